@@ -5,12 +5,13 @@ Lightweight LLM call: goal + capability that ran + result → JSON with
 satisfied (bool) and optional output_snippet. Only answers "is this goal satisfied?"
 """
 
-import json
 from app.agents.goal_checker.base_goal_checker import BaseGoalChecker
 from app.agents.llm.base_llm_client import BaseLLMClient
 from app.models.capability_result import CapabilityResult
 from app.models.goal_checker_result import GoalCheckerResult
 from app.core.logger import get_logger
+from app.core.prompt_store import log_prompt
+from app.core.serialization import JSONDecodeError, loads_llm_json
 
 logger = get_logger(__name__, layer="agent", component="goal_checker")
 
@@ -30,12 +31,12 @@ class LLMGoalChecker(BaseGoalChecker):
         result: CapabilityResult,
     ) -> GoalCheckerResult:
         """Build prompt, call LLM, parse satisfied (and optional output_snippet)."""
-        logger.debug(f"Checking goal.")
+        logger.debug("Checking goal.")
         prompt = self._build_prompt(goal, capability_name, result)
-        logger.debug(f"Goal checker prompt:\n{prompt}")
+        log_prompt(logger, "goal_checker", prompt)
         raw = self.llm_client.generate(prompt)
         parsed = self._parse_response(raw)
-        logger.debug(f"Goal checker result:\n{parsed}")
+        logger.debug("Goal checker result: %s", parsed)
         return parsed
 
     def _build_prompt(
@@ -67,19 +68,14 @@ JSON only:"""
 
     def _parse_response(self, raw: str) -> GoalCheckerResult:
         """Parse JSON; default to satisfied=True on parse failure to avoid infinite loop."""
-        raw = (raw or "").strip()
-        if raw.startswith("```"):
-            lines = raw.split("\n")
-            if lines[0].startswith("```"):
-                lines = lines[1:]
-            if lines and lines[-1].strip() == "```":
-                lines = lines[:-1]
-            raw = "\n".join(lines)
         try:
-            data = json.loads(raw)
-        except json.JSONDecodeError as e:
+            data = loads_llm_json(raw)
+        except JSONDecodeError as e:
             logger.warning("Goal checker returned invalid JSON; defaulting to satisfied=True", extra={"error": str(e)})
             return GoalCheckerResult(satisfied=True)
+        if not isinstance(data, dict):
+            logger.warning("Goal checker did not return an object; defaulting to satisfied=True")
+            return GoalCheckerResult(satisfied=True)
         satisfied = data.get("satisfied", True)
         if not isinstance(satisfied, bool):
             satisfied = True
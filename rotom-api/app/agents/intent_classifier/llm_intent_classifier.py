@@ -10,10 +10,11 @@ and only the rewritten message (e.g. "echo hello"). The classifier then just
 maps that explicit message to capability + args—no reference-resolution rules
 in the prompt. This keeps the classifier simple and scalable.
 """
-import json
 from app.agents.intent_classifier.base_intent_classifier import BaseIntentClassifier
 from app.agents.llm.base_llm_client import BaseLLMClient
 from app.core.logger import get_logger
+from app.core.prompt_store import log_prompt
+from app.core.serialization import loads_llm_json
 
 
 logger = get_logger(__name__, layer="intent", component="llm_intent_classifier")
@@ -31,19 +32,40 @@ class LLMIntentClassifier(BaseIntentClassifier):
         self.llm_client = llm_client
         # List of {name, description, arguments} for each capability (from registry).
         self.tool_metadata = tool_metadata
+        # The tools section is the same for every prompt; rendered once (see warm_up).
+        self._tools_section: str | None = None
+
+    def warm_up(self) -> None:
+        """Pre-render the static part of the prompt so the first request doesn't."""
+        self._render_tools_section()
+
+    def _render_tools_section(self) -> str:
+        if self._tools_section is None:
+            tools_section = ""
+            for tool in self.tool_metadata:
+                tools_section += f"\nTool: {tool['name']}\n"
+                tools_section += f"Description: {tool['description']}\n"
+                tools_section += "Arguments:\n"
+
+                for arg_name, arg_desc in tool["arguments"].items():
+                    tools_section += f"  - {arg_name}: {arg_desc}\n"
+            self._tools_section = tools_section
+        return self._tools_section
 
     def classify(self, user_input: str, context: str | None = None) -> dict:
         """
         Build a prompt (including context if provided), call the LLM, then
         parse and validate the JSON response. Returns {"capability": str, "arguments": dict}.
         """
-        logger.debug(f"Classifying intent.")
+        logger.debug("Classifying intent.")
         prompt = self._build_prompt(user_input, context=context)
-        logger.debug(f"Prompt for llm intent classification:\n{prompt}")
+        log_prompt(logger, "intent_classifier", prompt)
         raw_output = self.llm_client.generate(prompt)
 
         try:
-            parsed = json.loads(raw_output)
+            parsed = loads_llm_json(raw_output)
+            if not isinstance(parsed, dict):
+                raise ValueError("response must be a JSON object")
             capability = parsed.get("capability")
 
             if not isinstance(capability, str) or not capability.strip():
@@ -53,20 +75,20 @@ class LLMIntentClassifier(BaseIntentClassifier):
             valid_names = [tool["name"] for tool in self.tool_metadata]
 
             if capability not in valid_names:
-                logger.error(f"Invalid capability returned by LLM: {capability}")
+                logger.error("Invalid capability returned by LLM: %s", capability)
                 raise ValueError(f"Invalid capability returned by LLM: {capability}")
 
             arguments = parsed.get("arguments", {})
             if not isinstance(arguments, dict):
-                logger.error(f"Invalid arguments returned by LLM: {arguments}")
+                logger.error("Invalid arguments returned by LLM: %s", arguments)
                 raise ValueError("'arguments' must be a JSON object")
 
-            logger.debug(f"Capability (response) from llm intent classification: {capability}")
-            logger.debug(f"Arguments (response) from llm intent classification: {arguments}")
+            logger.debug("Capability (response) from llm intent classification: %s", capability)
+            logger.debug("Arguments (response) from llm intent classification: %s", arguments)
             return {"capability": capability, "arguments": arguments}
 
         except Exception as e:
-            logger.error(f"Failed to parse LLM intent response: {e}", extra={"error": str(e)})
+            logger.error("Failed to parse LLM intent response: %s", e, extra={"error": str(e)})
             raise ValueError(f"Failed to parse LLM intent response: {e}")
 
     def _build_prompt(self, user_input: str, context: str | None = None) -> str:
@@ -76,15 +98,7 @@ class LLMIntentClassifier(BaseIntentClassifier):
         then the current user input. The LLM never sees raw session state—only
         this formatted context string.
         """
-        tools_section = ""
-        
-        for tool in self.tool_metadata:
-            tools_section += f"\nTool: {tool['name']}\n"
-            tools_section += f"Description: {tool['description']}\n"
-            tools_section += "Arguments:\n"
-
-            for arg_name, arg_desc in tool["arguments"].items():
-                tools_section += f"  - {arg_name}: {arg_desc}\n"
+        tools_section = self._render_tools_section()
 
         # Phase 5: When context is present, we add it so the LLM can see recent conversation.
         # Phase 6: When the reference_resolver is used, RotomCore passes context=None here,
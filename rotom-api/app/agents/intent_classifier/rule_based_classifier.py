@@ -33,7 +33,7 @@ class RuleBasedIntentClassifier(BaseIntentClassifier):
             capability = "echo"
             arguments = {"message": user_input}
 
-        logger.info(f"Routing to capability: {capability}")
+        logger.info("Routing to capability: %s", capability)
 
         return {
             "capability": capability,
@@ -16,4 +16,8 @@ class BaseLLMClient(ABC):
     @abstractmethod
     def generate(self, prompt: str) -> str:
         """Send the prompt to the LLM and return the raw response text."""
-        pass
\ No newline at end of file
+        pass
+
+    def warm_up(self, connections: int = 1) -> int:
+        """Open up to `connections` pooled connections ahead of traffic; return how many. Default: nothing to warm."""
+        return 0
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""
+instrumented_llm_client.py — Per-stage LLM call metrics
+
+Wraps any BaseLLMClient and records each generate() call (count, latency,
+errors) under the current instrumentation stage (app.core.instrumentation).
+AgentService puts it directly around the provider client, inside the
+scheduler, so the recorded latency is the provider round trip and not the
+time spent queued for a slot. Each call is also an "llm.generate" tracing span.
+"""
+
+import time
+
+from app.agents.llm.base_llm_client import BaseLLMClient
+from app.core.instrumentation import get_current_stage, record_llm_call
+from app.core.tracing import TRACER
+
+
+class InstrumentedLLMClient(BaseLLMClient):
+    """BaseLLMClient wrapper that records call metrics; behaviour is otherwise unchanged."""
+
+    def __init__(self, inner: BaseLLMClient) -> None:
+        self.inner = inner
+
+    def generate(self, prompt: str) -> str:
+        with TRACER.span("llm.generate", stage=get_current_stage(), prompt_chars=len(prompt or "")):
+            start = time.perf_counter()
+            try:
+                result = self.inner.generate(prompt)
+            except Exception as e:
+                record_llm_call((time.perf_counter() - start) * 1000.0, error=e)
+                raise
+            record_llm_call((time.perf_counter() - start) * 1000.0)
+            return result
+
+    def warm_up(self, connections: int = 1) -> int:
+        return self.inner.warm_up(connections)
@@ -4,13 +4,25 @@ openai_client.py — OpenAI implementation of the LLM client
 Used by the intent classifier to call the OpenAI API. Reads OPENAI_API_KEY
 and OPENAI_MODEL from the environment. The system message tells the model to
 act as a strict JSON intent classifier so we get parseable capability +
-arguments back. Temperature 0 keeps responses deterministic.
+arguments back. Temperature 0 keeps responses deterministic. Token usage is
+recorded per instrumentation stage (app.core.instrumentation).
+
+Transport settings (unset = SDK defaults):
+  - OPENAI_BASE_URL: another OpenAI-compatible endpoint, e.g. the local fake
+    server in benchmarks/fake_openai_server.py for load tests;
+  - OPENAI_TIMEOUT_SECONDS: per-request timeout;
+  - OPENAI_MAX_RETRIES: SDK retries on 429/5xx/connection errors.
+
+The SDK is imported when the client is constructed, not when this module is
+imported (it is the largest part of the app's import time). warm_up() opens
+pooled connections with concurrent GET /models calls before traffic arrives.
 """
 
 import os
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
 
 from app.agents.llm.base_llm_client import BaseLLMClient
+from app.core.instrumentation import record_llm_tokens
 
 
 class OpenAIClient(BaseLLMClient):
@@ -19,7 +31,16 @@ class OpenAIClient(BaseLLMClient):
         model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         if not api_key:
             raise ValueError("OPENAI_API_KEY not set")
-        self.client = OpenAI(api_key=api_key)
+        options = {}
+        if os.getenv("OPENAI_BASE_URL"):
+            options["base_url"] = os.getenv("OPENAI_BASE_URL")
+        if os.getenv("OPENAI_TIMEOUT_SECONDS"):
+            options["timeout"] = float(os.getenv("OPENAI_TIMEOUT_SECONDS"))
+        if os.getenv("OPENAI_MAX_RETRIES"):
+            options["max_retries"] = int(os.getenv("OPENAI_MAX_RETRIES"))
+        from openai import OpenAI
+
+        self.client = OpenAI(api_key=api_key, **options)
         self.model = model
 
     def generate(self, prompt: str) -> str:
@@ -32,4 +53,15 @@ class OpenAIClient(BaseLLMClient):
             ],
             temperature=0.0,
         )
-        return response.choices[0].message.content.strip()
\ No newline at end of file
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            record_llm_tokens(usage.prompt_tokens, usage.completion_tokens)
+        return response.choices[0].message.content.strip()
+
+    def warm_up(self, connections: int = 1) -> int:
+        """Make `connections` concurrent GET /models calls so that many connections sit in the SDK's pool."""
+        client = self.client.with_options(max_retries=0)
+        with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="llm-warmup") as pool:
+            for future in [pool.submit(client.models.list) for _ in range(connections)]:
+                future.result()
+        return connections
@@ -0,0 +1,186 @@
+"""
+scheduled_llm_client.py — Priority lanes and fair sharing in front of the LLM
+
+Without this, every generate() call from every request goes straight to the
+provider in arrival order, so one session running a 12-step plan (or a bulk
+job) can starve interactive users.
+
+ScheduledLLMClient wraps any BaseLLMClient and admits at most max_concurrency
+calls at once. When all slots are busy, callers queue and are dispatched by:
+
+  1. Priority class, strictly: interactive before batch before background.
+     The class comes from the request context (app.core.context.llm_priority_ctx).
+  2. Within a class, weighted fair queuing across sessions: each call gets a
+     virtual finish tag = max(class virtual time, session's last tag) + 1/weight,
+     and the smallest tag goes first. A session with many queued calls cannot
+     push ahead of a session with one.
+  3. Per-session cap: a session never has more than per_session_inflight calls
+     running at once; its extra calls wait even if slots are free.
+
+Queue-wait time is recorded per class; stats() reports counts and percentiles.
+A call that has to queue also records an "llm.queue" tracing span for the wait.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional
+
+from app.agents.llm.base_llm_client import BaseLLMClient
+from app.core.context import LLM_PRIORITIES, get_llm_priority, get_request_id, get_session_id
+from app.core.instrumentation import get_current_stage
+from app.core.tracing import TRACER
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_PER_SESSION_INFLIGHT = 2
+# How many recent queue-wait samples per class are kept for percentiles.
+WAIT_SAMPLES_PER_CLASS = 2048
+
+
+class _Waiter:
+    __slots__ = ("session_key", "priority", "event", "enqueued_at")
+
+    def __init__(self, session_key: str, priority: str) -> None:
+        self.session_key = session_key
+        self.priority = priority
+        self.event = threading.Event()
+        self.enqueued_at = time.monotonic()
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ScheduledLLMClient(BaseLLMClient):
+    """BaseLLMClient wrapper that schedules calls by priority class and fair share per session."""
+
+    def __init__(
+        self,
+        inner: BaseLLMClient,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        per_session_inflight: int = DEFAULT_PER_SESSION_INFLIGHT,
+        session_weights: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.inner = inner
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_session_inflight = max(1, per_session_inflight)
+        self._weights = session_weights or {}
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._session_in_flight: Dict[str, int] = defaultdict(int)
+        # Per class: heap of (finish_tag, seq, waiter), virtual time, each session's last finish tag.
+        self._queues: Dict[str, list] = {p: [] for p in LLM_PRIORITIES}
+        self._vtime: Dict[str, float] = {p: 0.0 for p in LLM_PRIORITIES}
+        self._last_tag: Dict[str, Dict[str, float]] = {p: {} for p in LLM_PRIORITIES}
+        self._seq = itertools.count()
+        self._waits: Dict[str, Deque[float]] = {p: deque(maxlen=WAIT_SAMPLES_PER_CLASS) for p in LLM_PRIORITIES}
+        self._dispatched: Dict[str, int] = {p: 0 for p in LLM_PRIORITIES}
+
+    def generate(self, prompt: str) -> str:
+        priority = get_llm_priority()
+        if priority not in self._queues:
+            priority = "interactive"
+        # Requests without a session are their own fairness unit.
+        session_key = get_session_id() or get_request_id() or "-"
+        self._acquire(session_key, priority)
+        try:
+            return self.inner.generate(prompt)
+        finally:
+            self._release(session_key)
+
+    def warm_up(self, connections: int = 1) -> int:
+        """Warm the provider's pool directly (not scheduled), at most one connection per slot."""
+        return self.inner.warm_up(min(connections, self.max_concurrency))
+
+    # --- Scheduling ---
+
+    def _acquire(self, session_key: str, priority: str) -> None:
+        waiter = _Waiter(session_key, priority)
+        with self._lock:
+            if not self._has_waiters() and self._can_run(session_key):
+                self._start(waiter)
+                return
+            weight = self._weights.get(session_key, 1.0)
+            last = self._last_tag[priority].get(session_key, 0.0)
+            tag = max(self._vtime[priority], last) + 1.0 / weight
+            self._last_tag[priority][session_key] = tag
+            heapq.heappush(self._queues[priority], (tag, next(self._seq), waiter))
+            self._dispatch()
+        if waiter.event.is_set():
+            return
+        with TRACER.span("llm.queue", stage=get_current_stage(), priority=priority):
+            waiter.event.wait()
+
+    def _release(self, session_key: str) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._session_in_flight[session_key] -= 1
+            if not self._session_in_flight[session_key]:
+                del self._session_in_flight[session_key]
+            self._dispatch()
+
+    def _has_waiters(self) -> bool:
+        return any(self._queues[p] for p in LLM_PRIORITIES)
+
+    def _can_run(self, session_key: str) -> bool:
+        return (
+            self._in_flight < self.max_concurrency
+            and self._session_in_flight.get(session_key, 0) < self.per_session_inflight
+        )
+
+    def _start(self, waiter: _Waiter) -> None:
+        self._in_flight += 1
+        self._session_in_flight[waiter.session_key] += 1
+        self._waits[waiter.priority].append(time.monotonic() - waiter.enqueued_at)
+        self._dispatched[waiter.priority] += 1
+        waiter.event.set()
+
+    def _dispatch(self) -> None:
+        """Start queued calls while slots are free (lock held). Highest class first, smallest tag first."""
+        for priority in LLM_PRIORITIES:
+            queue = self._queues[priority]
+            blocked = []
+            while queue and self._in_flight < self.max_concurrency:
+                tag, seq, waiter = heapq.heappop(queue)
+                if not self._can_run(waiter.session_key):
+                    blocked.append((tag, seq, waiter))  # session at its cap; keep its place
+                    continue
+                self._vtime[priority] = tag
+                self._start(waiter)
+            for item in blocked:
+                heapq.heappush(queue, item)
+            if self._in_flight >= self.max_concurrency:
+                return
+            # Anything left in this class is capped per session; lower classes may use the free slots.
+        # Forget finish tags of idle sessions once their class is drained.
+        for priority in LLM_PRIORITIES:
+            if not self._queues[priority]:
+                self._last_tag[priority].clear()
+
+    # --- Stats ---
+
+    def stats(self) -> dict:
+        """Per priority class: queued, dispatched, queue wait (ms) mean/p50/p95/p99; plus in-flight totals."""
+        with self._lock:
+            classes = {}
+            for priority in LLM_PRIORITIES:
+                waits = sorted(self._waits[priority])
+                classes[priority] = {
+                    "queued": len(self._queues[priority]),
+                    "dispatched": self._dispatched[priority],
+                    "wait_ms_mean": (sum(waits) / len(waits) * 1000.0) if waits else 0.0,
+                    "wait_ms_p50": _percentile(waits, 0.50) * 1000.0,
+                    "wait_ms_p95": _percentile(waits, 0.95) * 1000.0,
+                    "wait_ms_p99": _percentile(waits, 0.99) * 1000.0,
+                }
+            return {
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "per_session_inflight": self.per_session_inflight,
+                "classes": classes,
+            }
@@ -9,13 +9,14 @@ count of summarized text and output it"). One LLM call: user_input → JSON arra
 of goal strings; on parse failure or empty list we fall back to a single goal.
 """
 
-import json
 from typing import List, Optional
 
 from app.agents.plan_builder.base_plan_builder import BasePlanBuilder
 from app.agents.llm.base_llm_client import BaseLLMClient
 from app.models.plan import Plan, PlanStep
 from app.core.logger import get_logger
+from app.core.prompt_store import log_prompt
+from app.core.serialization import JSONDecodeError, loads_llm_json
 
 logger = get_logger(__name__, layer="agent", component="plan_builder")
 
@@ -30,12 +31,12 @@ class LLMPlanBuilder(BasePlanBuilder):
 
     def build_plan(self, user_input: str) -> Plan:
         """Ask the LLM for a list of goals; parse and return. Fallback to single goal on error."""
-        logger.debug(f"Building plan.")
+        logger.debug("Building plan.")
         prompt = self._build_prompt(user_input)
-        logger.debug(f"Plan builder prompt:\n{prompt}")
+        log_prompt(logger, "plan_builder", prompt)
         raw = self.llm_client.generate(prompt)
         parsed = self._parse_response(raw, user_input)
-        logger.debug(f"Plan builder result:\n{parsed}")
+        logger.debug("Plan builder result: %s", parsed)
         return parsed
 
     def _build_prompt(self, user_input: str) -> str:
@@ -63,17 +64,9 @@ JSON array only:"""
     def _parse_response(self, raw: str, user_input: str) -> Plan:
         """Parse JSON array into a list of PlanStep. Accepts goal strings or objects with goal/store_output_as/use_from_memory."""
         fallback_goal = (user_input or "").strip() or "Complete the user request"
-        raw = (raw or "").strip()
-        if raw.startswith("```"):
-            lines = raw.split("\n")
-            if lines[0].startswith("```"):
-                lines = lines[1:]
-            if lines and lines[-1].strip() == "```":
-                lines = lines[:-1]
-            raw = "\n".join(lines)
         try:
-            data = json.loads(raw)
-        except json.JSONDecodeError as e:
+            data = loads_llm_json(raw)
+        except JSONDecodeError as e:
             logger.warning("Plan builder returned invalid JSON; using single goal", extra={"error": str(e)})
             return [{"goal": fallback_goal}]
         if not isinstance(data, list):
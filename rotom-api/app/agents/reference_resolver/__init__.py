@@ -4,10 +4,16 @@ reference_resolver — Phase 6: Resolve-then-classify preprocessing
 This package provides the abstraction and implementation for rewriting user
 messages so that references ("that", "it", "again") are resolved from session
 context before intent classification. The service layer imports from here to
-inject into RotomCore.
+inject into RotomCore. GatedReferenceResolver wraps a resolver with a cheap
+local check (AnaphoraGate) so self-contained messages skip the LLM call.
 """
 
 from app.agents.reference_resolver.base_reference_resolver import BaseReferenceResolver
+from app.agents.reference_resolver.gated_reference_resolver import (
+    AnaphoraGate,
+    GatedReferenceResolver,
+    load_patterns,
+)
 from app.agents.reference_resolver.llm_reference_resolver import LLMReferenceResolver
 
-__all__ = ["BaseReferenceResolver", "LLMReferenceResolver"]
+__all__ = ["AnaphoraGate", "BaseReferenceResolver", "GatedReferenceResolver", "LLMReferenceResolver", "load_patterns"]
@@ -34,3 +34,11 @@ class BaseReferenceResolver(ABC):
             references resolved. No JSON, no explanation—just the new message.
         """
         pass
+
+    def may_rewrite(self, user_input: str) -> bool:
+        """
+        Cheap pre-check: False when resolve() will certainly return user_input
+        unchanged without doing any work (e.g. a gate decided to skip). RotomCore
+        then skips speculative planning. The default is True.
+        """
+        return True
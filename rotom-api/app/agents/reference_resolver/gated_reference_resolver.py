@@ -0,0 +1,137 @@
+"""
+gated_reference_resolver.py — Skip the resolver LLM call for self-contained messages
+
+RotomCore calls the reference resolver on every turn that has session context,
+even for messages like "count the words in 'hello world'" that refer to nothing.
+Each call is a full serial LLM round trip before planning can start.
+
+AnaphoraGate is a cheap local check (a handful of regexes) for the things that
+actually need resolving: object pronouns ("it", "them", a trailing "that"),
+repeat markers ("again", "same", "another"), references to earlier output
+("the last one", "the result", "above") and elliptical follow-ups ("and
+shorter", "twice", a bare "yes"). The defaults are deliberately narrow: words
+like "this", "more" or "the text" usually introduce new content in a request,
+so they don't fire on their own. GatedReferenceResolver wraps any
+BaseReferenceResolver and only calls it when the gate fires; otherwise the
+message is returned unchanged.
+
+ROTOM_REFERENCE_GATE_PATTERNS names a file of replacement patterns (one regex
+per line; blank lines and "#" comments are ignored), see load_patterns().
+
+Shadow mode always calls the inner resolver and logs whether the gate agreed
+(gate said "skip" and the LLM left the message unchanged, and vice versa), so
+patterns can be tuned before enforcing. stats() reports the skip rate.
+"""
+
+import re
+import threading
+from typing import Iterable, Optional, Tuple
+
+from app.agents.reference_resolver.base_reference_resolver import BaseReferenceResolver
+from app.core.logger import get_logger
+
+logger = get_logger(__name__, layer="agent", component="reference_gate")
+
+# Each pattern is matched case-insensitively anywhere in the message.
+DEFAULT_ANAPHORA_PATTERNS = (
+    # Object pronouns that usually point at an earlier turn ("translate it", "sort them").
+    r"\b(it|them|those|these)\b",
+    # "that" / "this" standing alone ("do that", "shorten this?"), not "this text: ...".
+    r"\b(that|this)\s*([.,!?]|$)",
+    r"\b(do|redo|undo|use|try|keep|change|fix) (that|this)\b",
+    # Repeat / continuation markers.
+    r"\b(again|same|repeat|another|once more|instead)\b",
+    # References to earlier output.
+    r"\b(previous|prior|earlier|above|former|latter)\b",
+    r"\bthe last (one|result|output|answer|response|message|time)\b",
+    r"\bthe (result|output|answer|response|summary)\b",
+    # Elliptical follow-ups: start with a connective, or a one-word comparative/answer.
+    r"^\s*(and|or|but|also|then)\b",
+    r"^\W*(\w+er|twice|both|yes|no|ok|okay|sure)\W*$",
+)
+
+
+def load_patterns(path: str) -> Tuple[str, ...]:
+    """Read gate patterns from a file: one regex per line, blank lines and "#" comments skipped."""
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    patterns = tuple(line for line in lines if line and not line.startswith("#"))
+    if not patterns:
+        raise ValueError(f"No reference gate patterns in {path}")
+    for pattern in patterns:
+        re.compile(pattern)  # fail at startup, not on the first request
+    return patterns
+
+
+class AnaphoraGate:
+    """Decides whether a message may contain a reference to earlier conversation."""
+
+    def __init__(self, patterns: Optional[Iterable[str]] = None) -> None:
+        self.patterns = tuple(patterns) if patterns is not None else DEFAULT_ANAPHORA_PATTERNS
+        # One alternation so a message is scanned once.
+        self._regex = re.compile("|".join(f"(?:{p})" for p in self.patterns), re.IGNORECASE)
+
+    def needs_resolution(self, user_input: str) -> bool:
+        return bool(user_input) and self._regex.search(user_input) is not None
+
+
+class GatedReferenceResolver(BaseReferenceResolver):
+    """
+    Wraps a resolver (normally LLMReferenceResolver). With shadow=False the inner
+    resolver only runs when the gate fires; with shadow=True it always runs and
+    gate/LLM agreement is logged and counted.
+    """
+
+    def __init__(self, inner: BaseReferenceResolver, gate: Optional[AnaphoraGate] = None, shadow: bool = False):
+        self.inner = inner
+        self.gate = gate or AnaphoraGate()
+        self.shadow = shadow
+        self._lock = threading.Lock()
+        self._counts = {
+            "calls": 0,
+            "skipped": 0,
+            "resolved": 0,
+            "shadow_agree": 0,
+            "shadow_missed": 0,  # gate would skip, but the LLM rewrote the message
+            "shadow_extra": 0,  # gate fired, but the LLM left the message unchanged
+        }
+
+    def _count(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._counts[key] += 1
+
+    def may_rewrite(self, user_input: str) -> bool:
+        # Shadow mode always calls the inner resolver.
+        return self.shadow or self.gate.needs_resolution(user_input)
+
+    def resolve(self, user_input: str, context: str) -> str:
+        needed = self.gate.needs_resolution(user_input)
+        if not self.shadow:
+            if not needed:
+                self._count("calls", "skipped")
+                logger.debug("Reference resolution skipped by gate", extra={"event": "reference_gate_skip"})
+                return user_input
+            self._count("calls", "resolved")
+            return self.inner.resolve(user_input, context)
+
+        resolved = self.inner.resolve(user_input, context)
+        changed = (resolved or "").strip() != (user_input or "").strip()
+        if needed == changed:
+            outcome = "shadow_agree"
+        else:
+            outcome = "shadow_missed" if changed else "shadow_extra"
+        self._count("calls", "resolved", outcome)
+        logger.info(
+            "Reference gate shadow decision",
+            extra={"event": "reference_gate_shadow", "gate_fired": needed, "llm_changed": changed, "outcome": outcome},
+        )
+        return resolved
+
+    def stats(self) -> dict:
+        """Counters plus skip_rate (0 in shadow mode, where nothing is skipped)."""
+        with self._lock:
+            stats = dict(self._counts)
+        stats["skip_rate"] = stats["skipped"] / stats["calls"] if stats["calls"] else 0.0
+        stats["mode"] = "shadow" if self.shadow else "enforce"
+        return stats
@@ -6,12 +6,13 @@ a single user-facing response string. RotomCore uses this as the final
 CapabilityResult output (synthesized).
 """
 
-import json
 from typing import List
 
 from app.agents.response_formatter.base_response_formatter import BaseResponseFormatter
 from app.agents.llm.base_llm_client import BaseLLMClient
 from app.core.logger import get_logger
+from app.core.prompt_store import log_prompt
+from app.core.serialization import dumps
 
 logger = get_logger(__name__, layer="agent", component="response_formatter")
 
@@ -31,17 +32,17 @@ class LLMResponseFormatter(BaseResponseFormatter):
         goals: List[str],
     ) -> str:
         """Build prompt with user_input, output_data, goals; return LLM response as the final output."""
-        logger.debug(f"Formatting response.")
+        logger.debug("Formatting response.")
         prompt = self._build_prompt(user_input, output_data, goals)
-        logger.debug(f"Prompt for llm response formatter:\n{prompt}")
+        log_prompt(logger, "response_formatter", prompt)
         raw = self.llm_client.generate(prompt)        
         formatted_response = (raw or "").strip() or "No response generated."
-        logger.debug(f"Formatted response from llm response formatter:\n{formatted_response}")
+        logger.debug("Formatted response from llm response formatter (%d chars)", len(formatted_response))
         return formatted_response
 
     def _build_prompt(self, user_input: str, output_data: list, goals: List[str]) -> str:
         """Ask the LLM to produce a clear, user-facing response from the data."""
-        data_str = json.dumps(output_data, indent=2)
+        data_str = dumps(output_data, indent=True)
         if len(data_str) > OUTPUT_DATA_TRUNCATE:
             data_str = data_str[:OUTPUT_DATA_TRUNCATE] + "\n..."
         goals_str = "\n".join(f"{i+1}. {g}" for i, g in enumerate(goals))
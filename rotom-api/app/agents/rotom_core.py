@@ -18,10 +18,39 @@ before building the plan. We still append the original user_input to memory.
 
 Goal_checker decides per-goal satisfaction (retry or advance); there is no
 plan-free continuation decider—we always use the goals-based path.
+
+When a capability_cache is injected, results of cacheable capabilities are
+memoized by (capability name, canonical arguments): a repeated call returns the
+cached result without running execute() again.
+
+When session_locks (KeyedLocks) is injected, turns for the same session_id are
+handled one at a time in arrival order; other sessions run in parallel.
+
+Speculative planning: when a speculation_executor is injected and the reference
+resolver is about to run, build_plan(user_input) starts on the executor at the
+same time. If the resolver returns the message unchanged, that plan is used
+(one LLM round trip saved); otherwise it is discarded and we plan from the
+resolved text. Turns where the resolver says it won't rewrite (may_rewrite(),
+e.g. the anaphora gate skipped) are not speculated; they are counted as
+"gated", outside the attempts behind the hit rate speculation_stats() reports.
+
+Metrics: each step runs inside app.core.instrumentation.stage(...)
+(reference_resolve, plan_build, classify, execute, goal_check, format), so
+stage latency and the LLM calls made in it are recorded. Goals per request,
+steps per goal, and MAX_GOALS_ITERATIONS / MAX_STEPS_PER_GOAL hits are
+recorded too (see GET /metrics). Stages are tracing spans as well; capability
+execution gets its own child span (see GET /debug/trace/{request_id}).
 """
+import contextvars
+import logging
+import threading
 import time
-from typing import Dict, List, Union
+from typing import List, Optional, Union
 
+from app.core.artifacts import ARTIFACT_REF_PREFIX, ArtifactHandle, ArtifactStore
+from app.core.instrumentation import record_limit_hit, stage
+from app.core.metrics import REGISTRY
+from app.core.tracing import TRACER
 from app.core.logger import get_logger
 from app.models.capability_result import CapabilityResult
 from app.models.plan import Plan, PlanStep, plan_goal_strings
@@ -42,6 +71,9 @@ ARTIFACT_CONTEXT_MAX_LEN = 2000
 # Phase 8.5: Truncation limits when building step context for the goals path (keeps token cost bounded).
 GOAL_ORIGINAL_INPUT_MAX_LEN = 3500
 GOAL_PREVIOUS_OUTPUT_MAX_LEN = 1000
+# Max length of each step output kept in output_data (the response formatter truncates its input to less anyway);
+# the full value stays in the request's artifact store.
+OUTPUT_DATA_MAX_LEN = 4000
 
 
 class RotomCore:
@@ -61,6 +93,9 @@ class RotomCore:
         goal_checker,
         response_formatter,
         reference_resolver=None,
+        capability_cache=None,
+        session_locks=None,
+        speculation_executor=None,
     ):
         logger.info("Rotom Core initialized")
         self.registry = registry
@@ -72,6 +107,14 @@ class RotomCore:
         self.response_formatter = response_formatter
         # Phase 6: Optional. When set, we rewrite user message from context before building plan.
         self.reference_resolver = reference_resolver
+        # Optional. When set, cacheable capabilities are memoized (see app.capabilities.result_cache).
+        self.capability_cache = capability_cache
+        # Optional. When set (app.core.session.keyed_lock.KeyedLocks), one turn at a time per session.
+        self.session_locks = session_locks
+        # Optional. When set (a concurrent.futures executor), plan speculatively while resolving references.
+        self.speculation_executor = speculation_executor
+        self._speculation_lock = threading.Lock()
+        self._speculation_counts = {"attempts": 0, "hits": 0, "misses": 0, "failures": 0, "gated": 0}
 
     def handle(self, user_input: str, session_id: str | None = None):
         """
@@ -81,113 +124,155 @@ class RotomCore:
         passed into the goals flow so the plan builder can use session context.
         Memory and step context always use the original user_input.
         """
+        if session_id and self.session_locks is not None:
+            # Context read → plan → append must not interleave with another turn of this session.
+            with self.session_locks.hold(session_id):
+                return self._handle_turn(user_input, session_id)
+        return self._handle_turn(user_input, session_id)
+
+    def _handle_turn(self, user_input: str, session_id: str | None):
+        """One turn of handle() (called with the session's lock held, when locks are configured)."""
         logger.debug("Beginning handle() method.", extra={"user_input_preview": (user_input or "")[:200]})
 
         if session_id:
             self.session_store.get(session_id)  # Ensure session exists
 
-        # --- Session context and reference resolution ---
-        message_for_plan = self._get_context_and_message_for_classifier(session_id, user_input)
+        # --- Session context and reference resolution (with speculative planning) ---
+        message_for_plan, prebuilt_plan = self._resolve_message_and_plan(session_id, user_input)
 
         # --- Goals-based flow (always) ---
-        return self._handle_goals_based(user_input, session_id, message_for_plan=message_for_plan)
+        return self._handle_goals_based(
+            user_input, session_id, message_for_plan=message_for_plan, prebuilt_plan=prebuilt_plan
+        )
 
     def _handle_goals_based(
-        self, user_input: str, session_id: str | None, message_for_plan: str | None = None
+        self,
+        user_input: str,
+        session_id: str | None,
+        message_for_plan: str | None = None,
+        prebuilt_plan: Plan | None = None,
     ):
         """
         Phase 8.5: Build plan (goals), for each goal run classifier → capability → goal_checker,
         accumulate output_data, then response_formatter for final output.
         When message_for_plan is provided (from reference resolution), the plan is built from it;
-        otherwise the plan is built from user_input. Memory and step context always use user_input.
-        Uses a request-scoped artifact store when steps declare store_output_as / use_from_memory.
+        otherwise the plan is built from user_input. A prebuilt_plan (kept speculative plan) skips
+        build_plan entirely. Memory and step context always use user_input.
+        Every step output goes into a request-scoped ArtifactStore (named when the step declares
+        store_output_as); step context reads bounded previews from it instead of re-slicing full strings.
         """
         plan_input = message_for_plan if message_for_plan is not None else user_input
-        raw_plan = self.plan_builder.build_plan(plan_input)
+        raw_plan = prebuilt_plan if prebuilt_plan is not None else self._build_plan(plan_input)
         steps = self._normalize_plan_to_steps(raw_plan)
-        logger.debug("Goals-based plan built", extra={"goals_count": len(steps), "goals": plan_goal_strings(steps)})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Goals-based plan built", extra={"goals_count": len(steps), "goals": plan_goal_strings(steps)})
 
         # --- Plan built; iterate over goals ---
         output_data = []
+        # output_handles[i] is the artifact holding the full output of output_data[i];
+        # output_data itself only keeps a bounded preview for the response formatter.
+        output_handles: List[ArtifactHandle] = []
         goal_iterations = 0
         first_step_this_request = True
-        artifacts: Dict[str, str] = {}
-
-        for goal_index, step in enumerate(steps):
-            if goal_iterations >= MAX_GOALS_ITERATIONS:
-                logger.warning("Phase 8.5 max iterations reached; formatting with partial results")
-                break
-            goal_text = step["goal"]
-            satisfied = False
-            steps_this_goal = 0
-            while not satisfied and goal_iterations < MAX_GOALS_ITERATIONS:
-                # Build context for this step (original input + artifacts or previous output)
-                step_context = self._build_goal_step_context(step, user_input, output_data, artifacts)
-
-                # Classify intent for this goal
-                intent_data = self.intent_classifier.classify(goal_text, context=step_context if step_context.strip() else None)
-                if not self._validate_intent_data(intent_data):
-                    logger.warning("Intent classifier returned invalid data for goal; skipping to next goal", extra={"goal": goal_text})
-                    satisfied = True
-                    break
+        iterations_exhausted = False
 
-                capability_name = intent_data["capability"]
-                arguments = intent_data["arguments"]
+        # Request-scoped artifact store: each output stored once (large ones spilled to mmap).
+        # The with block releases spill files when the goals loop ends, including on errors.
+        with ArtifactStore() as artifacts:
+            original_chunk = artifacts.preview(artifacts.put(user_input), GOAL_ORIGINAL_INPUT_MAX_LEN)
 
-                # Resolve capability and validate arguments
-                capability = self.registry.get(capability_name)
-                if not capability:
-                    logger.warning("Capability not found for goal; skipping to next goal", extra={"goal": goal_text, "capability": capability_name})
-                    satisfied = True
+            for goal_index, step in enumerate(steps):
+                if goal_iterations >= MAX_GOALS_ITERATIONS:
+                    logger.warning("Phase 8.5 max iterations reached; formatting with partial results")
+                    iterations_exhausted = True
                     break
-
-                try:
-                    self._validate_arguments(capability_name, capability, arguments)
-                except ValueError as e:
-                    logger.warning("Invalid arguments for goal; skipping to next goal", extra={"goal": goal_text, "error": str(e)})
-                    satisfied = True
-                    break
-
-                result = self._execute_capability(
-                    capability_name, capability, arguments, session_id
-                )
-
-                # Record output and optional artifact
-                output_data.append({
-                    "goal": goal_text,
-                    "capability": capability_name,
-                    "output": result.output or "",
-                    "success": result.success,
-                })
-                goal_iterations += 1
-                steps_this_goal += 1
-
-                store_key = step.get("store_output_as")
-                if store_key and (k := str(store_key).strip()):
-                    artifacts[k] = result.output or ""
-
-                # Record turn in session memory
-                if session_id:
-                    if first_step_this_request:
-                        self._append_user_turn(session_id, user_input)
-                        first_step_this_request = False
-                    self._append_assistant_turn(session_id, capability_name, result)
-
-                # Check if goal is satisfied
-                check_result = self.goal_checker.check(goal_text, capability_name, result)
-                if check_result.output_snippet:
-                    output_data[-1]["snippet"] = check_result.output_snippet
-                satisfied = self._is_goal_satisfied(
-                    check_result, steps_this_goal, output_data, goal_text
-                )
-                if satisfied and check_result.satisfied:
-                    logger.debug(
-                        "Goal satisfied",
-                        extra={"goal": goal_text, "step": goal_iterations},
+                goal_text = step["goal"]
+                satisfied = False
+                steps_this_goal = 0
+                while not satisfied and goal_iterations < MAX_GOALS_ITERATIONS:
+                    # Build context for this step (original input + artifacts or previous output)
+                    step_context = self._build_goal_step_context(
+                        step, original_chunk, output_data, artifacts, output_handles
                     )
 
+                    # Classify intent for this goal
+                    with stage("classify"):
+                        intent_data = self.intent_classifier.classify(
+                            goal_text, context=step_context if step_context.strip() else None
+                        )
+                    if not self._validate_intent_data(intent_data):
+                        logger.warning("Intent classifier returned invalid data for goal; skipping to next goal", extra={"goal": goal_text})
+                        satisfied = True
+                        break
+
+                    capability_name = intent_data["capability"]
+                    arguments = intent_data["arguments"]
+
+                    # Resolve capability and validate arguments
+                    capability = self.registry.get(capability_name)
+                    if not capability:
+                        logger.warning("Capability not found for goal; skipping to next goal", extra={"goal": goal_text, "capability": capability_name})
+                        satisfied = True
+                        break
+
+                    try:
+                        self._validate_arguments(capability_name, capability, arguments)
+                    except ValueError as e:
+                        logger.warning("Invalid arguments for goal; skipping to next goal", extra={"goal": goal_text, "error": str(e)})
+                        satisfied = True
+                        break
+
+                    arguments = self._resolve_artifact_arguments(capability, arguments, artifacts)
+                    with stage("execute"):
+                        result = self._execute_capability(
+                            capability_name, capability, arguments, session_id
+                        )
+
+                    # Record output (full value in the artifact store, named when the step asks for it)
+                    store_key = step.get("store_output_as")
+                    store_name = str(store_key).strip() if store_key else ""
+                    output_handles.append(artifacts.put(result.output, name=store_name or None))
+                    output_data.append({
+                        "goal": goal_text,
+                        "capability": capability_name,
+                        "output": (result.output or "")[:OUTPUT_DATA_MAX_LEN],
+                        "success": result.success,
+                    })
+                    goal_iterations += 1
+                    steps_this_goal += 1
+
+                    # Record turn in session memory
+                    if session_id:
+                        if first_step_this_request:
+                            self._append_user_turn(session_id, user_input)
+                            first_step_this_request = False
+                        self._append_assistant_turn(session_id, capability_name, result)
+
+                    # Check if goal is satisfied
+                    with stage("goal_check"):
+                        check_result = self.goal_checker.check(goal_text, capability_name, result)
+                    if check_result.output_snippet:
+                        output_data[-1]["snippet"] = check_result.output_snippet
+                    satisfied = self._is_goal_satisfied(
+                        check_result, steps_this_goal, output_data, goal_text, output_handles
+                    )
+                    if satisfied and check_result.satisfied:
+                        logger.debug(
+                            "Goal satisfied",
+                            extra={"goal": goal_text, "step": goal_iterations},
+                        )
+                if not satisfied:
+                    # The while loop only ends unsatisfied when MAX_GOALS_ITERATIONS ran out mid-goal.
+                    iterations_exhausted = True
+                if steps_this_goal:
+                    REGISTRY.observe("rotom_steps_per_goal", steps_this_goal)
+
+        if iterations_exhausted:
+            record_limit_hit("max_goals_iterations")
+        REGISTRY.observe("rotom_goals_per_request", len(steps))
         goal_strings = plan_goal_strings(steps)
-        final_output = self.response_formatter.format_response(user_input, output_data, goal_strings)
+        with stage("format"):
+            final_output = self.response_formatter.format_response(user_input, output_data, goal_strings)
         last_cap = output_data[-1]["capability"] if output_data else "goals"
         return CapabilityResult(
             capability=last_cap,
@@ -210,13 +295,33 @@ class RotomCore:
     ):
         """
         Execute a capability with timing and error handling. Returns a CapabilityResult
-        with execution_time_ms and session_id set.
+        with execution_time_ms and session_id set. When the capability cache holds a
+        result for these arguments, it is returned (marked cache_hit) without executing.
         """
+        with TRACER.span("capability.execute", capability=capability_name) as span:
+            result = self._run_capability(capability_name, capability, arguments, session_id)
+            if span is not None:
+                span.set_attribute("success", result.success)
+                span.set_attribute("cache_hit", bool(result.metadata.get("cache_hit")))
+            return result
+
+    def _run_capability(self, capability_name: str, capability, arguments: dict, session_id: str | None):
+        """Body of _execute_capability (cache lookup, execute, timing), run inside its span."""
         start_time = time.perf_counter()
+        cached = self.capability_cache.get(capability, arguments) if self.capability_cache is not None else None
+        if self.capability_cache is not None and self.capability_cache.is_cacheable(capability):
+            REGISTRY.inc("rotom_capability_cache_lookups_total", result="hit" if cached is not None else "miss")
+        if cached is not None:
+            cached.metadata["cache_hit"] = True
+            cached.metadata["execution_time_ms"] = round((time.perf_counter() - start_time) * 1000, 2)
+            cached.session_id = session_id
+            return cached
         try:
             result = capability.execute(arguments)
+            if self.capability_cache is not None:
+                self.capability_cache.put(capability, arguments, result)
         except Exception as e:
-            logger.error(f"Capability execution failed.\nCapability name: {capability_name}\nError: {str(e)}")
+            logger.error("Capability execution failed.\nCapability name: %s\nError: %s", capability_name, e)
             result = CapabilityResult(
                 capability=capability_name,
                 output="",
@@ -254,40 +359,103 @@ class RotomCore:
             },
         )
 
-    def _get_context_and_message_for_classifier(self, session_id: str | None, user_input: str) -> str:
+    def _resolve_message_and_plan(self, session_id: str | None, user_input: str):
         """
-        Return the message to use for the plan. When session_id, context, and
-        reference_resolver are present, returns the resolved message (references
-        like "that"/"it"/"again" expanded from session context); otherwise returns
-        the original user_input. Callers pass this to the plan builder.
+        Return (message_for_plan, prebuilt_plan). When session_id, context, and
+        reference_resolver are present, message_for_plan is the resolved message
+        (references like "that"/"it"/"again" expanded from session context);
+        otherwise it is the original user_input. prebuilt_plan is the speculative
+        plan when it was started and the resolver left the message unchanged,
+        else None (the caller builds the plan).
         """
-        logger.debug(f"Getting context and message for plan.\nSession ID: {session_id}\nUser input: {user_input}")
+        logger.debug("Getting context and message for plan. Session ID: %s", session_id)
         context = ""
         if session_id:
-            context = self.session_memory.get_context(session_id, max_turns=5) or ""
-            logger.debug(f"Context from session memory:\n{context}")
+            # query lets relevance-aware memories add older turns that match this message.
+            context = self.session_memory.get_context(session_id, max_turns=5, query=user_input) or ""
+            logger.debug("Context from session memory (%d chars)", len(context))
 
         message_for_plan = user_input
+        prebuilt_plan = None
         if session_id and context.strip() and self.reference_resolver is not None:
-            message_for_plan = self.reference_resolver.resolve(user_input, context)
-            logger.debug(f"Reference resolver used; rewritten message:\n{message_for_plan}")
+            speculative = None
+            if self.reference_resolver.may_rewrite(user_input):
+                speculative = self._start_speculative_plan(user_input)
+            elif self.speculation_executor is not None:
+                # Resolution is a no-op here; planning inline costs nothing extra, so it isn't a hit.
+                self._count_speculation("gated")
+            try:
+                with stage("reference_resolve"):
+                    message_for_plan = self.reference_resolver.resolve(user_input, context)
+            except BaseException:
+                if speculative is not None:
+                    speculative.cancel()
+                raise
+            logger.debug("Reference resolver used; rewritten message:\n%s", message_for_plan)
+            if speculative is not None:
+                prebuilt_plan = self._finish_speculative_plan(speculative, user_input, message_for_plan)
         else:
             logger.debug("No reference resolver used; returning user_input unchanged.")
 
-        return message_for_plan
+        return message_for_plan, prebuilt_plan
+
+    def _start_speculative_plan(self, user_input: str):
+        """Submit build_plan(user_input) to the speculation executor; returns the future or None."""
+        if self.speculation_executor is None:
+            return None
+        self._count_speculation("attempts")
+        # Copy contextvars so the plan builder's logs keep this request's request_id.
+        ctx = contextvars.copy_context()
+        return self.speculation_executor.submit(ctx.run, self._build_plan, user_input)
+
+    def _build_plan(self, text: str):
+        """plan_builder.build_plan(text), timed as the plan_build stage."""
+        with stage("plan_build"):
+            return self.plan_builder.build_plan(text)
+
+    def _finish_speculative_plan(self, future, user_input: str, message_for_plan: str):
+        """Keep the speculative plan if the resolver left the message unchanged; otherwise discard it."""
+        if (message_for_plan or "").strip() != (user_input or "").strip():
+            future.cancel()  # no-op if already running; its result is simply ignored
+            self._count_speculation("misses")
+            return None
+        try:
+            plan = future.result()
+        except Exception as e:
+            # Plan again on the request thread; if the builder is really failing it fails there as usual.
+            self._count_speculation("failures")
+            logger.warning("Speculative plan failed", extra={"event": "speculative_plan_failed", "error": str(e)})
+            return None
+        self._count_speculation("hits")
+        return plan
+
+    def _count_speculation(self, key: str) -> None:
+        with self._speculation_lock:
+            self._speculation_counts[key] += 1
+
+    def speculation_stats(self) -> dict:
+        """Speculative planning counters plus hit_rate (hits / attempts; gated turns are not attempts)."""
+        with self._speculation_lock:
+            stats = dict(self._speculation_counts)
+        stats["hit_rate"] = stats["hits"] / stats["attempts"] if stats["attempts"] else 0.0
+        return stats
 
     def _build_goal_step_context(
         self,
         step: PlanStep,
-        user_input: str,
+        original_chunk: str,
         output_data: list,
-        artifacts: Dict[str, str],
+        artifacts: ArtifactStore,
+        output_handles: Optional[List[ArtifactHandle]] = None,
     ) -> str:
         """
         Build the context string for the intent classifier for one goal step.
-        Uses original input (truncated), optional use_from_memory artifacts, or previous step output.
+        Uses the original input (already stripped/truncated to GOAL_ORIGINAL_INPUT_MAX_LEN),
+        optional use_from_memory artifacts, or the previous step output. Artifact content is
+        read via ArtifactStore.preview, so only the injected prefix is ever copied. When an
+        artifact is longer than the preview, the classifier is told it can pass the full
+        value by reference ("artifact:<key>").
         """
-        original_chunk = (user_input or "").strip()[:GOAL_ORIGINAL_INPUT_MAX_LEN]
         if not output_data:
             return original_chunk
         base = f"Original user input (use for 'the text' / 'original text' when needed):\n{original_chunk}"
@@ -297,27 +465,53 @@ class RotomCore:
         )
         if use_keys_list:
             for key in use_keys_list:
-                val = (artifacts.get(key) or "").strip()[:ARTIFACT_CONTEXT_MAX_LEN]
+                handle = artifacts.handle_for(key)
+                val = artifacts.preview(handle, ARTIFACT_CONTEXT_MAX_LEN)
                 base += f"\n\nContent of '{key}' (from a previous step):\n{val}"
+                if handle is not None and handle.length > ARTIFACT_CONTEXT_MAX_LEN:
+                    base += (
+                        f"\n[Truncated. To pass the full content of '{key}' as an argument, "
+                        f"use the value \"{ARTIFACT_REF_PREFIX}{key}\".]"
+                    )
         else:
-            last_output = (
-                (output_data[-1].get("output") or "").strip()[
-                    :GOAL_PREVIOUS_OUTPUT_MAX_LEN
-                ]
-            )
+            if output_handles:
+                last_output = artifacts.preview(output_handles[-1], GOAL_PREVIOUS_OUTPUT_MAX_LEN)
+            else:
+                last_output = (output_data[-1].get("output") or "").strip()[:GOAL_PREVIOUS_OUTPUT_MAX_LEN]
             base += f"\n\nPrevious step result:\n{last_output}"
         return base
 
+    def _resolve_artifact_arguments(self, capability, arguments: dict, artifacts: ArtifactStore) -> dict:
+        """
+        Replace "artifact:<key>" argument values with the stored artifact. Capabilities that
+        set accepts_artifact_views receive a lazy ArtifactView (no copy); others get the full
+        text. Values that are not references to a known key are passed through unchanged.
+        """
+        if not artifacts.names():
+            return arguments
+        accepts_views = bool(getattr(capability, "accepts_artifact_views", False))
+        resolved = {}
+        for name, value in arguments.items():
+            handle = artifacts.resolve_ref(value)
+            if handle is None:
+                resolved[name] = value
+            else:
+                resolved[name] = artifacts.view(handle) if accepts_views else artifacts.text(handle)
+        return resolved
+
     def _is_goal_satisfied(
         self,
         check_result,
         steps_this_goal: int,
         output_data: list,
         goal_text: str,
+        output_handles: Optional[List[ArtifactHandle]] = None,
     ) -> bool:
         """
         Decide if the current goal is satisfied: checker said so, max steps per goal reached,
         or duplicate step (same capability and output as previous). Logs for max steps and duplicate.
+        When output_handles is given, outputs are compared by content digest (full value) rather
+        than by the truncated output_data preview.
         """
         if check_result.satisfied:
             return True
@@ -326,14 +520,16 @@ class RotomCore:
                 "Per-goal step limit reached; treating goal as done",
                 extra={"goal": goal_text, "steps_this_goal": steps_this_goal},
             )
+            record_limit_hit("max_steps_per_goal")
             return True
         if steps_this_goal >= 2:
             last_step = output_data[-1]
             prev_step = output_data[-2]
-            if (
-                last_step["capability"] == prev_step["capability"]
-                and (last_step.get("output") or "") == (prev_step.get("output") or "")
-            ):
+            if output_handles and len(output_handles) >= 2:
+                same_output = output_handles[-1].digest == output_handles[-2].digest
+            else:
+                same_output = (last_step.get("output") or "") == (prev_step.get("output") or "")
+            if last_step["capability"] == prev_step["capability"] and same_output:
                 logger.warning(
                     "Duplicate step for goal (same capability and output); treating as done",
                     extra={"goal": goal_text},
@@ -0,0 +1,264 @@
+"""
+admission.py — Admission control and backpressure for expensive endpoints
+
+Under overload the API used to accept every /run request, pile them onto the
+threadpool, and let them all time out together. This middleware decides up
+front whether a request gets in:
+
+  - At most max_in_flight cost units run at once. A request's cost is
+    estimated from Content-Length (1 unit + 1 per cost_unit_bytes), so one huge
+    input counts like several small ones. Requests over max_request_bytes are
+    rejected immediately with 413. A body without Content-Length (chunked) is
+    read up front, stopping once it passes the limit, and costed and checked by
+    its actual size; the app then receives the buffered body as usual.
+  - Up to max_queue requests wait (FIFO) for capacity, each for at most
+    queue_timeout_seconds.
+  - Anything beyond that gets a fast 429 with Retry-After estimated from the
+    current drain rate (completions per second over the last few seconds).
+
+Admitted requests therefore see predictable latency: the queue in front of
+them is bounded. acquire() and release() run on the event loop, but stats()
+is also called from the threadpool (GET /admission/stats, the /metrics
+collector), so the counters and deques are guarded by a threading.Lock that is
+never held across an await. stats() only reads; it does not trim.
+
+The time an admitted request spent waiting is left in the ASGI scope's state
+(request.state.admission_wait_ms) for the per-request breakdown.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Iterable, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__, layer="api", component="admission")
+
+DEFAULT_MAX_IN_FLIGHT = 32
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_QUEUE_TIMEOUT_SECONDS = 10.0
+DEFAULT_COST_UNIT_BYTES = 16 * 1024
+DEFAULT_MAX_REQUEST_BYTES = 1024 * 1024
+# Completions within this window determine the drain rate for Retry-After.
+DRAIN_WINDOW_SECONDS = 10.0
+RETRY_AFTER_MAX_SECONDS = 60
+
+ADMITTED, REJECTED_BUSY, REJECTED_TOO_LARGE = "admitted", "busy", "too_large"
+
+
+class AdmissionController:
+    """Cost-weighted semaphore with a bounded FIFO wait queue and drain-rate tracking."""
+
+    def __init__(
+        self,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        queue_timeout_seconds: float = DEFAULT_QUEUE_TIMEOUT_SECONDS,
+        cost_unit_bytes: int = DEFAULT_COST_UNIT_BYTES,
+        max_request_bytes: Optional[int] = DEFAULT_MAX_REQUEST_BYTES,
+    ) -> None:
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.cost_unit_bytes = max(1, cost_unit_bytes)
+        self.max_request_bytes = max_request_bytes
+        # Guards everything below (see the module docstring).
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+        self._completions: Deque[float] = deque()
+        self._counts = {"admitted": 0, "queued": 0, "rejected_busy": 0, "rejected_too_large": 0, "timeouts": 0}
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        return cls(
+            max_in_flight=int(os.getenv("ROTOM_ADMISSION_MAX_IN_FLIGHT", str(DEFAULT_MAX_IN_FLIGHT))),
+            max_queue=int(os.getenv("ROTOM_ADMISSION_MAX_QUEUE", str(DEFAULT_MAX_QUEUE))),
+            queue_timeout_seconds=float(
+                os.getenv("ROTOM_ADMISSION_QUEUE_TIMEOUT_SECONDS", str(DEFAULT_QUEUE_TIMEOUT_SECONDS))
+            ),
+            cost_unit_bytes=int(os.getenv("ROTOM_ADMISSION_COST_UNIT_BYTES", str(DEFAULT_COST_UNIT_BYTES))),
+            max_request_bytes=int(os.getenv("ROTOM_ADMISSION_MAX_REQUEST_BYTES", str(DEFAULT_MAX_REQUEST_BYTES))),
+        )
+
+    def estimate_cost(self, content_length: Optional[int]) -> int:
+        """Cost units for a request body of this size (unknown size = 1 unit), capped at max_in_flight."""
+        if not content_length:
+            return 1
+        return min(self.max_in_flight, 1 + content_length // self.cost_unit_bytes)
+
+    async def acquire(self, content_length: Optional[int] = None) -> Tuple[str, int]:
+        """Return (decision, cost). Call release(cost) after the request when decision is ADMITTED."""
+        if self.max_request_bytes is not None and content_length and content_length > self.max_request_bytes:
+            self._count("rejected_too_large")
+            return REJECTED_TOO_LARGE, 0
+        cost = self.estimate_cost(content_length)
+        future = asyncio.get_running_loop().create_future()
+        entry = (cost, future)
+        with self._lock:
+            if not self._waiters and self._in_flight + cost <= self.max_in_flight:
+                self._in_flight += cost
+                self._counts["admitted"] += 1
+                return ADMITTED, cost
+            if len(self._waiters) >= self.max_queue:
+                self._counts["rejected_busy"] += 1
+                return REJECTED_BUSY, cost
+            self._waiters.append(entry)
+            self._counts["queued"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Granted at the last moment: keep the slot.
+                self._count("admitted")
+                return ADMITTED, cost
+            self._remove_waiter(entry)
+            self._count("timeouts", "rejected_busy")
+            return REJECTED_BUSY, cost
+        except asyncio.CancelledError:
+            # Client went away while queued; give back the slot if it was already granted.
+            if future.done() and not future.cancelled():
+                self.release(cost)
+            else:
+                self._remove_waiter(entry)
+            raise
+        self._count("admitted")
+        return ADMITTED, cost
+
+    def release(self, cost: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._in_flight -= cost
+            self._completions.append(now)
+            self._trim_completions(now)
+            # Grant waiters in FIFO order while they fit (a big request at the head is not overtaken).
+            while self._waiters and self._in_flight + self._waiters[0][0] <= self.max_in_flight:
+                waiter_cost, future = self._waiters.popleft()
+                if future.done():
+                    continue
+                self._in_flight += waiter_cost
+                future.set_result(True)
+
+    def retry_after_seconds(self) -> int:
+        """How long until a new request would likely get in, from the recent drain rate."""
+        now = time.monotonic()
+        with self._lock:
+            self._trim_completions(now)
+            rate = len(self._completions) / DRAIN_WINDOW_SECONDS
+            in_flight, waiting = self._in_flight, len(self._waiters)
+        if rate <= 0:
+            return RETRY_AFTER_MAX_SECONDS if in_flight else 1
+        return max(1, min(RETRY_AFTER_MAX_SECONDS, math.ceil((waiting + 1) / rate)))
+
+    def stats(self) -> dict:
+        """Read-only snapshot; safe to call from any thread."""
+        now = time.monotonic()
+        with self._lock:
+            recent = sum(1 for t in self._completions if now - t <= DRAIN_WINDOW_SECONDS)
+            return dict(
+                self._counts,
+                in_flight=self._in_flight,
+                waiting=len(self._waiters),
+                max_in_flight=self.max_in_flight,
+                max_queue=self.max_queue,
+                drain_rate_per_second=recent / DRAIN_WINDOW_SECONDS,
+            )
+
+    def _count(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._counts[key] += 1
+
+    def _remove_waiter(self, entry) -> None:
+        with self._lock:
+            try:
+                self._waiters.remove(entry)
+            except ValueError:
+                pass
+
+    def _trim_completions(self, now: float) -> None:
+        # Caller holds self._lock.
+        while self._completions and now - self._completions[0] > DRAIN_WINDOW_SECONDS:
+            self._completions.popleft()
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying an AdmissionController to requests whose path is in `paths`."""
+
+    def __init__(self, app, controller: AdmissionController, paths: Iterable[str] = ("/run",)) -> None:
+        self.app = app
+        self.controller = controller
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        content_length = _content_length(scope)
+        if content_length is None:
+            # No Content-Length (chunked): read the body now so it is size-checked and costed too.
+            content_length, receive = await _buffer_body(receive, self.controller.max_request_bytes)
+        decision, cost = await self.controller.acquire(content_length)
+        if decision == REJECTED_TOO_LARGE:
+            response = JSONResponse({"detail": "Request too large"}, status_code=413)
+            await response(scope, receive, send)
+            return
+        if decision == REJECTED_BUSY:
+            retry_after = self.controller.retry_after_seconds()
+            logger.warning("Request rejected by admission control", extra={"event": "admission_rejected",
+                                                                          "retry_after": retry_after})
+            response = JSONResponse(
+                {"detail": "Server busy, retry later"},
+                status_code=429,
+                headers={"Retry-After": str(retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        scope.setdefault("state", {})["admission_wait_ms"] = (time.perf_counter() - start) * 1000.0
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(cost)
+
+
+def _content_length(scope) -> Optional[int]:
+    for name, value in scope.get("headers") or ():
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+async def _buffer_body(receive, limit: Optional[int]):
+    """
+    Read a request body of unknown length, stopping early once it exceeds limit.
+    Returns (bytes read, receive) where the new receive replays the buffered
+    messages before falling through to the original one.
+    """
+    messages = []
+    size = 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break  # client disconnected
+        size += len(message.get("body", b""))
+        if not message.get("more_body", False) or (limit is not None and size > limit):
+            break
+
+    async def replay():
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    return size, replay
@@ -0,0 +1,238 @@
+"""
+capture.py — Opt-in traffic capture for POST /run
+
+Synthetic benchmarks don't have our real mix of plan lengths and session
+patterns. With ROTOM_CAPTURE_PATH set, this middleware appends one JSON line
+per /run request to that file:
+
+    {"ts": 1760812345.12, "request_id": "...", "status": 200, "latency_ms": 812.4,
+     "input": "...", "session_id": "...", "priority": null,
+     "stages": {"plan_build": {"ms": 201.3, "count": 1}, "classify": {...}, ...}}
+
+stages comes from the request's trace (app.core.tracing), so it shows the
+shape of the request: how many goals were classified, how many LLM calls were
+made, and where the time went. benchmarks/replay.py re-issues a capture
+against another build.
+
+Records pass through redaction hooks before they are written. Each hook takes
+the record dict and returns it (modified or not), or None to drop it.
+ROTOM_CAPTURE_REDACT is a comma-separated list of built-in hooks ("email",
+"secret", "digits") and/or "package.module:function" paths; the default is
+"email,secret". ROTOM_CAPTURE_SAMPLE_RATE (default 1.0) captures a fraction of
+requests. Serialization and file writes happen on a background thread; the
+request only pays for copying the body.
+"""
+
+import importlib
+import os
+import queue
+import random
+import re
+import threading
+import time
+from typing import Callable, Iterable, List, Optional
+
+from app.core.logger import get_logger
+from app.core.serialization import JSONDecodeError, dumps, loads
+from app.core.tracing import TRACER, stage_breakdown
+
+logger = get_logger(__name__, layer="api", component="capture")
+
+# Pending records; beyond this they are dropped rather than blocking requests.
+CAPTURE_QUEUE_MAX = 10_000
+DEFAULT_REDACT = "email,secret"
+REDACTED = "[REDACTED]"
+
+Redactor = Callable[[dict], Optional[dict]]
+
+
+def _pattern_redactor(pattern: str) -> Redactor:
+    compiled = re.compile(pattern)
+
+    def redact(record: dict) -> dict:
+        if isinstance(record.get("input"), str):
+            record["input"] = compiled.sub(REDACTED, record["input"])
+        return record
+
+    return redact
+
+
+BUILTIN_REDACTORS = {
+    "email": _pattern_redactor(r"[\w.+-]+@[\w-]+\.[\w.-]+"),
+    # API keys and bearer tokens (sk-..., ghp_..., "Bearer x").
+    "secret": _pattern_redactor(r"\b(?:sk-[A-Za-z0-9_-]{16,}|gh[pousr]_[A-Za-z0-9]{20,}|Bearer\s+[A-Za-z0-9._~+/-]+=*)"),
+    # Any run of 4+ digits (card, phone, and account numbers).
+    "digits": _pattern_redactor(r"\d{4,}"),
+}
+
+
+def load_redactors(spec: str) -> List[Redactor]:
+    """Resolve "email,secret,pkg.mod:func" into hook callables; unknown names raise ValueError."""
+    redactors = []
+    for name in (part.strip() for part in (spec or "").split(",")):
+        if not name:
+            continue
+        if name in BUILTIN_REDACTORS:
+            redactors.append(BUILTIN_REDACTORS[name])
+        elif ":" in name:
+            module_name, _, attr = name.partition(":")
+            redactors.append(getattr(importlib.import_module(module_name), attr))
+        else:
+            raise ValueError(f"Unknown capture redactor: {name}")
+    return redactors
+
+
+class TrafficCapture:
+    """Redacts and appends capture records to a JSONL file from a background thread."""
+
+    def __init__(self, path: str, redactors: Iterable[Redactor] = (), sample_rate: float = 1.0) -> None:
+        self.path = path
+        self.redactors = list(redactors)
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self._queue: "queue.Queue" = queue.Queue(maxsize=CAPTURE_QUEUE_MAX)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.captured = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["TrafficCapture"]:
+        """None unless ROTOM_CAPTURE_PATH is set."""
+        path = os.getenv("ROTOM_CAPTURE_PATH")
+        if not path:
+            return None
+        return cls(
+            path,
+            redactors=load_redactors(os.getenv("ROTOM_CAPTURE_REDACT", DEFAULT_REDACT)),
+            sample_rate=float(os.getenv("ROTOM_CAPTURE_SAMPLE_RATE", "1.0")),
+        )
+
+    def should_capture(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def submit(self, body: bytes, status: int, request_id: Optional[str], started_at: float, latency_ms: float) -> None:
+        """Queue one finished request (parsed, redacted, and written later on the writer thread)."""
+        # Take the spans now: the trace store is bounded and the writer may run much later.
+        spans = TRACER.get_trace(request_id) if request_id else []
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait((body, status, request_id, started_at, latency_ms, spans))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Write everything queued now in the calling thread (tests, shutdown)."""
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._write(items)
+
+    def stats(self) -> dict:
+        return {"captured": self.captured, "dropped": self.dropped, "pending": self._queue.qsize()}
+
+    def build_record(
+        self, body: bytes, status: int, request_id: Optional[str], started_at: float, latency_ms: float, spans: list
+    ) -> Optional[dict]:
+        try:
+            payload = loads(body) if body else {}
+        except JSONDecodeError:
+            payload = {}
+        if not isinstance(payload, dict):
+            payload = {}
+        record = {
+            "ts": round(started_at, 6),
+            "request_id": request_id,
+            "status": status,
+            "latency_ms": round(latency_ms, 3),
+            "input": payload.get("input"),
+            "session_id": payload.get("session_id"),
+            "priority": payload.get("priority"),
+            "stages": stage_breakdown(spans),
+        }
+        for redact in self.redactors:
+            record = redact(record)
+            if record is None:
+                return None
+        return record
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(items)
+
+    def _write(self, items) -> None:
+        lines = []
+        for item in items:
+            try:
+                record = self.build_record(*item)
+            except Exception as e:
+                # A broken custom redactor must not take the writer down; drop the record.
+                logger.warning("Capture redaction failed", extra={"event": "capture_failed", "error": str(e)})
+                record = None
+            if record is None:
+                self.dropped += 1
+            else:
+                lines.append(dumps(record) + "\n")
+        if not lines:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+            self.captured += len(lines)
+        except OSError as e:
+            self.dropped += len(lines)
+            logger.warning("Capture write failed", extra={"event": "capture_failed", "error": str(e)})
+
+
+class TrafficCaptureMiddleware:
+    """ASGI middleware that hands each request to `paths` (body, status, X-Request-ID, timing) to a TrafficCapture."""
+
+    def __init__(self, app, capture: TrafficCapture, paths: Iterable[str] = ("/run",)) -> None:
+        self.app = app
+        self.capture = capture
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") not in self.paths or not self.capture.should_capture():
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.time()
+        start = time.perf_counter()
+        chunks: List[bytes] = []
+        response = {"status": 0, "request_id": None}
+
+        async def capturing_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def capturing_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for name, value in message.get("headers") or ():
+                    if name.lower() == b"x-request-id":
+                        response["request_id"] = value.decode("latin-1")
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                latency_ms = (time.perf_counter() - start) * 1000.0
+                self.capture.submit(b"".join(chunks), response["status"], response["request_id"], started_at, latency_ms)
+
+        await self.app(scope, capturing_receive, capturing_send)
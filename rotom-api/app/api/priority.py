@@ -0,0 +1,53 @@
+"""
+priority.py — Server-side choice of a /run request's LLM scheduling lane
+
+RunRequest.priority used to be trusted as sent, and an omitted value meant
+"interactive", so any client could put its traffic in the top lane of the LLM
+scheduler (see ScheduledLLMClient). Now the server decides:
+
+  - Untrusted callers get at most ROTOM_CLIENT_MAX_PRIORITY (default "batch").
+    Omitting priority gives that lane; asking for a higher one is lowered to it;
+    asking for a lower one ("background") is honoured.
+  - Callers that send X-Rotom-Priority-Token matching ROTOM_INTERACTIVE_TOKEN
+    (e.g. the first-party UI's gateway) may use any lane and default to
+    "interactive". Without that env var nobody is trusted.
+"""
+
+import hmac
+import os
+from typing import Optional
+
+from app.core.context import LLM_PRIORITIES
+
+DEFAULT_CLIENT_MAX_PRIORITY = "batch"
+
+
+class PriorityPolicy:
+    """Maps (requested priority, caller token) to the lane the request is scheduled in."""
+
+    def __init__(self, client_max: str = DEFAULT_CLIENT_MAX_PRIORITY, trusted_token: Optional[str] = None) -> None:
+        if client_max not in LLM_PRIORITIES:
+            raise ValueError(f"Unknown priority {client_max!r}; expected one of {', '.join(LLM_PRIORITIES)}")
+        self.client_max = client_max
+        self.trusted_token = trusted_token
+
+    @classmethod
+    def from_env(cls) -> "PriorityPolicy":
+        return cls(
+            client_max=os.getenv("ROTOM_CLIENT_MAX_PRIORITY", DEFAULT_CLIENT_MAX_PRIORITY).lower(),
+            trusted_token=os.getenv("ROTOM_INTERACTIVE_TOKEN") or None,
+        )
+
+    def trusted(self, token: Optional[str]) -> bool:
+        """True if token matches the trusted-caller token (constant-time compare)."""
+        if not self.trusted_token or not token:
+            return False
+        return hmac.compare_digest(token.encode("utf-8"), self.trusted_token.encode("utf-8"))
+
+    def resolve(self, requested: Optional[str], token: Optional[str] = None) -> str:
+        """The lane to schedule in: requested, capped at client_max unless the caller is trusted."""
+        ceiling = LLM_PRIORITIES[0] if self.trusted(token) else self.client_max
+        if requested is None:
+            return ceiling
+        # LLM_PRIORITIES is ordered highest first, so a larger index is a lower lane.
+        return LLM_PRIORITIES[max(LLM_PRIORITIES.index(requested), LLM_PRIORITIES.index(ceiling))]
@@ -9,19 +9,37 @@ This module defines the actual HTTP endpoints. Its job is only to:
 We intentionally keep this thin: no business logic, no capability routing,
 no direct use of RotomCore. That way the API can change (e.g. different
 framework or transport) without touching orchestration or capabilities.
+
+The AgentService is not built at import: service_provider builds it in the
+background at startup (see app.main) or on first use, so the process binds
+quickly. GET /health is liveness; GET /ready is readiness (service built and,
+with ROTOM_WARMUP=1, warmed up).
 """
 
-from app.services.agent_service import AgentService
+from app.api.admission import AdmissionController
+from app.api.priority import PriorityPolicy
+from app.services.idempotency import IdempotencyConflict
+from app.services.service_provider import ServiceProvider
 from app.core.logger import get_logger
+from app.core.metrics import REGISTRY
+from app.core.tracing import TRACER, render_waterfall
 from app.schemas.run_request import RunRequest
 from app.schemas.run_response import RunResponse
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import Optional
 
 router = APIRouter()
 logger = get_logger(__name__, layer="api", component="routes")
 
-# One shared service instance; it's stateless and just delegates to RotomCore.
-agent_service = AgentService()
+# One shared service instance; it's stateless and just delegates to RotomCore. Built lazily.
+service_provider = ServiceProvider.from_env()
+REGISTRY.register_collector("startup", service_provider.stats)
+# Admission control for POST /run; the middleware is registered in main.py.
+admission_controller = AdmissionController.from_env()
+REGISTRY.register_collector("admission", admission_controller.stats)
+# Which LLM scheduling lane a /run request gets; clients can't pick "interactive" themselves.
+priority_policy = PriorityPolicy.from_env()
 
 
 @router.get("/health")
@@ -31,17 +49,151 @@ def health_check():
     return {"status": "ok"}
 
 
+@router.get("/ready")
+def readiness_check():
+    """Readiness: 200 once the service is built (and warmed up, if enabled), else 503 with the startup state."""
+    if not service_provider.ready:
+        service_provider.start()  # no-op if startup is already running; retries after a failed build
+        return JSONResponse(status_code=503, content={"status": "starting", **service_provider.stats()})
+    return {"status": "ready", **service_provider.stats()}
+
+
+@router.get("/metrics")
+def metrics(format: str = "prometheus"):
+    """
+    All metrics: stage latency histograms, LLM calls/tokens/errors per stage,
+    goals per request, steps per goal, limit hits, and every component's stats
+    as gauges. Prometheus text by default; ?format=json for a JSON snapshot.
+    """
+    if format == "json":
+        return REGISTRY.snapshot()
+    return PlainTextResponse(REGISTRY.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def _require_admin(admin_token: Optional[str]) -> None:
+    """403 unless an admin token is configured (ROTOM_PROFILE_ADMIN_TOKEN) and matches."""
+    if not service_provider.get().profiler.authorized(admin_token):
+        raise HTTPException(status_code=403, detail="Requires a valid X-Rotom-Admin-Token")
+
+
+@router.get("/debug/trace/{request_id}")
+def debug_trace(
+    request_id: str,
+    format: str = "text",
+    admin_token: Optional[str] = Header(None, alias="X-Rotom-Admin-Token"),
+):
+    """
+    Waterfall of one recent request (request_id is returned in the X-Request-ID
+    header): every stage, LLM call, and capability span with its offset and
+    duration. ?format=json returns the raw spans. Spans carry request details,
+    so this requires the admin token, like /debug/profile.
+    """
+    _require_admin(admin_token)
+    spans = TRACER.get_trace(request_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found (unknown id, expired, or tracing disabled)")
+    if format == "json":
+        return {"trace_id": request_id, "spans": [s.to_dict() for s in spans]}
+    return PlainTextResponse(render_waterfall(spans))
+
+
+@router.get("/debug/profile/{profile_id}")
+def debug_profile(
+    profile_id: str,
+    format: str = "speedscope",
+    admin_token: Optional[str] = Header(None, alias="X-Rotom-Admin-Token"),
+):
+    """
+    A profile taken with POST /run + X-Rotom-Profile (its id is in the response
+    metadata as profile_id). ?format=speedscope (default; open in speedscope.app),
+    collapsed (flamegraph.pl / inferno input), or summary (LLM wait vs Python
+    time and the hottest frames). Requires the admin token.
+    """
+    _require_admin(admin_token)
+    profile = service_provider.get().profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found (unknown id or expired)")
+    if format == "collapsed":
+        return PlainTextResponse(profile.to_collapsed())
+    if format == "summary":
+        return profile.summary()
+    return profile.to_speedscope()
+
+
+@router.get("/sessions/stats")
+def session_stats():
+    """Resident sessions/bytes and eviction counters for the session store and memory."""
+    return service_provider.get().session_stats()
+
+
+@router.get("/llm/stats")
+def llm_stats():
+    """LLM scheduler: in-flight calls and per-priority-class queue wait percentiles."""
+    return service_provider.get().llm_stats()
+
+
+@router.get("/admission/stats")
+def admission_stats():
+    """Admission control: in-flight cost, queue depth, drain rate, and admitted/rejected counters."""
+    return admission_controller.stats()
+
+
+@router.get("/idempotency/stats")
+def idempotency_stats():
+    """Idempotency-Key dedupe counters and how many results are stored."""
+    return service_provider.get().idempotency_stats()
+
+
+def _flag(value: Optional[str]) -> bool:
+    return (value or "").lower() in ("1", "true", "on")
+
+
 @router.post("/run", response_model=RunResponse)
-def run_agent(request: RunRequest):
+def run_agent(
+    request: RunRequest,
+    http_request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    profile: Optional[str] = Header(None, alias="X-Rotom-Profile"),
+    admin_token: Optional[str] = Header(None, alias="X-Rotom-Admin-Token"),
+    breakdown: Optional[str] = Header(None, alias="X-Rotom-Breakdown"),
+    priority_token: Optional[str] = Header(None, alias="X-Rotom-Priority-Token"),
+):
     """
     Main endpoint: send user text and optionally a session_id; get back the
     capability result (which capability ran, output, success, metadata).
     Request body: { "input": "user message", "session_id": "optional" }.
+    Send an Idempotency-Key header to make retries safe: a repeat returns the
+    original response; the same key with a different body gets 409. Keys are
+    scoped to the session_id (or, without one, the client address).
+    Admins can send X-Rotom-Profile: 1 with X-Rotom-Admin-Token to profile this
+    request; metadata.profile_id is then readable at GET /debug/profile/{id}.
+    Send X-Rotom-Breakdown: 1 to get metadata.breakdown: wall time, LLM calls,
+    and tokens per stage, time queued (admission, LLM scheduler, session lock),
+    and capability cache hits.
+    The LLM scheduling lane is body.priority capped at ROTOM_CLIENT_MAX_PRIORITY
+    (default batch); callers with a valid X-Rotom-Priority-Token may use any lane
+    and default to interactive (see app.api.priority).
     """
     logger.debug("Run endpoint called")
-    result = agent_service.run(
-        user_input=request.input,
-        session_id=request.session_id,
-    )
+    profile_requested = _flag(profile)
+    breakdown_requested = _flag(breakdown)
+    if profile_requested:
+        _require_admin(admin_token)
+    try:
+        result = service_provider.get().run(
+            user_input=request.input,
+            session_id=request.session_id,
+            priority=priority_policy.resolve(request.priority, priority_token),
+            idempotency_key=idempotency_key,
+            profile=profile_requested,
+            breakdown=breakdown_requested,
+            client_id=http_request.client.host if http_request.client else None,
+        )
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if breakdown_requested and "breakdown" in result.metadata:
+        # Admission waits happen in middleware, before the request's trace starts.
+        admission_wait_ms = getattr(http_request.state, "admission_wait_ms", 0.0)
+        result.metadata["breakdown"]["queued_ms"]["admission"] = round(admission_wait_ms, 3)
     logger.debug("Run endpoint completed")
     return result
\ No newline at end of file
@@ -6,6 +6,10 @@ summarize text). Each one has a name, description, and argument_schema so the
 LLM and RotomCore know how to call it. Capabilities are stateless: they get
 only the arguments for this call and return a CapabilityResult. They do not
 see session, memory, or the registry—they just execute.
+
+Because capabilities are pure, a capability may set cacheable = True to let
+RotomCore memoize its results (see result_cache.py): the same name + arguments
+returns the stored result instead of running execute() again.
 """
 
 from abc import ABC, abstractmethod
@@ -15,11 +19,24 @@ class BaseCapability(ABC):
     """
     Subclasses must set name, description, and argument_schema (used for
     validation and for building the LLM prompt), and implement execute(arguments).
+
+    Optional caching hints (read by CapabilityResultCache):
+      - cacheable: True when execute() is deterministic enough that a repeated
+        call with the same arguments may reuse the previous result.
+      - cache_ttl_seconds: how long a cached result stays valid; None uses the
+        cache's default TTL.
+
+    accepts_artifact_views: when True, an argument the classifier passed as
+    "artifact:<key>" arrives as a lazy ArtifactView (app.core.artifacts) instead
+    of the fully materialized string, so large artifacts are read incrementally.
     """
 
     name: str
     description: str
     argument_schema: dict[str, str]
+    cacheable: bool = False
+    cache_ttl_seconds: float | None = None
+    accepts_artifact_views: bool = False
 
     @abstractmethod
     def execute(self, arguments: dict):
@@ -0,0 +1,192 @@
+"""
+result_cache.py — Memoization of pure capability results
+
+Capabilities are pure: the same arguments produce the same result. When a
+capability opts in (cacheable = True on the class), RotomCore asks this cache
+before calling execute(). The key is the capability name plus a SHA-256 of the
+arguments serialized canonically (sorted keys, no whitespace), so {"a": 1, "b": 2}
+and {"b": 2, "a": 1} hit the same entry.
+
+The cache is bounded by approximate bytes (not entry count) because one
+summarizer result can be tiny while another holds a long document; entries are
+evicted least-recently-used first. Each capability can set its own TTL via
+cache_ttl_seconds. Hit/miss/eviction counters are kept so operators can see
+whether the cache is earning its memory.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.logger import get_logger
+from app.models.capability_result import CapabilityResult
+
+logger = get_logger(__name__, layer="capability", component="result_cache")
+
+# Default upper bound for all cached results together (approximate bytes).
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+# TTL used when a cacheable capability does not set cache_ttl_seconds.
+DEFAULT_TTL_SECONDS = 600.0
+# Rough per-entry overhead (key, tuple, OrderedDict node, pydantic object) added to the payload size.
+_ENTRY_OVERHEAD_BYTES = 256
+
+
+def _canonical_default(value) -> str:
+    """
+    json.dumps fallback for non-JSON argument values. Artifact views expose
+    cache_key() (content digest + range) so hashing never materializes the
+    artifact; anything else falls back to str().
+    """
+    cache_key = getattr(value, "cache_key", None)
+    if callable(cache_key):
+        return cache_key()
+    return str(value)
+
+
+def canonical_arguments_hash(arguments: dict) -> str:
+    """
+    Return a stable SHA-256 hex digest for an arguments dict. Keys are sorted and
+    separators fixed so that logically equal dicts hash the same; non-JSON values
+    go through _canonical_default rather than failing the lookup.
+    """
+    canonical = json.dumps(
+        arguments or {},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=_canonical_default,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _utf8_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _approx_result_size(key: str, result: CapabilityResult) -> int:
+    """
+    Approximate memory cost of one cached entry: key + output + metadata (UTF-8
+    bytes, so non-ASCII text is not undercounted) + fixed overhead.
+    """
+    return (
+        _utf8_len(key)
+        + _utf8_len(result.output or "")
+        + _utf8_len(repr(result.metadata or {}))
+        + _ENTRY_OVERHEAD_BYTES
+    )
+
+
+class CapabilityResultCache:
+    """
+    Thread-safe LRU cache of CapabilityResult by (capability name, canonical arguments hash).
+
+    RotomCore calls get(capability, arguments) before executing and put(...) after a
+    successful run. Failed results are never cached so a transient LLM error does
+    not stick. Returned results are deep copies because RotomCore mutates metadata
+    (execution_time_ms, session_id) on the object it gets back.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        default_ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._default_ttl = default_ttl_seconds
+        # key -> (result, expires_at, size_bytes); order = recency (last = most recently used).
+        self._entries: "OrderedDict[str, Tuple[CapabilityResult, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @staticmethod
+    def is_cacheable(capability) -> bool:
+        """True when the capability opted in to memoization."""
+        return bool(getattr(capability, "cacheable", False))
+
+    def _key(self, capability, arguments: dict) -> str:
+        return f"{capability.name}:{canonical_arguments_hash(arguments)}"
+
+    def _ttl_for(self, capability) -> float:
+        ttl = getattr(capability, "cache_ttl_seconds", None)
+        return self._default_ttl if ttl is None else float(ttl)
+
+    def get(self, capability, arguments: dict) -> Optional[CapabilityResult]:
+        """Return a copy of the cached result for this call, or None on miss/expiry/non-cacheable."""
+        if not self.is_cacheable(capability):
+            return None
+        key = self._key(capability, arguments)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            result, expires_at, size = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._bytes -= size
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        logger.debug("capability_cache_hit", extra={"event": "capability_cache_hit", "capability": capability.name})
+        return result.model_copy(deep=True)
+
+    def put(self, capability, arguments: dict, result: CapabilityResult) -> None:
+        """
+        Store a successful result for a cacheable capability; evict LRU entries to stay under max_bytes.
+        Results flagged metadata["fallback"] (degraded output after an internal error) are not stored.
+        """
+        if not self.is_cacheable(capability) or not result.success:
+            return
+        if (result.metadata or {}).get("fallback"):
+            return
+        ttl = self._ttl_for(capability)
+        if ttl <= 0:
+            return
+        key = self._key(capability, arguments)
+        stored = result.model_copy(deep=True)
+        size = _approx_result_size(key, stored)
+        if size > self._max_bytes:
+            # A single value larger than the whole budget would just evict everything else.
+            return
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (stored, expires_at, size)
+            self._bytes += size
+            while self._bytes > self._max_bytes and self._entries:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Snapshot of hit/miss counters, hit rate, and current size."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": (self._hits / lookups) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+            }
@@ -7,6 +7,9 @@ When llm_client is injected (e.g. by the service layer), it calls the LLM
 to produce a short summary so multi-step flows like "draft → summarize" work
 for real. Capabilities may use injected services per architecture; they do
 not construct dependencies.
+
+The summarizer is cacheable: summarizing the same text twice returns the
+memoized result instead of paying for a second LLM call.
 """
 
 from app.capabilities.base_capability import BaseCapability
@@ -23,6 +26,8 @@ class SummarizerStubCapability(BaseCapability):
     name = "summarizer_stub"
     description = "Summarize the provided text in one or two sentences."
     argument_schema = {"text": "string - The text to summarize."}
+    cacheable = True
+    cache_ttl_seconds = 3600.0
 
     def __init__(self, llm_client=None):
         """
@@ -35,6 +40,7 @@ class SummarizerStubCapability(BaseCapability):
     def execute(self, arguments: dict) -> CapabilityResult:
         text = (arguments.get("text") or "").strip()
         logger.debug("Summarizer execution started")
+        metadata = {"original_length": len(text)}
 
         if self.llm_client is not None:
             # Real summarization: bounded prompt, structured instruction.
@@ -57,6 +63,8 @@ Summary:"""
                     extra={"event": "summarizer_llm_error", "error": str(e)},
                 )
                 summary = f"[SUMMARY]: {text[:80]}{'...' if len(text) > 80 else ''}"
+                # Degraded output: the result cache must not keep it.
+                metadata["fallback"] = True
             output = summary
         else:
             # Stub: deterministic for tests and when no LLM is wired.
@@ -67,5 +75,5 @@ Summary:"""
             capability=self.name,
             output=output,
             success=True,
-            metadata={"original_length": len(text)},
+            metadata=metadata,
         )
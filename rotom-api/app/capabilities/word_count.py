@@ -4,9 +4,13 @@ word_count.py — Word-count capability for testing multi-step flows
 Returns the number of words in the given text. Deterministic and fast, so
 the goals-based flow can chain echo → word_count (or similar) per goal
 without calling an LLM inside a capability. Keeps tests predictable and quick.
+
+word_count accepts artifact views: when "text" references a stored artifact it
+counts words chunk by chunk instead of materializing the whole value.
 """
 
 from app.capabilities.base_capability import BaseCapability
+from app.core.artifacts import ArtifactView
 from app.models.capability_result import CapabilityResult
 from app.core.logger import get_logger
 
@@ -17,11 +21,15 @@ class WordCountCapability(BaseCapability):
     name = "word_count"
     description = "Count the number of words in the provided text."
     argument_schema = {"text": "string - The text to count words in."}
+    accepts_artifact_views = True
 
     def execute(self, arguments: dict) -> CapabilityResult:
         text = arguments.get("text", "")
         logger.debug("Word count execution started")
-        count = len(text.split()) if isinstance(text, str) else 0
+        if isinstance(text, ArtifactView):
+            count = _count_words_in_chunks(text.iter_text())
+        else:
+            count = len(text.split()) if isinstance(text, str) else 0
         logger.debug("Word count execution completed")
         return CapabilityResult(
             capability=self.name,
@@ -29,3 +37,21 @@ class WordCountCapability(BaseCapability):
             success=True,
             metadata={"word_count": count},
         )
+
+
+def _count_words_in_chunks(chunks) -> int:
+    """
+    Same result as len("".join(chunks).split()) without joining: a word that
+    straddles a chunk boundary is counted once.
+    """
+    count = 0
+    in_word = False
+    for chunk in chunks:
+        if not chunk:
+            continue
+        words = len(chunk.split())
+        if words and in_word and not chunk[0].isspace():
+            words -= 1  # continuation of the word that ended the previous chunk
+        count += words
+        in_word = not chunk[-1].isspace()
+    return count
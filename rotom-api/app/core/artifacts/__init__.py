@@ -0,0 +1,18 @@
+"""
+Request-scoped artifact store (Phase 8.5 artifacts, out-of-core).
+
+  - ArtifactStore: holds each capability output once, addressed by handle;
+    large values are spilled to a memory-mapped temp file.
+  - ArtifactHandle: opaque, content-addressed reference to a stored value.
+  - ArtifactView: lazy slice of a stored value (no copy until read).
+  - ARTIFACT_REF_PREFIX: "artifact:<name>" lets an argument reference a stored value.
+"""
+
+from app.core.artifacts.store import (
+    ARTIFACT_REF_PREFIX,
+    ArtifactHandle,
+    ArtifactStore,
+    ArtifactView,
+)
+
+__all__ = ["ARTIFACT_REF_PREFIX", "ArtifactHandle", "ArtifactStore", "ArtifactView"]
@@ -0,0 +1,265 @@
+"""
+store.py — Request-scoped artifact store with handles, spill-to-disk, and views
+
+RotomCore used to keep every capability output as a plain string in a dict and
+re-slice it (after a full .strip() copy) into the classifier context on every
+step. With multi-megabyte intermediate outputs that multiplied memory use per
+step. This store keeps each output once and hands out an ArtifactHandle:
+
+  - put(value) stores the value and returns a handle. Identical content is
+    stored only once (handles are content-addressed by SHA-256).
+  - Values larger than spill_threshold_chars are written to an anonymous temp
+    file and memory-mapped, so they live in the page cache instead of the heap.
+  - preview(handle, n) returns the first n characters of the stripped value
+    without copying the whole value; view(handle, start, stop) returns an
+    ArtifactView that slices lazily (memoryview over the mmap, no copy).
+  - Names (plan "store_output_as" keys) map to handles, so "artifact:<name>"
+    references in capability arguments can be resolved to a view or the text.
+
+The store is created per request by RotomCore as a context manager, so spill
+files are released when the request's goals finish or fail; views must not
+outlive the store.
+"""
+
+import hashlib
+import mmap
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Union
+
+# Values longer than this (in characters) are spilled to a memory-mapped temp file.
+DEFAULT_SPILL_THRESHOLD_CHARS = 256 * 1024
+
+# Prefix the classifier can use in an argument value to reference a stored artifact
+# (e.g. {"text": "artifact:summarized_text"}) instead of inlining its full content.
+ARTIFACT_REF_PREFIX = "artifact:"
+
+# ASCII whitespace; used to strip spilled (byte) values without decoding them.
+_ASCII_WHITESPACE = b" \t\n\r\x0b\x0c"
+# UTF-8 uses at most 4 bytes per character; bounds how many bytes we decode for an n-char preview.
+_MAX_UTF8_BYTES_PER_CHAR = 4
+
+
+@dataclass(frozen=True)
+class ArtifactHandle:
+    """
+    Opaque reference to one stored value. artifact_id is derived from the content digest.
+    length is the value's length in characters, whether it is held in memory or spilled
+    (views over spilled values are still offset in bytes; see ArtifactView).
+    """
+
+    artifact_id: str
+    digest: str
+    length: int
+    spilled: bool
+
+
+class ArtifactView:
+    """
+    A lazy slice of an artifact. For in-memory values the source is the original
+    str (offsets in characters); for spilled values it is a memoryview over the
+    mmap (offsets in bytes). Nothing is copied until text() / tobytes() or
+    iter_text() is called, and then only the requested range.
+    """
+
+    __slots__ = ("_source", "_start", "_stop", "digest")
+
+    def __init__(self, source: Union[str, memoryview], start: int, stop: int, digest: str):
+        self._source = source
+        self._start = start
+        self._stop = stop
+        # Content digest of the whole artifact; lets caches key on content without reading it.
+        self.digest = digest
+
+    def __len__(self) -> int:
+        return max(0, self._stop - self._start)
+
+    @property
+    def is_spilled(self) -> bool:
+        return isinstance(self._source, memoryview)
+
+    def text(self) -> str:
+        """Materialize the viewed range as a str (copies only this range)."""
+        if isinstance(self._source, str):
+            return self._source[self._start:self._stop]
+        return bytes(self._source[self._start:self._stop]).decode("utf-8", errors="replace")
+
+    def tobytes(self) -> bytes:
+        """Materialize the viewed range as UTF-8 bytes."""
+        if isinstance(self._source, str):
+            return self._source[self._start:self._stop].encode("utf-8")
+        return bytes(self._source[self._start:self._stop])
+
+    def iter_text(self, chunk_size: int = 64 * 1024) -> Iterator[str]:
+        """
+        Yield the viewed range as text chunks of roughly chunk_size units. Spilled
+        chunks are cut on UTF-8 character boundaries so no character is split.
+        """
+        if isinstance(self._source, str):
+            for pos in range(self._start, self._stop, chunk_size):
+                yield self._source[pos:min(pos + chunk_size, self._stop)]
+            return
+        pos = self._start
+        while pos < self._stop:
+            end = min(pos + chunk_size, self._stop)
+            # Back up over UTF-8 continuation bytes (10xxxxxx) so the chunk ends on a boundary.
+            while end < self._stop and end > pos and (self._source[end] & 0xC0) == 0x80:
+                end -= 1
+            yield bytes(self._source[pos:end]).decode("utf-8", errors="replace")
+            pos = end
+
+    def cache_key(self) -> str:
+        """Stable identity of the viewed content (digest + range) for memoization keys; reads nothing."""
+        return f"{ARTIFACT_REF_PREFIX}{self.digest}:{self._start}:{self._stop}"
+
+    def __str__(self) -> str:
+        return self.text()
+
+    def __repr__(self) -> str:
+        return f"ArtifactView(digest={self.digest[:12]}, len={len(self)}, spilled={self.is_spilled})"
+
+
+class _SpilledValue:
+    """One value written to an anonymous temp file and mapped read-only."""
+
+    __slots__ = ("_file", "mm", "view")
+
+    def __init__(self, data: bytes):
+        self._file = tempfile.TemporaryFile()
+        self._file.write(data)
+        self._file.flush()
+        self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mm)
+
+    def close(self) -> None:
+        self.view.release()
+        try:
+            self.mm.close()
+        except BufferError:
+            # A view slice is still alive somewhere; the mapping is freed when it is collected.
+            pass
+        self._file.close()
+
+
+class ArtifactStore:
+    """
+    Holds the outputs of one request. Values are addressed by ArtifactHandle and
+    optionally by a name (the plan's store_output_as key). Not thread-safe: a
+    request runs its goals sequentially, so one store is only touched by one thread.
+    """
+
+    def __init__(self, spill_threshold_chars: int = DEFAULT_SPILL_THRESHOLD_CHARS) -> None:
+        self._spill_threshold = spill_threshold_chars
+        # artifact_id -> str (in memory) or _SpilledValue (mmap)
+        self._values: Dict[str, Union[str, _SpilledValue]] = {}
+        self._handles: Dict[str, ArtifactHandle] = {}
+        self._names: Dict[str, ArtifactHandle] = {}
+
+    # --- Writing ---
+
+    def put(self, value: Optional[str], name: Optional[str] = None) -> ArtifactHandle:
+        """
+        Store value (None is stored as "") and return its handle. Identical content
+        returns the existing handle. When name is given, the name now points at it.
+        """
+        value = value or ""
+        encoded = value.encode("utf-8")
+        digest = hashlib.sha256(encoded).hexdigest()
+        artifact_id = digest[:24]
+        handle = self._handles.get(artifact_id)
+        if handle is None:
+            if len(value) > self._spill_threshold:
+                self._values[artifact_id] = _SpilledValue(encoded)
+                handle = ArtifactHandle(artifact_id, digest, len(value), True)
+            else:
+                self._values[artifact_id] = value
+                handle = ArtifactHandle(artifact_id, digest, len(value), False)
+            self._handles[artifact_id] = handle
+        if name:
+            self._names[name] = handle
+        return handle
+
+    # --- Lookup ---
+
+    def handle_for(self, name: str) -> Optional[ArtifactHandle]:
+        """Return the handle stored under name (a store_output_as key), or None."""
+        return self._names.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._names.keys())
+
+    def resolve_ref(self, value) -> Optional[ArtifactHandle]:
+        """
+        If value is an "artifact:<name>" reference to a known name, return its
+        handle; otherwise None. Used to let capabilities receive a handle instead
+        of an inlined string.
+        """
+        if not isinstance(value, str) or not value.startswith(ARTIFACT_REF_PREFIX):
+            return None
+        return self._names.get(value[len(ARTIFACT_REF_PREFIX):].strip())
+
+    # --- Reading ---
+
+    def view(self, handle: ArtifactHandle, start: int = 0, stop: Optional[int] = None) -> ArtifactView:
+        """Return a lazy view of [start, stop) of the value (whole value by default); no copy."""
+        stored = self._values[handle.artifact_id]
+        source = stored if isinstance(stored, str) else stored.view
+        end = len(source) if stop is None else min(stop, len(source))
+        return ArtifactView(source, max(0, start), end, handle.digest)
+
+    def text(self, handle: ArtifactHandle) -> str:
+        """Materialize the full value as a str. Prefer preview()/view() for large artifacts."""
+        return self.view(handle).text()
+
+    def preview(self, handle: Optional[ArtifactHandle], max_chars: int) -> str:
+        """
+        Equivalent to text(handle).strip()[:max_chars] but without copying the whole
+        value: only leading/trailing whitespace is scanned and at most max_chars
+        characters (4 * max_chars bytes for spilled values) are materialized.
+        """
+        if handle is None or max_chars <= 0:
+            return ""
+        stored = self._values[handle.artifact_id]
+        if isinstance(stored, str):
+            start, end = _str_strip_bounds(stored)
+            return stored[start:min(end, start + max_chars)]
+        start, end = _bytes_strip_bounds(stored.view)
+        raw = bytes(stored.view[start:min(end, start + max_chars * _MAX_UTF8_BYTES_PER_CHAR)])
+        return raw.decode("utf-8", errors="ignore")[:max_chars]
+
+    # --- Lifecycle ---
+
+    def close(self) -> None:
+        """Release spill files. Safe to call more than once."""
+        for stored in self._values.values():
+            if isinstance(stored, _SpilledValue):
+                stored.close()
+        self._values.clear()
+        self._handles.clear()
+        self._names.clear()
+
+    def __enter__(self) -> "ArtifactStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _str_strip_bounds(value: str):
+    """Return (start, end) such that value[start:end] == value.strip(), scanning only the edges."""
+    start, end = 0, len(value)
+    while start < end and value[start].isspace():
+        start += 1
+    while end > start and value[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _bytes_strip_bounds(data: memoryview):
+    """Like _str_strip_bounds for UTF-8 bytes (ASCII whitespace only)."""
+    start, end = 0, len(data)
+    while start < end and data[start] in _ASCII_WHITESPACE:
+        start += 1
+    while end > start and data[end - 1] in _ASCII_WHITESPACE:
+        end -= 1
+    return start, end
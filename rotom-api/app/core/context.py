@@ -27,4 +27,23 @@ def generate_request_id():
 
 def get_request_id():
     """Return the request_id for the current request, or None if not in a request (e.g. tests)."""
-    return request_id_ctx.get()
\ No newline at end of file
+    return request_id_ctx.get()
+
+
+# LLM scheduling (see app.agents.llm.scheduled_llm_client): which priority class
+# and which session the current work belongs to. Set by the service layer per
+# request; background workers set their own priority. copy_context() carries
+# both into helper threads (e.g. speculative planning).
+LLM_PRIORITIES = ("interactive", "batch", "background")
+llm_priority_ctx = contextvars.ContextVar("llm_priority", default="interactive")
+session_id_ctx = contextvars.ContextVar("session_id", default=None)
+
+
+def get_llm_priority():
+    """Priority class for LLM calls made in this context ("interactive" unless set)."""
+    return llm_priority_ctx.get()
+
+
+def get_session_id():
+    """session_id of the request being handled, or None."""
+    return session_id_ctx.get()
@@ -0,0 +1,143 @@
+"""
+instrumentation.py — Stage timing and LLM accounting on top of app.core.metrics
+
+RotomCore wraps each step of a turn in stage(...):
+
+    with stage("plan_build"):
+        plan = self.plan_builder.build_plan(text)
+
+which records rotom_stage_duration_ms{stage=...} and marks the stage in a
+contextvar while the block runs. LLM calls made inside the block (see
+InstrumentedLLMClient) are then counted under that stage, so per-stage LLM
+calls, errors, latency, and tokens come for free. Calls outside any stage are
+labelled "other" (e.g. background memory compaction). Each stage is also a
+tracing span (app.core.tracing), so the same names appear in trace waterfalls.
+
+Stages used by RotomCore: reference_resolve, plan_build, classify, execute,
+goal_check, format. AgentService wraps the whole turn in "request".
+
+request_breakdown() reads one request's trace back into the per-request view
+clients can ask for in RunResponse metadata: wall time and LLM calls/tokens per
+stage, time queued behind the LLM scheduler and the session lock, and
+capability cache hits.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from app.core.metrics import REGISTRY
+from app.core.tracing import TRACER, Span, current_span
+
+STAGE_OTHER = "other"
+
+current_stage_ctx = contextvars.ContextVar("current_stage", default=None)
+
+
+def get_current_stage() -> str:
+    """Name of the innermost active stage, or "other"."""
+    return current_stage_ctx.get() or STAGE_OTHER
+
+
+@contextmanager
+def stage(name: str) -> Iterator[Optional[Span]]:
+    """Time the block as rotom_stage_duration_ms{stage=name}; LLM calls inside are attributed to it. Yields the span."""
+    token = current_stage_ctx.set(name)
+    start = time.perf_counter()
+    try:
+        with TRACER.span(name, kind="stage") as span:
+            yield span
+    finally:
+        REGISTRY.observe("rotom_stage_duration_ms", (time.perf_counter() - start) * 1000.0, stage=name)
+        current_stage_ctx.reset(token)
+
+
+def record_llm_call(duration_ms: float, error: Optional[BaseException] = None) -> None:
+    """One LLM round trip in the current stage (count, latency, and errors by exception type)."""
+    current = get_current_stage()
+    REGISTRY.inc("rotom_llm_calls_total", stage=current)
+    REGISTRY.observe("rotom_llm_call_duration_ms", duration_ms, stage=current)
+    if error is not None:
+        REGISTRY.inc("rotom_llm_errors_total", stage=current, error=type(error).__name__)
+
+
+def record_llm_tokens(prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+    """Token usage reported by the provider for one call, attributed to the current stage."""
+    current = get_current_stage()
+    if prompt_tokens:
+        REGISTRY.inc("rotom_llm_tokens_total", prompt_tokens, stage=current, kind="prompt")
+    if completion_tokens:
+        REGISTRY.inc("rotom_llm_tokens_total", completion_tokens, stage=current, kind="completion")
+    # Also on the call's "llm.generate" span, for request_breakdown().
+    span = current_span()
+    if span is not None and span.name == "llm.generate":
+        span.set_attribute("prompt_tokens", prompt_tokens or 0)
+        span.set_attribute("completion_tokens", completion_tokens or 0)
+
+
+def record_limit_hit(limit: str) -> None:
+    """A safety limit (e.g. MAX_GOALS_ITERATIONS) cut a turn short."""
+    REGISTRY.inc("rotom_limit_hits_total", limit=limit)
+
+
+def _new_stage_entry() -> dict:
+    return {
+        "ms": 0.0, "count": 0, "llm_calls": 0, "llm_ms": 0.0,
+        "prompt_tokens": 0, "completion_tokens": 0, "llm_queue_ms": 0.0,
+    }
+
+
+def request_breakdown(spans: List[Span]) -> dict:
+    """
+    Per-request cost and latency from one request's spans:
+
+        {"wall_ms": ..., "stages": {stage: {ms, count, llm_calls, llm_ms, prompt_tokens,
+         completion_tokens, llm_queue_ms}}, "llm": {calls, errors, ms, prompt_tokens,
+         completion_tokens}, "queued_ms": {"llm_scheduler": ..., "session_lock": ...},
+         "capabilities": {"executed": ..., "cache_hits": ...}}
+
+    Stage ms sum repeated stages (classify runs once per goal). LLM calls and queue
+    waits are attributed to the stage they were made in ("other" outside any stage).
+    """
+    stages: Dict[str, dict] = {}
+    llm = {"calls": 0, "errors": 0, "ms": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+    queued = {"llm_scheduler": 0.0, "session_lock": 0.0}
+    capabilities = {"executed": 0, "cache_hits": 0}
+    wall_ms = 0.0
+    for s in spans:
+        attrs = s.attributes
+        if s.name == "request":
+            wall_ms += s.duration_ms
+        elif attrs.get("kind") == "stage":
+            entry = stages.setdefault(s.name, _new_stage_entry())
+            entry["ms"] += s.duration_ms
+            entry["count"] += 1
+        elif s.name == "llm.generate":
+            entry = stages.setdefault(attrs.get("stage") or STAGE_OTHER, _new_stage_entry())
+            entry["llm_calls"] += 1
+            entry["llm_ms"] += s.duration_ms
+            llm["calls"] += 1
+            llm["ms"] += s.duration_ms
+            llm["errors"] += s.status == "error"
+            for key in ("prompt_tokens", "completion_tokens"):
+                entry[key] += attrs.get(key, 0)
+                llm[key] += attrs.get(key, 0)
+        elif s.name == "llm.queue":
+            stages.setdefault(attrs.get("stage") or STAGE_OTHER, _new_stage_entry())["llm_queue_ms"] += s.duration_ms
+            queued["llm_scheduler"] += s.duration_ms
+        elif s.name == "session_lock.wait":
+            queued["session_lock"] += s.duration_ms
+        elif s.name == "capability.execute":
+            capabilities["executed"] += 1
+            capabilities["cache_hits"] += bool(attrs.get("cache_hit"))
+    for entry in stages.values():
+        for key in ("ms", "llm_ms", "llm_queue_ms"):
+            entry[key] = round(entry[key], 3)
+    return {
+        "wall_ms": round(wall_ms, 3),
+        "stages": stages,
+        "llm": dict(llm, ms=round(llm["ms"], 3)),
+        "queued_ms": {k: round(v, 3) for k, v in queued.items()},
+        "capabilities": capabilities,
+    }
@@ -9,32 +9,83 @@ captured by the platform without touching the filesystem.
 Environment:
   - LOG_MODE=dev  (default): human-readable lines like "[INFO] message".
   - LOG_MODE=prod: JSON lines so log aggregators can parse level, timestamp, request_id, etc.
+    Rendered by FastJsonFormatter (one dumps() per record via app.core.serialization).
+  - LOG_LEVEL (default INFO): root level. DEBUG adds per-step detail and prompt hashes.
+  - LOG_ASYNC=1 (default): the root logger only enqueues records (QueueHandler);
+    a QueueListener thread formats and writes them, so stdout I/O never runs on
+    the request thread. LOG_ASYNC=0 writes synchronously (useful when debugging
+    a crash that kills the process before the queue drains).
+  - ROTOM_PROMPT_STORE_DIR / ROTOM_PROMPT_LOG_SAMPLE_RATE: see app.core.prompt_store.
+
+Call sites use lazy %-style arguments (logger.debug("x %s", value)) so messages
+below the level are never formatted; large values (prompts) go through
+app.core.prompt_store.log_prompt, which logs a hash instead of the text.
 
 The fields we use (request_id, layer, component) are injected by logger.py's
 LoggerAdapter; this file only decides how they are rendered. Do not reconfigure
 logging from anywhere else—do it here once at startup.
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import os
-from pythonjsonlogger import jsonlogger
+import time
+from typing import Optional
+
+from app.core import prompt_store
+from app.core.serialization import dumps
+
+# LogRecord attributes that are not user "extra" fields.
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class FastJsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: timestamp, level, name, message, then every extra
+    field (request_id, layer, component, event, ...). Same shape as the previous
+    python-json-logger setup, without its per-record format-string parsing.
+    """
+
+    def __init__(self, datefmt: str = "%H:%M:%S") -> None:
+        super().__init__(datefmt=datefmt)
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": time.strftime(self.datefmt, self.converter(record.created)),
+            "level": record.levelname,
+            "name": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return dumps(payload, default=str)
+
+
+# The running QueueListener (LOG_ASYNC=1), so setup can be repeated and shutdown can drain it.
+_listener: Optional[logging.handlers.QueueListener] = None
 
 
 def setup_logging():
-    """Configure the root logger: level, output stream, and format (dev vs prod JSON)."""
+    """Configure the root logger: level, output stream, format (dev vs prod JSON), and async delivery."""
+    global _listener
     logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
+    level_name = os.getenv("LOG_LEVEL", "INFO").upper()
+    level = logging.getLevelName(level_name)
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown LOG_LEVEL: {level_name}")
+    logger.setLevel(level)
 
     handler = logging.StreamHandler(sys.stdout)
 
     log_mode = os.getenv("LOG_MODE", "dev").lower()
     if log_mode == "prod":
-        formatter = jsonlogger.JsonFormatter(
-            fmt="%(asctime)s %(levelname)s %(name)s %(message)s",
-            rename_fields={"levelname": "level", "asctime": "timestamp"},
-            datefmt="%H:%M:%S"
-        )
+        formatter = FastJsonFormatter(datefmt="%H:%M:%S")
     else:
         # formatter = logging.Formatter("[%(levelname)s] %(name)s %(filename)s:%(lineno)d | %(message)s")
         formatter = logging.Formatter(
@@ -43,8 +94,17 @@ def setup_logging():
         )
 
     handler.setFormatter(formatter)
+    shutdown_logging()
     logger.handlers = []
-    logger.addHandler(handler)
+    if os.getenv("LOG_ASYNC", "1").lower() in ("0", "false", "off"):
+        logger.addHandler(handler)
+    else:
+        records: "queue.Queue" = queue.Queue(-1)
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        _listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+        _listener.start()
+
+    prompt_store.configure_from_env()
 
     logging.getLogger("httpcore").setLevel(logging.WARNING)
     logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -56,4 +116,15 @@ def setup_logging():
     logging.getLogger("langchain_community.tools").setLevel(logging.WARNING)
     logging.getLogger("langchain_community.tools.base").setLevel(logging.WARNING)
     logging.getLogger("langchain_community.tools.base.tool").setLevel(logging.WARNING)
-    logging.getLogger("langchain_community.tools.base.tool.tool").setLevel(logging.WARNING)
\ No newline at end of file
+    logging.getLogger("langchain_community.tools.base.tool.tool").setLevel(logging.WARNING)
+
+
+def shutdown_logging():
+    """Stop the QueueListener (if any) after writing everything still queued."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -8,9 +8,17 @@ in-memory implementation:
     type for parameters so callers can pass a mock in tests.
   - InMemorySessionMemory: concrete implementation that stores entries in
     a dict in process memory. Used by AgentService to wire RotomCore.
+  - SQLiteSessionMemory: persistent implementation (SQLite, WAL mode) with a
+    write-behind queue and a read-through cache; survives restarts and can be
+    shared by several workers.
+
+RetrievalSessionMemory (recency + similarity recall over local embeddings)
+lives in app.core.memory.retrieval and is not imported here, so NumPy is only
+loaded when that backend is used.
 """
 
 from app.core.memory.base_session_memory import BaseSessionMemory
 from app.core.memory.in_memory import InMemorySessionMemory
+from app.core.memory.sqlite_memory import SQLiteSessionMemory
 
-__all__ = ["BaseSessionMemory", "InMemorySessionMemory"]
+__all__ = ["BaseSessionMemory", "InMemorySessionMemory", "SQLiteSessionMemory"]
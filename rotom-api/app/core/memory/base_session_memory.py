@@ -14,6 +14,7 @@ Capabilities never touch memory; only the orchestration layer (RotomCore) does.
 """
 
 from abc import ABC, abstractmethod
+from typing import Optional
 
 
 class BaseSessionMemory(ABC):
@@ -29,7 +30,7 @@ class BaseSessionMemory(ABC):
     """
 
     @abstractmethod
-    def get_context(self, session_id: str, max_turns: int = 5) -> str:
+    def get_context(self, session_id: str, max_turns: int = 5, query: Optional[str] = None) -> str:
         """
         Return a string summarizing recent turns for this session.
 
@@ -43,6 +44,9 @@ class BaseSessionMemory(ABC):
         Args:
             session_id: Which conversation/session to read from.
             max_turns: How many recent turns to include (one turn = user + assistant).
+            query: Optional current user message. Implementations that can rank
+                history by relevance (RetrievalSessionMemory) use it to add
+                older matching turns; recency-only implementations ignore it.
         """
         pass
 
@@ -0,0 +1,156 @@
+"""
+compaction.py — Rolling summaries of turns that fell out of session memory
+
+InMemorySessionMemory keeps only the most recent entries per session; older
+turns used to vanish. With a SessionCompactor attached, entries that drop off
+the ring are queued and a background thread folds them into a running summary
+for that session. get_context() then returns that summary line followed by the
+recent turns, so long sessions keep useful history at a constant prompt size.
+
+Summarizers (pick one in the service layer):
+  - ExtractiveTurnSummarizer: local and free. Keeps a bounded, rolling list of
+    shortened lines (the most recent old turns win when space runs out).
+  - LLMTurnSummarizer: asks the LLM to merge the previous summary with the new
+    turns. Falls back to the extractive summarizer if the call fails.
+
+The request path never summarizes; append() only queues work.
+"""
+
+import queue
+import threading
+from typing import List, Optional
+
+from app.core.context import llm_priority_ctx
+from app.core.logger import get_logger
+
+logger = get_logger(__name__, layer="core", component="memory_compactor")
+
+# Upper bound on a session's summary so the prompt stays constant-size.
+SUMMARY_MAX_CHARS = 1200
+# Each folded line is shortened to this many characters by the extractive summarizer.
+EXTRACTIVE_LINE_MAX_CHARS = 160
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+class ExtractiveTurnSummarizer:
+    """Local summarizer: previous summary plus shortened new lines, trimmed from the oldest side."""
+
+    def __init__(self, max_chars: int = SUMMARY_MAX_CHARS, line_max_chars: int = EXTRACTIVE_LINE_MAX_CHARS) -> None:
+        self.max_chars = max_chars
+        self.line_max_chars = line_max_chars
+
+    def summarize(self, previous: str, lines: List[str]) -> str:
+        parts = [p for p in previous.split(" | ") if p] if previous else []
+        parts.extend(_clip(" ".join(line.split()), self.line_max_chars) for line in lines)
+        # Drop the oldest parts until the summary fits.
+        while len(parts) > 1 and len(" | ".join(parts)) > self.max_chars:
+            parts.pop(0)
+        return _clip(" | ".join(parts), self.max_chars)
+
+
+class LLMTurnSummarizer:
+    """Summarizer backed by an injected LLM client (see BaseLLMClient)."""
+
+    def __init__(self, llm_client, max_chars: int = SUMMARY_MAX_CHARS, fallback=None) -> None:
+        self.llm_client = llm_client
+        self.max_chars = max_chars
+        self.fallback = fallback or ExtractiveTurnSummarizer(max_chars=max_chars)
+
+    def summarize(self, previous: str, lines: List[str]) -> str:
+        turns = "\n".join(lines)
+        prompt = f"""You maintain a running summary of a conversation between a user and an assistant.
+Merge the previous summary with the new turns into one updated summary of at most {self.max_chars} characters.
+Keep names, numbers, decisions, and anything the user may refer back to. Output only the summary.
+
+Previous summary:
+{previous or "(none)"}
+
+New turns:
+{turns}
+
+Updated summary:"""
+        try:
+            summary = (self.llm_client.generate(prompt) or "").strip()
+        except Exception as e:
+            logger.warning(
+                "Turn summarization LLM call failed; using extractive summary",
+                extra={"event": "memory_compaction_llm_error", "error": str(e)},
+            )
+            summary = ""
+        if not summary:
+            return self.fallback.summarize(previous, lines)
+        return _clip(summary, self.max_chars)
+
+
+class SessionCompactor:
+    """
+    Background worker that runs target.compact(session_id, summarizer) for
+    scheduled sessions. A session is queued at most once at a time.
+    """
+
+    def __init__(self, summarizer) -> None:
+        self.summarizer = summarizer
+        self._queue: "queue.Queue" = queue.Queue()
+        self._scheduled = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.compactions = 0
+        self.failures = 0
+
+    def schedule(self, target, session_id: str) -> None:
+        """Queue a compaction (cheap; called from the request path)."""
+        key = (id(target), session_id)
+        with self._lock:
+            if key in self._scheduled:
+                return
+            self._scheduled.add(key)
+        self._queue.put((target, session_id))
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="memory-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_pending(self) -> int:
+        """Process everything queued right now in the calling thread (tests, shutdown). Returns how many ran."""
+        ran = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return ran
+            if item is not None:
+                self._compact(*item)
+                ran += 1
+
+    def stats(self) -> dict:
+        return {"compactions": self.compactions, "failures": self.failures, "queued": self._queue.qsize()}
+
+    def _compact(self, target, session_id: str) -> None:
+        # Unschedule first so entries dropped while we summarize queue another round.
+        with self._lock:
+            self._scheduled.discard((id(target), session_id))
+        try:
+            if target.compact(session_id, self.summarizer):
+                self.compactions += 1
+        except Exception as e:
+            self.failures += 1
+            logger.error("Session compaction failed", extra={"event": "memory_compaction_failed", "error": str(e)})
+
+    def _run(self) -> None:
+        # Summarization LLM calls yield to interactive and batch traffic (see ScheduledLLMClient).
+        llm_priority_ctx.set("background")
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._compact(*item)
@@ -0,0 +1,34 @@
+"""
+formatting.py — How one memory entry is rendered into the context string
+
+Every session memory implementation turns stored entries into the same lines
+("User: ..." / "Assistant ran X; result: ...") so prompts look identical no
+matter which backend is configured. Keep rendering here, not in each backend.
+"""
+
+
+def render_entry(entry: dict) -> str:
+    """Render one user/assistant entry as a single context line."""
+    role = entry.get("role", "unknown")
+    if role == "user":
+        content = entry.get("content", "")
+        return f"User: {content}"
+    if role == "assistant":
+        cap = entry.get("capability", "")
+        summary = entry.get("output_summary", entry.get("summary", ""))
+        return f"Assistant ran {cap}; result: {summary}"
+    return str(entry)
+
+
+def render_summary(summary: str) -> str:
+    """Render a session's rolling summary (older, compacted turns) as one context line."""
+    return f"Earlier in this conversation (summary): {summary}"
+
+
+def entries_for_turns(max_turns: int, available: int) -> int:
+    """
+    How many trailing entries get_context(max_turns) should include. One "turn"
+    = user message + assistant response = 2 entries; max_turns falsy means all.
+    """
+    n = max(0, max_turns * 2) if max_turns else available
+    return n if n else available
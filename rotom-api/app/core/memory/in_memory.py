@@ -6,60 +6,173 @@ This is the concrete implementation of BaseSessionMemory used in production
 the process restarts, all conversation history is lost. That's intentional for
 Phase 5; a future phase could add a persistent implementation behind the same
 interface.
+
+Sessions live in a SessionLRU, so the number of sessions is capped too (by
+count and approximate bytes, plus an idle TTL). A background SessionSweeper
+calls sweep() to evict; append() and get_context() never do.
+
+Each session is a SessionRing (see ring_buffer.py): a fixed-capacity ring of
+pre-rendered entries with a cached context string, so reading the context on
+every turn is a lookup rather than a rebuild.
+
+Thread safety: the sync /run route runs in a threadpool, so appends and reads
+for a session happen under that session's shard lock (StripedSessionLRU);
+different sessions usually hit different shards and proceed in parallel.
+
+Compaction (optional): with a SessionCompactor injected, entries that fall off
+the ring are folded into a rolling per-session summary by a background worker
+(see compaction.py), and get_context() returns that summary plus recent turns.
+If the compactor falls behind, at most max_folded_per_session dropped entries
+wait per session; beyond that the oldest are forgotten, as without compaction.
 """
 
-from typing import Dict, List
+from typing import Dict, Optional
 
 from app.core.memory.base_session_memory import BaseSessionMemory
+from app.core.memory.ring_buffer import EntryRecord, SessionRing
+from app.core.session.lru import (
+    DEFAULT_IDLE_TTL_SECONDS,
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MAX_SESSIONS,
+    DEFAULT_STRIPES,
+    SESSION_OVERHEAD_BYTES,
+    StripedSessionLRU,
+)
 
 
 # Limit how many entries we keep per session so memory doesn't grow forever.
 # 20 entries ≈ 10 user+assistant pairs (one "turn" = user message + assistant response).
 MAX_ENTRIES_PER_SESSION = 20
+# Dropped entries waiting for the compactor, per session; the oldest go first beyond this.
+MAX_FOLDED_PER_SESSION = 100
 
 
 class InMemorySessionMemory(BaseSessionMemory):
     """
-    Session memory stored in RAM. One list of entries per session_id.
+    Session memory stored in RAM. One ring buffer of entries per session_id.
 
-    - get_context(): take the last N entries, format them as "User: ..." and
-      "Assistant ran X; result: ..." so the LLM gets a readable summary.
-    - append(): add one entry to the session's list, then trim the list if it
-      exceeds MAX_ENTRIES_PER_SESSION so we don't leak memory.
+    - get_context(): the last N entries formatted as "User: ..." and
+      "Assistant ran X; result: ..." so the LLM gets a readable summary
+      (served from the ring's cached string).
+    - append(): add one entry to the session's ring; once it holds
+      MAX_ENTRIES_PER_SESSION entries the oldest is overwritten.
+    - sweep() / stats(): global session eviction and gauges (see SessionLRU).
+    - compact(): fold dropped entries into the session summary (called by
+      the SessionCompactor's thread, never by the request path).
     """
 
-    def __init__(self, max_entries_per_session: int = MAX_ENTRIES_PER_SESSION) -> None:
+    def __init__(
+        self,
+        max_entries_per_session: int = MAX_ENTRIES_PER_SESSION,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        idle_ttl_seconds: Optional[float] = DEFAULT_IDLE_TTL_SECONDS,
+        stripes: int = DEFAULT_STRIPES,
+        compactor=None,
+        max_folded_per_session: int = MAX_FOLDED_PER_SESSION,
+    ) -> None:
         self._max_entries = max_entries_per_session
-        # session_id -> list of dicts (each dict is one "entry": user or assistant)
-        self._sessions: Dict[str, List[dict]] = {}
-
-    def get_context(self, session_id: str, max_turns: int = 5) -> str:
-        entries = self._sessions.get(session_id)
-        if not entries:
-            return ""
+        self._max_folded = max(1, max_folded_per_session)
+        # Optional. When set, dropped entries are summarized instead of forgotten.
+        self._compactor = compactor
+        # session_id -> SessionRing (each record wraps one "entry": user or assistant)
+        self._sessions = StripedSessionLRU(
+            max_sessions=max_sessions, max_bytes=max_bytes, idle_ttl_seconds=idle_ttl_seconds, stripes=stripes
+        )
 
+    def get_context(self, session_id: str, max_turns: int = 5, query: Optional[str] = None) -> str:
+        # Recency only: query is accepted for interface compatibility and ignored.
         # One "turn" = user message + assistant response = 2 entries. So max_turns=5 → last 10 entries.
-        n = max(0, max_turns * 2) if max_turns else len(entries)
-        recent = entries[-n:] if n else entries
-        lines = []
-        for e in recent:
-            role = e.get("role", "unknown")
-            if role == "user":
-                content = e.get("content", "")
-                lines.append(f"User: {content}")
-            elif role == "assistant":
-                cap = e.get("capability", "")
-                summary = e.get("output_summary", e.get("summary", ""))
-                lines.append(f"Assistant ran {cap}; result: {summary}")
-            else:
-                lines.append(str(e))
-        return "\n".join(lines) if lines else ""
+        # Rendered under the session's shard lock so a concurrent append can't be seen half-applied.
+        # A newly cached window grows the session, so this goes through mutate() to count it.
+        rendered = []
+
+        def render(ring: SessionRing) -> int:
+            before = ring.cached_chars
+            rendered.append(ring.context(max_turns))
+            return ring.cached_chars - before
+
+        self._sessions.mutate(session_id, None, render)
+        return rendered[0] if rendered else ""
 
     def append(self, session_id: str, entry: dict) -> None:
-        if session_id not in self._sessions:
-            self._sessions[session_id] = []
-        store = self._sessions[session_id]
-        store.append(entry)
-        # Keep only the most recent entries; drop older ones to cap memory use.
-        if len(store) > self._max_entries:
-            self._sessions[session_id] = store[-self._max_entries:]
+        # Render outside the lock; only the ring update itself is serialized (per shard).
+        record = EntryRecord(entry)
+
+        compactor = self._compactor
+        needs_compaction = []
+
+        def add(ring: SessionRing) -> int:
+            # Cached context strings change length too; they count toward the session's size.
+            cached_before = ring.cached_chars
+            # When the ring is full the oldest entry is overwritten, which caps memory use.
+            dropped = ring.append(record)
+            delta = record.size + ring.cached_chars - cached_before
+            if dropped is None:
+                return delta
+            if compactor is None:
+                return delta - dropped.size
+            # Keep the dropped entry (still counted in size) until it is folded into the summary.
+            ring.folded.append(dropped)
+            needs_compaction.append(True)
+            if len(ring.folded) > self._max_folded:
+                # Compactor is behind: forget the oldest pending entry rather than grow without bound.
+                return delta - ring.folded.pop(0).size
+            return delta
+
+        self._sessions.mutate(session_id, lambda: SessionRing(self._max_entries), add, size=SESSION_OVERHEAD_BYTES)
+        if needs_compaction:
+            compactor.schedule(self, session_id)
+
+    def compact(self, session_id: str, summarizer) -> bool:
+        """
+        Fold this session's dropped entries into its rolling summary. The summarizer
+        (possibly an LLM call) runs without holding any lock. Returns True if updated.
+        If the summarizer raises, the entries go back to the session's pending list.
+        """
+        def take(ring: SessionRing):
+            folded, ring.folded = ring.folded, []
+            return ring, ring.summary, folded
+
+        ring, previous, folded = self._sessions.read(session_id, take, (None, "", []))
+        if not folded:
+            return False
+        try:
+            summary = summarizer.summarize(previous, [record.line for record in folded])
+        except BaseException:
+            # Put the entries back (still counted in size) so the next round retries them.
+            def restore(current: SessionRing) -> int:
+                if current is not ring:
+                    return 0
+                current.folded[:0] = folded
+                overflow = len(current.folded) - self._max_folded
+                if overflow <= 0:
+                    return 0
+                forgotten, current.folded[:overflow] = current.folded[:overflow], []
+                return -sum(record.size for record in forgotten)
+
+            self._sessions.mutate(session_id, None, restore)
+            raise
+
+        def apply(current: SessionRing) -> int:
+            if current is not ring:
+                return 0  # session was cleared/evicted and recreated meanwhile
+            delta = len(summary) - len(current.summary) - sum(record.size for record in folded)
+            current.summary = summary
+            return delta
+
+        self._sessions.mutate(session_id, None, apply)
+        return True
+
+    def clear(self, session_id: str) -> None:
+        """Forget a session's history."""
+        self._sessions.pop(session_id)
+
+    def sweep(self) -> int:
+        """Evict idle / over-cap sessions. Called by the background SessionSweeper."""
+        return self._sessions.sweep()
+
+    def stats(self) -> Dict[str, int]:
+        """Resident-session gauges and eviction counters."""
+        return self._sessions.stats()
+
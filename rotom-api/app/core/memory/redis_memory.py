@@ -0,0 +1,62 @@
+"""
+redis_memory.py — Session memory shared across replicas via Redis
+
+Same BaseSessionMemory contract as InMemorySessionMemory, but each session's
+entries live in a Redis list, so any rotom-api replica behind a load balancer
+(and a replica that just restarted) sees the same history.
+
+  - append(): one pipelined round trip of RPUSH (JSON entry), LTRIM (keep the
+    last max_entries_per_session) and EXPIRE (idle sessions expire on their own).
+  - get_context(): one LRANGE for exactly the entries needed, rendered with
+    the shared formatting helpers so prompts look identical to other backends.
+"""
+
+import json
+from typing import Optional
+
+from app.core.memory.base_session_memory import BaseSessionMemory
+from app.core.memory.formatting import entries_for_turns, render_entry
+from app.core.memory.in_memory import MAX_ENTRIES_PER_SESSION
+from app.core.persistence import RedisClient
+
+# Sessions untouched for this long disappear from Redis (refreshed on every append).
+DEFAULT_SESSION_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_KEY_PREFIX = "rotom:memory:"
+
+
+class RedisSessionMemory(BaseSessionMemory):
+    """Session turns in Redis lists. Share one RedisClient (connection pool) with RedisSessionStore."""
+
+    def __init__(
+        self,
+        client: RedisClient,
+        max_entries_per_session: int = MAX_ENTRIES_PER_SESSION,
+        ttl_seconds: int = DEFAULT_SESSION_TTL_SECONDS,
+        key_prefix: str = DEFAULT_KEY_PREFIX,
+    ) -> None:
+        self._client = client
+        self._max_entries = max_entries_per_session
+        self._ttl = ttl_seconds
+        self._prefix = key_prefix
+
+    def _key(self, session_id: str) -> str:
+        return f"{self._prefix}{session_id}"
+
+    def get_context(self, session_id: str, max_turns: int = 5, query: Optional[str] = None) -> str:
+        n = entries_for_turns(max_turns, self._max_entries)
+        raw = self._client.execute("LRANGE", self._key(session_id), -n, -1) or []
+        return "\n".join(render_entry(json.loads(item)) for item in raw)
+
+    def append(self, session_id: str, entry: dict) -> None:
+        key = self._key(session_id)
+        (
+            self._client.pipeline()
+            .command("RPUSH", key, json.dumps(entry, default=str))
+            .command("LTRIM", key, -self._max_entries, -1)
+            .command("EXPIRE", key, self._ttl)
+            .execute()
+        )
+
+    def clear(self, session_id: str) -> None:
+        """Forget a session's history."""
+        self._client.execute("DEL", self._key(session_id))
@@ -0,0 +1,177 @@
+"""
+retrieval.py — Session memory that also recalls relevant older turns
+
+InMemorySessionMemory only knows recency: get_context(max_turns=5) is the last
+five turns. In long sessions the turn the user refers back to ("the summary of
+the contract from before") is often older than that.
+
+RetrievalSessionMemory keeps more history per session (bounded) and embeds
+every entry with a local hashed-feature embedding (no model, no network):
+words and word pairs are hashed into a fixed-size signed vector and L2
+normalized. Each session holds its embeddings in one NumPy matrix, so scoring a
+query against the whole history is a single matrix-vector product.
+
+get_context(session_id, max_turns, query) returns the top-k older turns most
+similar to the query (in chronological order) followed by the most recent
+turns. Without a query it behaves like InMemorySessionMemory.
+"""
+
+import re
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.memory.base_session_memory import BaseSessionMemory
+from app.core.memory.formatting import entries_for_turns
+from app.core.memory.ring_buffer import EntryRecord
+from app.core.session.lru import (
+    DEFAULT_IDLE_TTL_SECONDS,
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MAX_SESSIONS,
+    DEFAULT_STRIPES,
+    SESSION_OVERHEAD_BYTES,
+    StripedSessionLRU,
+)
+
+# Embedding width. 256 float32 = 1 KiB per entry.
+EMBEDDING_DIM = 256
+# How many entries per session are kept for retrieval (recent turns come from the same store).
+RETRIEVAL_MAX_ENTRIES_PER_SESSION = 200
+# How many older turns (user + assistant pairs) are added to the context at most.
+RETRIEVAL_TOP_K = 3
+# Older turns scoring below this cosine similarity are not worth the prompt space.
+RETRIEVAL_MIN_SIMILARITY = 0.2
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class HashedFeatureEmbedder:
+    """
+    Deterministic bag-of-words embedding: unigrams and bigrams are hashed
+    (crc32, stable across processes) into `dim` buckets with a hash-derived sign.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM) -> None:
+        self.dim = dim
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        tokens = _TOKEN_RE.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        if norm:
+            vector /= norm
+        return vector
+
+
+class _RetrievalSession:
+    """Entries for one session plus their embeddings, row i of `matrix` belongs to records[i]."""
+
+    __slots__ = ("records", "matrix")
+
+    def __init__(self, capacity: int, dim: int) -> None:
+        self.records: List[EntryRecord] = []
+        self.matrix = np.zeros((capacity, dim), dtype=np.float32)
+
+    def append(self, record: EntryRecord, vector: np.ndarray) -> int:
+        """Add one entry; returns the change in approximate size (dropped entries subtract)."""
+        capacity = self.matrix.shape[0]
+        delta = record.size
+        if len(self.records) == capacity:
+            # Drop the oldest quarter in one shift so appends stay amortized O(1).
+            drop = max(1, capacity // 4)
+            delta -= sum(r.size for r in self.records[:drop])
+            del self.records[:drop]
+            self.matrix[: capacity - drop] = self.matrix[drop:]
+        self.matrix[len(self.records)] = vector
+        self.records.append(record)
+        return delta
+
+
+class RetrievalSessionMemory(BaseSessionMemory):
+    """
+    Session memory with recency plus similarity recall. Sessions live in a
+    StripedSessionLRU (same caps, sweeper, and stats as InMemorySessionMemory).
+    """
+
+    def __init__(
+        self,
+        max_entries_per_session: int = RETRIEVAL_MAX_ENTRIES_PER_SESSION,
+        top_k: int = RETRIEVAL_TOP_K,
+        min_similarity: float = RETRIEVAL_MIN_SIMILARITY,
+        embedder: Optional[HashedFeatureEmbedder] = None,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        idle_ttl_seconds: Optional[float] = DEFAULT_IDLE_TTL_SECONDS,
+        stripes: int = DEFAULT_STRIPES,
+    ) -> None:
+        self._max_entries = max(2, max_entries_per_session)
+        self._top_k = top_k
+        self._min_similarity = min_similarity
+        self._embedder = embedder or HashedFeatureEmbedder()
+        self._sessions = StripedSessionLRU(
+            max_sessions=max_sessions, max_bytes=max_bytes, idle_ttl_seconds=idle_ttl_seconds, stripes=stripes
+        )
+
+    def get_context(self, session_id: str, max_turns: int = 5, query: Optional[str] = None) -> str:
+        query_vector = self._embedder.embed(query) if query else None
+        return self._sessions.read(session_id, lambda s: self._render(s, max_turns, query_vector), "")
+
+    def append(self, session_id: str, entry: dict) -> None:
+        # Render and embed outside the lock; only the matrix update is serialized.
+        record = EntryRecord(entry)
+        vector = self._embedder.embed(record.line)
+        dim = self._embedder.dim
+        self._sessions.mutate(
+            session_id,
+            lambda: _RetrievalSession(self._max_entries, dim),
+            lambda session: session.append(record, vector),
+            # The matrix is allocated up front, so charge it when the session is created.
+            size=SESSION_OVERHEAD_BYTES + self._max_entries * dim * 4,
+        )
+
+    def clear(self, session_id: str) -> None:
+        """Forget a session's history."""
+        self._sessions.pop(session_id)
+
+    def sweep(self) -> int:
+        """Evict idle / over-cap sessions. Called by the background SessionSweeper."""
+        return self._sessions.sweep()
+
+    def stats(self) -> Dict[str, int]:
+        """Resident-session gauges and eviction counters."""
+        return self._sessions.stats()
+
+    def _render(self, session: _RetrievalSession, max_turns: int, query_vector: Optional[np.ndarray]) -> str:
+        records = session.records
+        if not records:
+            return ""
+        n = entries_for_turns(max_turns, len(records))
+        recent_start = max(0, len(records) - n)
+        picked: List[int] = []
+        if query_vector is not None and recent_start > 0 and self._top_k > 0:
+            picked = self._recall(session, recent_start, query_vector)
+        lines = [records[i].line for i in picked]
+        lines.extend(record.line for record in records[recent_start:])
+        return "\n".join(lines)
+
+    def _recall(self, session: _RetrievalSession, recent_start: int, query_vector: np.ndarray) -> List[int]:
+        """Indices (chronological) of the best-matching older turns, each expanded to its user+assistant pair."""
+        scores = session.matrix[:recent_start] @ query_vector
+        k = min(self._top_k, recent_start)
+        best = np.argpartition(-scores, k - 1)[:k]
+        picked = set()
+        for i in best.tolist():
+            if scores[i] < self._min_similarity:
+                continue
+            picked.add(i)
+            # Pull in the other half of the turn so the line makes sense on its own.
+            role = session.records[i].entry.get("role")
+            pair = i + 1 if role == "user" else i - 1
+            if 0 <= pair < recent_start:
+                picked.add(pair)
+        return sorted(picked)
@@ -0,0 +1,122 @@
+"""
+ring_buffer.py — Fixed-capacity per-session history with a cached context string
+
+InMemorySessionMemory used to keep a plain list per session, copy it with
+store[-max:] once the cap was hit, and re-render the last N entries on every
+get_context(). The goals loop appends an assistant entry on every step and
+reads the context on every turn, so that work was repeated constantly.
+
+SessionRing keeps:
+  - a fixed-size ring of EntryRecord objects (entry + its rendered line),
+    so appending never copies and each entry is rendered exactly once;
+  - one cached context string per window size (entries requested by
+    get_context's max_turns). append() updates each cached string in place:
+    drop the oldest line of the window (a known length) and add the new line.
+
+So get_context() is a dict lookup; only the first read for a new max_turns
+builds the string. At most MAX_CACHED_WINDOWS windows are cached per session
+(other window sizes are rendered on each read), and `cached_chars` tracks
+their total length so the session's byte accounting includes them.
+
+When compaction is on (see compaction.py), records that fall off the ring
+are kept in `folded` until the background compactor merges them into
+`summary`; context() then starts with the summary line.
+"""
+
+from typing import Dict, List, Optional
+
+from app.core.memory.formatting import render_entry, render_summary
+from app.core.session.lru import approx_size
+
+# Callers use one or two max_turns values; more distinct windows are rendered without caching.
+MAX_CACHED_WINDOWS = 4
+
+
+class EntryRecord:
+    """One stored entry, its rendered context line, and its approximate size."""
+
+    __slots__ = ("entry", "line", "size")
+
+    def __init__(self, entry: dict) -> None:
+        self.entry = entry
+        self.line = render_entry(entry)
+        self.size = approx_size(entry) + len(self.line)
+
+
+class SessionRing:
+    """Ring buffer of the last `capacity` entries for one session, plus rendered-context cache."""
+
+    __slots__ = ("_records", "_head", "_count", "_contexts", "cached_chars", "summary", "folded")
+
+    def __init__(self, capacity: int) -> None:
+        self._records: List[Optional[EntryRecord]] = [None] * max(1, capacity)
+        self._head = 0  # index of the oldest record
+        self._count = 0
+        # window (number of trailing entries) -> rendered context for that window
+        self._contexts: Dict[int, str] = {}
+        # Total length of the cached context strings (counted in the session's size).
+        self.cached_chars = 0
+        # Rolling summary of compacted older turns, and dropped records waiting to be folded into it.
+        self.summary = ""
+        self.folded: List[EntryRecord] = []
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        return len(self._records)
+
+    def window_for(self, max_turns: int) -> int:
+        """Entries get_context(max_turns) covers; same rule as formatting.entries_for_turns."""
+        n = max(0, max_turns * 2) if max_turns else 0
+        return min(n, self.capacity) if n else self.capacity
+
+    def _at(self, i: int) -> EntryRecord:
+        """Record at logical position i (0 = oldest)."""
+        return self._records[(self._head + i) % len(self._records)]
+
+    def append(self, record: EntryRecord) -> Optional[EntryRecord]:
+        """Add a record; returns the record that fell off the ring (if it was full)."""
+        old_count = self._count
+        # Update cached contexts before overwriting, while the window's oldest record is still readable.
+        for window, context in self._contexts.items():
+            if old_count < window:
+                updated = f"{context}\n{record.line}" if old_count else record.line
+            elif window == 1:
+                updated = record.line
+            else:
+                oldest = self._at(old_count - window)
+                updated = f"{context[len(oldest.line) + 1:]}\n{record.line}"
+            self._contexts[window] = updated
+            self.cached_chars += len(updated) - len(context)
+
+        capacity = len(self._records)
+        if old_count < capacity:
+            self._records[(self._head + old_count) % capacity] = record
+            self._count += 1
+            return None
+        dropped = self._records[self._head]
+        self._records[self._head] = record
+        self._head = (self._head + 1) % capacity
+        return dropped
+
+    def context(self, max_turns: int) -> str:
+        """Rendered context for the last max_turns turns; built once per window, then cached."""
+        if not self._count:
+            return ""
+        window = self.window_for(max_turns)
+        context = self._contexts.get(window)
+        if context is None:
+            start = max(0, self._count - window)
+            context = "\n".join(self._at(i).line for i in range(start, self._count))
+            if len(self._contexts) < MAX_CACHED_WINDOWS:
+                self._contexts[window] = context
+                self.cached_chars += len(context)
+        if self.summary:
+            return f"{render_summary(self.summary)}\n{context}"
+        return context
+
+    def entries(self) -> List[dict]:
+        """Stored entries, oldest first."""
+        return [self._at(i).entry for i in range(self._count)]
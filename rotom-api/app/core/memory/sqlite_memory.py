@@ -0,0 +1,159 @@
+"""
+sqlite_memory.py — Persistent session memory on SQLite (WAL + write-behind)
+
+InMemorySessionMemory loses everything on restart and cannot be shared between
+uvicorn workers. This implementation keeps the same BaseSessionMemory contract
+but stores turns in SQLite:
+
+  - append() updates an in-process cache and enqueues the INSERT on the shared
+    SQLiteWriteBehind; the request thread never waits for a commit.
+  - get_context() is served from the cache. On a cache miss (first touch in
+    this worker, or the entry aged past cache_ttl_seconds so other workers'
+    turns become visible) the recent rows are read once and merged with any of
+    this worker's entries that are still waiting in the write queue.
+  - Each entry carries a unique id so that merge never duplicates a turn.
+  - Rows beyond max_entries_per_session are trimmed periodically by the writer.
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Deque, Optional, Tuple
+
+from app.core.memory.base_session_memory import BaseSessionMemory
+from app.core.memory.formatting import entries_for_turns, render_entry
+from app.core.memory.in_memory import MAX_ENTRIES_PER_SESSION
+from app.core.persistence import SQLiteWriteBehind
+
+# How many sessions keep their recent turns in the in-process cache.
+DEFAULT_CACHE_MAX_SESSIONS = 2048
+# How long cached turns are trusted before re-reading (lets other workers' turns show up).
+DEFAULT_CACHE_TTL_SECONDS = 5.0
+# Trim old rows for a session every N appends rather than on every write.
+TRIM_EVERY_APPENDS = 10
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS session_turns (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        entry_uid TEXT NOT NULL UNIQUE,
+        created_at REAL NOT NULL,
+        entry TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_session_turns_session ON session_turns (session_id, id)",
+)
+
+# (entry_uid, created_at, entry)
+_CachedEntry = Tuple[str, float, dict]
+
+
+class _CachedSession:
+    """Recent entries for one session plus when they were last read from the database."""
+
+    __slots__ = ("entries", "loaded_at", "appends_since_trim")
+
+    def __init__(self, entries: Deque[_CachedEntry], loaded_at: float):
+        self.entries = entries
+        self.loaded_at = loaded_at
+        self.appends_since_trim = 0
+
+
+class SQLiteSessionMemory(BaseSessionMemory):
+    """
+    Session memory persisted in SQLite with a read-through, write-behind cache.
+    Pass the same SQLiteWriteBehind that SQLiteSessionStore uses so all writes
+    share one writer thread and one transaction per batch.
+    """
+
+    def __init__(
+        self,
+        db: SQLiteWriteBehind,
+        max_entries_per_session: int = MAX_ENTRIES_PER_SESSION,
+        cache_max_sessions: int = DEFAULT_CACHE_MAX_SESSIONS,
+        cache_ttl_seconds: Optional[float] = DEFAULT_CACHE_TTL_SECONDS,
+    ) -> None:
+        self._db = db
+        self._max_entries = max_entries_per_session
+        self._cache_max_sessions = cache_max_sessions
+        self._cache_ttl = cache_ttl_seconds
+        self._cache: "OrderedDict[str, _CachedSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db.execute_script(_SCHEMA)
+
+    # --- BaseSessionMemory ---
+
+    def get_context(self, session_id: str, max_turns: int = 5, query: Optional[str] = None) -> str:
+        cached = self._cached_session(session_id)
+        if not cached.entries:
+            return ""
+        entries = list(cached.entries)
+        n = entries_for_turns(max_turns, len(entries))
+        lines = [render_entry(entry) for _, _, entry in entries[-n:]]
+        return "\n".join(lines) if lines else ""
+
+    def append(self, session_id: str, entry: dict) -> None:
+        cached = self._cached_session(session_id)
+        entry_uid = uuid.uuid4().hex
+        created_at = time.time()
+        with self._lock:
+            cached.entries.append((entry_uid, created_at, entry))
+            cached.appends_since_trim += 1
+            trim = cached.appends_since_trim >= TRIM_EVERY_APPENDS
+            if trim:
+                cached.appends_since_trim = 0
+        self._db.enqueue(
+            "INSERT OR IGNORE INTO session_turns (session_id, entry_uid, created_at, entry) VALUES (?, ?, ?, ?)",
+            (session_id, entry_uid, created_at, json.dumps(entry, default=str)),
+        )
+        if trim:
+            self._db.enqueue(
+                "DELETE FROM session_turns WHERE session_id = ? AND id NOT IN "
+                "(SELECT id FROM session_turns WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                (session_id, session_id, self._max_entries),
+            )
+
+    # --- Extra operations ---
+
+    def clear(self, session_id: str) -> None:
+        """Forget a session's turns (cache now, database with the next batch)."""
+        with self._lock:
+            self._cache.pop(session_id, None)
+        self._db.enqueue("DELETE FROM session_turns WHERE session_id = ?", (session_id,))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued appends are committed (tests and graceful shutdown)."""
+        return self._db.flush(timeout)
+
+    # --- Cache ---
+
+    def _cached_session(self, session_id: str) -> _CachedSession:
+        """Return the cache entry for session_id, loading (or refreshing) it from the database if needed."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(session_id)
+            if cached is not None and (self._cache_ttl is None or now - cached.loaded_at < self._cache_ttl):
+                self._cache.move_to_end(session_id)
+                return cached
+        # Read outside the lock so one slow read does not block other sessions.
+        rows = self._db.query(
+            "SELECT entry_uid, created_at, entry FROM session_turns WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, self._max_entries),
+        )
+        loaded = [(uid, created_at, json.loads(entry)) for uid, created_at, entry in reversed(rows)]
+        with self._lock:
+            current = self._cache.get(session_id)
+            if current is not None:
+                # Keep this worker's entries that the writer has not committed yet.
+                known = {uid for uid, _, _ in loaded}
+                pending = [item for item in current.entries if item[0] not in known]
+                loaded = sorted(loaded + pending, key=lambda item: item[1])
+            fresh = _CachedSession(deque(loaded, maxlen=self._max_entries), now)
+            if current is not None:
+                fresh.appends_since_trim = current.appends_since_trim
+            self._cache[session_id] = fresh
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self._cache_max_sessions:
+                self._cache.popitem(last=False)
+            return fresh
@@ -0,0 +1,254 @@
+"""
+metrics.py — In-process metrics registry (counters, histograms, collected gauges)
+
+Recording happens on the request path, so it must cost close to nothing. Each
+thread writes to its own shard (plain dicts, no lock); the lock is only taken
+when a thread records for the first time and when /metrics reads. A read sums
+all shards, so totals are exact up to writes that race with the read. Shards of
+threads that have exited are folded into one retained shard whenever a thread
+registers or /metrics reads, so short-lived threads don't accumulate shards.
+
+  - inc(name, value=1, **labels): counter.
+  - observe(name, value, **labels): histogram with fixed upper bounds
+    (DEFAULT_LATENCY_BUCKETS_MS unless histogram(name, buckets) declared others).
+  - register_collector(name, fn): fn() returns a (nested) dict of numbers read at
+    snapshot time, e.g. an existing component's stats(). Numeric leaves become
+    gauges named rotom_<name>_<path>.
+
+snapshot() returns everything as a dict; render_prometheus() renders the
+Prometheus text format. REGISTRY is the process-wide registry used by
+app.core.instrumentation and served at GET /metrics.
+"""
+
+import bisect
+import re
+import threading
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds (ms) for latency histograms; LLM round trips dominate, so the range reaches 60 s.
+DEFAULT_LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+# Upper bounds for small counts (goals per request, steps per goal).
+COUNT_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 12, 16)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+SeriesKey = Tuple[str, LabelKey]
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Shard:
+    """One thread's series. Only its owner thread writes; readers copy the dicts."""
+
+    __slots__ = ("counters", "histograms", "owner")
+
+    def __init__(self, owner: Optional[threading.Thread] = None) -> None:
+        self.counters: Dict[SeriesKey, float] = {}
+        # key -> [bucket counts (len(bounds) + 1, last is +Inf), sum, count]
+        self.histograms: Dict[SeriesKey, list] = {}
+        self.owner = weakref.ref(owner) if owner is not None else None
+
+    def retired(self) -> bool:
+        """True once the owner thread has exited (it will not write again)."""
+        if self.owner is None:
+            return False
+        thread = self.owner()
+        return thread is None or not thread.is_alive()
+
+    def merge_from(self, other: "_Shard") -> None:
+        """Add other's series into this shard (other may still be written by its owner)."""
+        for key, value in other.counters.copy().items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, (buckets, total, count) in other.histograms.copy().items():
+            merged = self.histograms.get(key)
+            if merged is None:
+                self.histograms[key] = [list(buckets), total, count]
+            else:
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+
+
+class MetricsRegistry:
+    """Per-thread sharded counters and histograms, plus collectors read at snapshot time."""
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # _shards[0] has no owner: it holds the totals of threads that have exited.
+        self._shards: List[_Shard] = [_Shard()]
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._collectors: Dict[str, Callable[[], dict]] = {}
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard(threading.current_thread())
+            self._local.shard = shard
+            with self._lock:
+                self._fold_retired()
+                self._shards.append(shard)
+        return shard
+
+    def _fold_retired(self) -> None:
+        """Merge shards of exited threads into the retained shard (caller holds the lock)."""
+        retained = self._shards[0]
+        live = [retained]
+        for shard in self._shards[1:]:
+            if shard.retired():
+                retained.merge_from(shard)
+            else:
+                live.append(shard)
+        self._shards = live
+
+    # --- Recording (hot path) ---
+
+    def histogram(self, name: str, buckets: Iterable[float]) -> None:
+        """Declare bucket upper bounds for a histogram (before its first observe)."""
+        self._buckets[name] = tuple(sorted(buckets))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        counters = self._shard().counters
+        key = (name, _label_key(labels))
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        histograms = self._shard().histograms
+        key = (name, _label_key(labels))
+        bounds = self._buckets.get(name, DEFAULT_LATENCY_BUCKETS_MS)
+        entry = histograms.get(key)
+        if entry is None:
+            entry = histograms[key] = [[0] * (len(bounds) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(bounds, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    # --- Collectors ---
+
+    def register_collector(self, name: str, fn: Callable[[], dict]) -> None:
+        """Read fn() at snapshot time (replaces any collector with the same name)."""
+        with self._lock:
+            self._collectors[name] = fn
+
+    def unregister_collector(self, name: str) -> None:
+        with self._lock:
+            self._collectors.pop(name, None)
+
+    # --- Reading ---
+
+    def snapshot(self) -> dict:
+        """{"counters": [...], "histograms": [...], "gauges": {...}} summed over all shards."""
+        total_shard = _Shard()
+        with self._lock:
+            # Folding and summing under the lock, so a retired shard is never counted twice.
+            self._fold_retired()
+            for shard in self._shards:
+                total_shard.merge_from(shard)
+            collectors = dict(self._collectors)
+        counters = total_shard.counters
+        histograms = total_shard.histograms
+        gauges: Dict[str, float] = {}
+        for name, fn in collectors.items():
+            try:
+                _flatten(f"rotom_{name}", fn(), gauges)
+            except Exception:
+                # A broken collector must not take /metrics down with it.
+                gauges[f"rotom_{_metric_name(name)}_collector_error"] = 1
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            "histograms": [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "buckets": dict(zip([*map(str, self._buckets.get(name, DEFAULT_LATENCY_BUCKETS_MS)), "+Inf"], counts)),
+                    "sum": total,
+                    "count": count,
+                }
+                for (name, labels), (counts, total, count) in sorted(histograms.items())
+            ],
+            "gauges": gauges,
+        }
+
+    def counter_value(self, name: str, **labels) -> float:
+        """Sum of one counter series across shards (tests and the per-request breakdown)."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            return sum(shard.counters.get(key, 0) for shard in self._shards)
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        snap = self.snapshot()
+        lines: List[str] = []
+        typed = set()
+        for series in snap["counters"]:
+            name = series["name"]
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_render_labels(series['labels'])} {_num(series['value'])}")
+        for series in snap["histograms"]:
+            name = series["name"]
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in series["buckets"].items():
+                cumulative += count
+                labels = dict(series["labels"], le=bound)
+                lines.append(f"{name}_bucket{_render_labels(labels)} {cumulative}")
+            lines.append(f"{name}_sum{_render_labels(series['labels'])} {_num(series['sum'])}")
+            lines.append(f"{name}_count{_render_labels(series['labels'])} {series['count']}")
+        for name, value in sorted(snap["gauges"].items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clear all recorded series (tests). Collectors and bucket declarations are kept."""
+        with self._lock:
+            for shard in self._shards:
+                shard.counters.clear()
+                shard.histograms.clear()
+
+
+def _metric_name(text: str) -> str:
+    return _INVALID_NAME_CHARS.sub("_", text)
+
+
+def _flatten(prefix: str, value, out: Dict[str, float]) -> None:
+    if isinstance(value, bool):
+        out[_metric_name(prefix)] = int(value)
+    elif isinstance(value, (int, float)):
+        out[_metric_name(prefix)] = value
+    elif isinstance(value, dict):
+        for key, inner in value.items():
+            _flatten(f"{prefix}_{key}", inner, out)
+    # Strings (e.g. a mode name) are not metrics; skip them.
+
+
+def _render_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels.items()
+    )
+    return "{" + body + "}"
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.histogram("rotom_goals_per_request", COUNT_BUCKETS)
+REGISTRY.histogram("rotom_steps_per_goal", COUNT_BUCKETS)
@@ -0,0 +1,15 @@
+"""
+Persistence helpers shared by the persistent session backends.
+
+  - SQLiteWriteBehind: one SQLite file in WAL mode with a background writer
+    thread that batches writes, plus per-thread reader connections.
+  - RedisClient / RedisPool: dependency-free RESP client with connection
+    pooling and pipelining (used by the Redis session backend).
+
+The in-process Redis stand-in used by tests lives in benchmarks/fake_redis_server.py.
+"""
+
+from app.core.persistence.redis_client import RedisClient, RedisError, RedisPool
+from app.core.persistence.sqlite_write_behind import SQLiteWriteBehind
+
+__all__ = ["RedisClient", "RedisError", "RedisPool", "SQLiteWriteBehind"]
@@ -0,0 +1,236 @@
+"""
+redis_client.py — Minimal Redis (RESP2) client with pooling and pipelining
+
+The Redis-backed session store and memory only need a handful of commands, so
+rather than adding a dependency we speak the protocol directly:
+
+  - RedisConnection: one socket; encodes commands as RESP arrays of bulk
+    strings and parses the five reply types (+simple, -error, :int, $bulk, *array).
+  - RedisPool: a bounded LIFO pool of connections shared by request threads.
+    A connection is checked out for one command or one pipeline and returned;
+    a connection that hit an I/O error is discarded instead.
+  - RedisClient.pipeline(): buffer several commands, send them in one write,
+    read all replies in one pass (one network round trip).
+
+Connecting sends AUTH and SELECT when configured and raises RedisError if the
+server refuses either, rather than carrying on unauthenticated or in db 0.
+Only plaintext redis:// URLs are supported; rediss:// (TLS) is rejected.
+
+Works against real Redis and against benchmarks.fake_redis_server (tests).
+"""
+
+import socket
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Sequence
+from urllib.parse import unquote, urlparse
+
+# Max open connections per pool; callers block briefly when all are in use.
+DEFAULT_MAX_CONNECTIONS = 16
+DEFAULT_SOCKET_TIMEOUT_SECONDS = 5.0
+
+
+class RedisError(Exception):
+    """An error reply from the server (e.g. wrong type, unknown command)."""
+
+
+def encode_command(args: Sequence[Any]) -> bytes:
+    """RESP array of bulk strings. str/int/float are sent as their text; bytes as is."""
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        else:
+            data = str(arg).encode("utf-8")
+        out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(out)
+
+
+class RedisConnection:
+    """One TCP connection. Not thread-safe: use through RedisPool."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db: int = 0,
+        password: Optional[str] = None,
+        timeout: float = DEFAULT_SOCKET_TIMEOUT_SECONDS,
+        username: Optional[str] = None,
+    ) -> None:
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+        try:
+            if password:
+                credentials = (username, password) if username else (password,)
+                self._setup("AUTH", *credentials)
+            if db:
+                self._setup("SELECT", db)
+        except BaseException:
+            self.close()
+            raise
+
+    def _setup(self, *args: Any) -> None:
+        """Run a connection setup command; an error reply raises instead of being ignored."""
+        reply = self.execute(*args)
+        if isinstance(reply, RedisError):
+            raise RedisError(f"{args[0]} failed: {reply}")
+
+    def execute(self, *args: Any) -> Any:
+        return self.execute_many([args])[0]
+
+    def execute_many(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        """Send all commands in one write, then read one reply per command. Error replies are returned, not raised."""
+        self._sock.sendall(b"".join(encode_command(c) for c in commands))
+        return [self._read_reply() for _ in commands]
+
+    def close(self) -> None:
+        try:
+            self._reader.close()
+        finally:
+            self._sock.close()
+
+    def _read_line(self) -> bytes:
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Redis connection closed")
+        return line[:-2]
+
+    def _read_reply(self) -> Any:
+        line = self._read_line()
+        kind, rest = line[:1], line[1:]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            return RedisError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Redis connection closed")
+            return data[:-2]
+        if kind == b"*":
+            count = int(rest)
+            if count < 0:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise ConnectionError(f"Unexpected Redis reply: {line[:50]!r}")
+
+
+class RedisPool:
+    """Bounded pool of RedisConnection objects for one server."""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: Optional[str] = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        timeout: float = DEFAULT_SOCKET_TIMEOUT_SECONDS,
+        username: Optional[str] = None,
+    ) -> None:
+        self.host, self.port, self.db, self.password = host, port, db, password
+        self.username = username
+        self._timeout = timeout
+        self._idle: "deque[RedisConnection]" = deque()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisPool":
+        """redis://[[username]:password@]host[:port][/db]; credentials may be percent-encoded."""
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported Redis URL scheme {parsed.scheme!r} (only redis:// is supported)")
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=db,
+            password=unquote(parsed.password) if parsed.password else None,
+            username=unquote(parsed.username) if parsed.username else None,
+            **kwargs,
+        )
+
+    @contextmanager
+    def connection(self) -> Iterator[RedisConnection]:
+        if not self._slots.acquire(timeout=self._timeout):
+            raise TimeoutError("No Redis connection available from pool")
+        conn = None
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = RedisConnection(self.host, self.port, self.db, self.password, self._timeout, self.username)
+            yield conn
+        except (OSError, ConnectionError):
+            # Socket is in an unknown state; drop it rather than returning it to the pool.
+            if conn is not None:
+                conn.close()
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                with self._lock:
+                    self._idle.append(conn)
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            while self._idle:
+                self._idle.pop().close()
+
+
+class Pipeline:
+    """Commands buffered locally and sent in one round trip by execute()."""
+
+    def __init__(self, pool: RedisPool) -> None:
+        self._pool = pool
+        self._commands: List[Sequence[Any]] = []
+
+    def command(self, *args: Any) -> "Pipeline":
+        self._commands.append(args)
+        return self
+
+    def execute(self, raise_on_error: bool = True) -> List[Any]:
+        if not self._commands:
+            return []
+        commands, self._commands = self._commands, []
+        with self._pool.connection() as conn:
+            replies = conn.execute_many(commands)
+        if raise_on_error:
+            for reply in replies:
+                if isinstance(reply, RedisError):
+                    raise reply
+        return replies
+
+
+class RedisClient:
+    """Thread-safe entry point: execute() for one command, pipeline() for batches."""
+
+    def __init__(self, pool: RedisPool) -> None:
+        self.pool = pool
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisClient":
+        return cls(RedisPool.from_url(url, **kwargs))
+
+    def execute(self, *args: Any) -> Any:
+        with self.pool.connection() as conn:
+            reply = conn.execute(*args)
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    def pipeline(self) -> Pipeline:
+        return Pipeline(self.pool)
+
+    def close(self) -> None:
+        self.pool.close()
@@ -0,0 +1,209 @@
+"""
+sqlite_write_behind.py — Shared SQLite connection manager with write-behind batching
+
+Persistent session backends (SQLiteSessionMemory, SQLiteSessionStore) must not
+make the request thread wait for a disk commit. This module owns one SQLite
+database file in WAL mode and:
+
+  - Runs a single background writer thread. Callers enqueue(sql, params) and
+    return immediately; the writer groups queued statements into one
+    transaction per batch (up to batch_max statements or flush_interval_ms).
+  - Gives each reader thread its own connection (sqlite3 connections must not
+    be shared across threads). In WAL mode readers never block the writer.
+  - flush() waits until everything enqueued so far is committed (tests, shutdown).
+
+Several uvicorn workers can open the same file: WAL allows concurrent readers
+and serializes writers via SQLite's own lock (busy_timeout makes them wait
+instead of failing).
+"""
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__, layer="core", component="sqlite_write_behind")
+
+# Max statements per transaction; bigger batches amortize commit cost.
+DEFAULT_BATCH_MAX = 256
+# How long the writer keeps collecting after the first queued statement before committing.
+DEFAULT_FLUSH_INTERVAL_MS = 50
+# How long a connection waits on SQLite's lock (another worker writing) before raising.
+BUSY_TIMEOUT_MS = 5000
+
+_STOP = object()
+
+
+class SQLiteWriteBehind:
+    """
+    One database file, one writer thread, per-thread reader connections.
+
+    Inject the same instance into every SQLite-backed store in the process so
+    all writes go through a single writer (one transaction per batch).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_max: int = DEFAULT_BATCH_MAX,
+        flush_interval_ms: int = DEFAULT_FLUSH_INTERVAL_MS,
+    ) -> None:
+        self.path = path
+        self._batch_max = batch_max
+        self._flush_interval = flush_interval_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._local = threading.local()
+        self._closed = False
+        self._batches_written = 0
+        self._statements_written = 0
+        self._write_errors = 0
+
+        # WAL is a property of the database file; set it once up front.
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.close()
+
+        self._writer = threading.Thread(target=self._writer_loop, name="sqlite-write-behind", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: autocommit; the writer opens explicit transactions per batch.
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000.0, isolation_level=None, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        # NORMAL is durable across app crashes in WAL mode; only an OS crash can lose the last commits.
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # --- Schema / reads (synchronous) ---
+
+    def execute_script(self, statements: Iterable[str]) -> None:
+        """Run schema statements synchronously (startup only, not the request path)."""
+        conn = self._connect()
+        try:
+            for statement in statements:
+                conn.execute(statement)
+        finally:
+            conn.close()
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def query(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        """Run a read query on this thread's connection and return all rows."""
+        return self._reader().execute(sql, params).fetchall()
+
+    # --- Writes (asynchronous) ---
+
+    def enqueue(self, sql: str, params: Sequence = ()) -> None:
+        """Queue a write; returns immediately. The writer thread commits it with the next batch."""
+        if self._closed:
+            raise RuntimeError("SQLiteWriteBehind is closed")
+        self._queue.put((sql, tuple(params)))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every statement enqueued before this call is committed. Returns False on timeout."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def pending(self) -> int:
+        """Approximate number of queued, not yet committed statements."""
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending(),
+            "batches_written": self._batches_written,
+            "statements_written": self._statements_written,
+            "write_errors": self._write_errors,
+        }
+
+    def close(self) -> None:
+        """Flush outstanding writes and stop the writer thread. Safe to call more than once."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join(timeout=10)
+
+    # --- Writer thread ---
+
+    def _collect_batch(self, first) -> Tuple[List[tuple], List[threading.Event], bool]:
+        """Gather statements after `first` until batch_max, the flush interval, a flush marker, or stop."""
+        statements: List[tuple] = []
+        waiters: List[threading.Event] = []
+        stop = False
+        item = first
+        deadline = time.monotonic() + self._flush_interval
+        while True:
+            if item is _STOP:
+                stop = True
+                break
+            if isinstance(item, threading.Event):
+                # Someone is waiting on flush(): commit what we have now.
+                waiters.append(item)
+                break
+            statements.append(item)
+            if len(statements) >= self._batch_max:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+        return statements, waiters, stop
+
+    def _writer_loop(self) -> None:
+        conn = self._connect()
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            statements, waiters, stop = self._collect_batch(first)
+            if stop:
+                # Drain whatever was queued before close() so nothing is lost.
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    elif item is not _STOP:
+                        statements.append(item)
+            if statements:
+                self._write_batch(conn, statements)
+            for waiter in waiters:
+                waiter.set()
+        conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, statements: List[tuple]) -> None:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for sql, params in statements:
+                conn.execute(sql, params)
+            conn.execute("COMMIT")
+            self._batches_written += 1
+            self._statements_written += len(statements)
+        except sqlite3.Error as e:
+            self._write_errors += 1
+            logger.error(
+                "SQLite write-behind batch failed",
+                extra={"event": "sqlite_batch_failed", "error": str(e), "statements": len(statements)},
+            )
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
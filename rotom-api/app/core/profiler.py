@@ -0,0 +1,297 @@
+"""
+profiler.py — On-demand sampling profiler for a single request
+
+Metrics and traces say *which* stage of a slow request pattern is slow, not
+which code inside it. For that, an admin can ask for one request to be
+profiled (POST /run with X-Rotom-Profile: 1 and X-Rotom-Admin-Token):
+AgentService runs RotomCore.handle under RequestProfiler.profile(), which
+
+  - starts a sampler thread that reads the request thread's Python stack every
+    ROTOM_PROFILE_INTERVAL_MS (default 5 ms) via sys._current_frames(); the
+    request itself runs unmodified (no sys.setprofile hooks), so the overhead
+    is the sampler's own wake-ups;
+  - splits the time into LLM wait (samples whose stack is inside an LLM client,
+    app/agents/llm: scheduler queueing and the provider round trip) and Python
+    (everything else), and reports the request thread's CPU time next to it;
+  - keeps the result in memory under a profile id (returned in the response
+    metadata as profile_id) for GET /debug/profile/{id}, as speedscope JSON
+    (https://www.speedscope.app), collapsed stacks (flamegraph.pl, inferno), or
+    a summary.
+
+Only the request thread is sampled; work handed to helper threads (speculative
+planning) shows up as the request thread waiting on it.
+
+Profiling is off unless ROTOM_PROFILE_ADMIN_TOKEN is set, and a global limit
+(ROTOM_PROFILE_MAX_PER_MINUTE, default 6; one profile at a time) bounds the
+cost; requests over the limit run normally without a profile.
+"""
+
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__, layer="core", component="profiler")
+
+DEFAULT_INTERVAL_SECONDS = 0.005
+DEFAULT_MAX_PER_MINUTE = 6
+# Finished profiles kept for retrieval (oldest dropped first).
+DEFAULT_MAX_PROFILES = 100
+# Deeper stacks keep only their innermost frames.
+MAX_STACK_DEPTH = 256
+RATE_WINDOW_SECONDS = 60.0
+
+CATEGORY_LLM_WAIT = "llm_wait"
+CATEGORY_PYTHON = "python"
+
+_THIS_FILE = __file__
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Frames from this directory mean the request is waiting on the LLM (queued or in the round trip).
+_LLM_DIR = os.path.join(_APP_DIR, "agents", "llm") + os.sep
+
+
+def _frame_label(code) -> str:
+    """'qualname (dir/file.py:line)' — the two last path parts keep __init__.py files apart."""
+    parts = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({'/'.join(parts[-2:])}:{code.co_firstlineno})"
+
+
+class Profile:
+    """Aggregated samples of one profiled call: stack -> total weight in ms."""
+
+    def __init__(self, profile_id: str, name: str, interval_ms: float) -> None:
+        self.profile_id = profile_id
+        self.name = name
+        self.interval_ms = interval_ms
+        self.started_at = time.time()
+        self.wall_ms = 0.0
+        self.cpu_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.sample_count = 0
+        # Stacks are tuples of code objects, root first; labels are built only when rendering.
+        self.stacks: Dict[tuple, float] = {}
+        self.category_ms = {CATEGORY_LLM_WAIT: 0.0, CATEGORY_PYTHON: 0.0}
+
+    def add_sample(self, stack: tuple, weight_ms: float) -> None:
+        self.sample_count += 1
+        self.stacks[stack] = self.stacks.get(stack, 0.0) + weight_ms
+        in_llm = any(code.co_filename.startswith(_LLM_DIR) for code in stack)
+        self.category_ms[CATEGORY_LLM_WAIT if in_llm else CATEGORY_PYTHON] += weight_ms
+
+    def summary(self, top: int = 10) -> dict:
+        """Time split and the hottest leaf frames (self time)."""
+        self_ms: Dict[str, float] = {}
+        for stack, weight in self.stacks.items():
+            if stack:
+                label = _frame_label(stack[-1])
+                self_ms[label] = self_ms.get(label, 0.0) + weight
+        hottest = sorted(self_ms.items(), key=lambda item: item[1], reverse=True)[:top]
+        return {
+            "profile_id": self.profile_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "wall_ms": round(self.wall_ms, 2),
+            "cpu_ms": round(self.cpu_ms, 2) if self.cpu_ms is not None else None,
+            "llm_wait_ms": round(self.category_ms[CATEGORY_LLM_WAIT], 2),
+            "python_ms": round(self.category_ms[CATEGORY_PYTHON], 2),
+            "samples": self.sample_count,
+            "interval_ms": self.interval_ms,
+            "error": self.error,
+            "top_self_ms": [{"frame": label, "ms": round(ms, 2)} for label, ms in hottest],
+        }
+
+    def to_collapsed(self) -> str:
+        """Brendan Gregg's collapsed format: 'root;child;leaf <microseconds>' per line."""
+        merged: Dict[str, float] = {}
+        for stack, weight in self.stacks.items():
+            key = ";".join(_frame_label(code) for code in stack) or "[idle]"
+            merged[key] = merged.get(key, 0.0) + weight
+        return "".join(f"{key} {int(round(ms * 1000))}\n" for key, ms in sorted(merged.items()))
+
+    def to_speedscope(self) -> dict:
+        """speedscope file format, one 'sampled' profile weighted in milliseconds."""
+        frames: List[dict] = []
+        index: Dict[object, int] = {}
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        for stack, weight in self.stacks.items():
+            row = []
+            for code in stack:
+                if code not in index:
+                    index[code] = len(frames)
+                    frames.append({
+                        "name": getattr(code, "co_qualname", code.co_name),
+                        "file": code.co_filename,
+                        "line": code.co_firstlineno,
+                    })
+                row.append(index[code])
+            samples.append(row)
+            weights.append(round(weight, 3))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.name} {self.profile_id}",
+            "exporter": "rotom-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(self.wall_ms, 3),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+class _Sampler(threading.Thread):
+    """Samples one thread's stack until stopped, stopping each stack at the profiled call's frame."""
+
+    def __init__(self, profile: Profile, thread_id: int, root_frame, interval_seconds: float) -> None:
+        super().__init__(name="request-profiler", daemon=True)
+        self.profile = profile
+        self.thread_id = thread_id
+        self.root_frame = root_frame
+        self.interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop_event.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None and frame is not self.root_frame and len(stack) < MAX_STACK_DEPTH:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            stack.reverse()
+            if stack and stack[0].co_filename == _THIS_FILE:
+                # Caught the request thread in profile() itself (stopping the sampler).
+                last = now
+                continue
+            # Weight by the real gap, so a late wake-up (GIL held by the request) isn't undercounted.
+            self.profile.add_sample(tuple(stack), (now - last) * 1000.0)
+            last = now
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class ProfileRateLimiter:
+    """At most max_per_window profiles per sliding window, and max_concurrent at once."""
+
+    def __init__(self, max_per_window: int, window_seconds: float = RATE_WINDOW_SECONDS, max_concurrent: int = 1) -> None:
+        self.max_per_window = max_per_window
+        self.window_seconds = window_seconds
+        self.max_concurrent = max_concurrent
+        self._starts: Deque[float] = deque()
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._starts and now - self._starts[0] >= self.window_seconds:
+                self._starts.popleft()
+            if self._active >= self.max_concurrent or len(self._starts) >= self.max_per_window:
+                return False
+            self._starts.append(now)
+            self._active += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
+
+
+class RequestProfiler:
+    """Admin-gated, rate-limited sampling profiles of single calls, kept by id. admin_token=None disables it."""
+
+    def __init__(
+        self,
+        admin_token: Optional[str] = None,
+        interval_seconds: float = DEFAULT_INTERVAL_SECONDS,
+        max_per_minute: int = DEFAULT_MAX_PER_MINUTE,
+        max_profiles: int = DEFAULT_MAX_PROFILES,
+    ) -> None:
+        self.admin_token = admin_token
+        self.interval_seconds = interval_seconds
+        self.max_profiles = max_profiles
+        self.limiter = ProfileRateLimiter(max_per_minute)
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.profiled = 0
+        self.rate_limited = 0
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        """ROTOM_PROFILE_ADMIN_TOKEN, ROTOM_PROFILE_INTERVAL_MS, ROTOM_PROFILE_MAX_PER_MINUTE."""
+        return cls(
+            admin_token=os.getenv("ROTOM_PROFILE_ADMIN_TOKEN") or None,
+            interval_seconds=float(os.getenv("ROTOM_PROFILE_INTERVAL_MS", "5")) / 1000.0,
+            max_per_minute=int(os.getenv("ROTOM_PROFILE_MAX_PER_MINUTE", str(DEFAULT_MAX_PER_MINUTE))),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.admin_token)
+
+    def authorized(self, token: Optional[str]) -> bool:
+        """True if profiling is enabled and token matches the admin token (constant-time compare)."""
+        if not self.enabled or not token:
+            return False
+        return hmac.compare_digest(token.encode("utf-8"), self.admin_token.encode("utf-8"))
+
+    def profile(self, fn: Callable, name: str = "request") -> Tuple[object, Optional[str]]:
+        """
+        Run fn() in this thread under the sampler; return (result, profile_id).
+        profile_id is None when the rate limit is reached (fn still runs, unprofiled).
+        If fn raises, the profile is still kept (with its error) and the exception propagates.
+        """
+        if not self.limiter.try_acquire():
+            self.rate_limited += 1
+            return fn(), None
+        profile = Profile(uuid.uuid4().hex, name, self.interval_seconds * 1000.0)
+        sampler = _Sampler(profile, threading.get_ident(), sys._getframe(), self.interval_seconds)
+        cpu_start = time.thread_time()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            return fn(), profile.profile_id
+        except BaseException as e:
+            profile.error = type(e).__name__
+            raise
+        finally:
+            sampler.stop()
+            profile.wall_ms = (time.perf_counter() - start) * 1000.0
+            profile.cpu_ms = (time.thread_time() - cpu_start) * 1000.0
+            self._store(profile)
+            self.limiter.release()
+            logger.info(
+                "Request profiled",
+                extra={"profile_id": profile.profile_id, "wall_ms": round(profile.wall_ms, 2), "samples": profile.sample_count},
+            )
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stored = len(self._profiles)
+        return {"enabled": self.enabled, "profiled": self.profiled, "rate_limited": self.rate_limited, "stored": stored}
+
+    def _store(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles[profile.profile_id] = profile
+            self.profiled += 1
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
@@ -0,0 +1,139 @@
+"""
+prompt_store.py — Hash-referenced prompt logging
+
+The agents used to log every full prompt (several KB each) at DEBUG, formatted
+eagerly on the request thread. Now they call log_prompt(logger, kind, prompt):
+
+  - Nothing happens unless the logger is enabled for DEBUG.
+  - The log line carries only the prompt's content hash and size
+    (prompt_hash / prompt_chars / prompt_kind fields).
+  - A sampled fraction of prompts (ROTOM_PROMPT_LOG_SAMPLE_RATE, default 0)
+    is written once to a content-addressed directory
+    (ROTOM_PROMPT_STORE_DIR/<hash>.txt) by a background thread, so a hash in
+    the logs can be looked up later. The same prompt is stored only once.
+
+PROMPT_STORE is configured by logging_config.setup_logging().
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import random
+import threading
+from typing import Optional
+
+# Characters of the hash used as the reference (64 bits is plenty for lookup).
+PROMPT_HASH_CHARS = 16
+# Pending writes; prompts beyond this are dropped rather than blocking the request.
+WRITE_QUEUE_MAX = 1000
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256((prompt or "").encode("utf-8")).hexdigest()[:PROMPT_HASH_CHARS]
+
+
+class PromptStore:
+    """Content-addressed prompt files written by a background thread. directory=None stores nothing."""
+
+    def __init__(self, directory: Optional[str] = None, sample_rate: float = 0.0) -> None:
+        self.directory = directory
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self._queue: "queue.Queue" = queue.Queue(maxsize=WRITE_QUEUE_MAX)
+        self._thread: Optional[threading.Thread] = None
+        # Guards the writer thread start and the stored/dropped counters (updated from several threads).
+        self._lock = threading.Lock()
+        self.stored = 0
+        self.dropped = 0
+
+    def should_store(self) -> bool:
+        return bool(self.directory) and self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def put(self, digest: str, prompt: str) -> None:
+        """Queue the prompt for writing under its hash (no-op when it already exists on disk)."""
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait((digest, prompt))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.txt")
+
+    def get(self, digest: str) -> Optional[str]:
+        """Stored prompt text for a hash, or None."""
+        if not self.directory:
+            return None
+        try:
+            with open(self.path_for(digest), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def flush(self) -> None:
+        """Write everything queued now in the calling thread (tests, shutdown)."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                self._write(*item)
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="prompt-store", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is not None:
+                self._write(*item)
+
+    def _write(self, digest: str, prompt: str) -> None:
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(prompt)
+            os.replace(tmp, path)
+        except OSError:
+            with self._lock:
+                self.dropped += 1
+            return
+        with self._lock:
+            self.stored += 1
+
+
+PROMPT_STORE = PromptStore()
+
+
+def configure_from_env() -> None:
+    """ROTOM_PROMPT_STORE_DIR and ROTOM_PROMPT_LOG_SAMPLE_RATE (0..1) configure PROMPT_STORE."""
+    PROMPT_STORE.directory = os.getenv("ROTOM_PROMPT_STORE_DIR") or None
+    PROMPT_STORE.sample_rate = max(0.0, min(1.0, float(os.getenv("ROTOM_PROMPT_LOG_SAMPLE_RATE", "0"))))
+
+
+def log_prompt(logger, kind: str, prompt: str, store: Optional[PromptStore] = None) -> None:
+    """Log a prompt by hash at DEBUG (and maybe store its text); free when DEBUG is off."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    store = store or PROMPT_STORE
+    digest = prompt_hash(prompt)
+    if store.should_store():
+        store.put(digest, prompt)
+    logger.debug(
+        "%s prompt %s (%d chars)",
+        kind,
+        digest,
+        len(prompt or ""),
+        extra={"prompt_kind": kind, "prompt_hash": digest, "prompt_chars": len(prompt or "")},
+    )
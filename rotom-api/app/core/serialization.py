@@ -0,0 +1,99 @@
+"""
+serialization.py — Shared JSON parse/dump for the request path
+
+Every /run parses several LLM JSON replies (plan builder, intent classifier,
+goal checker), dumps collected output for the response formatter, serializes
+the HTTP response, and in prod writes a JSON log line per log call. This module
+is the one place that does that work:
+
+  - loads / dumps / dumps_bytes: orjson when installed (several times faster),
+    the standard json module otherwise. dumps always returns str.
+  - strip_code_fences / loads_llm_json: LLMs often wrap JSON in ```json fences
+    or add a line of prose around it; this strips that before parsing.
+  - FastJSONResponse: FastAPI response class that renders with dumps_bytes
+    (set as the app's default_response_class in main.py).
+
+Parse errors are always json.JSONDecodeError (orjson's error subclasses it),
+so callers catch one type regardless of backend.
+"""
+
+import json
+from typing import Any, Callable, Optional
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson installed
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data: "str | bytes") -> Any:
+    """Parse JSON text (str or bytes)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any, *, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Serialize to UTF-8 JSON bytes. indent=True pretty-prints with 2 spaces."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=default, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            # e.g. non-str dict keys or ints beyond 64 bits; the stdlib handles those.
+            pass
+    return _std_dumps(obj, indent, default).encode("utf-8")
+
+
+def dumps(obj: Any, *, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Serialize to a JSON str. Output is compact unless indent=True; non-ASCII is kept as-is."""
+    if orjson is not None:
+        return dumps_bytes(obj, indent=indent, default=default).decode("utf-8")
+    return _std_dumps(obj, indent, default)
+
+
+def _std_dumps(obj: Any, indent: bool, default: Optional[Callable[[Any], Any]]) -> str:
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=default)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=default)
+
+
+def strip_code_fences(raw: Optional[str]) -> str:
+    """
+    Return the JSON part of an LLM reply: drops a surrounding ``` / ```json fence
+    and, if the text still doesn't start with { or [, any prose before the first
+    { or [ and after the matching last } or ].
+    """
+    text = (raw or "").strip()
+    if text.startswith("```"):
+        first, _, body = text.partition("\n")
+        # Single-line fence (```json {...}```): the language tag is dropped as prose below.
+        text = (body or first[3:]).rstrip()
+        if text.endswith("```"):
+            text = text[:-3]
+        text = text.strip()
+    if text and text[0] not in "{[":
+        starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+        if starts:
+            start = min(starts)
+            end = text.rfind("}" if text[start] == "{" else "]")
+            if end > start:
+                text = text[start: end + 1]
+    return text
+
+
+def loads_llm_json(raw: Optional[str]) -> Any:
+    """strip_code_fences then loads. Raises JSONDecodeError on invalid JSON."""
+    return loads(strip_code_fences(raw))
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps_bytes (orjson when available)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
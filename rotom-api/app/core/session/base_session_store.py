@@ -0,0 +1,26 @@
+"""
+base_session_store.py — Session store interface
+
+RotomCore only needs "make sure this session exists" (get) and the ability to
+reset a session (clear). Defining that contract here lets the service layer
+pick an implementation—in-process dict, SQLite, ...—without RotomCore or the
+API knowing which one is in use.
+"""
+
+from abc import ABC, abstractmethod
+
+from app.core.session.models import SessionState
+
+
+class BaseSessionStore(ABC):
+    """Maps session_id to SessionState. get() creates the session if it doesn't exist; clear() removes it."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> SessionState:
+        """Return the session for this id, creating a new SessionState if needed."""
+        pass
+
+    @abstractmethod
+    def clear(self, session_id: str) -> None:
+        """Remove the session (e.g. on logout or explicit reset)."""
+        pass
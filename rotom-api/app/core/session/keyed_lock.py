@@ -0,0 +1,93 @@
+"""
+keyed_lock.py — Per-session turn ordering
+
+Two requests for the same session_id can arrive at once (double submit, a
+client retry, parallel tabs). Each turn reads the session's context and then
+appends to it, so interleaving them would mix up the history. KeyedLocks gives
+every key its own FIFO lock: turns for one session run one at a time, in the
+order they called hold(), while different sessions never wait on each other.
+
+Locks are created on first use and dropped again when nobody holds or waits
+for them (reference counted), so this does not grow with the number of
+sessions ever seen. The bookkeeping maps are striped to avoid one hot lock.
+A turn that has to wait for its key records a "session_lock.wait" tracing span.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterator, List, Set
+
+from app.core.tracing import TRACER
+
+DEFAULT_LOCK_STRIPES = 64
+
+
+class _KeyState:
+    """Ticket lock for one key: waiters take a ticket and run when it is served."""
+
+    __slots__ = ("cond", "next_ticket", "serving", "refs", "abandoned")
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self.cond = threading.Condition(lock)
+        self.next_ticket = 0
+        self.serving = 0
+        self.refs = 0
+        # Tickets whose waiter was interrupted before its turn; skipped when reached.
+        self.abandoned: Set[int] = set()
+
+    def advance(self) -> None:
+        """Serve the next ticket that still has a waiter."""
+        self.serving += 1
+        while self.serving in self.abandoned:
+            self.abandoned.discard(self.serving)
+            self.serving += 1
+
+
+class KeyedLocks:
+    """FIFO mutual exclusion per key. Usage: `with locks.hold(session_id): ...`."""
+
+    def __init__(self, stripes: int = DEFAULT_LOCK_STRIPES) -> None:
+        stripes = max(1, stripes)
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(stripes)]
+        self._states: List[Dict[Hashable, _KeyState]] = [{} for _ in range(stripes)]
+
+    @contextmanager
+    def hold(self, key: Hashable) -> Iterator[None]:
+        index = hash(key) % len(self._locks)
+        lock, states = self._locks[index], self._states[index]
+        with lock:
+            state = states.get(key)
+            if state is None:
+                state = _KeyState(lock)
+                states[key] = state
+            state.refs += 1
+            ticket = state.next_ticket
+            state.next_ticket += 1
+        try:
+            # The wait is inside the try: if it is interrupted (KeyboardInterrupt, async
+            # exception), the ticket is abandoned below instead of blocking the key forever.
+            with lock:
+                if state.serving != ticket:
+                    with TRACER.span("session_lock.wait"):
+                        while state.serving != ticket:
+                            state.cond.wait()
+            yield
+        finally:
+            with lock:
+                if state.serving == ticket:
+                    state.advance()
+                else:
+                    state.abandoned.add(ticket)
+                state.refs -= 1
+                if state.refs == 0:
+                    del states[key]
+                else:
+                    state.cond.notify_all()
+
+    def active_keys(self) -> int:
+        """How many keys currently have a holder or waiter (for stats and tests)."""
+        total = 0
+        for lock, states in zip(self._locks, self._states):
+            with lock:
+                total += len(states)
+        return total
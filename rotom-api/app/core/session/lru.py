@@ -0,0 +1,284 @@
+"""
+lru.py — Bounded, evictable map of per-session state
+
+InMemorySessionStore and InMemorySessionMemory used plain dicts keyed by
+session_id, so every session ever seen stayed resident (a slow leak in a
+long-running container that receives many one-shot session ids). SessionLRU
+replaces those dicts with a map that:
+
+  - keeps sessions in least-recently-used order (every access moves a session
+    to the back), with a last-access timestamp and an approximate byte size;
+  - caps residency by session count and by approximate bytes, and expires
+    sessions idle longer than idle_ttl_seconds.
+
+Eviction happens only in sweep(), which a background SessionSweeper calls, so
+the request path just does O(1) dict work. Eviction counters and resident
+gauges are available from stats().
+
+StripedSessionLRU spreads sessions over several SessionLRU shards, each with
+its own lock, so concurrent requests for different sessions rarely contend.
+Caps are split across shards so the shard caps add up exactly to the global
+caps (the remainder goes one unit each to the first shards). There are never
+more shards than max_sessions, so a small cap is not inflated to one session
+per shard. LRU order is per shard rather than global—close enough for
+eviction and much cheaper under load.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+# Defaults sized for a single container; override per deployment.
+DEFAULT_MAX_SESSIONS = 100_000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_IDLE_TTL_SECONDS = 3600.0
+# Number of independently locked shards in StripedSessionLRU.
+DEFAULT_STRIPES = 16
+
+# Rough fixed cost of one resident session (dict slot, slot object, id string).
+SESSION_OVERHEAD_BYTES = 256
+
+
+def approx_size(value: Any) -> int:
+    """
+    Cheap approximate byte size of a JSON-like value (strings, numbers, dicts, lists).
+    Not exact like sys.getsizeof on a deep walk, but proportional to what we keep and
+    fast enough to call on every append.
+    """
+    if isinstance(value, str):
+        return 49 + len(value)
+    if isinstance(value, dict):
+        return 64 + sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 56 + sum(approx_size(v) for v in value)
+    return 32
+
+
+class _Slot:
+    """One resident session: its value, approximate size, and last access time."""
+
+    __slots__ = ("value", "size", "last_access")
+
+    def __init__(self, value: Any, size: int, last_access: float):
+        self.value = value
+        self.size = size
+        self.last_access = last_access
+
+
+class SessionLRU:
+    """
+    Thread-safe session_id -> value map with LRU order, byte accounting, and
+    sweep()-driven eviction. Callers report size changes with resize().
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        idle_ttl_seconds: Optional[float] = DEFAULT_IDLE_TTL_SECONDS,
+        on_evict: Optional[Callable[[str, Any], None]] = None,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._on_evict = on_evict
+        self._slots: "OrderedDict[str, _Slot]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._evicted_lru = 0
+        self._evicted_idle = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._slots
+
+    def get(self, session_id: str) -> Any:
+        """Return the value for session_id (marking it recently used), or None."""
+        with self._lock:
+            slot = self._slots.get(session_id)
+            if slot is None:
+                return None
+            slot.last_access = time.monotonic()
+            self._slots.move_to_end(session_id)
+            return slot.value
+
+    def get_or_create(self, session_id: str, factory: Callable[[], Any], size: int = 0) -> Any:
+        """Return the existing value or store factory() with the given approximate size."""
+        with self._lock:
+            slot = self._slots.get(session_id)
+            now = time.monotonic()
+            if slot is None:
+                slot = _Slot(factory(), size, now)
+                self._slots[session_id] = slot
+                self._bytes += size
+            else:
+                slot.last_access = now
+                self._slots.move_to_end(session_id)
+            return slot.value
+
+    def mutate(
+        self, session_id: str, factory: Optional[Callable[[], Any]], fn: Callable[[Any], int], size: int = 0
+    ) -> None:
+        """
+        Get or create the value and call fn(value) while holding the lock, so
+        in-place changes are atomic. fn returns the change in approximate size.
+        With factory=None a missing session is left alone (fn is not called).
+        """
+        with self._lock:
+            slot = self._slots.get(session_id)
+            now = time.monotonic()
+            if slot is None:
+                if factory is None:
+                    return
+                slot = _Slot(factory(), size, now)
+                self._slots[session_id] = slot
+                self._bytes += size
+            else:
+                slot.last_access = now
+                self._slots.move_to_end(session_id)
+            delta = fn(slot.value)
+            slot.size += delta
+            self._bytes += delta
+
+    def read(self, session_id: str, fn: Callable[[Any], Any], default: Any = None) -> Any:
+        """Return fn(value) computed under the lock (marks the session used), or default if absent."""
+        with self._lock:
+            slot = self._slots.get(session_id)
+            if slot is None:
+                return default
+            slot.last_access = time.monotonic()
+            self._slots.move_to_end(session_id)
+            return fn(slot.value)
+
+    def resize(self, session_id: str, delta: int) -> None:
+        """Adjust the approximate size of a resident session (e.g. after appending an entry)."""
+        with self._lock:
+            slot = self._slots.get(session_id)
+            if slot is not None:
+                slot.size += delta
+                self._bytes += delta
+
+    def pop(self, session_id: str) -> Any:
+        """Remove a session explicitly (not counted as an eviction). Returns its value or None."""
+        with self._lock:
+            slot = self._slots.pop(session_id, None)
+            if slot is None:
+                return None
+            self._bytes -= slot.size
+            return slot.value
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        Evict idle sessions, then least-recently-used sessions until both caps hold.
+        Returns how many sessions were evicted. Called from the background sweeper.
+        """
+        now = time.monotonic() if now is None else now
+        evicted = []
+        with self._lock:
+            # LRU order == last-access order, so idle sessions are all at the front.
+            if self.idle_ttl_seconds is not None:
+                while self._slots:
+                    session_id, slot = next(iter(self._slots.items()))
+                    if now - slot.last_access < self.idle_ttl_seconds:
+                        break
+                    self._slots.popitem(last=False)
+                    self._bytes -= slot.size
+                    self._evicted_idle += 1
+                    evicted.append((session_id, slot.value))
+            while self._slots and (len(self._slots) > self.max_sessions or self._bytes > self.max_bytes):
+                session_id, slot = self._slots.popitem(last=False)
+                self._bytes -= slot.size
+                self._evicted_lru += 1
+                evicted.append((session_id, slot.value))
+        if self._on_evict is not None:
+            for session_id, value in evicted:
+                self._on_evict(session_id, value)
+        return len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        """Resident gauges and eviction counters."""
+        with self._lock:
+            return {
+                "resident_sessions": len(self._slots),
+                "resident_bytes": self._bytes,
+                "evicted_lru": self._evicted_lru,
+                "evicted_idle": self._evicted_idle,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def _split(total: int, parts: int) -> List[int]:
+    """total split into `parts` integers that differ by at most 1 and sum to total."""
+    base, remainder = divmod(total, parts)
+    return [base + (1 if i < remainder else 0) for i in range(parts)]
+
+
+class StripedSessionLRU:
+    """
+    Same interface as SessionLRU, but sessions are hashed onto `stripes`
+    independent shards (each with its own lock and a share of the caps).
+    The stripe count is reduced to max_sessions when that is smaller.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        idle_ttl_seconds: Optional[float] = DEFAULT_IDLE_TTL_SECONDS,
+        stripes: int = DEFAULT_STRIPES,
+    ) -> None:
+        if max_sessions < 1 or max_bytes < 1:
+            raise ValueError("max_sessions and max_bytes must be at least 1")
+        stripes = max(1, min(stripes, max_sessions, max_bytes))
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._shards: List[SessionLRU] = [
+            SessionLRU(max_sessions=shard_sessions, max_bytes=shard_bytes, idle_ttl_seconds=idle_ttl_seconds)
+            for shard_sessions, shard_bytes in zip(_split(max_sessions, stripes), _split(max_bytes, stripes))
+        ]
+
+    def _shard(self, session_id: str) -> SessionLRU:
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._shard(session_id)
+
+    def get(self, session_id: str) -> Any:
+        return self._shard(session_id).get(session_id)
+
+    def get_or_create(self, session_id: str, factory: Callable[[], Any], size: int = 0) -> Any:
+        return self._shard(session_id).get_or_create(session_id, factory, size)
+
+    def mutate(
+        self, session_id: str, factory: Optional[Callable[[], Any]], fn: Callable[[Any], int], size: int = 0
+    ) -> None:
+        self._shard(session_id).mutate(session_id, factory, fn, size)
+
+    def read(self, session_id: str, fn: Callable[[Any], Any], default: Any = None) -> Any:
+        return self._shard(session_id).read(session_id, fn, default)
+
+    def resize(self, session_id: str, delta: int) -> None:
+        self._shard(session_id).resize(session_id, delta)
+
+    def pop(self, session_id: str) -> Any:
+        return self._shard(session_id).pop(session_id)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Sweep shard by shard; only one shard is locked at a time."""
+        return sum(shard.sweep(now) for shard in self._shards)
+
+    def stats(self) -> Dict[str, int]:
+        totals = {"resident_sessions": 0, "resident_bytes": 0, "evicted_lru": 0, "evicted_idle": 0}
+        for shard in self._shards:
+            shard_stats = shard.stats()
+            for key in totals:
+                totals[key] += shard_stats[key]
+        totals.update(max_sessions=self.max_sessions, max_bytes=self.max_bytes, stripes=len(self._shards))
+        return totals
@@ -0,0 +1,57 @@
+"""
+redis_store.py — Session store shared across replicas via Redis
+
+Same contract as InMemorySessionStore, but SessionState.data is a JSON string
+in Redis, so sessions survive rolling restarts and are visible to every
+replica. Keys carry a TTL that is refreshed whenever the session is used, so
+abandoned sessions expire without a sweeper.
+
+get() is one pipelined round trip: create-if-missing (SET NX), read, refresh TTL.
+"""
+
+import json
+
+from app.core.persistence import RedisClient
+from .base_session_store import BaseSessionStore
+from .models import SessionState
+
+DEFAULT_SESSION_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_KEY_PREFIX = "rotom:session:"
+
+
+class RedisSessionStore(BaseSessionStore):
+    """Maps session_id to SessionState stored in Redis. Call save() after changing state.data."""
+
+    def __init__(
+        self,
+        client: RedisClient,
+        ttl_seconds: int = DEFAULT_SESSION_TTL_SECONDS,
+        key_prefix: str = DEFAULT_KEY_PREFIX,
+    ) -> None:
+        self._client = client
+        self._ttl = ttl_seconds
+        self._prefix = key_prefix
+
+    def _key(self, session_id: str) -> str:
+        return f"{self._prefix}{session_id}"
+
+    def get(self, session_id: str) -> SessionState:
+        """Return the session for this id, creating it in Redis if needed."""
+        key = self._key(session_id)
+        _, raw, _ = (
+            self._client.pipeline()
+            .command("SET", key, "{}", "NX", "EX", self._ttl)
+            .command("GET", key)
+            .command("EXPIRE", key, self._ttl)
+            .execute()
+        )
+        data = json.loads(raw) if raw else {}
+        return SessionState(session_id=session_id, data=data)
+
+    def save(self, state: SessionState) -> None:
+        """Persist state.data (and refresh the TTL)."""
+        self._client.execute("SET", self._key(state.session_id), json.dumps(state.data, default=str), "EX", self._ttl)
+
+    def clear(self, session_id: str) -> None:
+        """Remove the session (e.g. on logout or explicit reset)."""
+        self._client.execute("DEL", self._key(session_id))
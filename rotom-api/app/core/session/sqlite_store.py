@@ -0,0 +1,93 @@
+"""
+sqlite_store.py — Persistent session store on SQLite (WAL + write-behind)
+
+Same contract as InMemorySessionStore, but sessions survive restarts and are
+visible to every uvicorn worker that opens the same database file. Lookups are
+served from an in-process LRU cache; a miss reads the row once. Creating a
+session or saving its data enqueues the write on the shared SQLiteWriteBehind,
+so the request thread never waits for a commit.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.persistence import SQLiteWriteBehind
+from .base_session_store import BaseSessionStore
+from .models import SessionState
+
+# How many SessionState objects are kept in the in-process cache.
+DEFAULT_CACHE_MAX_SESSIONS = 4096
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )""",
+)
+
+
+class SQLiteSessionStore(BaseSessionStore):
+    """Maps session_id to SessionState, persisted in SQLite. Share the SQLiteWriteBehind with SQLiteSessionMemory."""
+
+    def __init__(self, db: SQLiteWriteBehind, cache_max_sessions: int = DEFAULT_CACHE_MAX_SESSIONS) -> None:
+        self._db = db
+        self._cache_max_sessions = cache_max_sessions
+        self._cache: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db.execute_script(_SCHEMA)
+
+    def get(self, session_id: str) -> SessionState:
+        """Return the session for this id, creating (and persisting, write-behind) a new SessionState if needed."""
+        with self._lock:
+            state = self._cache.get(session_id)
+            if state is not None:
+                self._cache.move_to_end(session_id)
+                return state
+        rows = self._db.query("SELECT data FROM sessions WHERE session_id = ?", (session_id,))
+        if rows:
+            state = SessionState(session_id=session_id, data=json.loads(rows[0][0]))
+        else:
+            state = SessionState(session_id=session_id)
+            now = time.time()
+            self._db.enqueue(
+                "INSERT OR IGNORE INTO sessions (session_id, data, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                (session_id, "{}", now, now),
+            )
+        return self._remember(state)
+
+    def save(self, state: SessionState) -> None:
+        """Persist changes to state.data (write-behind)."""
+        now = time.time()
+        self._db.enqueue(
+            "INSERT INTO sessions (session_id, data, created_at, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+            (state.session_id, json.dumps(state.data, default=str), now, now),
+        )
+        self._remember(state, replace=True)
+
+    def clear(self, session_id: str) -> None:
+        """Remove the session from the cache now and from the database with the next batch."""
+        with self._lock:
+            self._cache.pop(session_id, None)
+        self._db.enqueue("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued writes are committed (tests and graceful shutdown)."""
+        return self._db.flush(timeout)
+
+    def _remember(self, state: SessionState, replace: bool = False) -> SessionState:
+        with self._lock:
+            if replace:
+                self._cache[state.session_id] = state
+            else:
+                # Another thread may have created it meanwhile; keep a single object per session.
+                state = self._cache.setdefault(state.session_id, state)
+            self._cache.move_to_end(state.session_id)
+            while len(self._cache) > self._cache_max_sessions:
+                self._cache.popitem(last=False)
+            return state
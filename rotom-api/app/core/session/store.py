@@ -5,25 +5,57 @@ This is where we keep "session identity": given a session_id from the API, we
 return (or create) a SessionState for it. We do not store conversation history
 here—that lives in the memory layer (app.core.memory). This store is
 process-local and not persistent; when the process restarts, all sessions are
-gone. A future implementation could use Redis or a DB behind the same interface.
+gone. Persistent implementations (e.g. sqlite_store.SQLiteSessionStore) share
+the BaseSessionStore interface.
+
+Sessions are held in a SessionLRU so the store cannot grow without bound: a
+background SessionSweeper evicts idle and least-recently-used sessions.
 """
 
-from typing import Dict
+from typing import Dict, Optional
+from .base_session_store import BaseSessionStore
+from .lru import (
+    DEFAULT_IDLE_TTL_SECONDS,
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MAX_SESSIONS,
+    DEFAULT_STRIPES,
+    SESSION_OVERHEAD_BYTES,
+    StripedSessionLRU,
+)
 from .models import SessionState
 
 
-class InMemorySessionStore:
+class InMemorySessionStore(BaseSessionStore):
     """Maps session_id to SessionState. get() creates the session if it doesn't exist; clear() removes it."""
 
-    def __init__(self) -> None:
-        self._sessions: Dict[str, SessionState] = {}
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        idle_ttl_seconds: Optional[float] = DEFAULT_IDLE_TTL_SECONDS,
+        stripes: int = DEFAULT_STRIPES,
+    ) -> None:
+        self._sessions = StripedSessionLRU(
+            max_sessions=max_sessions, max_bytes=max_bytes, idle_ttl_seconds=idle_ttl_seconds, stripes=stripes
+        )
 
     def get(self, session_id: str) -> SessionState:
         """Return the session for this id, creating a new SessionState if needed."""
-        if session_id not in self._sessions:
-            self._sessions[session_id] = SessionState(session_id=session_id)
-        return self._sessions[session_id]
+        # SessionState.data is usually tiny, so we charge a fixed size per session.
+        return self._sessions.get_or_create(
+            session_id,
+            lambda: SessionState(session_id=session_id),
+            size=SESSION_OVERHEAD_BYTES + len(session_id),
+        )
 
     def clear(self, session_id: str) -> None:
         """Remove the session (e.g. on logout or explicit reset)."""
-        self._sessions.pop(session_id, None)
\ No newline at end of file
+        self._sessions.pop(session_id)
+
+    def sweep(self) -> int:
+        """Evict idle / over-cap sessions. Called by the background SessionSweeper."""
+        return self._sessions.sweep()
+
+    def stats(self) -> Dict[str, int]:
+        """Resident-session gauges and eviction counters."""
+        return self._sessions.stats()
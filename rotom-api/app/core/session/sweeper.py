@@ -0,0 +1,56 @@
+"""
+sweeper.py — Background eviction for session maps
+
+The request path never evicts sessions; this daemon thread does. Every
+interval_seconds it calls sweep() on each registered target (anything with a
+sweep() method, e.g. InMemorySessionStore and InMemorySessionMemory), which
+drops idle sessions and enforces the global count/byte caps.
+"""
+
+import threading
+from typing import Iterable, List
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__, layer="core", component="session_sweeper")
+
+DEFAULT_SWEEP_INTERVAL_SECONDS = 1.0
+
+
+class SessionSweeper:
+    """Runs sweep() on its targets periodically in a daemon thread. start() once; stop() on shutdown."""
+
+    def __init__(self, targets: Iterable, interval_seconds: float = DEFAULT_SWEEP_INTERVAL_SECONDS) -> None:
+        self._targets: List = [t for t in targets if hasattr(t, "sweep")]
+        self._interval = interval_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.sweeps = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def sweep_once(self) -> int:
+        """Sweep every target now; returns the total number of evicted sessions."""
+        evicted = 0
+        for target in self._targets:
+            try:
+                evicted += target.sweep()
+            except Exception as e:
+                logger.error("Session sweep failed", extra={"event": "session_sweep_failed", "error": str(e)})
+        self.sweeps += 1
+        return evicted
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            evicted = self.sweep_once()
+            if evicted:
+                logger.debug("Session sweep evicted sessions", extra={"event": "session_sweep", "evicted": evicted})
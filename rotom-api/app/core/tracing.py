@@ -0,0 +1,388 @@
+"""
+tracing.py — Lightweight request tracing (spans via contextvars)
+
+Logs carry request_id, but they can't show the shape of a slow request. A span
+is one timed piece of work; spans nest through a contextvar, so any code that
+opens a span while another is active becomes its child, including work handed
+to helper threads with contextvars.copy_context() (speculative planning).
+
+    with TRACER.span("capability.execute", capability="echo"):
+        ...
+
+app.core.instrumentation.stage() opens a span for every stage, so RotomCore's
+steps, the LLM calls inside them, and capability execution all appear without
+extra code. The root span's trace_id is the request_id, so a trace can be
+looked up from any log line.
+
+Finished spans go to:
+  - an in-memory store of the most recent traces (GET /debug/trace/{request_id}
+    renders it as a waterfall). Spans opened outside any request (background
+    work such as memory compaction) get their own uuid trace; those are kept in
+    a separate, smaller store so they never push request traces out;
+  - optional exporters, fed by a background thread so the request never waits
+    on I/O: JsonlSpanExporter (one span per line) and OTLPHttpSpanExporter
+    (OTLP/HTTP JSON to a collector, e.g. an OpenTelemetry Collector).
+"""
+
+import contextvars
+import itertools
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from app.core.context import get_request_id
+from app.core.logger import get_logger
+from app.core.serialization import dumps
+
+logger = get_logger(__name__, layer="core", component="tracing")
+
+# How many recent traces are kept for /debug/trace, and spans per trace.
+DEFAULT_MAX_TRACES = 1000
+# Recent traces of background work (spans with no request_id), kept apart from request traces.
+DEFAULT_MAX_BACKGROUND_TRACES = 100
+DEFAULT_MAX_SPANS_PER_TRACE = 2000
+# Exporter batching.
+EXPORT_BATCH_SIZE = 256
+EXPORT_INTERVAL_SECONDS = 1.0
+EXPORT_QUEUE_MAX = 10_000
+# Width of the waterfall bar column.
+WATERFALL_WIDTH = 60
+
+current_span_ctx = contextvars.ContextVar("current_span", default=None)
+
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """One timed operation. start/end are wall-clock seconds; duration uses a monotonic clock."""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "attributes",
+        "start", "end", "duration_ms", "status", "thread", "background", "_t0",
+    )
+
+    def __init__(
+        self, trace_id: str, parent_id: Optional[str], name: str, attributes: dict, background: bool = False
+    ) -> None:
+        self.trace_id = trace_id
+        self.span_id = f"{next(_span_ids):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.end = 0.0
+        self.duration_ms = 0.0
+        self.status = "ok"
+        self.thread = threading.current_thread().name
+        # True for spans of a trace that no request started (see Tracer._record).
+        self.background = background
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def finish(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._t0) * 1000.0
+        self.end = self.start + self.duration_ms / 1000.0
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "end": self.end,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "thread": self.thread,
+            "attributes": self.attributes,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return current_span_ctx.get()
+
+
+class Tracer:
+    """Creates spans, keeps recent traces in memory, and hands finished spans to exporters."""
+
+    def __init__(
+        self,
+        max_traces: int = DEFAULT_MAX_TRACES,
+        max_spans_per_trace: int = DEFAULT_MAX_SPANS_PER_TRACE,
+        enabled: bool = True,
+        max_background_traces: int = DEFAULT_MAX_BACKGROUND_TRACES,
+    ) -> None:
+        self.enabled = enabled
+        self.max_traces = max_traces
+        self.max_background_traces = max_background_traces
+        self.max_spans_per_trace = max_spans_per_trace
+        self._lock = threading.Lock()
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._background_traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._exporters: List = []
+        self._queue: "queue.Queue" = queue.Queue(maxsize=EXPORT_QUEUE_MAX)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.dropped = 0
+
+    # --- Recording ---
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """Time the block as a child of the current span (a new trace if there is none)."""
+        if not self.enabled:
+            yield None
+            return
+        parent = current_span_ctx.get()
+        if parent is not None:
+            trace_id, parent_id, background = parent.trace_id, parent.span_id, parent.background
+        else:
+            request_id = get_request_id()
+            trace_id, parent_id, background = request_id or uuid.uuid4().hex, None, request_id is None
+        span = Span(trace_id, parent_id, name, attributes, background)
+        token = current_span_ctx.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attributes["error"] = type(e).__name__
+            raise
+        finally:
+            current_span_ctx.reset(token)
+            span.finish()
+            self._record(span)
+
+    def _record(self, span: Span) -> None:
+        if span.background:
+            traces, max_traces = self._background_traces, self.max_background_traces
+        else:
+            traces, max_traces = self._traces, self.max_traces
+        with self._lock:
+            spans = traces.get(span.trace_id)
+            if spans is None:
+                spans = traces[span.trace_id] = []
+                while len(traces) > max_traces:
+                    traces.popitem(last=False)
+            if len(spans) < self.max_spans_per_trace:
+                spans.append(span)
+        if self._exporters:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                self.dropped += 1
+
+    # --- Reading ---
+
+    def get_trace(self, trace_id: str) -> List[Span]:
+        """Finished spans of a trace, ordered by start time."""
+        with self._lock:
+            spans = list(self._traces.get(trace_id) or self._background_traces.get(trace_id, ()))
+        return sorted(spans, key=lambda s: s.start)
+
+    # --- Export ---
+
+    def has_exporter(self, kind: type, target: str) -> bool:
+        """True if an exporter of this class already writes to target (path or endpoint)."""
+        return any(
+            isinstance(e, kind) and target in (getattr(e, "path", None), getattr(e, "endpoint", None))
+            for e in self._exporters
+        )
+
+    def add_exporter(self, exporter) -> None:
+        """Register an exporter (export(list_of_span_dicts), optional shutdown()) and start the export thread."""
+        self._exporters.append(exporter)
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run_export, name="trace-exporter", daemon=True)
+            self._thread.start()
+
+    def flush(self) -> None:
+        """Export everything queued right now in the calling thread (tests, shutdown)."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._export(batch)
+
+    def shutdown(self) -> None:
+        """Stop the export thread, export what is still queued, and close the exporters."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join(timeout=EXPORT_INTERVAL_SECONDS * 5)
+        self.flush()
+        for exporter in self._exporters:
+            if hasattr(exporter, "shutdown"):
+                exporter.shutdown()
+        self._exporters = []
+
+    def _run_export(self) -> None:
+        while not self._stop.is_set():
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=EXPORT_INTERVAL_SECONDS))
+                while len(batch) < EXPORT_BATCH_SIZE:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            self._export(batch)
+
+    def _export(self, spans: List[Span]) -> None:
+        if not spans:
+            return
+        payload = [s.to_dict() for s in spans]
+        for exporter in list(self._exporters):
+            try:
+                exporter.export(payload)
+            except Exception as e:
+                logger.warning("Span export failed", extra={"event": "trace_export_failed", "error": str(e)})
+
+
+class JsonlSpanExporter:
+    """Appends one JSON object per span to a local file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans: List[dict]) -> None:
+        self._file.write("".join(dumps(s, default=str) + "\n" for s in spans))
+        self._file.flush()
+
+    def shutdown(self) -> None:
+        self._file.close()
+
+
+class OTLPHttpSpanExporter:
+    """
+    Posts spans as OTLP/HTTP JSON (ExportTraceServiceRequest) to endpoint
+    (e.g. http://localhost:4318/v1/traces). Trace ids are hex-encoded into the
+    16-byte OTLP form; non-hex request ids are hashed.
+    """
+
+    def __init__(self, endpoint: str, service_name: str = "rotom-api", timeout: float = 2.0) -> None:
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def export(self, spans: List[dict]) -> None:
+        # Imported on first export: most processes never configure an OTLP endpoint.
+        import urllib.request
+
+        body = dumps(self.to_otlp(spans), default=str).encode("utf-8")
+        request = urllib.request.Request(
+            self.endpoint, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def to_otlp(self, spans: List[dict]) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attr("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "rotom"},
+                    "spans": [self._otlp_span(s) for s in spans],
+                }],
+            }]
+        }
+
+    @staticmethod
+    def _otlp_span(span: dict) -> dict:
+        out = {
+            "traceId": _otlp_trace_id(span["trace_id"]),
+            "spanId": span["span_id"],
+            "name": span["name"],
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(int(span["start"] * 1e9)),
+            "endTimeUnixNano": str(int(span["end"] * 1e9)),
+            "attributes": [_otlp_attr(k, v) for k, v in span["attributes"].items()],
+            "status": {"code": 2 if span["status"] == "error" else 1},
+        }
+        if span["parent_id"]:
+            out["parentSpanId"] = span["parent_id"]
+        return out
+
+
+def _otlp_trace_id(trace_id: str) -> str:
+    hex_id = trace_id.replace("-", "").lower()
+    if len(hex_id) == 32 and all(c in "0123456789abcdef" for c in hex_id):
+        return hex_id
+    return uuid.uuid5(uuid.NAMESPACE_OID, trace_id).hex
+
+
+def _otlp_attr(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def stage_breakdown(spans: List[Span]) -> Dict[str, dict]:
+    """{span name: {"ms": total duration, "count": spans}}; repeated spans (classify per goal) are summed."""
+    breakdown: Dict[str, dict] = {}
+    for s in spans:
+        entry = breakdown.setdefault(s.name, {"ms": 0.0, "count": 0})
+        entry["ms"] += s.duration_ms
+        entry["count"] += 1
+    for entry in breakdown.values():
+        entry["ms"] = round(entry["ms"], 3)
+    return breakdown
+
+
+def render_waterfall(spans: List[Span], width: int = WATERFALL_WIDTH) -> str:
+    """Text waterfall: one line per span, indented by depth, with a bar placed on the trace's timeline."""
+    if not spans:
+        return ""
+    origin = min(s.start for s in spans)
+    total = max(s.end for s in spans) - origin or 1e-9
+    children: Dict[Optional[str], List[Span]] = {}
+    ids = {s.span_id for s in spans}
+    for s in spans:
+        # Spans whose parent was not recorded (e.g. still running) are shown at the top level.
+        parent = s.parent_id if s.parent_id in ids else None
+        children.setdefault(parent, []).append(s)
+
+    lines = [f"trace {spans[0].trace_id}  total {total * 1000:.1f} ms"]
+
+    def walk(parent_id: Optional[str], depth: int) -> None:
+        for s in sorted(children.get(parent_id, ()), key=lambda x: x.start):
+            offset = int((s.start - origin) / total * width)
+            length = max(1, int(round(s.duration_ms / 1000.0 / total * width)))
+            bar = " " * offset + "#" * min(length, width - offset)
+            label = ("  " * depth + s.name)[:40]
+            flag = " !" if s.status == "error" else ""
+            lines.append(f"{label:<40} {(s.start - origin) * 1000:>9.1f} {s.duration_ms:>9.1f} ms |{bar:<{width}}|{flag}")
+            walk(s.span_id, depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines) + "\n"
+
+
+def configure_from_env(tracer: "Tracer") -> None:
+    """
+    ROTOM_TRACING=off disables spans entirely. ROTOM_TRACE_JSONL_PATH adds a JSONL
+    exporter; ROTOM_TRACE_OTLP_ENDPOINT adds an OTLP/HTTP JSON exporter.
+    """
+    tracer.enabled = os.getenv("ROTOM_TRACING", "on").lower() not in ("0", "off", "false")
+    path = os.getenv("ROTOM_TRACE_JSONL_PATH")
+    if path and not tracer.has_exporter(JsonlSpanExporter, path):
+        tracer.add_exporter(JsonlSpanExporter(path))
+    endpoint = os.getenv("ROTOM_TRACE_OTLP_ENDPOINT")
+    if endpoint and not tracer.has_exporter(OTLPHttpSpanExporter, endpoint):
+        tracer.add_exporter(OTLPHttpSpanExporter(endpoint))
+
+
+TRACER = Tracer()
@@ -6,11 +6,18 @@ This file is what gets run (e.g. by uvicorn). It:
   2. Sets up logging once so every module gets consistent format and level.
   3. Creates the FastAPI app and attaches middleware that assigns each request
      a unique request_id (stored in contextvars) so logs can be traced per request.
-  4. Registers the API routes (e.g. POST /run, GET /health).
+  4. Adds admission control in front of POST /run so overload is shed early.
+  5. Optionally captures /run traffic for replay (ROTOM_CAPTURE_PATH).
+  6. Registers the API routes (e.g. POST /run, GET /health, GET /ready).
+  7. At startup, builds the AgentService in the background (and warms it up
+     with ROTOM_WARMUP=1), so uvicorn binds without waiting for it. At shutdown,
+     stops its background threads and flushes span exporters.
 
 We do not put business logic here—only wiring and configuration.
 """
 
+import atexit
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -27,19 +34,51 @@ setup_logging()
 
 from fastapi import FastAPI, Request
 from app.core.context import generate_request_id
-from app.api.routes import router
+from app.core.serialization import FastJSONResponse
+from app.api.admission import AdmissionControlMiddleware
+from app.api.capture import TrafficCapture, TrafficCaptureMiddleware
+from app.core.metrics import REGISTRY
+from app.core.tracing import TRACER
+from app.api.routes import admission_controller, router, service_provider
 
-app = FastAPI(title="Rotom AI System") # Create the FastAPI app.
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build (and optionally warm up) the service off the event loop; GET /ready turns 200 when done.
+    service_provider.start()
+    yield
+    # Stop the session sweeper and memory compactor (pending compactions finish first).
+    service_provider.shutdown()
+    # Then stop the span export thread, exporting what is queued and closing exporters.
+    TRACER.shutdown()
+
+
+# Create the FastAPI app. Responses are rendered with orjson when available (app.core.serialization).
+app = FastAPI(title="Rotom AI System", default_response_class=FastJSONResponse, lifespan=lifespan)
 
 
 # This middleware runs on every HTTP request. It generates a unique ID for the request
 # and stores it in contextvars so that logger.py can attach it to every log line
 # produced while handling this request. That makes it easy to grep logs by request.
+# The id is also returned as X-Request-ID so a client can look up GET /debug/trace/{request_id}.
 @app.middleware("http")
 async def add_request_id(request: Request, call_next):
-    generate_request_id()
+    request_id = generate_request_id()
     response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
     return response
 
 
-app.include_router(router)
\ No newline at end of file
+# Bounded in-flight work and wait queue for /run; excess requests get a fast 429
+# with Retry-After instead of piling onto the threadpool (see app.api.admission).
+app.add_middleware(AdmissionControlMiddleware, controller=admission_controller, paths=("/run",))
+
+# Opt-in JSONL capture of /run traffic (input, session, status, stage timings) for
+# benchmarks/replay.py. Added last so it is outermost and also records 429s.
+traffic_capture = TrafficCapture.from_env()
+if traffic_capture is not None:
+    app.add_middleware(TrafficCaptureMiddleware, capture=traffic_capture, paths=("/run",))
+    REGISTRY.register_collector("capture", traffic_capture.stats)
+    atexit.register(traffic_capture.flush)
+
+app.include_router(router)
@@ -9,14 +9,18 @@ layer (routes) converts this to the simple values the service expects
 """
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
 
 
 class RunRequest(BaseModel):
     """
     JSON body for /run: the user's message and an optional session id.
     When session_id is present, Rotom uses it for Phase 5 context/memory.
+    priority asks for an LLM scheduling lane; the server caps it (see
+    app.api.priority), so untrusted clients get "batch" unless they ask for
+    "background".
     """
 
     input: str
-    session_id: Optional[str] = None
\ No newline at end of file
+    session_id: Optional[str] = None
+    priority: Optional[Literal["interactive", "batch", "background"]] = None
\ No newline at end of file
@@ -8,21 +8,98 @@ classifier, reference resolver (Phase 6), and the goals-based path (plan_builder
 goal_checker, response_formatter)—and injecting them into RotomCore. RotomCore
 always uses the goals-based flow. RotomCore itself creates nothing; it only
 receives dependencies.
+
+Session backend (environment):
+  - ROTOM_SESSION_BACKEND=memory (default): in-process store and memory.
+  - ROTOM_SESSION_BACKEND=retrieval: in-process, and get_context also recalls
+    older turns similar to the current message (local embeddings, NumPy).
+  - ROTOM_SESSION_BACKEND=sqlite: SQLite in WAL mode at ROTOM_SQLITE_PATH
+    (default rotom_sessions.db), shared by all uvicorn workers.
+  - ROTOM_SESSION_BACKEND=redis: Redis at ROTOM_REDIS_URL (default
+    redis://localhost:6379/0), shared by all replicas; keys expire after
+    ROTOM_SESSION_TTL_SECONDS of inactivity (default 7 days).
+  - In-memory caps: ROTOM_SESSION_MAX_SESSIONS, ROTOM_SESSION_MAX_BYTES,
+    ROTOM_SESSION_IDLE_TTL_SECONDS (evicted by a background SessionSweeper).
+  - ROTOM_MEMORY_COMPACTION=off (default) | local | llm: fold turns older than
+    ROTOM_MEMORY_RECENT_TURNS (default 5) into a rolling summary in the background.
+    Only the memory backend supports it; with another backend it is ignored
+    with a warning.
+
+Reference resolution: ROTOM_REFERENCE_GATE=on (default) skips the resolver LLM
+call for messages with no pronoun/repeat/ellipsis markers; shadow always calls
+it and logs gate agreement; off disables the gate. ROTOM_REFERENCE_GATE_PATTERNS
+names a file of gate patterns that replaces the defaults. While the resolver runs, the
+plan is built speculatively from the raw message (ROTOM_SPECULATIVE_PLANNING=0
+disables; ROTOM_SPECULATION_WORKERS sizes the pool, default 8).
+
+LLM scheduling: all calls go through ScheduledLLMClient. ROTOM_LLM_MAX_CONCURRENCY
+(default 16) caps calls in flight; ROTOM_LLM_PER_SESSION_INFLIGHT (default 2)
+caps them per session.
+
+Idempotency: run(..., idempotency_key=...) dedupes retries. A duplicate of a
+request still running waits for it; a later duplicate gets the stored result
+for ROTOM_IDEMPOTENCY_TTL_SECONDS (default 600), with at most
+ROTOM_IDEMPOTENCY_MAX_ENTRIES (default 10000) results kept. Keys are scoped to the
+session (or to client_id when there is no session). Every caller gets its
+own copy of the result, and profile/breakdown are applied per request outside
+the deduplicated call, so they describe that request (a replay shows no LLM work).
+
+Metrics: the component stats (sessions, LLM scheduler, speculation, reference
+gate, capability cache, idempotency) are registered as collectors on the
+process metrics registry (app.core.metrics.REGISTRY), next to the stage and
+LLM series RotomCore records; GET /metrics serves them all.
+
+Tracing: every request is a trace (id = request_id) of stage, LLM, and
+capability spans, kept in memory for GET /debug/trace/{request_id}.
+ROTOM_TRACING=off disables it; ROTOM_TRACE_JSONL_PATH and
+ROTOM_TRACE_OTLP_ENDPOINT add exporters (see app.core.tracing).
+
+Profiling: run(..., profile=True) samples RotomCore.handle for that one request
+and puts the profile id in the result metadata (see app.core.profiler; enabled
+by ROTOM_PROFILE_ADMIN_TOKEN, globally rate-limited).
+
+Breakdown: run(..., breakdown=True) puts the request's cost and latency
+breakdown (per-stage wall time, LLM calls and tokens, queue waits, cache hits;
+see app.core.instrumentation.request_breakdown) in the result metadata. It is
+read from the request's trace, so it needs tracing enabled.
+
+Startup: app.api.routes does not build this at import; a ServiceProvider
+(app.services.service_provider) builds it in the background at startup, and
+optionally calls warm_up() before GET /ready reports ready.
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from app.agents.rotom_core import RotomCore
+from app.core.context import llm_priority_ctx, session_id_ctx
+from app.core.instrumentation import request_breakdown, stage
+from app.core.metrics import REGISTRY
+from app.core.profiler import RequestProfiler
+from app.core.tracing import TRACER, configure_from_env as configure_tracing
 from app.core.logger import get_logger
-from app.core.memory import InMemorySessionMemory
+from app.core.memory import InMemorySessionMemory, SQLiteSessionMemory
+from app.core.memory.compaction import ExtractiveTurnSummarizer, LLMTurnSummarizer, SessionCompactor
+from app.core.memory.redis_memory import RedisSessionMemory
+from app.core.persistence import RedisClient, SQLiteWriteBehind
 from app.core.session.store import InMemorySessionStore
+from app.core.session.redis_store import RedisSessionStore
+from app.core.session.sqlite_store import SQLiteSessionStore
+from app.core.session.keyed_lock import KeyedLocks
+from app.core.session.sweeper import SessionSweeper
+from app.services.idempotency import IdempotencyCache, request_fingerprint
 from app.capabilities.registry import CapabilityRegistry
+from app.capabilities.result_cache import CapabilityResultCache
 from app.capabilities.echo import EchoCapability
 from app.capabilities.summarizer_stub import SummarizerStubCapability
 from app.capabilities.word_count import WordCountCapability
 
 # from app.agents.llm.dummy_llm_client import DummyLLMClient
+from app.agents.llm.instrumented_llm_client import InstrumentedLLMClient
 from app.agents.llm.openai_client import OpenAIClient
+from app.agents.llm.scheduled_llm_client import ScheduledLLMClient
 from app.agents.intent_classifier import LLMIntentClassifier
-from app.agents.reference_resolver import LLMReferenceResolver
+from app.agents.reference_resolver import AnaphoraGate, GatedReferenceResolver, LLMReferenceResolver, load_patterns
 from app.agents.plan_builder import LLMPlanBuilder
 from app.agents.goal_checker import LLMGoalChecker
 from app.agents.response_formatter import LLMResponseFormatter
@@ -36,16 +113,38 @@ class AgentService:
     run(user_input, session_id=None), which delegates to rotom_core.handle(...).
     """
 
-    def __init__(self):
+    def __init__(self, llm_client=None):
+        """llm_client replaces the OpenAI provider (benchmarks, offline runs); it is still scheduled and instrumented."""
         logger.debug("Agent service initialized")
+        configure_tracing(TRACER)
+        # On-demand sampling profiles of single requests (admin-only, rate-limited).
+        self.profiler = RequestProfiler.from_env()
 
-        # Where we store session identity (and optionally other session data).
-        session_store = InMemorySessionStore()
-
-        # Phase 5: Where we store recent conversation per session for the LLM context.
-        session_memory = InMemorySessionMemory()
+        # Where we store session identity (and optionally other session data), and
+        # Phase 5: where we store recent conversation per session for the LLM context.
+        # Every LLM call goes through the scheduler: priority lanes, fair share per session.
+        # Metrics wrap the provider itself so recorded latency excludes scheduler queueing.
+        llm_client = ScheduledLLMClient(
+            InstrumentedLLMClient(llm_client if llm_client is not None else OpenAIClient()),
+            max_concurrency=int(os.getenv("ROTOM_LLM_MAX_CONCURRENCY", "16")),
+            per_session_inflight=int(os.getenv("ROTOM_LLM_PER_SESSION_INFLIGHT", "2")),
+        )
+        self.llm_client = llm_client
 
-        llm_client = OpenAIClient()
+        # Optional rolling summaries of old turns (in-memory backend only); runs on its own thread,
+        # started with the other background workers once everything else is built.
+        self.memory_compactor = self._build_memory_compactor(llm_client)
+        session_store, session_memory = self._build_session_backends()
+        self.session_store = session_store
+        self.session_memory = session_memory
+        # Results of recent requests by Idempotency-Key, so client retries don't re-run the chain.
+        self.idempotency = IdempotencyCache(
+            ttl_seconds=float(os.getenv("ROTOM_IDEMPOTENCY_TTL_SECONDS", "600")),
+            max_entries=int(os.getenv("ROTOM_IDEMPOTENCY_MAX_ENTRIES", "10000")),
+        )
+        # In-memory backends cap resident sessions; this thread does their eviction off the request path
+        # (and drops expired idempotency results).
+        self.session_sweeper = SessionSweeper([session_store, session_memory, self.idempotency])
         
         # We build capabilities here (not in the registry) so we can inject llm_client into the summarizer.
         # The registry only holds what we pass; it does not create capabilities in this path.
@@ -58,13 +157,18 @@ class AgentService:
         registry = CapabilityRegistry(capabilities=capabilities)
         tool_metadata = registry.list_metadata()
 
+        # Memoizes cacheable capabilities (e.g. summarizer) so identical calls skip the LLM.
+        self.capability_cache = CapabilityResultCache()
+
 
         intent_classifier = LLMIntentClassifier(
             llm_client=llm_client,
             tool_metadata=tool_metadata,
         )
+        self.intent_classifier = intent_classifier
         # Phase 6: Resolver rewrites user message from context before building plan.
-        reference_resolver = LLMReferenceResolver(llm_client=llm_client)
+        reference_resolver = self._build_reference_resolver(llm_client)
+        self.reference_resolver = reference_resolver
 
         # Goals-based path: always wired so RotomCore uses plan → goals → goal_checker → response_formatter.
         plan_builder = LLMPlanBuilder(llm_client=llm_client)
@@ -81,11 +185,205 @@ class AgentService:
             goal_checker=goal_checker,
             response_formatter=response_formatter,
             reference_resolver=reference_resolver,
+            capability_cache=self.capability_cache,
+            # Requests run in a threadpool; keep each session's turns in order.
+            session_locks=KeyedLocks(),
+            speculation_executor=self._build_speculation_executor(),
         )
+        # Background threads start last, so a constructor that raises above leaves none running.
+        self._start_workers()
+        self._register_metrics_collectors()
+
+    def _start_workers(self) -> None:
+        if self.memory_compactor is not None:
+            self.memory_compactor.start()
+        self.session_sweeper.start()
 
-    def run(self, user_input: str, session_id: str | None = None):
-        """Process one user message; optional session_id enables Phase 5 context/memory for that session."""
+    def shutdown(self) -> None:
+        """Stop the background workers (session sweeper, memory compactor); called at app shutdown."""
+        self.session_sweeper.stop()
+        if self.memory_compactor is not None:
+            self.memory_compactor.stop()
+        logger.info("Agent service stopped", extra={"event": "service_stopped"})
+
+    def warm_up(self, connections: int = 4) -> dict:
+        """Open pooled LLM connections and pre-render prompt templates before the first request."""
+        opened = self.llm_client.warm_up(connections)
+        self.intent_classifier.warm_up()
+        logger.info("Agent service warm-up done", extra={"event": "warmup", "llm_connections": opened})
+        return {"llm_connections": opened}
+
+    def _register_metrics_collectors(self):
+        """Expose each component's stats() through the metrics registry (read when /metrics is scraped)."""
+        REGISTRY.register_collector("sessions", self.session_stats)
+        REGISTRY.register_collector("llm_scheduler", self.llm_stats)
+        REGISTRY.register_collector("speculation", self.rotom_core.speculation_stats)
+        REGISTRY.register_collector("capability_cache", self.capability_cache.stats)
+        REGISTRY.register_collector("idempotency", self.idempotency_stats)
+        REGISTRY.register_collector("profiler", self.profiler.stats)
+        if hasattr(self.reference_resolver, "stats"):
+            REGISTRY.register_collector("reference_gate", self.reference_resolver.stats)
+        if self.memory_compactor is not None:
+            REGISTRY.register_collector("memory_compaction", self.memory_compactor.stats)
+
+    def _build_session_backends(self):
+        """Return (session_store, session_memory) for the backend selected by ROTOM_SESSION_BACKEND."""
+        backend = os.getenv("ROTOM_SESSION_BACKEND", "memory").lower()
+        if backend == "sqlite":
+            path = os.getenv("ROTOM_SQLITE_PATH", "rotom_sessions.db")
+            logger.info("Using SQLite session backend", extra={"path": path})
+            # One write-behind writer shared by both so all session writes batch together.
+            db = SQLiteWriteBehind(path)
+            return SQLiteSessionStore(db), SQLiteSessionMemory(db)
+        if backend == "redis":
+            url = os.getenv("ROTOM_REDIS_URL", "redis://localhost:6379/0")
+            ttl = int(os.getenv("ROTOM_SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+            logger.info("Using Redis session backend", extra={"url": url.split("@")[-1]})
+            # One connection pool shared by both.
+            client = RedisClient.from_url(url)
+            return RedisSessionStore(client, ttl_seconds=ttl), RedisSessionMemory(client, ttl_seconds=ttl)
+        if backend not in ("memory", "retrieval"):
+            raise ValueError(f"Unknown ROTOM_SESSION_BACKEND: {backend}")
+        # Global caps shared by store and memory (each enforces them on its own map).
+        caps = {
+            "max_sessions": int(os.getenv("ROTOM_SESSION_MAX_SESSIONS", "100000")),
+            "max_bytes": int(os.getenv("ROTOM_SESSION_MAX_BYTES", str(256 * 1024 * 1024))),
+            "idle_ttl_seconds": float(os.getenv("ROTOM_SESSION_IDLE_TTL_SECONDS", "3600")),
+        }
+        memory_kwargs = dict(caps)
+        if self.memory_compactor is not None:
+            # Keep exactly the turns RotomCore puts in context verbatim; older ones go into the summary.
+            recent_turns = int(os.getenv("ROTOM_MEMORY_RECENT_TURNS", "5"))
+            memory_kwargs.update(max_entries_per_session=recent_turns * 2, compactor=self.memory_compactor)
+        if backend == "retrieval":
+            # Imported here so NumPy is only loaded when this backend is selected.
+            from app.core.memory.retrieval import RetrievalSessionMemory
+
+            return InMemorySessionStore(**caps), RetrievalSessionMemory(**caps)
+        return InMemorySessionStore(**caps), InMemorySessionMemory(**memory_kwargs)
+
+    def _build_speculation_executor(self):
+        """Thread pool for speculative planning, or None when ROTOM_SPECULATIVE_PLANNING=0."""
+        if os.getenv("ROTOM_SPECULATIVE_PLANNING", "1").lower() in ("0", "false", "off"):
+            return None
+        workers = int(os.getenv("ROTOM_SPECULATION_WORKERS", "8"))
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="speculative-plan")
+
+    def _build_reference_resolver(self, llm_client):
+        """
+        LLM resolver behind the anaphora gate per ROTOM_REFERENCE_GATE (on | shadow | off).
+        ROTOM_REFERENCE_GATE_PATTERNS optionally points at a file of gate patterns.
+        """
+        resolver = LLMReferenceResolver(llm_client=llm_client)
+        mode = os.getenv("ROTOM_REFERENCE_GATE", "on").lower()
+        if mode == "off":
+            return resolver
+        if mode not in ("on", "shadow"):
+            raise ValueError(f"Unknown ROTOM_REFERENCE_GATE: {mode}")
+        patterns_path = os.getenv("ROTOM_REFERENCE_GATE_PATTERNS")
+        gate = AnaphoraGate(load_patterns(patterns_path)) if patterns_path else AnaphoraGate()
+        return GatedReferenceResolver(resolver, gate=gate, shadow=(mode == "shadow"))
+
+    def _build_memory_compactor(self, llm_client):
+        """Return a SessionCompactor for ROTOM_MEMORY_COMPACTION (off | local | llm), or None."""
+        mode = os.getenv("ROTOM_MEMORY_COMPACTION", "off").lower()
+        if mode == "off":
+            return None
+        backend = os.getenv("ROTOM_SESSION_BACKEND", "memory").lower()
+        if backend != "memory":
+            logger.warning(
+                "ROTOM_MEMORY_COMPACTION is only supported by the memory session backend; ignoring it",
+                extra={"event": "memory_compaction_unsupported", "backend": backend, "mode": mode},
+            )
+            return None
+        if mode == "local":
+            return SessionCompactor(ExtractiveTurnSummarizer())
+        if mode == "llm":
+            return SessionCompactor(LLMTurnSummarizer(llm_client=llm_client))
+        raise ValueError(f"Unknown ROTOM_MEMORY_COMPACTION: {mode}")
+
+    def session_stats(self) -> dict:
+        """Resident-session gauges and eviction counters for backends that track them."""
+        stats = {}
+        for name, backend in (("store", self.session_store), ("memory", self.session_memory)):
+            if hasattr(backend, "stats"):
+                stats[name] = backend.stats()
+        return stats
+
+    def llm_stats(self) -> dict:
+        """LLM scheduler stats (in-flight, per-class queue waits)."""
+        return self.llm_client.stats()
+
+    def idempotency_stats(self) -> dict:
+        """Idempotency-Key counters: executed, attached to in-flight, replayed from cache, conflicts."""
+        return self.idempotency.stats()
+
+    def run(
+        self,
+        user_input: str,
+        session_id: str | None = None,
+        priority: str | None = None,
+        idempotency_key: str | None = None,
+        profile: bool = False,
+        breakdown: bool = False,
+        client_id: str | None = None,
+    ):
+        """
+        Process one user message; optional session_id enables Phase 5 context/memory for that session.
+        priority ("interactive" | "batch" | "background") is the LLM scheduling class for this request.
+        With idempotency_key, a retry of the same request returns the original result instead of
+        running again; reusing the key for a different request raises IdempotencyConflict. Keys are
+        scoped to session_id, or to client_id (the caller's identity) for requests without a session.
+        profile=True runs the agent under the sampling profiler (callers check authorization);
+        the result metadata then carries profile_id, or profile_skipped when rate-limited.
+        breakdown=True adds metadata["breakdown"] (or breakdown_skipped when tracing is off).
+        """
         logger.debug("Agent service dispatching to agent (rotom_core)")
-        result = self.rotom_core.handle(user_input, session_id=session_id)
+        # The LLM scheduler reads these from context (they follow into helper threads via copy_context).
+        session_token = session_id_ctx.set(session_id)
+        priority_token = llm_priority_ctx.set(priority or "interactive")
+
+        def execute():
+            return self._execute(user_input, session_id, priority, idempotency_key, client_id)
+
+        try:
+            with stage("request") as request_span:
+                result = self._run_profiled(execute) if profile else execute()
+        finally:
+            llm_priority_ctx.reset(priority_token)
+            session_id_ctx.reset(session_token)
+        # Per-request metadata goes on this caller's copy, never into the idempotency cache.
+        if breakdown:
+            if request_span is None:
+                result.metadata["breakdown_skipped"] = "tracing_disabled"
+            else:
+                result.metadata["breakdown"] = request_breakdown(TRACER.get_trace(request_span.trace_id))
         logger.debug("Agent service execution completed")
+        return result
+
+    def _execute(
+        self,
+        user_input: str,
+        session_id: str | None,
+        priority: str | None,
+        idempotency_key: str | None,
+        client_id: str | None,
+    ):
+        """rotom_core.handle, deduplicated by idempotency_key (per session or client) when given."""
+        if idempotency_key:
+            fingerprint = request_fingerprint(input=user_input, session_id=session_id, priority=priority)
+            return self.idempotency.run(
+                idempotency_key,
+                fingerprint,
+                lambda: self.rotom_core.handle(user_input, session_id=session_id),
+                scope=f"session:{session_id}" if session_id else f"client:{client_id or ''}",
+            )
+        return self.rotom_core.handle(user_input, session_id=session_id)
+
+    def _run_profiled(self, execute):
+        result, profile_id = self.profiler.profile(execute, name="rotom_core.handle")
+        if profile_id is None:
+            result.metadata["profile_skipped"] = "rate_limited"
+        else:
+            result.metadata["profile_id"] = profile_id
         return result
\ No newline at end of file
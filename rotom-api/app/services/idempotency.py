@@ -0,0 +1,149 @@
+"""
+idempotency.py — Idempotency-Key handling for POST /run
+
+Clients retry /run on timeout. Without this, every retry re-runs the whole
+plan → classify → check → format chain and appends the turn to session memory
+again. With an Idempotency-Key header:
+
+  - A duplicate that arrives while the original is still running waits for
+    that execution and gets its result (or its exception).
+  - A duplicate that arrives afterwards gets the stored result, as long as it
+    is within ttl_seconds; at most max_entries results are kept (oldest
+    dropped first).
+  - Reusing a key with a different request body raises IdempotencyConflict
+    (the API maps it to 409).
+
+Keys are scoped: the same key under a different scope (the service passes the
+session, or the client when there is no session) is an unrelated entry, so two
+callers that happen to pick the same key neither conflict nor see each other's
+results.
+
+Every duplicate gets its own deep copy of the stored result, and the cache
+keeps a copy taken when the execution finished. A caller can then add
+per-request metadata to its response (e.g. a latency breakdown) without
+changing what other retries see.
+
+Failed executions are not cached: the next retry runs again. State is
+per process, like the in-memory session backends.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__, layer="service", component="idempotency")
+
+DEFAULT_TTL_SECONDS = 600.0
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+class IdempotencyConflict(Exception):
+    """The Idempotency-Key was already used for a request with a different payload."""
+
+
+def request_fingerprint(**fields: Any) -> str:
+    """Stable hash of the request fields that must match for a key to be reused."""
+    payload = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _InFlight:
+    __slots__ = ("fingerprint", "done", "result", "error", "waiters")
+
+    def __init__(self, fingerprint: str) -> None:
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class IdempotencyCache:
+    """Deduplicates executions by key: in-flight attach plus a bounded TTL result cache."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Tuple[str, str], _InFlight] = {}
+        # (scope, key) -> (fingerprint, result, expires_at); insertion order = age.
+        self._results: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        self._counts = {"executed": 0, "attached": 0, "replayed": 0, "conflicts": 0, "failed": 0}
+
+    def run(self, key: str, fingerprint: str, fn: Callable[[], Any], scope: str = "") -> Any:
+        """
+        Return fn() for the first request with this key in this scope; later
+        duplicates get copies of its result.
+        """
+        slot = (scope, key)
+        with self._lock:
+            now = time.monotonic()
+            stored = self._results.get(slot)
+            if stored is not None and stored[2] <= now:
+                del self._results[slot]
+                stored = None
+            if stored is not None:
+                self._check(key, stored[0], fingerprint)
+                self._counts["replayed"] += 1
+                return copy.deepcopy(stored[1])
+            pending = self._in_flight.get(slot)
+            owner = pending is None
+            if owner:
+                pending = _InFlight(fingerprint)
+                self._in_flight[slot] = pending
+                self._counts["executed"] += 1
+            else:
+                self._check(key, pending.fingerprint, fingerprint)
+                pending.waiters += 1
+                self._counts["attached"] += 1
+        if not owner:
+            logger.info("Duplicate request attached to in-flight execution", extra={"event": "idempotency_attach"})
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return copy.deepcopy(pending.result)
+
+        try:
+            result = fn()
+            # The stored copy is taken before the owner's caller can modify its result.
+            pending.result = copy.deepcopy(result)
+        except BaseException as e:
+            pending.error = e
+            with self._lock:
+                self._counts["failed"] += 1
+                self._in_flight.pop(slot, None)
+            pending.done.set()
+            raise
+        with self._lock:
+            self._in_flight.pop(slot, None)
+            self._results[slot] = (fingerprint, pending.result, time.monotonic() + self.ttl_seconds)
+            self._results.move_to_end(slot)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        pending.done.set()
+        return result
+
+    def sweep(self) -> int:
+        """Drop expired results; returns how many were removed."""
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            for slot in [k for k, v in self._results.items() if v[2] <= now]:
+                del self._results[slot]
+                removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counts, in_flight=len(self._in_flight), stored=len(self._results))
+
+    def _check(self, key: str, expected: str, fingerprint: str) -> None:
+        if expected != fingerprint:
+            self._counts["conflicts"] += 1
+            raise IdempotencyConflict(f"Idempotency-Key {key!r} was used with a different request")
@@ -0,0 +1,157 @@
+"""
+service_provider.py — Lazy, measured construction of the AgentService graph
+
+routes.py used to build AgentService() at import time. That imported the
+OpenAI SDK and every agent and built the whole dependency graph before uvicorn
+could bind. /health then said "ok" before the service could answer a /run.
+
+ServiceProvider builds the service on first use instead:
+
+  - get() returns the service, building it under a lock on the first call.
+    Concurrent callers wait for that one build.
+  - start() builds in a background thread so the process can bind and answer
+    /health right away. main.py calls it at startup.
+  - With warm-up enabled (ROTOM_WARMUP=1), the build is followed by
+    AgentService.warm_up(): it opens ROTOM_WARMUP_CONNECTIONS (default 4)
+    pooled LLM connections and pre-renders prompt templates, so the first
+    requests don't pay for TLS handshakes.
+  - ready is True once the service is built (and warmed, if enabled). GET /ready
+    reports it. Readiness probes should use /ready; liveness stays on /health.
+
+stats() reports the state and how long construction and warm-up took. The
+same numbers are logged once, so slow cold starts show up in deploy logs.
+shutdown() stops the built service's background workers (app shutdown).
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__, layer="service", component="service_provider")
+
+DEFAULT_WARMUP_CONNECTIONS = 4
+
+IDLE, BUILDING, WARMING, READY, FAILED = "idle", "building", "warming", "ready", "failed"
+
+
+def _build_agent_service():
+    # Imported here: this pulls in the LLM SDK and every agent, which is what startup defers.
+    from app.services.agent_service import AgentService
+
+    return AgentService()
+
+
+class ServiceProvider:
+    """Builds one service instance on demand (or in the background) and tracks readiness."""
+
+    def __init__(
+        self,
+        factory: Callable[[], object] = _build_agent_service,
+        warm_up: bool = False,
+        warmup_connections: int = DEFAULT_WARMUP_CONNECTIONS,
+    ) -> None:
+        self.factory = factory
+        self.warm_up = warm_up
+        self.warmup_connections = max(1, warmup_connections)
+        self._service = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.state = IDLE
+        self.construct_ms: Optional[float] = None
+        self.warmup_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "ServiceProvider":
+        return cls(
+            warm_up=os.getenv("ROTOM_WARMUP", "0").lower() in ("1", "true", "on"),
+            warmup_connections=int(os.getenv("ROTOM_WARMUP_CONNECTIONS", str(DEFAULT_WARMUP_CONNECTIONS))),
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def get(self):
+        """The service, built on first use. Build errors propagate to the caller (and the next call retries)."""
+        service = self._service
+        if service is not None:
+            return service
+        with self._lock:
+            if self._service is None:
+                self.state = BUILDING
+                start = time.perf_counter()
+                try:
+                    service = self.factory()
+                except Exception as e:
+                    self.state = FAILED
+                    self.error = f"{type(e).__name__}: {e}"
+                    raise
+                self.construct_ms = round((time.perf_counter() - start) * 1000.0, 3)
+                logger.info("Agent service constructed", extra={"event": "service_constructed",
+                                                                 "construct_ms": self.construct_ms})
+                self._service = service
+                # Built; with warm-up enabled it is ready only after the background warm-up.
+                self.state = WARMING if self.warm_up else READY
+            return self._service
+
+    def set(self, service) -> None:
+        """Use an already-built service (benchmarks, tests); it counts as ready."""
+        with self._lock:
+            self._service = service
+            self.state = READY
+
+    def start(self) -> None:
+        """Build (and warm up) in a background thread; safe to call more than once."""
+        with self._start_lock:
+            if self._thread is not None or self.state == READY:
+                return
+            self._thread = threading.Thread(target=self._build_and_warm, name="service-startup", daemon=True)
+            self._thread.start()
+
+    def shutdown(self) -> None:
+        """Stop the service's background workers, if it was built."""
+        service = self._service
+        if service is not None and hasattr(service, "shutdown"):
+            service.shutdown()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the background start finishes; True if the service is ready."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.ready
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "construct_ms": self.construct_ms,
+            "warmup_ms": self.warmup_ms,
+            "warm_up": self.warm_up,
+            "error": self.error,
+        }
+
+    def _build_and_warm(self) -> None:
+        try:
+            service = self.get()
+        except Exception as e:
+            logger.error("Agent service construction failed", extra={"event": "service_failed", "error": str(e)})
+            with self._start_lock:
+                self._thread = None  # let /ready retry
+            return
+        if self.ready:
+            return
+        start = time.perf_counter()
+        try:
+            service.warm_up(self.warmup_connections)
+        except Exception as e:
+            # A failed warm-up costs latency on the first requests, not correctness: still become ready.
+            logger.warning("Agent service warm-up failed", extra={"event": "warmup_failed", "error": str(e)})
+        self.warmup_ms = round((time.perf_counter() - start) * 1000.0, 3)
+        logger.info("Agent service warmed up", extra={"event": "service_warmed", "warmup_ms": self.warmup_ms,
+                                                      "connections": self.warmup_connections})
+        self.state = READY
@@ -0,0 +1,5 @@
+"""
+benchmarks — Offline performance harness for Rotom
+
+Nothing here is imported by the app. See benchmarks/README.md for usage.
+"""
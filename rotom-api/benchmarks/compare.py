@@ -0,0 +1,63 @@
+"""
+compare.py — Compare two end-to-end benchmark result files
+
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+
+Runs are matched by (mode, concurrency). For each one it prints throughput and
+request p50/p95/p99 with the relative change, then the per-stage p95 changes.
+Lower is better for latency, higher for throughput.
+"""
+
+import argparse
+import sys
+
+from app.core.serialization import loads
+
+
+def _load_runs(path: str) -> dict:
+    with open(path, "rb") as f:
+        report = loads(f.read())
+    return {(run["mode"], run["concurrency"]): run for run in report["runs"]}
+
+
+def format_change(before: float, after: float) -> str:
+    if not before:
+        return "   n/a"
+    return f"{(after - before) / before * 100.0:+6.1f}%"
+
+
+def compare(before_path: str, after_path: str) -> str:
+    """Human-readable comparison of two result files."""
+    before_runs = _load_runs(before_path)
+    after_runs = _load_runs(after_path)
+    lines = []
+    for key in sorted(before_runs.keys() & after_runs.keys()):
+        before, after = before_runs[key], after_runs[key]
+        lines.append(f"{key[0]} c={key[1]}")
+        lines.append(
+            f"  throughput   {before['throughput_rps']:9.2f} -> {after['throughput_rps']:9.2f} req/s "
+            f"{format_change(before['throughput_rps'], after['throughput_rps'])}"
+        )
+        for q in ("p50", "p95", "p99"):
+            b, a = before["latency_ms"][q], after["latency_ms"][q]
+            lines.append(f"  latency {q:4} {b:9.1f} -> {a:9.1f} ms    {format_change(b, a)}")
+        for name in sorted(before["stages_ms"].keys() & after["stages_ms"].keys()):
+            b, a = before["stages_ms"][name]["p95"], after["stages_ms"][name]["p95"]
+            lines.append(f"    {name:20} p95 {b:9.2f} -> {a:9.2f} ms {format_change(b, a)}")
+    unmatched = sorted(before_runs.keys() ^ after_runs.keys())
+    if unmatched:
+        lines.append("Only in one file: " + ", ".join(f"{m} c={c}" for m, c in unmatched))
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args(argv)
+    print(compare(args.before, args.after))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
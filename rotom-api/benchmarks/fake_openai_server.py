@@ -0,0 +1,280 @@
+"""
+fake_openai_server.py — Local OpenAI-compatible server for network-level load tests
+
+ScriptedLLMClient skips everything between RotomCore and the provider: the
+OpenAI SDK, its HTTP connection pool, timeouts, retries, and JSON decoding.
+This server implements POST /v1/chat/completions (plain and streaming) and
+GET /v1/models on localhost, so the real OpenAIClient can be pointed at it:
+
+    python -m benchmarks.fake_openai_server --port 8100 --latency lognormal:300:0.5 \\
+        --rate-limit-rate 0.02 --error-rate 0.01 --stream-chunk-delay-ms 40
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=fake uvicorn app.main:app
+
+Answers come from --rules (a JSON list of {"pattern": regex, "response": text},
+matched against the last user message, first match wins), otherwise from
+ScriptedLLMClient's canned answer for the agent that built the prompt. Per
+request, in order:
+
+  - with probability --rate-limit-rate: 429 with Retry-After (the SDK retries these);
+  - with probability --error-rate: 500;
+  - a delay drawn from --latency (time to first byte);
+  - the response; when streaming, --stream-chunk-chars per SSE chunk with
+    --stream-chunk-delay-ms between chunks (a slow stream).
+
+Connections are HTTP/1.1 keep-alive, like the real API, so pool reuse matters.
+"""
+
+import argparse
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+from app.core.serialization import dumps_bytes, loads
+from benchmarks.scripted_llm_client import DEFAULT_RESPONSES, Latency, detect_stage
+
+DEFAULT_STREAM_CHUNK_CHARS = 16
+# Rough token estimate for the usage block (the SDK and metrics only need plausible numbers).
+CHARS_PER_TOKEN = 4
+
+
+def load_rules(path: str) -> List[Tuple["re.Pattern", str]]:
+    """[{"pattern": regex, "response": text}, ...] from a JSON file."""
+    with open(path, "rb") as f:
+        return [(re.compile(rule["pattern"], re.S), rule["response"]) for rule in loads(f.read())]
+
+
+class FakeOpenAIServer:
+    """Threaded fake of the chat completions API; start() returns self, url is the base URL for the SDK."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Optional[Latency] = None,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after_seconds: float = 1.0,
+        stream_chunk_chars: int = DEFAULT_STREAM_CHUNK_CHARS,
+        stream_chunk_delay_ms: float = 0.0,
+        rules: Optional[List[Tuple["re.Pattern", str]]] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency = latency or Latency.constant(0)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_seconds = retry_after_seconds
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+        self.stream_chunk_delay_ms = stream_chunk_delay_ms
+        self.rules = rules or []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "streamed": 0, "rate_limited": 0, "errors": 0, "connections": 0}
+        self._httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, kwargs={"poll_interval": 0.1}, name="fake-openai", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] += 1
+
+    def _decide(self) -> Tuple[Optional[int], float]:
+        """(injected status or None, delay seconds) for one request."""
+        with self._lock:
+            roll = self._rng.random()
+            delay = self.latency.sample(self._rng)
+        if roll < self.rate_limit_rate:
+            return 429, 0.0
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500, 0.0
+        return None, delay
+
+    def answer(self, prompt: str) -> str:
+        for pattern, response in self.rules:
+            if pattern.search(prompt):
+                return response
+        response = DEFAULT_RESPONSES[detect_stage(prompt)]
+        return response(prompt) if callable(response) else response
+
+
+def _completion_id() -> str:
+    return f"chatcmpl-{uuid.uuid4().hex[:24]}"
+
+
+def _usage(prompt: str, content: str) -> dict:
+    prompt_tokens = max(1, len(prompt) // CHARS_PER_TOKEN)
+    completion_tokens = max(1, len(content) // CHARS_PER_TOKEN)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+
+def _handler_for(server: FakeOpenAIServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; with Nagle on, keep-alive responses stall on delayed ACKs.
+        disable_nagle_algorithm = True
+
+        def setup(self) -> None:
+            super().setup()
+            server._count("connections")
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") != "/v1/models":
+                return self._error(404, "Not found", "invalid_request_error")
+            self._json(200, {"object": "list", "data": [{"id": "fake-model", "object": "model", "owned_by": "rotom"}]})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            if self.path.rstrip("/") != "/v1/chat/completions":
+                return self._error(404, "Not found", "invalid_request_error")
+            try:
+                request = loads(body)
+                messages = request["messages"]
+            except (ValueError, KeyError, TypeError):
+                return self._error(400, "Invalid request body", "invalid_request_error")
+            server._count("requests")
+
+            status, delay = server._decide()
+            if status == 429:
+                server._count("rate_limited")
+                return self._error(429, "Rate limit reached (injected)", "rate_limit_exceeded",
+                                   headers={"Retry-After": str(server.retry_after_seconds)})
+            if status == 500:
+                server._count("errors")
+                return self._error(500, "Internal error (injected)", "server_error")
+            if delay:
+                time.sleep(delay)
+
+            user_messages = [m.get("content") or "" for m in messages if m.get("role") == "user"]
+            prompt = user_messages[-1] if user_messages else ""
+            content = server.answer(prompt)
+            model = request.get("model") or "fake-model"
+            if request.get("stream"):
+                server._count("streamed")
+                include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+                return self._stream(model, prompt, content, include_usage)
+            self._json(200, {
+                "id": _completion_id(),
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": _usage(prompt, content),
+            })
+
+        def _stream(self, model: str, prompt: str, content: str, include_usage: bool) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            completion_id, created = _completion_id(), int(time.time())
+
+            def chunk(delta: dict, finish_reason=None, usage=None) -> dict:
+                choices = [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                event = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": choices}
+                if usage:
+                    event["usage"] = usage
+                return event
+
+            self._sse(chunk({"role": "assistant", "content": ""}))
+            step = server.stream_chunk_chars
+            for start in range(0, len(content), step):
+                if server.stream_chunk_delay_ms and start:
+                    time.sleep(server.stream_chunk_delay_ms / 1000.0)
+                self._sse(chunk({"content": content[start:start + step]}))
+            self._sse(chunk({}, finish_reason="stop"))
+            if include_usage:
+                self._sse(chunk({}, usage=_usage(prompt, content)))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+
+        def _sse(self, event: dict) -> None:
+            self._write_chunk(b"data: " + dumps_bytes(event) + b"\n\n")
+
+        def _write_chunk(self, data: bytes) -> None:
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def _json(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+            data = dumps_bytes(payload)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _error(self, status: int, message: str, code: str, headers: Optional[dict] = None) -> None:
+            self._json(status, {"error": {"message": message, "type": code, "param": None, "code": code}}, headers)
+
+    return Handler
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible fake server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", default="0", help="ms | constant:ms | uniform:lo:hi | lognormal:median:sigma")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429")
+    parser.add_argument("--stream-chunk-chars", type=int, default=DEFAULT_STREAM_CHUNK_CHARS)
+    parser.add_argument("--stream-chunk-delay-ms", type=float, default=0.0, help="delay between streamed chunks")
+    parser.add_argument("--rules", default=None, help='JSON file: [{"pattern": regex, "response": text}, ...]')
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    server = FakeOpenAIServer(
+        host=args.host,
+        port=args.port,
+        latency=Latency.parse(args.latency),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_seconds=args.retry_after,
+        stream_chunk_chars=args.stream_chunk_chars,
+        stream_chunk_delay_ms=args.stream_chunk_delay_ms,
+        rules=load_rules(args.rules) if args.rules else None,
+        seed=args.seed,
+    )
+    print(f"Fake OpenAI API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+fake_redis_server.py — Tiny in-process Redis stand-in for tests and local runs
+
+Speaks enough RESP2 for the Redis session backend: strings (GET/SET with EX and
+NX, DEL, EXISTS), lists (RPUSH, LRANGE, LTRIM, LLEN), expiry (EXPIRE, TTL) and
+connection commands (PING, SELECT, AUTH, FLUSHALL). Each client connection gets
+a thread; one lock guards the keyspace. Expired keys are removed lazily when
+touched, like real Redis. With password set, AUTH checks it (other commands are
+not gated); SELECT accepts dbs 0-15 but they share one keyspace.
+
+Not for production: no persistence, no eviction, single keyspace.
+"""
+
+import socketserver
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _encode_reply(value: Any) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, _Simple):
+        return b"+%s\r\n" % value.text.encode()
+    if isinstance(value, _Error):
+        return b"-%s\r\n" % value.text.encode()
+    if isinstance(value, bool):
+        return b":%d\r\n" % int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode_reply(v) for v in value)
+    raise TypeError(f"Cannot encode {type(value)}")
+
+
+class _Simple:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class _Error:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+OK = _Simple("OK")
+WRONGTYPE = _Error("WRONGTYPE Operation against a key holding the wrong kind of value")
+
+
+class _Keyspace:
+    """Values are bytes (strings) or lists of bytes; expiry is an absolute monotonic time."""
+
+    def __init__(self, password: Optional[str] = None) -> None:
+        self.password = password
+        self.data: Dict[bytes, Any] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.lock = threading.Lock()
+
+    def _alive(self, key: bytes) -> bool:
+        deadline = self.expires.get(key)
+        if deadline is not None and time.monotonic() >= deadline:
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def run(self, args: List[bytes]) -> Any:
+        name = args[0].decode().upper()
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            return _Error(f"ERR unknown command '{name}'")
+        with self.lock:
+            return handler(*args[1:])
+
+    # --- connection ---
+
+    def cmd_ping(self, *args):
+        return args[0] if args else _Simple("PONG")
+
+    def cmd_select(self, db):
+        if not db.isdigit() or int(db) >= 16:
+            return _Error("ERR DB index is out of range")
+        return OK
+
+    def cmd_auth(self, *args):
+        if self.password is None:
+            return _Error("ERR AUTH <password> called without any password configured for the default user")
+        if args[-1].decode() != self.password:
+            return _Error("WRONGPASS invalid username-password pair or user is disabled.")
+        return OK
+
+    def cmd_flushall(self, *args):
+        self.data.clear()
+        self.expires.clear()
+        return OK
+
+    # --- keys / strings ---
+
+    def cmd_get(self, key):
+        if not self._alive(key):
+            return None
+        value = self.data[key]
+        return value if isinstance(value, bytes) else WRONGTYPE
+
+    def cmd_set(self, key, value, *options):
+        opts = [o.upper() for o in options]
+        if b"NX" in opts and self._alive(key):
+            return None
+        self.data[key] = value
+        self.expires.pop(key, None)
+        if b"EX" in opts:
+            seconds = int(options[opts.index(b"EX") + 1])
+            self.expires[key] = time.monotonic() + seconds
+        return OK
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self.data[key]
+                self.expires.pop(key, None)
+                removed += 1
+        return removed
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self._alive(key))
+
+    def cmd_expire(self, key, seconds):
+        if not self._alive(key):
+            return 0
+        self.expires[key] = time.monotonic() + int(seconds)
+        return 1
+
+    def cmd_ttl(self, key):
+        if not self._alive(key):
+            return -2
+        deadline = self.expires.get(key)
+        return -1 if deadline is None else max(0, int(round(deadline - time.monotonic())))
+
+    # --- lists ---
+
+    def _list(self, key, create=False) -> Tuple[Optional[list], Optional[_Error]]:
+        if not self._alive(key):
+            if not create:
+                return None, None
+            self.data[key] = []
+        value = self.data[key]
+        if not isinstance(value, list):
+            return None, WRONGTYPE
+        return value, None
+
+    def cmd_rpush(self, key, *values):
+        items, error = self._list(key, create=True)
+        if error:
+            return error
+        items.extend(values)
+        return len(items)
+
+    def cmd_llen(self, key):
+        items, error = self._list(key)
+        return error or len(items or [])
+
+    @staticmethod
+    def _range(length: int, start: int, stop: int) -> Tuple[int, int]:
+        if start < 0:
+            start = max(0, length + start)
+        if stop < 0:
+            stop = length + stop
+        return start, min(stop, length - 1)
+
+    def cmd_lrange(self, key, start, stop):
+        items, error = self._list(key)
+        if error:
+            return error
+        if not items:
+            return []
+        lo, hi = self._range(len(items), int(start), int(stop))
+        return items[lo: hi + 1] if lo <= hi else []
+
+    def cmd_ltrim(self, key, start, stop):
+        items, error = self._list(key)
+        if error:
+            return error
+        if items is None:
+            return OK
+        lo, hi = self._range(len(items), int(start), int(stop))
+        items[:] = items[lo: hi + 1] if lo <= hi else []
+        if not items:
+            del self.data[key]
+            self.expires.pop(key, None)
+        return OK
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        keyspace: _Keyspace = self.server.keyspace
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            self.wfile.write(_encode_reply(keyspace.run(args)))
+            self.wfile.flush()
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline command (e.g. typed into telnet): split on whitespace.
+            return line.split() or None
+        args = []
+        for _ in range(int(line[1:].strip())):
+            length = int(self.rfile.readline()[1:].strip())
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeRedisServer:
+    """Start with start() (or as a context manager); connect to url. port=0 picks a free port."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, password: Optional[str] = None) -> None:
+        self._server = _Server((host, port), _Handler)
+        self._server.keyspace = _Keyspace(password)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self._server.server_address[0]}:{self.port}/0"
+
+    def start(self) -> "FakeRedisServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, name="fake-redis", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeRedisServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
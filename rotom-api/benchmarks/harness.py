@@ -0,0 +1,207 @@
+"""
+harness.py — End-to-end load harness (RotomCore in-process, or POST /run over ASGI)
+
+Runs a fixed number of requests at a given concurrency against an AgentService
+built around a ScriptedLLMClient, and reports:
+
+  - throughput (requests/s) and errors;
+  - request latency p50/p95/p99/mean/max;
+  - per-stage time per request (p50/p95/p99), read from each request's trace:
+    every stage RotomCore records (plan_build, classify, execute, goal_check,
+    format, ...) plus llm.generate and capability.execute. A stage that runs
+    several times in one request (classify once per goal) is summed.
+
+Modes:
+  - "core": AgentService.run() on a thread pool (RotomCore.handle plus the LLM
+    scheduler, no HTTP);
+  - "http": POST /run through the real FastAPI app (middleware, admission
+    control, validation, serialization), driven in-process as an ASGI app, so
+    no server or network is involved.
+"""
+
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from app.core.context import generate_request_id
+from app.core.serialization import dumps_bytes, loads
+from app.core.tracing import TRACER, stage_breakdown
+
+MODES = ("core", "http")
+
+DEFAULT_MESSAGES = (
+    "echo hello world",
+    "count the words in 'the quick brown fox jumps over the lazy dog' then echo done",
+    "summarize 'Rotom plans goals, classifies each one and runs a capability' then count the words of the summary",
+    "echo one then echo two then echo three",
+)
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def latency_summary(values_ms: List[float]) -> dict:
+    ordered = sorted(values_ms)
+    return {
+        "count": len(ordered),
+        "p50": round(percentile(ordered, 0.50), 3),
+        "p95": round(percentile(ordered, 0.95), 3),
+        "p99": round(percentile(ordered, 0.99), 3),
+        "mean": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "max": round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+def stage_totals(request_id: str) -> Dict[str, float]:
+    """Milliseconds per span name for one request's trace (repeated spans summed)."""
+    breakdown = stage_breakdown(TRACER.get_trace(request_id))
+    return {name: entry["ms"] for name, entry in breakdown.items() if name != "request"}
+
+
+class _Collector:
+    def __init__(self) -> None:
+        self.latencies_ms: List[float] = []
+        self.stages: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, request_id: Optional[str], latency_ms: float, error: Optional[str]) -> None:
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+            return
+        self.latencies_ms.append(latency_ms)
+        if request_id:
+            for name, ms in stage_totals(request_id).items():
+                self.stages.setdefault(name, []).append(ms)
+
+    def result(self, concurrency: int, requests: int, elapsed: float) -> dict:
+        return {
+            "concurrency": concurrency,
+            "requests": requests,
+            "ok": len(self.latencies_ms),
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(self.latencies_ms) / elapsed, 3) if elapsed > 0 else 0.0,
+            "latency_ms": latency_summary(self.latencies_ms),
+            "stages_ms": {name: latency_summary(values) for name, values in sorted(self.stages.items())},
+        }
+
+
+def _message_for(i: int, messages: Sequence[str]) -> str:
+    return messages[i % len(messages)]
+
+
+def _session_for(i: int, sessions: int) -> Optional[str]:
+    return f"bench-{i % sessions}" if sessions > 0 else None
+
+
+def run_core(service, concurrency: int, requests: int, messages: Sequence[str] = DEFAULT_MESSAGES, sessions: int = 0) -> dict:
+    """Call service.run() `requests` times from `concurrency` threads."""
+    collector = _Collector()
+
+    def one(i: int) -> None:
+        request_id = generate_request_id()
+        start = time.perf_counter()
+        error = None
+        try:
+            result = service.run(_message_for(i, messages), session_id=_session_for(i, sessions))
+            if not result.success:
+                error = "unsuccessful"
+        except Exception as e:
+            error = type(e).__name__
+        collector.record(request_id, (time.perf_counter() - start) * 1000.0, error)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as pool:
+        # A fresh context per request so request ids and spans don't leak between them.
+        futures = [pool.submit(contextvars.Context().run, one, i) for i in range(requests)]
+        for future in futures:
+            future.result()
+    return collector.result(concurrency, requests, time.perf_counter() - start)
+
+
+async def _asgi_post(app, path: str, payload: dict):
+    """POST a JSON body to an ASGI app in-process; return (status, headers, body)."""
+    body = dumps_bytes(payload)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    sent = False
+    response = {"status": 0, "headers": {}, "body": b""}
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode().lower(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # Starlette sends the 500 and then re-raises for the server to log; a server would carry on.
+        response["status"] = response["status"] or 500
+    return response["status"], response["headers"], response["body"]
+
+
+def run_http(app, concurrency: int, requests: int, messages: Sequence[str] = DEFAULT_MESSAGES, sessions: int = 0) -> dict:
+    """POST /run `requests` times with at most `concurrency` in flight."""
+    collector = _Collector()
+
+    async def main() -> None:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i: int) -> None:
+            payload = {"input": _message_for(i, messages)}
+            session_id = _session_for(i, sessions)
+            if session_id:
+                payload["session_id"] = session_id
+            async with semaphore:
+                start = time.perf_counter()
+                status, headers, body = await _asgi_post(app, "/run", payload)
+                latency_ms = (time.perf_counter() - start) * 1000.0
+            error = None
+            if status != 200:
+                error = f"HTTP {status}"
+            elif not loads(body).get("success", False):
+                error = "unsuccessful"
+            collector.record(headers.get("x-request-id"), latency_ms, error)
+
+        await asyncio.gather(*(one(i) for i in range(requests)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return collector.result(concurrency, requests, time.perf_counter() - start)
+
+
+def load_http_app(service):
+    """The FastAPI app from app.main, with its AgentService replaced by `service`."""
+    from app.api import routes
+    from app.main import app
+
+    routes.service_provider.set(service)
+    return app
@@ -0,0 +1,340 @@
+"""
+micro.py — Microbenchmarks for per-goal orchestration overhead
+
+Everything RotomCore does between LLM calls is Python work that runs once per
+goal (or per turn): building the classifier context, normalising the plan,
+validating arguments, reading session memory, building each agent's prompt,
+constructing CapabilityResult. Each case below times one such function on
+large inputs (8K-char messages, 12-goal plans, long sessions). Timings are
+process CPU time, so time slices lost to other processes on a busy machine
+don't count.
+
+Absolute microseconds depend on the machine, so they are not what gets
+compared. A fixed pure-Python calibration loop (string formatting, splitting,
+dict building: the same kind of work as the cases) is timed alternately with
+each case, and the case is stored as its ratio to the loop (median over
+rounds). A faster or slower machine, or a burst of load, moves both sides, and
+the ratios stay put.
+
+Baselines (ratios, plus the raw microseconds for reference) live in
+benchmarks/baselines/micro.json. The regression gate fails when a case's ratio
+is more than ROTOM_BENCH_MAX_REGRESSION_PCT (default 50) percent above its
+baseline. It runs with the test suite by default (ROTOM_BENCH_GATE=0 skips it):
+
+    python -m benchmarks.micro                      # table vs baseline, exit 1 on regression
+    python -m benchmarks.micro --update-baseline    # re-record after an intended change
+    python -m pytest tests/test_microbenchmarks.py
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import timeit
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.agents.goal_checker.llm_goal_checker import LLMGoalChecker
+from app.agents.intent_classifier.llm_intent_classifier import LLMIntentClassifier
+from app.agents.plan_builder.llm_plan_builder import LLMPlanBuilder
+from app.agents.reference_resolver.llm_reference_resolver import LLMReferenceResolver
+from app.agents.response_formatter.llm_response_formatter import LLMResponseFormatter
+from app.agents.rotom_core import RotomCore
+from app.capabilities.echo import EchoCapability
+from app.capabilities.registry import CapabilityRegistry
+from app.capabilities.summarizer_stub import SummarizerStubCapability
+from app.capabilities.word_count import WordCountCapability
+from app.core.artifacts import ArtifactStore
+from app.core.memory import InMemorySessionMemory
+from app.core.serialization import dumps, loads
+from app.core.session.store import InMemorySessionStore
+from app.models.capability_result import CapabilityResult
+from benchmarks.scripted_llm_client import ScriptedLLMClient
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "micro.json")
+DEFAULT_MAX_REGRESSION_PCT = 50.0
+ROUNDS = 7
+# Each round times each side for at least this long (the loop count doubles until it does).
+MIN_ROUND_SECONDS = 0.01
+
+# See run_relative().
+ALLOCATOR_WARMUP_BYTES = 4 * 1024 * 1024
+
+MESSAGE_CHARS = 8000
+PLAN_GOALS = 12
+SESSION_TURNS = 200
+
+Case = Callable[[], Callable[[], object]]
+
+
+def _message(chars: int = MESSAGE_CHARS) -> str:
+    words = "the quick brown fox jumps over the lazy dog and keeps running through the field "
+    return (words * (chars // len(words) + 1))[:chars]
+
+
+def _raw_plan() -> list:
+    """12 goals, mixing plain strings with artifact-passing objects, as plan builders return them."""
+    plan = []
+    for i in range(PLAN_GOALS):
+        if i % 3 == 0:
+            plan.append(f"  get word count of part {i} of the original text and output it  ")
+        elif i % 3 == 1:
+            plan.append({"goal": f"summarize part {i} of the original text", "store_output_as": f"summary_{i}"})
+        else:
+            plan.append({"goal": f"count the words of summary {i - 1}", "use_from_memory": [f"summary_{i - 1}"]})
+    return plan
+
+
+def _core() -> RotomCore:
+    """A RotomCore whose agents are never called; only its helpers are timed."""
+    return RotomCore(
+        intent_classifier=None,
+        registry=_registry(),
+        session_store=InMemorySessionStore(),
+        session_memory=InMemorySessionMemory(),
+        plan_builder=None,
+        goal_checker=None,
+        response_formatter=None,
+    )
+
+
+def _registry() -> CapabilityRegistry:
+    return CapabilityRegistry(capabilities=[EchoCapability(), SummarizerStubCapability(), WordCountCapability()])
+
+
+def _output_data(artifacts: ArtifactStore) -> Tuple[list, list]:
+    """Outputs of 11 finished goals of a 12-goal plan, each a full 8K-char result."""
+    output_data, handles = [], []
+    for i in range(PLAN_GOALS - 1):
+        text = _message()
+        handles.append(artifacts.put(text, name=f"summary_{i}"))
+        output_data.append({"goal": f"goal {i}", "capability": "summarizer_stub", "output": text[:4000]})
+    return output_data, handles
+
+
+def case_goal_step_context_previous_output() -> Callable[[], object]:
+    core, artifacts = _core(), ArtifactStore()
+    output_data, handles = _output_data(artifacts)
+    step = {"goal": "count the words of the previous result"}
+    original = _message()[:3500]
+    return lambda: core._build_goal_step_context(step, original, output_data, artifacts, handles)
+
+
+def case_goal_step_context_use_from_memory() -> Callable[[], object]:
+    core, artifacts = _core(), ArtifactStore()
+    output_data, handles = _output_data(artifacts)
+    step = {"goal": "combine the summaries", "use_from_memory": ["summary_1", "summary_4", "summary_7"]}
+    original = _message()[:3500]
+    return lambda: core._build_goal_step_context(step, original, output_data, artifacts, handles)
+
+
+def case_normalize_plan_12_goals() -> Callable[[], object]:
+    core, plan = _core(), _raw_plan()
+    return lambda: core._normalize_plan_to_steps(plan)
+
+
+def case_validate_arguments() -> Callable[[], object]:
+    core, capability = _core(), WordCountCapability()
+    arguments = {"text": _message()}
+    return lambda: core._validate_arguments("word_count", capability, arguments)
+
+
+def case_memory_get_context_long_session() -> Callable[[], object]:
+    memory = InMemorySessionMemory()
+    for i in range(SESSION_TURNS):
+        memory.append("s", {"role": "user", "content": _message()})
+        memory.append("s", {"role": "assistant", "capability": "echo", "success": True, "output_summary": _message(200)})
+    return lambda: memory.get_context("s", max_turns=5)
+
+
+def case_memory_append_8k() -> Callable[[], object]:
+    memory = InMemorySessionMemory()
+    entry = {"role": "user", "content": _message()}
+    return lambda: memory.append("s", entry)
+
+
+def case_prompt_plan_builder() -> Callable[[], object]:
+    builder, message = LLMPlanBuilder(ScriptedLLMClient()), _message()
+    return lambda: builder._build_prompt(message)
+
+
+def case_prompt_intent_classifier() -> Callable[[], object]:
+    classifier = LLMIntentClassifier(ScriptedLLMClient(), _registry().list_metadata())
+    goal, context = "count the words of the original text", _message()[:3500]
+    return lambda: classifier._build_prompt(goal, context=context)
+
+
+def case_prompt_goal_checker() -> Callable[[], object]:
+    checker = LLMGoalChecker(ScriptedLLMClient())
+    result = CapabilityResult(capability="summarizer_stub", output=_message(), success=True, metadata={})
+    return lambda: checker._build_prompt("summarize the original text", "summarizer_stub", result)
+
+
+def case_prompt_response_formatter() -> Callable[[], object]:
+    formatter = LLMResponseFormatter(ScriptedLLMClient())
+    output_data, _ = _output_data(ArtifactStore())
+    goals = [f"goal {i}" for i in range(PLAN_GOALS)]
+    message = _message()
+    return lambda: formatter._build_prompt(message, output_data, goals)
+
+
+def case_prompt_reference_resolver() -> Callable[[], object]:
+    resolver = LLMReferenceResolver(ScriptedLLMClient())
+    memory = case_memory_get_context_long_session()
+    context = memory()
+    return lambda: resolver._build_prompt("do that again", context)
+
+
+def case_capability_result_construction() -> Callable[[], object]:
+    output = _message()
+    return lambda: CapabilityResult(
+        capability="summarizer_stub",
+        output=output,
+        success=True,
+        metadata={"execution_time_ms": 1.25, "cache_hit": False},
+        session_id="s",
+    )
+
+
+CASES: Dict[str, Case] = {
+    name[len("case_"):]: fn for name, fn in sorted(globals().items()) if name.startswith("case_") and callable(fn)
+}
+
+
+def calibration_loop() -> object:
+    """Fixed reference workload; case timings are reported relative to it."""
+    parts = [f"goal {i}: {'word ' * (i % 8)}" for i in range(120)]
+    text = "\n".join(parts)
+    counts: Dict[str, int] = {}
+    for word in text.split():
+        counts[word] = counts.get(word, 0) + 1
+    return sorted(counts.items())
+
+
+def measure_relative(
+    fn: Callable[[], object], rounds: int = ROUNDS, min_round_seconds: float = MIN_ROUND_SECONDS
+) -> Tuple[float, float, float]:
+    """
+    Returns (ratio, us_per_call, calibration_us). Each round times the calibration
+    loop and then fn back to back; ratio is the median of the per-round ratios,
+    so a slowdown that hits both halves of a round cancels out.
+    """
+    # CPU time of this process, so time slices lost to other processes on a busy runner don't count.
+    timers = [timeit.Timer(calibration_loop, timer=time.process_time), timeit.Timer(fn, timer=time.process_time)]
+    numbers = []
+    for timer in timers:
+        number = 1
+        while timer.timeit(number) < min_round_seconds:
+            number *= 2
+        numbers.append(number)
+    samples = []
+    for _ in range(rounds):
+        samples.append(tuple(timer.timeit(number) / number * 1e6 for timer, number in zip(timers, numbers)))
+    ratio = statistics.median(us / calibration_us for calibration_us, us in samples)
+    return ratio, min(us for _, us in samples), min(calibration_us for calibration_us, _ in samples)
+
+
+def _settle_allocator() -> None:
+    """
+    Allocate and free one large block so the allocator is in the same state in every
+    process (glibc raises its mmap threshold after such a free). Otherwise cases that
+    build ~40 KB strings time 2x apart depending on what the process allocated before.
+    """
+    block = bytearray(ALLOCATOR_WARMUP_BYTES)
+    del block
+
+
+def run_relative(
+    names: Optional[List[str]] = None, **measure_kwargs
+) -> Tuple[Dict[str, float], Dict[str, float], float]:
+    """Returns ({case: ratio}, {case: us_per_call}, calibration_us) for the given cases (all by default)."""
+    _settle_allocator()
+    relative, results, calibrations = {}, {}, []
+    for name in names or CASES:
+        relative[name], results[name], calibration_us = measure_relative(CASES[name](), **measure_kwargs)
+        calibrations.append(calibration_us)
+    return relative, results, statistics.median(calibrations)
+
+
+def _load_payload(path: str) -> dict:
+    try:
+        with open(path, "rb") as f:
+            return loads(f.read())
+    except FileNotFoundError:
+        return {}
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, float]:
+    """{case: ratio to the calibration loop} from the baseline file."""
+    return _load_payload(path).get("relative", {})
+
+
+def save_baseline(
+    relative: Dict[str, float], us_per_call: Dict[str, float], calibration_us: float, path: str = BASELINE_PATH
+) -> None:
+    """Write ratios (what the gate compares) and the raw timings of this run (for reference only)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = {
+        "relative": {name: round(ratio, 5) for name, ratio in sorted(relative.items())},
+        "calibration_us": round(calibration_us, 3),
+        "us_per_call": {name: round(us, 3) for name, us in sorted(us_per_call.items())},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(dumps(payload, indent=True) + "\n")
+
+
+def max_regression_pct() -> float:
+    return float(os.getenv("ROTOM_BENCH_MAX_REGRESSION_PCT", str(DEFAULT_MAX_REGRESSION_PCT)))
+
+
+def regressions(results: Dict[str, float], baseline: Dict[str, float], max_pct: float) -> List[str]:
+    """One message per case whose ratio exceeds baseline by more than max_pct percent (new cases pass)."""
+    failures = []
+    for name, ratio in sorted(results.items()):
+        base = baseline.get(name)
+        if base and ratio > base * (1.0 + max_pct / 100.0):
+            failures.append(
+                f"{name}: {ratio:.3f}x vs baseline {base:.3f}x (+{(ratio / base - 1.0) * 100.0:.0f}% > {max_pct:.0f}%)"
+            )
+    return failures
+
+
+def gate_failures(
+    relative: Dict[str, float], baseline: Dict[str, float], max_pct: float, **measure_kwargs
+) -> List[str]:
+    """regressions(), with failing cases timed once more; only a case that fails both times counts."""
+    suspects = [line.split(":", 1)[0] for line in regressions(relative, baseline, max_pct)]
+    if not suspects:
+        return []
+    retried, _, _ = run_relative(suspects, **measure_kwargs)
+    return regressions(retried, baseline, max_pct)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Orchestration microbenchmarks.")
+    parser.add_argument("cases", nargs="*", help=f"subset of: {', '.join(CASES)}")
+    parser.add_argument("--update-baseline", action="store_true", help="record these results as the baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    args = parser.parse_args(argv)
+
+    relative, results, calibration_us = run_relative(args.cases or None)
+    baseline = load_baseline(args.baseline)
+    print(f"{'calibration loop':40} {calibration_us:10.2f} us")
+    for name, us in results.items():
+        base = baseline.get(name)
+        delta = f"{(relative[name] / base - 1.0) * 100.0:+6.1f}%" if base else "    new"
+        print(f"{name:40} {us:10.2f} us  {relative[name]:8.3f}x  {delta}")
+    if args.update_baseline:
+        # A partial run keeps the stored entries of the cases it didn't time.
+        stored_us = _load_payload(args.baseline).get("us_per_call", {})
+        save_baseline({**baseline, **relative}, {**stored_us, **results}, calibration_us, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    failures = gate_failures(relative, baseline, max_regression_pct())
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+replay.py — Time-scaled replay of captured /run traffic, and build-vs-build reports
+
+A capture (ROTOM_CAPTURE_PATH, see app.api.capture) holds real requests with
+their timestamps, sessions, and shapes. Replay re-issues it against a running
+build at N× speed and records what happened:
+
+    python -m benchmarks.replay run capture.jsonl --target http://127.0.0.1:8000 \\
+        --speed 10 --output benchmarks/results/replay-main.json
+    python -m benchmarks.replay run capture.jsonl --target http://127.0.0.1:8001 \\
+        --speed 10 --output benchmarks/results/replay-branch.json
+    python -m benchmarks.replay compare benchmarks/results/replay-main.json \\
+        benchmarks/results/replay-branch.json
+
+Scheduling: request i is due at (ts_i - ts_0) / speed seconds after start.
+Requests of one session are sent strictly in captured order, each one only
+after the previous one has finished, because turn N+1 reads the memory
+that turn N wrote. Requests without a session are independent. If the target
+falls behind, requests go out late rather than out of order. late_ms records
+how late each one was, so an overloaded replay is visible in the report.
+
+The report groups latency by the request's captured shape: the number of LLM
+calls it made in production (stages["llm.generate"].count), so a change that
+helps short requests but hurts 12-goal plans shows up.
+"""
+
+import argparse
+import http.client
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.serialization import dumps, dumps_bytes, loads
+from benchmarks.compare import format_change
+from benchmarks.harness import latency_summary
+
+DEFAULT_MAX_WORKERS = 256
+DEFAULT_TIMEOUT_SECONDS = 120.0
+
+# (record) -> (status, latency_ms, request_id)
+Sender = Callable[[dict], Tuple[int, float, Optional[str]]]
+
+
+def load_capture(path: str, only_ok: bool = True) -> List[dict]:
+    """Captured records in timestamp order; by default only requests that succeeded when captured."""
+    records = []
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = loads(line)
+            if not isinstance(record.get("input"), str):
+                continue
+            if only_ok and record.get("status") != 200:
+                continue
+            records.append(record)
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+
+def llm_calls(record: dict) -> int:
+    """Shape of a captured request: how many LLM calls it made when captured."""
+    return int(((record.get("stages") or {}).get("llm.generate") or {}).get("count", 0))
+
+
+def plan_groups(records: List[dict], speed: float) -> List[List[Tuple[float, int, dict]]]:
+    """
+    Split records into ordered groups of (due_seconds, index, record): one group per
+    session (kept in captured order), and one group per request without a session.
+    """
+    if not records:
+        return []
+    origin = records[0]["ts"]
+    sessions: Dict[str, List[Tuple[float, int, dict]]] = {}
+    groups: List[List[Tuple[float, int, dict]]] = []
+    for index, record in enumerate(records):
+        item = ((record["ts"] - origin) / speed, index, record)
+        session_id = record.get("session_id")
+        if session_id:
+            if session_id not in sessions:
+                sessions[session_id] = []
+                groups.append(sessions[session_id])
+            sessions[session_id].append(item)
+        else:
+            groups.append([item])
+    return groups
+
+
+def replay(records: List[dict], send: Sender, speed: float = 1.0, max_workers: int = DEFAULT_MAX_WORKERS) -> List[dict]:
+    """Send every record on the time-scaled schedule; return one result per record, in captured order."""
+    results: List[Optional[dict]] = [None] * len(records)
+    start = time.monotonic()
+
+    def run_group(group: List[Tuple[float, int, dict]]) -> None:
+        for due, index, record in group:
+            wait = due - (time.monotonic() - start)
+            if wait > 0:
+                time.sleep(wait)
+            late_ms = max(0.0, (time.monotonic() - start - due) * 1000.0)
+            try:
+                status, latency_ms, request_id = send(record)
+            except Exception as e:
+                status, latency_ms, request_id = 0, 0.0, None
+                record = dict(record, error=type(e).__name__)
+            results[index] = {
+                "index": index,
+                "session_id": record.get("session_id"),
+                "status": status,
+                "latency_ms": round(latency_ms, 3),
+                "late_ms": round(late_ms, 3),
+                "request_id": request_id,
+                "captured_status": record.get("status"),
+                "captured_latency_ms": record.get("latency_ms"),
+                "llm_calls": llm_calls(record),
+                "error": record.get("error"),
+            }
+
+    # Groups start in order of their first request, so earlier sessions get workers first.
+    groups = sorted(plan_groups(records, speed), key=lambda g: g[0][0])
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="replay") as pool:
+        for future in [pool.submit(run_group, group) for group in groups]:
+            future.result()
+    return results
+
+
+class HttpSender:
+    """POSTs records to <target>/run over one keep-alive connection per worker thread."""
+
+    def __init__(self, target: str, timeout: float = DEFAULT_TIMEOUT_SECONDS) -> None:
+        parsed = urllib.parse.urlsplit(target)
+        self.scheme = parsed.scheme or "http"
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port
+        self.path = (parsed.path.rstrip("/") or "") + "/run"
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[http.client.HTTPConnection] = []
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            conn = cls(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Close every worker's connection (the worker threads are gone once replay() returns)."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
+    def __call__(self, record: dict) -> Tuple[int, float, Optional[str]]:
+        payload = {"input": record["input"]}
+        for key in ("session_id", "priority"):
+            if record.get(key):
+                payload[key] = record[key]
+        body = dumps_bytes(payload)
+        conn = self._connection()
+        start = time.perf_counter()
+        try:
+            conn.request("POST", self.path, body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            # Drop the broken connection; the next request opens a new one.
+            conn.close()
+            self._local.conn = None
+            raise
+        return response.status, (time.perf_counter() - start) * 1000.0, response.getheader("X-Request-ID")
+
+
+def build_report(results: List[dict], target: str, speed: float) -> dict:
+    ok = [r for r in results if r["status"] == 200]
+    by_status: Dict[str, int] = {}
+    for r in results:
+        by_status[str(r["status"])] = by_status.get(str(r["status"]), 0) + 1
+    by_shape: Dict[int, List[float]] = {}
+    for r in ok:
+        by_shape.setdefault(r["llm_calls"], []).append(r["latency_ms"])
+    return {
+        "benchmark": "replay",
+        "target": target,
+        "speed": speed,
+        "requests": len(results),
+        "ok": len(ok),
+        "status_counts": by_status,
+        "latency_ms": latency_summary([r["latency_ms"] for r in ok]),
+        "late_ms": latency_summary([r["late_ms"] for r in results]),
+        "by_llm_calls": {str(k): latency_summary(v) for k, v in sorted(by_shape.items())},
+        "results": results,
+    }
+
+
+def compare_reports(before: dict, after: dict) -> str:
+    """Latency comparison of two replay reports of the same capture, overall and by request shape."""
+    lines = [
+        f"before: {before['target']} ({before['ok']}/{before['requests']} ok)",
+        f"after:  {after['target']} ({after['ok']}/{after['requests']} ok)",
+    ]
+    for q in ("p50", "p95", "p99"):
+        b, a = before["latency_ms"][q], after["latency_ms"][q]
+        lines.append(f"  latency {q:4} {b:9.1f} -> {a:9.1f} ms {format_change(b, a)}")
+    lines.append("  by LLM calls per request (p50 / p95):")
+    for shape in sorted(before["by_llm_calls"].keys() & after["by_llm_calls"].keys(), key=int):
+        b, a = before["by_llm_calls"][shape], after["by_llm_calls"][shape]
+        lines.append(
+            f"    {shape:>3} calls (n={a['count']:<5}) p50 {b['p50']:8.1f} -> {a['p50']:8.1f} {format_change(b['p50'], a['p50'])}"
+            f"   p95 {b['p95']:8.1f} -> {a['p95']:8.1f} {format_change(b['p95'], a['p95'])}"
+        )
+    for label, report in (("before", before), ("after", after)):
+        if report["late_ms"]["p95"] > 100:
+            lines.append(f"  warning: {label} replay fell behind schedule (late p95 {report['late_ms']['p95']:.0f} ms)")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay captured /run traffic and compare builds.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="replay a capture against a target")
+    run.add_argument("capture")
+    run.add_argument("--target", required=True, help="base URL of the build under test, e.g. http://127.0.0.1:8000")
+    run.add_argument("--speed", type=float, default=1.0, help="time compression factor (10 = ten times faster)")
+    run.add_argument("--include-failed", action="store_true", help="also replay requests that failed when captured")
+    run.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS)
+    run.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS)
+    run.add_argument("--output", required=True)
+    compare = commands.add_parser("compare", help="compare two replay reports")
+    compare.add_argument("before")
+    compare.add_argument("after")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.before, "rb") as f:
+            before = loads(f.read())
+        with open(args.after, "rb") as f:
+            after = loads(f.read())
+        print(compare_reports(before, after))
+        return 0
+
+    records = load_capture(args.capture, only_ok=not args.include_failed)
+    sender = HttpSender(args.target, args.timeout)
+    try:
+        results = replay(records, sender, speed=args.speed, max_workers=args.max_workers)
+    finally:
+        sender.close()
+    report = build_report(results, args.target, args.speed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(dumps(report, indent=True))
+    lat = report["latency_ms"]
+    print(f"{report['ok']}/{report['requests']} ok  p50={lat['p50']:.1f}ms p95={lat['p95']:.1f}ms p99={lat['p99']:.1f}ms")
+    print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+run_e2e.py — Command-line entry point for the end-to-end benchmark
+
+    cd rotom-api
+    python -m benchmarks.run_e2e --mode core,http --concurrency 1,8,32 --requests 200 \\
+        --latency lognormal:300:0.5 --error-rate 0.01 --output benchmarks/results/baseline.json
+    python -m benchmarks.compare benchmarks/results/baseline.json benchmarks/results/new.json
+
+Each (mode, concurrency) pair gets a fresh AgentService around a ScriptedLLMClient,
+so caches and sessions don't carry over between runs. With --llm fake-server the
+service uses the real OpenAIClient against a local FakeOpenAIServer instead
+(same latency and error settings), so the SDK's HTTP stack is measured too.
+Results are written as JSON (default benchmarks/results/e2e-<timestamp>.json)
+and summarised on stdout.
+"""
+
+import argparse
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Quiet, synchronous logging unless the caller asks otherwise; set before the app is imported.
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from app.core.logging_config import setup_logging
+from app.core.serialization import dumps
+from app.services.agent_service import AgentService
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from benchmarks.harness import DEFAULT_MESSAGES, MODES, load_http_app, run_core, run_http
+from benchmarks.scripted_llm_client import Latency, ScriptedLLMClient
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark for Rotom.")
+    parser.add_argument("--mode", default="core", help=f"comma-separated, from {', '.join(MODES)}")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--latency", default="lognormal:300:0.5", help="LLM latency: ms | constant:ms | uniform:lo:hi | lognormal:median:sigma")
+    parser.add_argument("--stage-latency", action="append", default=[], metavar="STAGE=SPEC", help="per-stage override, e.g. format=constant:800")
+    parser.add_argument("--llm", choices=("scripted", "fake-server"), default="scripted", help="in-process fake or local HTTP fake")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of LLM calls that fail")
+    parser.add_argument("--sessions", type=int, default=0, help="spread requests over this many sessions (0 = stateless)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="results JSON path")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    setup_logging()
+    modes = [m.strip() for m in args.mode.split(",") if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        raise SystemExit(f"Unknown mode(s): {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",")]
+    latency = {"*": Latency.parse(args.latency)}
+    for item in args.stage_latency:
+        stage_name, _, spec = item.partition("=")
+        latency[stage_name] = Latency.parse(spec)
+
+    report = {
+        "benchmark": "e2e",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "requests": args.requests,
+            "latency": {name: dist.to_dict() for name, dist in latency.items()},
+            "llm": args.llm,
+            "error_rate": args.error_rate,
+            "sessions": args.sessions,
+            "seed": args.seed,
+            "messages": list(DEFAULT_MESSAGES),
+        },
+        "runs": [],
+    }
+    for mode in modes:
+        for concurrency in levels:
+            if args.llm == "fake-server":
+                llm = FakeOpenAIServer(latency=latency["*"], error_rate=args.error_rate, seed=args.seed).start()
+                os.environ["OPENAI_BASE_URL"] = llm.url
+                os.environ.setdefault("OPENAI_API_KEY", "fake")
+                service = AgentService()
+            else:
+                llm = ScriptedLLMClient(latency=latency, error_rate=args.error_rate, seed=args.seed)
+                service = AgentService(llm_client=llm)
+            if mode == "http":
+                result = run_http(load_http_app(service), concurrency, args.requests, sessions=args.sessions)
+            else:
+                result = run_core(service, concurrency, args.requests, sessions=args.sessions)
+            result["mode"] = mode
+            result["llm"] = llm.stats()
+            if args.llm == "fake-server":
+                llm.stop()
+            report["runs"].append(result)
+            lat = result["latency_ms"]
+            print(
+                f"{mode:5} c={concurrency:<4} {result['throughput_rps']:8.2f} req/s  "
+                f"p50={lat['p50']:.1f}ms p95={lat['p95']:.1f}ms p99={lat['p99']:.1f}ms  "
+                f"errors={sum(result['errors'].values())}"
+            )
+
+    output = args.output or os.path.join(RESULTS_DIR, f"e2e-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(dumps(report, indent=True))
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
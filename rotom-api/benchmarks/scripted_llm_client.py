@@ -0,0 +1,188 @@
+"""
+scripted_llm_client.py — Scriptable fake LLM for offline benchmarks
+
+DummyLLMClient returns one fixed string, which can't drive the goals pipeline.
+ScriptedLLMClient recognises which agent a prompt comes from (plan builder,
+intent classifier, goal checker, response formatter, reference resolver,
+summarizer capability, memory compaction) and answers with a canned but
+well-formed response for that stage:
+
+  - plan_build: one goal per clause of the message, split on " then ";
+  - classify: word_count / summarizer_stub / echo, picked from the goal text;
+  - goal_check: satisfied;
+  - format, reference_resolve, summarize, compaction: short plain text.
+
+Any stage's answer can be replaced (responses={"plan_build": fn_or_string}).
+Each call first sleeps for a latency drawn from that stage's distribution
+(Latency.constant / uniform / lognormal) and may fail with ScriptedLLMError at
+the stage's error rate. A seed makes runs repeatable.
+"""
+
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional, Union
+
+from app.agents.llm.base_llm_client import BaseLLMClient
+
+STAGE_PLAN = "plan_build"
+STAGE_CLASSIFY = "classify"
+STAGE_GOAL_CHECK = "goal_check"
+STAGE_FORMAT = "format"
+STAGE_REFERENCE = "reference_resolve"
+STAGE_SUMMARIZE = "summarize"
+STAGE_COMPACTION = "compaction"
+STAGE_UNKNOWN = "unknown"
+
+# First line of each agent's prompt template -> stage.
+_PROMPT_MARKERS = (
+    ("You create a short list of logical, descriptive goals", STAGE_PLAN),
+    ("You are an intent classifier", STAGE_CLASSIFY),
+    ("You are a goal checker", STAGE_GOAL_CHECK),
+    ("You are a response formatter", STAGE_FORMAT),
+    ("You are a reference resolver", STAGE_REFERENCE),
+    ("Summarize the following", STAGE_SUMMARIZE),
+    ("You maintain a running summary", STAGE_COMPACTION),
+)
+
+Response = Union[str, Callable[[str], str]]
+
+
+class ScriptedLLMError(RuntimeError):
+    """Injected provider failure."""
+
+
+def detect_stage(prompt: str) -> str:
+    """Which agent built this prompt (see _PROMPT_MARKERS), or "unknown"."""
+    head = (prompt or "").lstrip()[:200]
+    for marker, name in _PROMPT_MARKERS:
+        if head.startswith(marker):
+            return name
+    return STAGE_UNKNOWN
+
+
+def _section(prompt: str, header: str, end: Optional[str] = None) -> str:
+    """Text after a 'Header:' line of a prompt template, up to the next end marker."""
+    _, _, rest = prompt.partition(header + "\n")
+    if end is not None:
+        rest = rest.split(end, 1)[0]
+    return rest.strip()
+
+
+def _default_plan(prompt: str) -> str:
+    message = _section(prompt, "User message:", "\n\nJSON array only:")
+    goals = [clause.strip() for clause in message.split(" then ") if clause.strip()]
+    return json.dumps(goals or [message])
+
+
+def _default_classification(prompt: str) -> str:
+    goal = _section(prompt, "User input:")
+    lowered = goal.lower()
+    if "count" in lowered and "word" in lowered:
+        return json.dumps({"capability": "word_count", "arguments": {"text": goal}})
+    if "summar" in lowered:
+        return json.dumps({"capability": "summarizer_stub", "arguments": {"text": goal}})
+    return json.dumps({"capability": "echo", "arguments": {"message": goal}})
+
+
+DEFAULT_RESPONSES: Dict[str, Response] = {
+    STAGE_PLAN: _default_plan,
+    STAGE_CLASSIFY: _default_classification,
+    STAGE_GOAL_CHECK: '{"satisfied": true, "output_snippet": null}',
+    STAGE_FORMAT: "All goals completed.",
+    STAGE_REFERENCE: lambda prompt: _section(prompt, "User message:", "\n\nResolved message"),
+    STAGE_SUMMARIZE: "A short summary.",
+    STAGE_COMPACTION: "The user asked for a few text operations.",
+    STAGE_UNKNOWN: "{}",
+}
+
+
+class Latency:
+    """A latency distribution in milliseconds; sample(rng) returns seconds."""
+
+    def __init__(self, kind: str, a: float = 0.0, b: float = 0.0) -> None:
+        if kind not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.a = a
+        self.b = b
+
+    @classmethod
+    def constant(cls, ms: float) -> "Latency":
+        return cls("constant", ms)
+
+    @classmethod
+    def uniform(cls, low_ms: float, high_ms: float) -> "Latency":
+        return cls("uniform", low_ms, high_ms)
+
+    @classmethod
+    def lognormal(cls, median_ms: float, sigma: float) -> "Latency":
+        """Long right tail, like real provider latency; sigma ~0.5 gives p99 ≈ 3x median."""
+        return cls("lognormal", median_ms, sigma)
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """'200' or 'constant:200', 'uniform:100:400', 'lognormal:300:0.5'."""
+        kind, *args = spec.split(":")
+        if not args:
+            return cls.constant(float(kind))
+        return cls(kind, *(float(a) for a in args))
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "constant":
+            ms = self.a
+        elif self.kind == "uniform":
+            ms = rng.uniform(self.a, self.b)
+        else:
+            ms = self.a * math.exp(rng.gauss(0.0, self.b))
+        return max(0.0, ms) / 1000.0
+
+    def to_dict(self) -> dict:
+        return {"kind": self.kind, "a": self.a, "b": self.b}
+
+
+class ScriptedLLMClient(BaseLLMClient):
+    """
+    Fake provider answering by stage. latency and error_rate are either one value
+    for every stage or a dict keyed by stage with "*" as the default.
+    """
+
+    def __init__(
+        self,
+        responses: Optional[Dict[str, Response]] = None,
+        latency: Union[Latency, Dict[str, Latency], None] = None,
+        error_rate: Union[float, Dict[str, float]] = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.responses = dict(DEFAULT_RESPONSES)
+        self.responses.update(responses or {})
+        self.latency = latency if isinstance(latency, dict) else {"*": latency or Latency.constant(0)}
+        self.error_rate = error_rate if isinstance(error_rate, dict) else {"*": error_rate}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    def generate(self, prompt: str) -> str:
+        stage = detect_stage(prompt)
+        latency = self.latency.get(stage, self.latency.get("*")) or Latency.constant(0)
+        error_rate = self.error_rate.get(stage, self.error_rate.get("*", 0.0))
+        with self._lock:
+            self.calls[stage] += 1
+            delay = latency.sample(self._rng)
+            fail = self._rng.random() < error_rate
+            if fail:
+                self.errors[stage] += 1
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise ScriptedLLMError(f"injected {stage} failure")
+        response = self.responses[stage]
+        return response(prompt) if callable(response) else response
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": dict(self.calls), "errors": dict(self.errors)}
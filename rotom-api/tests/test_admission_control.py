@@ -0,0 +1,222 @@
+"""
+Unit tests for admission control (app.api.admission).
+
+The controller is exercised directly on an event loop, and the middleware is
+called as a plain ASGI app with a fake scope/receive/send:
+  - requests within max_in_flight are admitted immediately;
+  - extra requests queue FIFO and are admitted as slots free up;
+  - a full queue or a queue timeout gives a fast 429 with Retry-After;
+  - oversized bodies are rejected with 413 and large bodies cost more units,
+    including chunked bodies sent without Content-Length;
+  - stats() can be read from other threads while the loop admits and releases.
+"""
+
+import asyncio
+import threading
+import unittest
+
+from app.api.admission import (
+    ADMITTED,
+    REJECTED_BUSY,
+    REJECTED_TOO_LARGE,
+    AdmissionController,
+    AdmissionControlMiddleware,
+)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestAdmissionController(unittest.TestCase):
+    def test_admits_up_to_limit_then_queues_fifo(self):
+        async def scenario():
+            controller = AdmissionController(max_in_flight=2, max_queue=2, queue_timeout_seconds=5)
+            first = await controller.acquire()
+            second = await controller.acquire()
+            self.assertEqual(first, (ADMITTED, 1))
+            self.assertEqual(second, (ADMITTED, 1))
+
+            order = []
+
+            async def waiter(name):
+                decision, cost = await controller.acquire()
+                order.append(name)
+                return decision
+
+            tasks = [asyncio.create_task(waiter("a")), asyncio.create_task(waiter("b"))]
+            await asyncio.sleep(0)
+            self.assertEqual(controller.stats()["waiting"], 2)
+            controller.release(1)
+            controller.release(1)
+            results = await asyncio.gather(*tasks)
+            self.assertEqual(results, [ADMITTED, ADMITTED])
+            self.assertEqual(order, ["a", "b"])
+            self.assertEqual(controller.stats()["in_flight"], 2)
+            self.assertEqual(controller.stats()["queued"], 2)
+
+        _run(scenario())
+
+    def test_full_queue_is_rejected_fast(self):
+        async def scenario():
+            controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout_seconds=5)
+            await controller.acquire()
+            queued = asyncio.create_task(controller.acquire())
+            await asyncio.sleep(0)
+            decision, _ = await controller.acquire()
+            self.assertEqual(decision, REJECTED_BUSY)
+            self.assertEqual(controller.stats()["rejected_busy"], 1)
+            controller.release(1)
+            self.assertEqual((await queued)[0], ADMITTED)
+
+        _run(scenario())
+
+    def test_queue_timeout_rejects_and_leaves_queue(self):
+        async def scenario():
+            controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout_seconds=0.05)
+            await controller.acquire()
+            decision, _ = await controller.acquire()
+            self.assertEqual(decision, REJECTED_BUSY)
+            stats = controller.stats()
+            self.assertEqual(stats["timeouts"], 1)
+            self.assertEqual(stats["waiting"], 0)
+
+        _run(scenario())
+
+    def test_cost_from_content_length_and_size_limit(self):
+        controller = AdmissionController(max_in_flight=8, cost_unit_bytes=100, max_request_bytes=1000)
+        self.assertEqual(controller.estimate_cost(None), 1)
+        self.assertEqual(controller.estimate_cost(50), 1)
+        self.assertEqual(controller.estimate_cost(350), 4)
+        self.assertEqual(controller.estimate_cost(10_000), 8)
+        self.assertEqual(_run(controller.acquire(1001)), (REJECTED_TOO_LARGE, 0))
+        self.assertEqual(_run(controller.acquire(350)), (ADMITTED, 4))
+        self.assertEqual(controller.stats()["in_flight"], 4)
+
+    def test_stats_readable_from_other_threads(self):
+        controller = AdmissionController(max_in_flight=2, max_queue=100)
+        stop = threading.Event()
+        errors = []
+
+        def read_stats():
+            while not stop.is_set():
+                try:
+                    controller.stats()
+                except Exception as e:  # e.g. "deque mutated during iteration"
+                    errors.append(e)
+
+        async def scenario():
+            for _ in range(200):
+                waiters = [asyncio.ensure_future(controller.acquire()) for _ in range(6)]
+                await asyncio.sleep(0)
+                for _ in range(6):
+                    controller.release(1)
+                    await asyncio.sleep(0)
+                await asyncio.gather(*waiters)
+
+        readers = [threading.Thread(target=read_stats) for _ in range(2)]
+        for thread in readers:
+            thread.start()
+        try:
+            _run(scenario())
+        finally:
+            stop.set()
+            for thread in readers:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual((controller.stats()["in_flight"], controller.stats()["waiting"]), (0, 0))
+
+    def test_retry_after_uses_drain_rate(self):
+        controller = AdmissionController(max_in_flight=1, max_queue=0)
+        self.assertEqual(controller.retry_after_seconds(), 1)
+        _run(controller.acquire())
+        # Busy with no completions yet: worst case.
+        self.assertEqual(controller.retry_after_seconds(), 60)
+        for _ in range(20):
+            _run(controller.acquire())
+            controller.release(1)
+        # 20 completions in a 10 s window = 2/s, one request ahead -> 1 s.
+        self.assertEqual(controller.retry_after_seconds(), 1)
+
+
+class TestAdmissionMiddleware(unittest.TestCase):
+    def _call(self, middleware, path="/run", content_length=None, chunks=(b"",)):
+        headers = []
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        scope = {"type": "http", "method": "POST", "path": path, "headers": headers}
+        sent = []
+        messages = [{"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+                    for i, chunk in enumerate(chunks)]
+
+        async def receive():
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        _run(middleware(scope, receive, send))
+        start = next(m for m in sent if m["type"] == "http.response.start")
+        return start["status"], dict(start["headers"])
+
+    def _ok_app(self, calls):
+        async def app(scope, receive, send):
+            calls.append(scope["path"])
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        return app
+
+    def test_admitted_request_reaches_app_and_releases(self):
+        calls = []
+        controller = AdmissionController(max_in_flight=1, max_queue=0)
+        middleware = AdmissionControlMiddleware(self._ok_app(calls), controller)
+        self.assertEqual(self._call(middleware)[0], 200)
+        self.assertEqual(self._call(middleware)[0], 200)
+        self.assertEqual(calls, ["/run", "/run"])
+        self.assertEqual(controller.stats()["in_flight"], 0)
+
+    def test_busy_returns_429_with_retry_after(self):
+        calls = []
+        controller = AdmissionController(max_in_flight=1, max_queue=0)
+        _run(controller.acquire())  # occupy the only slot
+        middleware = AdmissionControlMiddleware(self._ok_app(calls), controller)
+        status, headers = self._call(middleware)
+        self.assertEqual(status, 429)
+        self.assertIn(b"retry-after", headers)
+        self.assertEqual(calls, [])
+        # Other paths are not gated.
+        self.assertEqual(self._call(middleware, path="/health")[0], 200)
+
+    def test_oversized_request_returns_413(self):
+        calls = []
+        controller = AdmissionController(max_request_bytes=100)
+        middleware = AdmissionControlMiddleware(self._ok_app(calls), controller)
+        self.assertEqual(self._call(middleware, content_length=101)[0], 413)
+        self.assertEqual(calls, [])
+
+    def test_chunked_body_is_size_checked_and_replayed(self):
+        bodies = []
+
+        async def app(scope, receive, send):
+            body = b""
+            while True:
+                message = await receive()
+                body += message.get("body", b"")
+                if not message.get("more_body"):
+                    break
+            bodies.append(body)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        controller = AdmissionController(max_in_flight=8, cost_unit_bytes=10, max_request_bytes=100)
+        middleware = AdmissionControlMiddleware(app, controller)
+        self.assertEqual(self._call(middleware, chunks=[b"x" * 60, b"y" * 60, b"z" * 60])[0], 413)
+        self.assertEqual((bodies, controller.stats()["rejected_too_large"]), ([], 1))
+        self.assertEqual(self._call(middleware, chunks=[b"a" * 30, b"b" * 30])[0], 200)
+        self.assertEqual(bodies, [b"a" * 30 + b"b" * 30])
+        self.assertEqual(controller.estimate_cost(60), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
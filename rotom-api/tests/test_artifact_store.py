@@ -0,0 +1,140 @@
+"""
+Unit tests for the request-scoped ArtifactStore (out-of-core artifacts).
+
+We check that values are stored once and addressed by handle, that large values
+spill to a memory-mapped file, that previews match .strip()[:n] without needing
+the whole value, and that RotomCore resolves "artifact:<key>" arguments into a
+view for capabilities that accept one (word_count).
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.agents.rotom_core import RotomCore
+from app.capabilities.registry import CapabilityRegistry
+from app.capabilities.word_count import WordCountCapability
+from app.core.artifacts import ArtifactStore, ArtifactView
+
+
+class RecordingArtifactStore(ArtifactStore):
+    closed = []
+
+    def close(self) -> None:
+        RecordingArtifactStore.closed.append(self)
+        super().close()
+
+
+class TestArtifactStore(unittest.TestCase):
+    """The store on its own: handles, dedupe, spill, previews, views."""
+
+    def setUp(self):
+        # Tiny threshold so tests can exercise the spill path with small strings.
+        self.store = ArtifactStore(spill_threshold_chars=64)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_identical_content_is_stored_once(self):
+        h1 = self.store.put("same text")
+        h2 = self.store.put("same text", name="copy")
+        self.assertEqual(h1, h2)
+        self.assertEqual(self.store.handle_for("copy"), h1)
+
+    def test_large_value_is_spilled_and_readable(self):
+        value = "  word " * 100 + "é"
+        handle = self.store.put(value, name="big")
+        self.assertTrue(handle.spilled)
+        self.assertEqual(self.store.text(handle), value)
+        self.assertEqual(handle.length, len(value))  # characters, not UTF-8 bytes
+        self.assertEqual(self.store.put("é" * 10).length, 10)
+
+    def test_preview_matches_strip_then_slice(self):
+        for value in ["  short  ", "\n" + "abc " * 50 + "\n", "  " + "x" * 200]:
+            handle = self.store.put(value)
+            self.assertEqual(self.store.preview(handle, 20), value.strip()[:20])
+        self.assertEqual(self.store.preview(None, 20), "")
+
+    def test_view_slices_without_materializing(self):
+        handle = self.store.put("0123456789" * 10)
+        view = self.store.view(handle, 10, 15)
+        self.assertIsInstance(view, ArtifactView)
+        self.assertEqual(len(view), 5)
+        self.assertEqual(view.text(), "01234")
+        self.assertTrue(view.is_spilled)
+
+    def test_resolve_ref_only_for_known_names(self):
+        handle = self.store.put("value", name="summary")
+        self.assertEqual(self.store.resolve_ref("artifact:summary"), handle)
+        self.assertIsNone(self.store.resolve_ref("artifact:missing"))
+        self.assertIsNone(self.store.resolve_ref("plain text"))
+
+
+class TestWordCountOnViews(unittest.TestCase):
+    """word_count gives the same answer on a chunked view as on the plain string."""
+
+    def test_chunked_count_matches_split(self):
+        text = "alpha beta  gamma\ndelta " * 1000
+        with ArtifactStore(spill_threshold_chars=100) as store:
+            view = store.view(store.put(text))
+            result = WordCountCapability().execute({"text": view})
+        self.assertEqual(result.output, str(len(text.split())))
+
+
+class TestRotomCoreArtifactReferences(unittest.TestCase):
+    """RotomCore passes a stored artifact by reference when the classifier asks for it."""
+
+    def test_artifact_reference_argument_resolved_to_view(self):
+        long_text = "word " * 1000
+        plan_builder = MagicMock()
+        plan_builder.build_plan.return_value = [
+            {"goal": "echo the long text", "store_output_as": "long_text"},
+            {"goal": "count words of long text", "use_from_memory": "long_text"},
+        ]
+        intent_classifier = MagicMock()
+        intent_classifier.classify.side_effect = [
+            {"capability": "echo", "arguments": {"message": long_text}},
+            {"capability": "word_count", "arguments": {"text": "artifact:long_text"}},
+        ]
+        goal_checker = MagicMock()
+        goal_checker.check.return_value = MagicMock(satisfied=True, output_snippet=None)
+        response_formatter = MagicMock()
+        response_formatter.format_response.return_value = "done"
+        rotom = RotomCore(
+            intent_classifier=intent_classifier,
+            registry=CapabilityRegistry(),
+            session_store=MagicMock(),
+            session_memory=MagicMock(),
+            plan_builder=plan_builder,
+            goal_checker=goal_checker,
+            response_formatter=response_formatter,
+        )
+
+        rotom.handle("echo a long text then count it")
+
+        second_context = intent_classifier.classify.call_args_list[1][1]["context"]
+        self.assertIn("artifact:long_text", second_context)
+        output_data = response_formatter.format_response.call_args[0][1]
+        self.assertEqual(output_data[1]["capability"], "word_count")
+        self.assertEqual(output_data[1]["output"], "1000")
+
+    def test_store_closed_when_goal_fails(self):
+        plan_builder = MagicMock()
+        plan_builder.build_plan.return_value = ["echo hi"]
+        intent_classifier = MagicMock()
+        intent_classifier.classify.return_value = {"capability": "echo", "arguments": {"message": "hi"}}
+        goal_checker = MagicMock()
+        goal_checker.check.side_effect = RuntimeError("goal checker down")
+        rotom = RotomCore(
+            intent_classifier=intent_classifier,
+            registry=CapabilityRegistry(),
+            session_store=MagicMock(),
+            session_memory=MagicMock(),
+            plan_builder=plan_builder,
+            goal_checker=goal_checker,
+            response_formatter=MagicMock(),
+        )
+        RecordingArtifactStore.closed.clear()
+        with patch("app.agents.rotom_core.ArtifactStore", RecordingArtifactStore):
+            with self.assertRaises(RuntimeError):
+                rotom.handle("echo hi")
+        self.assertEqual(len(RecordingArtifactStore.closed), 1)
@@ -0,0 +1,76 @@
+"""
+Unit tests for the offline benchmark harness (benchmarks/).
+
+  - ScriptedLLMClient recognises every agent's real prompt and answers in the
+    shape that agent parses;
+  - latency specs parse, and injected errors follow the error rate;
+  - a small core-mode run through AgentService(llm_client=...) succeeds and
+    reports per-stage percentiles.
+"""
+
+import json
+import unittest
+
+from app.agents.goal_checker.llm_goal_checker import LLMGoalChecker
+from app.agents.intent_classifier.llm_intent_classifier import LLMIntentClassifier
+from app.agents.plan_builder.llm_plan_builder import LLMPlanBuilder
+from app.agents.reference_resolver.llm_reference_resolver import LLMReferenceResolver
+from app.agents.response_formatter.llm_response_formatter import LLMResponseFormatter
+from app.models.capability_result import CapabilityResult
+from app.services.agent_service import AgentService
+from benchmarks.harness import run_core
+from benchmarks.scripted_llm_client import Latency, ScriptedLLMClient, ScriptedLLMError, detect_stage
+
+TOOLS = [
+    {"name": "echo", "description": "Repeat", "arguments": {"message": "string"}},
+    {"name": "word_count", "description": "Count", "arguments": {"text": "string"}},
+]
+
+
+class TestScriptedLLMClient(unittest.TestCase):
+    def test_detects_each_agent_prompt(self):
+        llm = ScriptedLLMClient()
+        result = CapabilityResult(capability="echo", output="hi", success=True, metadata={})
+        prompts = {
+            "plan_build": LLMPlanBuilder(llm)._build_prompt("echo a then count the words in b"),
+            "classify": LLMIntentClassifier(llm, TOOLS)._build_prompt("count the words in b"),
+            "goal_check": LLMGoalChecker(llm)._build_prompt("echo a", "echo", result),
+            "format": LLMResponseFormatter(llm)._build_prompt("echo a", [{"echo": "a"}], ["echo a"]),
+            "reference_resolve": LLMReferenceResolver(llm)._build_prompt("do that again", "User: echo a"),
+        }
+        for stage, prompt in prompts.items():
+            self.assertEqual(detect_stage(prompt), stage)
+
+        self.assertEqual(json.loads(llm.generate(prompts["plan_build"])), ["echo a", "count the words in b"])
+        self.assertEqual(json.loads(llm.generate(prompts["classify"]))["capability"], "word_count")
+        self.assertTrue(json.loads(llm.generate(prompts["goal_check"]))["satisfied"])
+        self.assertEqual(llm.generate(prompts["reference_resolve"]), "do that again")
+        self.assertEqual(llm.stats()["calls"]["plan_build"], 1)
+
+    def test_latency_and_errors(self):
+        self.assertEqual(Latency.parse("200").to_dict(), {"kind": "constant", "a": 200.0, "b": 0.0})
+        self.assertEqual(Latency.parse("lognormal:300:0.5").kind, "lognormal")
+        with self.assertRaises(ValueError):
+            Latency.parse("gamma:1:2")
+
+        llm = ScriptedLLMClient(error_rate={"*": 0.0, "format": 1.0}, responses={"goal_check": "custom"})
+        with self.assertRaises(ScriptedLLMError):
+            llm.generate("You are a response formatter. ...")
+        self.assertEqual(llm.generate("You are a goal checker. ..."), "custom")
+        self.assertEqual(llm.stats()["errors"], {"format": 1})
+
+
+class TestHarness(unittest.TestCase):
+    def test_core_run_reports_stages(self):
+        service = AgentService(llm_client=ScriptedLLMClient(latency=Latency.constant(1), seed=7))
+        result = run_core(service, concurrency=2, requests=6)
+        self.assertEqual(result["ok"], 6)
+        self.assertEqual(result["errors"], {})
+        self.assertGreater(result["throughput_rps"], 0)
+        for name in ("plan_build", "classify", "goal_check", "format", "llm.generate"):
+            self.assertIn(name, result["stages_ms"])
+        self.assertGreaterEqual(result["latency_ms"]["p99"], result["latency_ms"]["p50"])
+
+
+if __name__ == "__main__":
+    unittest.main()
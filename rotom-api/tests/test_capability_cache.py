@@ -0,0 +1,126 @@
+"""
+Unit tests for capability memoization (CapabilityResultCache).
+
+We check the cache on its own (canonical keys, TTL, byte-bounded LRU, stats) and
+through RotomCore: a cacheable capability called twice with the same arguments
+must only execute once, and the second result is marked cache_hit.
+"""
+
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from app.agents.rotom_core import RotomCore
+from app.capabilities.registry import CapabilityRegistry
+from app.capabilities.result_cache import CapabilityResultCache, canonical_arguments_hash
+from app.capabilities.summarizer_stub import SummarizerStubCapability
+from app.capabilities.echo import EchoCapability
+from app.models.capability_result import CapabilityResult
+
+
+class CountingLLMClient:
+    """Fake LLM that counts generate() calls so we can prove the summarizer ran once."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        return "A short summary."
+
+
+class TestCapabilityResultCache(unittest.TestCase):
+    """The cache in isolation: keys, TTL, eviction, and stats."""
+
+    def setUp(self):
+        self.cache = CapabilityResultCache(max_bytes=10_000)
+        self.summarizer = SummarizerStubCapability()
+
+    def _result(self, output: str) -> CapabilityResult:
+        return CapabilityResult(capability="summarizer_stub", output=output, success=True, metadata={})
+
+    def test_argument_order_does_not_change_hash(self):
+        self.assertEqual(
+            canonical_arguments_hash({"a": 1, "b": "x"}),
+            canonical_arguments_hash({"b": "x", "a": 1}),
+        )
+
+    def test_non_cacheable_capability_is_never_stored(self):
+        echo = EchoCapability()
+        self.cache.put(echo, {"message": "hi"}, CapabilityResult(capability="echo", output="hi", success=True))
+        self.assertIsNone(self.cache.get(echo, {"message": "hi"}))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_hit_returns_copy_and_updates_stats(self):
+        self.cache.put(self.summarizer, {"text": "doc"}, self._result("sum"))
+        first = self.cache.get(self.summarizer, {"text": "doc"})
+        first.metadata["mutated"] = True
+        second = self.cache.get(self.summarizer, {"text": "doc"})
+        self.assertEqual(second.output, "sum")
+        self.assertNotIn("mutated", second.metadata)
+        self.assertIsNone(self.cache.get(self.summarizer, {"text": "other"}))
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3)
+
+    def test_failed_and_fallback_results_are_not_cached(self):
+        failed = CapabilityResult(capability="summarizer_stub", output="", success=False)
+        fallback = CapabilityResult(capability="summarizer_stub", output="x", success=True, metadata={"fallback": True})
+        self.cache.put(self.summarizer, {"text": "a"}, failed)
+        self.cache.put(self.summarizer, {"text": "b"}, fallback)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_ttl_expiry(self):
+        short_lived = SummarizerStubCapability()
+        short_lived.cache_ttl_seconds = 0.01
+        self.cache.put(short_lived, {"text": "doc"}, self._result("sum"))
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get(short_lived, {"text": "doc"}))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+    def test_lru_eviction_by_bytes(self):
+        # Each entry is ~3KB of output; a 10KB budget holds three at most.
+        for i in range(5):
+            self.cache.put(self.summarizer, {"text": f"doc{i}"}, self._result("x" * 3000))
+        stats = self.cache.stats()
+        self.assertLessEqual(stats["bytes"], 10_000)
+        self.assertGreater(stats["evictions"], 0)
+        self.assertIsNone(self.cache.get(self.summarizer, {"text": "doc0"}))
+        self.assertIsNotNone(self.cache.get(self.summarizer, {"text": "doc4"}))
+
+    def test_sizes_count_utf8_bytes(self):
+        self.cache.put(self.summarizer, {"text": "a"}, self._result("x" * 1000))
+        ascii_bytes = self.cache.stats()["bytes"]
+        self.cache.clear()
+        self.cache.put(self.summarizer, {"text": "a"}, self._result("é" * 1000))  # 2 bytes per character
+        self.assertEqual(self.cache.stats()["bytes"], ascii_bytes + 1000)
+
+
+class TestRotomCoreCapabilityCache(unittest.TestCase):
+    """RotomCore consults the cache before executing a cacheable capability."""
+
+    def test_repeated_summarize_calls_llm_once(self):
+        llm = CountingLLMClient()
+        registry = CapabilityRegistry(capabilities=[SummarizerStubCapability(llm_client=llm)])
+        cache = CapabilityResultCache()
+        rotom = RotomCore(
+            intent_classifier=MagicMock(),
+            registry=registry,
+            session_store=MagicMock(),
+            session_memory=MagicMock(),
+            plan_builder=MagicMock(),
+            goal_checker=MagicMock(),
+            response_formatter=MagicMock(),
+            capability_cache=cache,
+        )
+        capability = registry.get("summarizer_stub")
+        first = rotom._execute_capability("summarizer_stub", capability, {"text": "long document"}, "s1")
+        second = rotom._execute_capability("summarizer_stub", capability, {"text": "long document"}, "s2")
+
+        self.assertEqual(llm.calls, 1)
+        self.assertEqual(first.output, second.output)
+        self.assertNotIn("cache_hit", first.metadata)
+        self.assertTrue(second.metadata["cache_hit"])
+        self.assertEqual(second.session_id, "s2")
+        self.assertEqual(cache.stats()["hits"], 1)
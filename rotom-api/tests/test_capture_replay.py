@@ -0,0 +1,158 @@
+"""
+Unit tests for traffic capture (app.api.capture) and replay (benchmarks/replay.py).
+
+  - the middleware records input, session, status, request id, and the
+    request's stage breakdown as one JSON line, after redaction hooks;
+  - a hook returning None drops the record; unknown hook names are rejected;
+  - replay keeps per-session order (turn 2 waits for turn 1 to finish) and
+    scales the captured timing by --speed;
+  - HttpSender posts to /run and the report compares two builds by request shape.
+"""
+
+import asyncio
+import http.server
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from app.api.capture import TrafficCapture, TrafficCaptureMiddleware, load_redactors
+from app.core.context import request_id_ctx
+from app.core.tracing import TRACER
+from benchmarks.replay import HttpSender, build_report, compare_reports, load_capture, replay
+
+
+def drop_batch(record):
+    return None if record.get("priority") == "batch" else record
+
+
+async def _fake_run_app(scope, receive, send):
+    """Reads the body, records a small trace, and answers with an X-Request-ID like app.main does."""
+    message = await receive()
+    request_id = json.loads(message["body"])["input"][-3:]
+    token = request_id_ctx.set(request_id)
+    try:
+        with TRACER.span("request"):
+            with TRACER.span("llm.generate"):
+                pass
+            with TRACER.span("llm.generate"):
+                pass
+    finally:
+        request_id_ctx.reset(token)
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"x-request-id", request_id.encode())]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def _post(app, payload: dict):
+    body = json.dumps(payload).encode()
+    scope = {"type": "http", "method": "POST", "path": "/run", "headers": []}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        pass
+
+    asyncio.run(app(scope, receive, send))
+
+
+class TestTrafficCapture(unittest.TestCase):
+    def test_middleware_records_redacted_request_with_stages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "capture.jsonl")
+            capture = TrafficCapture(path, redactors=load_redactors("email,tests.test_capture_replay:drop_batch"))
+            app = TrafficCaptureMiddleware(_fake_run_app, capture)
+            _post(app, {"input": "mail bob@example.com r01", "session_id": "s1"})
+            _post(app, {"input": "bulk job r02", "priority": "batch"})
+            capture.flush()
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual(record["input"], "mail [REDACTED] r01")
+        self.assertEqual(record["session_id"], "s1")
+        self.assertEqual((record["status"], record["request_id"]), (200, "r01"))
+        self.assertEqual(record["stages"]["llm.generate"]["count"], 2)
+        self.assertEqual(capture.stats()["dropped"], 1)
+
+    def test_unknown_redactor_rejected(self):
+        with self.assertRaises(ValueError):
+            load_redactors("email,nonsense")
+
+
+class TestReplay(unittest.TestCase):
+    def test_session_order_and_time_scaling(self):
+        records = [
+            {"ts": 100.0, "input": "s1 turn 1", "session_id": "s1", "status": 200},
+            {"ts": 100.1, "input": "s1 turn 2", "session_id": "s1", "status": 200},
+            {"ts": 100.1, "input": "no session", "status": 200},
+            {"ts": 102.0, "input": "s2 turn 1", "session_id": "s2", "status": 200},
+        ]
+        sent = []
+        lock = threading.Lock()
+        start = time.monotonic()
+
+        def send(record):
+            with lock:
+                sent.append((record["input"], time.monotonic() - start))
+            if record["input"] == "s1 turn 1":
+                time.sleep(0.1)
+            with lock:
+                sent.append((record["input"] + " done", time.monotonic() - start))
+            return 200, 1.0, None
+
+        results = replay(records, send, speed=20.0)
+        order = [name for name, _ in sent]
+        self.assertLess(order.index("s1 turn 1 done"), order.index("s1 turn 2"))
+        self.assertLess(order.index("no session"), order.index("s1 turn 1 done"))
+        s2_sent = dict(sent)["s2 turn 1"]
+        self.assertGreaterEqual(s2_sent, 0.095)  # (102 - 100) / 20
+        self.assertGreater(results[1]["late_ms"], 0)  # waited for turn 1 past its due time
+        self.assertEqual([r["index"] for r in results], [0, 1, 2, 3])
+
+    def test_http_sender_and_report(self):
+        class RunHandler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                body = json.dumps({"echo": payload}).encode()
+                self.send_response(200 if self.path == "/run" else 404)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-Request-ID", "rid-1")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RunHandler)
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        try:
+            with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+                f.write(json.dumps({"ts": 1.0, "input": "a", "status": 200, "stages": {"llm.generate": {"ms": 5, "count": 3}}}) + "\n")
+                f.write(json.dumps({"ts": 1.1, "input": "b", "status": 500}) + "\n")
+            records = load_capture(f.name)
+            os.unlink(f.name)
+            sender = HttpSender(f"http://127.0.0.1:{server.server_port}")
+            results = replay(records, sender, speed=100.0)
+            sender.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(len(results), 1)  # the captured 500 is skipped
+        self.assertEqual((results[0]["status"], results[0]["request_id"]), (200, "rid-1"))
+        report = build_report(results, "http://build-a", 100.0)
+        self.assertEqual(report["by_llm_calls"]["3"]["count"], 1)
+        text = compare_reports(report, dict(report, target="http://build-b"))
+        self.assertIn("3 calls", text)
+        self.assertIn("after:  http://build-b", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Unit tests for the local OpenAI-compatible fake server (benchmarks/fake_openai_server.py).
+
+  - OpenAIClient reaches it through OPENAI_BASE_URL and gets stage-appropriate answers;
+  - rules override the canned answers by prompt pattern;
+  - streamed completions arrive in chunks and reassemble to the full answer;
+  - injected 429s and 500s surface as the SDK's errors (no retries here).
+"""
+
+import json
+import os
+import re
+import unittest
+from unittest.mock import patch
+
+import openai
+from openai import OpenAI
+
+from app.agents.llm.openai_client import OpenAIClient
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+
+class TestFakeOpenAIServer(unittest.TestCase):
+    def setUp(self):
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.stop()
+
+    def _server(self, **kwargs):
+        server = FakeOpenAIServer(**kwargs).start()
+        self.servers.append(server)
+        return server
+
+    def _client(self, server):
+        env = {"OPENAI_API_KEY": "fake", "OPENAI_BASE_URL": server.url, "OPENAI_MAX_RETRIES": "0"}
+        with patch.dict(os.environ, env):
+            return OpenAIClient()
+
+    def test_openai_client_uses_base_url(self):
+        server = self._server(rules=[(re.compile("weather"), "sunny")])
+        client = self._client(server)
+        plan = client.generate("You create a short list of logical, descriptive goals.\n\nUser message:\necho a then echo b\n\nJSON array only:")
+        self.assertEqual(json.loads(plan), ["echo a", "echo b"])
+        self.assertEqual(client.generate("what is the weather"), "sunny")
+        self.assertEqual(server.stats()["requests"], 2)
+        self.assertEqual(server.stats()["connections"], 1)  # keep-alive reuse
+
+    def test_streaming(self):
+        server = self._server(rules=[(re.compile("."), "a fairly long streamed answer")], stream_chunk_chars=5)
+        sdk = OpenAI(api_key="fake", base_url=server.url, max_retries=0)
+        stream = sdk.chat.completions.create(
+            model="fake-model", messages=[{"role": "user", "content": "hi"}], stream=True,
+            stream_options={"include_usage": True},
+        )
+        chunks = [c for c in stream]
+        text = "".join(c.choices[0].delta.content or "" for c in chunks if c.choices)
+        self.assertEqual(text, "a fairly long streamed answer")
+        self.assertGreater(len(chunks), 6)
+        self.assertIsNotNone(chunks[-1].usage)
+
+    def test_injected_errors(self):
+        client = self._client(self._server(rate_limit_rate=1.0))
+        with self.assertRaises(openai.RateLimitError):
+            client.generate("hi")
+        client = self._client(self._server(error_rate=1.0))
+        with self.assertRaises(openai.InternalServerError):
+            client.generate("hi")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Unit tests for IdempotencyCache (Idempotency-Key handling for /run).
+
+  - a duplicate arriving while the original runs attaches to it (fn runs once);
+  - a later duplicate is replayed from the result cache until the TTL expires;
+  - reusing a key with a different payload raises IdempotencyConflict;
+  - the same key in different scopes (sessions / clients) is unrelated;
+  - failures are shared with attached duplicates but not cached;
+  - the result cache is bounded;
+  - each caller gets its own copy, so changing one response leaves the rest alone.
+"""
+
+import threading
+import time
+import unittest
+
+from app.services.idempotency import IdempotencyCache, IdempotencyConflict, request_fingerprint
+
+
+class TestIdempotencyCache(unittest.TestCase):
+    def test_in_flight_duplicate_attaches(self):
+        cache = IdempotencyCache()
+        fp = request_fingerprint(input="hi", session_id="s1", priority=None)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "result"
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(cache.run("k", fp, slow)))
+        first.start()
+        started.wait(5)
+        second = threading.Thread(target=lambda: results.append(cache.run("k", fp, slow)))
+        second.start()
+        for _ in range(100):
+            if cache.stats()["attached"]:
+                break
+            time.sleep(0.01)
+        release.set()
+        first.join(5)
+        second.join(5)
+
+        self.assertEqual(results, ["result", "result"])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["attached"], 1)
+
+    def test_completed_result_is_replayed_until_ttl(self):
+        cache = IdempotencyCache(ttl_seconds=0.05)
+        fp = request_fingerprint(input="hi")
+        calls = []
+
+        def fn():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(cache.run("k", fp, fn), 1)
+        self.assertEqual(cache.run("k", fp, fn), 1)
+        self.assertEqual(cache.stats()["replayed"], 1)
+        time.sleep(0.06)
+        self.assertEqual(cache.run("k", fp, fn), 2)
+
+    def test_callers_get_independent_copies(self):
+        cache = IdempotencyCache()
+        fp = request_fingerprint(input="hi")
+        first = cache.run("k", fp, lambda: {"output": "hi", "metadata": {}})
+        first["metadata"]["breakdown"] = {"wall_ms": 1.0}
+        second = cache.run("k", fp, lambda: None)
+        self.assertEqual(second, {"output": "hi", "metadata": {}})
+        second["metadata"]["profile_id"] = "p1"
+        self.assertEqual(cache.run("k", fp, lambda: None), {"output": "hi", "metadata": {}})
+
+    def test_payload_mismatch_conflicts(self):
+        cache = IdempotencyCache()
+        cache.run("k", request_fingerprint(input="a"), lambda: "a")
+        with self.assertRaises(IdempotencyConflict):
+            cache.run("k", request_fingerprint(input="b"), lambda: "b")
+        self.assertEqual(cache.stats()["conflicts"], 1)
+
+    def test_keys_are_scoped(self):
+        cache = IdempotencyCache()
+        cache.run("k", request_fingerprint(input="a"), lambda: "a", scope="session:s1")
+        # Another caller's reuse of the key neither conflicts nor replays s1's result.
+        self.assertEqual(cache.run("k", request_fingerprint(input="b"), lambda: "b", scope="client:10.0.0.2"), "b")
+        self.assertEqual(cache.run("k", request_fingerprint(input="a"), lambda: "other", scope="session:s1"), "a")
+        stats = cache.stats()
+        self.assertEqual((stats["executed"], stats["replayed"], stats["conflicts"]), (2, 1, 0))
+
+    def test_failures_are_not_cached(self):
+        cache = IdempotencyCache()
+        fp = request_fingerprint(input="x")
+
+        def boom():
+            raise RuntimeError("llm down")
+
+        with self.assertRaises(RuntimeError):
+            cache.run("k", fp, boom)
+        self.assertEqual(cache.run("k", fp, lambda: "ok"), "ok")
+        stats = cache.stats()
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_result_cache_is_bounded_and_swept(self):
+        cache = IdempotencyCache(ttl_seconds=0.05, max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.run(key, request_fingerprint(key=key), lambda: key)
+        self.assertEqual(cache.stats()["stored"], 2)
+        time.sleep(0.06)
+        self.assertEqual(cache.sweep(), 2)
+        self.assertEqual(cache.stats()["stored"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
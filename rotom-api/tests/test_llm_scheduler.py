@@ -0,0 +1,155 @@
+"""
+Unit tests for ScheduledLLMClient (priority lanes, fair share, per-session cap).
+
+The inner client blocks until the test releases it, so we can line up queued
+calls deterministically and check the order in which they are dispatched:
+  - interactive calls overtake queued batch calls;
+  - within a class, a session with one queued call is not stuck behind a
+    session with many;
+  - a session never exceeds per_session_inflight concurrent calls;
+  - queue waits are recorded per class;
+  - PriorityPolicy (app.api.priority) keeps untrusted /run callers out of the
+    interactive lane unless they present the trusted-caller token.
+"""
+
+import contextvars
+import threading
+import time
+import unittest
+
+from app.agents.llm.base_llm_client import BaseLLMClient
+from app.api.priority import PriorityPolicy
+from app.agents.llm.scheduled_llm_client import ScheduledLLMClient
+from app.core.context import llm_priority_ctx, session_id_ctx
+
+
+class _GatedLLM(BaseLLMClient):
+    """Records prompts in the order calls start; each call waits for release()."""
+
+    def __init__(self):
+        self.started = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._gate = threading.Semaphore(0)
+
+    def generate(self, prompt):
+        with self._lock:
+            self.started.append(prompt)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        self._gate.acquire()
+        with self._lock:
+            self.active -= 1
+        return prompt
+
+    def release(self, n=1):
+        for _ in range(n):
+            self._gate.release()
+
+
+class TestScheduledLLMClient(unittest.TestCase):
+
+    def setUp(self):
+        self.threads = []
+
+    def tearDown(self):
+        for t in self.threads:
+            t.join(2)
+
+    def _call(self, client, prompt, session, priority="interactive"):
+        def run():
+            session_id_ctx.set(session)
+            llm_priority_ctx.set(priority)
+            client.generate(prompt)
+
+        t = threading.Thread(target=contextvars.copy_context().run, args=(run,))
+        t.start()
+        self.threads.append(t)
+
+    def _wait_queued(self, client, count):
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline:
+            if sum(c["queued"] for c in client.stats()["classes"].values()) >= count:
+                return
+            time.sleep(0.005)
+        self.fail("calls did not queue")
+
+    def _wait_started(self, inner, count):
+        deadline = time.monotonic() + 2
+        while len(inner.started) < count and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertGreaterEqual(len(inner.started), count)
+
+    def test_interactive_overtakes_batch(self):
+        inner = _GatedLLM()
+        client = ScheduledLLMClient(inner, max_concurrency=1)
+        self._call(client, "first", "s0")
+        self._wait_started(inner, 1)
+        self._call(client, "batch", "s1", priority="batch")
+        self._wait_queued(client, 1)
+        self._call(client, "interactive", "s2")
+        self._wait_queued(client, 2)
+        inner.release(3)
+        self._wait_started(inner, 3)
+        self.assertEqual(inner.started, ["first", "interactive", "batch"])
+
+    def test_fair_share_across_sessions(self):
+        inner = _GatedLLM()
+        client = ScheduledLLMClient(inner, max_concurrency=1, per_session_inflight=4)
+        self._call(client, "hog-0", "hog")
+        self._wait_started(inner, 1)
+        for i in range(1, 4):
+            self._call(client, f"hog-{i}", "hog")
+            self._wait_queued(client, i)
+        self._call(client, "light", "light")
+        self._wait_queued(client, 4)
+        inner.release(5)
+        self._wait_started(inner, 5)
+        # The light session's single call is served after at most one more hog call.
+        self.assertLessEqual(inner.started.index("light"), 2)
+
+    def test_per_session_inflight_cap(self):
+        inner = _GatedLLM()
+        client = ScheduledLLMClient(inner, max_concurrency=8, per_session_inflight=1)
+        for i in range(3):
+            self._call(client, f"s-{i}", "same")
+        self._wait_started(inner, 1)
+        self._wait_queued(client, 2)
+        self.assertEqual(inner.max_active, 1)
+        inner.release(3)
+        self._wait_started(inner, 3)
+        self.assertEqual(inner.max_active, 1)
+
+    def test_stats_record_waits_per_class(self):
+        inner = _GatedLLM()
+        inner.release(2)
+        client = ScheduledLLMClient(inner)
+        self._call(client, "a", "s1")
+        self._call(client, "b", "s2", priority="background")
+        for t in self.threads:
+            t.join(2)
+        stats = client.stats()
+        self.assertEqual(stats["classes"]["interactive"]["dispatched"], 1)
+        self.assertEqual(stats["classes"]["background"]["dispatched"], 1)
+        self.assertEqual(stats["in_flight"], 0)
+
+class TestPriorityPolicy(unittest.TestCase):
+
+    def test_untrusted_callers_are_capped(self):
+        policy = PriorityPolicy(trusted_token="secret")
+        self.assertEqual(policy.resolve(None), "batch")
+        self.assertEqual(policy.resolve("interactive"), "batch")
+        self.assertEqual(policy.resolve("interactive", "wrong"), "batch")
+        self.assertEqual(policy.resolve("background"), "background")
+
+    def test_trusted_caller_may_use_any_lane(self):
+        policy = PriorityPolicy(trusted_token="secret")
+        self.assertEqual(policy.resolve(None, "secret"), "interactive")
+        self.assertEqual(policy.resolve("batch", "secret"), "batch")
+        # Without a configured token nobody is trusted.
+        self.assertEqual(PriorityPolicy().resolve("interactive", "secret"), "batch")
+
+    def test_unknown_ceiling_rejected(self):
+        with self.assertRaises(ValueError):
+            PriorityPolicy(client_max="urgent")
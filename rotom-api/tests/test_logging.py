@@ -0,0 +1,119 @@
+"""
+Unit tests for the logging setup and hash-referenced prompt logging.
+
+  - LOG_LEVEL sets the root level; LOG_ASYNC puts a QueueHandler on the root
+    and records still reach the real handler via the listener;
+  - log_prompt does nothing below DEBUG and logs only a hash at DEBUG;
+  - sampled prompts are written once to the content-addressed store;
+  - drops counted from many threads at once are not lost.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from app.core import logging_config
+from app.core.logger import get_logger
+from app.core.prompt_store import WRITE_QUEUE_MAX, PromptStore, log_prompt, prompt_hash
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestSetupLogging(unittest.TestCase):
+    def setUp(self):
+        root = logging.getLogger()
+        self._saved = (root.level, list(root.handlers))
+
+    def tearDown(self):
+        logging_config.shutdown_logging()
+        root = logging.getLogger()
+        root.setLevel(self._saved[0])
+        root.handlers = self._saved[1]
+
+    def test_level_and_async_queue(self):
+        with patch.dict(os.environ, {"LOG_LEVEL": "warning", "LOG_ASYNC": "1"}):
+            logging_config.setup_logging()
+        root = logging.getLogger()
+        self.assertEqual(root.level, logging.WARNING)
+        self.assertIsInstance(root.handlers[0], logging.handlers.QueueHandler)
+
+        captured = _ListHandler()
+        logging_config._listener.handlers = (captured,)
+        logging.getLogger("rotom.test").warning("disk %s", "full")
+        logging.getLogger("rotom.test").info("not shown")
+        logging_config.shutdown_logging()  # drains the queue
+        self.assertEqual([r.getMessage() for r in captured.records], ["disk full"])
+
+    def test_sync_mode_and_invalid_level(self):
+        with patch.dict(os.environ, {"LOG_LEVEL": "DEBUG", "LOG_ASYNC": "0"}):
+            logging_config.setup_logging()
+        self.assertIsInstance(logging.getLogger().handlers[0], logging.StreamHandler)
+        with patch.dict(os.environ, {"LOG_LEVEL": "LOUD"}), self.assertRaises(ValueError):
+            logging_config.setup_logging()
+
+
+class TestPromptLogging(unittest.TestCase):
+    def setUp(self):
+        self.base = logging.getLogger("rotom.prompt_test")
+        self.base.propagate = False
+        self.handler = _ListHandler()
+        self.base.addHandler(self.handler)
+        self.logger = get_logger("rotom.prompt_test", layer="agent", component="test")
+
+    def tearDown(self):
+        self.base.removeHandler(self.handler)
+
+    def test_nothing_below_debug(self):
+        self.base.setLevel(logging.INFO)
+        store = PromptStore("/nonexistent", sample_rate=1.0)
+        log_prompt(self.logger, "plan_builder", "x" * 5000, store=store)
+        self.assertEqual(self.handler.records, [])
+        self.assertEqual(store._queue.qsize(), 0)
+
+    def test_debug_logs_hash_and_stores_sampled_prompt_once(self):
+        self.base.setLevel(logging.DEBUG)
+        prompt = "Classify this message: hello" * 100
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PromptStore(tmp, sample_rate=1.0)
+            log_prompt(self.logger, "intent_classifier", prompt, store=store)
+            log_prompt(self.logger, "intent_classifier", prompt, store=store)
+            store.flush()
+            digest = prompt_hash(prompt)
+            self.assertEqual(store.get(digest), prompt)
+            self.assertEqual(os.listdir(tmp), [f"{digest}.txt"])
+
+        record = self.handler.records[0]
+        self.assertEqual(record.prompt_hash, digest)
+        self.assertEqual(record.prompt_chars, len(prompt))
+        self.assertNotIn("hello", record.getMessage())
+
+    def test_concurrent_drops_are_all_counted(self):
+        store = PromptStore("/nonexistent", sample_rate=1.0)
+        with patch.object(store, "_ensure_writer"):  # no writer: the queue stays full
+            for i in range(WRITE_QUEUE_MAX):
+                store.put(str(i), "p")
+
+            def flood():
+                for _ in range(2000):
+                    store.put("x", "p")
+
+            threads = [threading.Thread(target=flood) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(store.dropped, 8 * 2000)
+
+
+if __name__ == "__main__":
+    unittest.main()
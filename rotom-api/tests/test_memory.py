@@ -12,6 +12,7 @@ We test the real InMemorySessionMemory implementation (no mocks). We check:
 import unittest
 
 from app.core.memory import InMemorySessionMemory
+from app.core.memory.formatting import entries_for_turns, render_entry
 
 
 class TestInMemorySessionMemory(unittest.TestCase):
@@ -60,3 +61,30 @@ class TestInMemorySessionMemory(unittest.TestCase):
         self.assertNotIn("from s2", ctx1)
         self.assertIn("from s2", ctx2)
         self.assertNotIn("from s1", ctx2)
+
+
+class TestSessionRing(unittest.TestCase):
+    """The ring buffer's cached context must always equal a fresh render of the last N entries."""
+
+    def test_cached_context_matches_fresh_render_across_wraparound(self):
+        memory = InMemorySessionMemory(max_entries_per_session=5)
+        entries = []
+        for i in range(17):
+            if i % 2 == 0:
+                entry = {"role": "user", "content": f"line{i}\nwith newline"}
+            else:
+                entry = {"role": "assistant", "capability": "echo", "output_summary": f"out{i}"}
+            entries.append(entry)
+            memory.append("s1", entry)
+            kept = entries[-5:]
+            for max_turns in (0, 1, 2, 5):
+                # Reading every window each step keeps all of them cached and incrementally updated.
+                n = entries_for_turns(max_turns, len(kept))
+                expected = "\n".join(render_entry(e) for e in kept[-n:])
+                self.assertEqual(memory.get_context("s1", max_turns=max_turns), expected)
+
+    def test_ring_overwrites_oldest_entry(self):
+        memory = InMemorySessionMemory(max_entries_per_session=2)
+        for i in range(4):
+            memory.append("s1", {"role": "user", "content": f"m{i}"})
+        self.assertEqual(memory.get_context("s1", max_turns=5), "User: m2\nUser: m3")
@@ -0,0 +1,180 @@
+"""
+Unit tests for rolling session summaries (SessionCompactor + InMemorySessionMemory).
+
+We check:
+  - Entries that fall off the ring are not lost: after compaction they appear
+    in a summary line at the top of get_context().
+  - Compaction only runs on the compactor (append() just schedules it).
+  - The summary stays bounded no matter how long the session gets, and so do
+    the entries waiting for a compactor that has fallen behind.
+  - A summarizer that raises loses nothing: the entries are retried next round
+    and their bytes are released once they are folded.
+  - AgentService only builds a compactor for the memory backend, and its
+    shutdown() stops the compactor and sweeper threads; a constructor that
+    fails leaves no background thread running.
+  - The LLM summarizer merges previous summary + new turns, and falls back to
+    the extractive summary when the LLM call fails.
+"""
+
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.core.memory import InMemorySessionMemory
+from app.core.memory.compaction import ExtractiveTurnSummarizer, LLMTurnSummarizer, SessionCompactor
+from app.services.agent_service import AgentService
+from benchmarks.scripted_llm_client import ScriptedLLMClient
+
+
+def _turn(memory, i):
+    memory.append("s1", {"role": "user", "content": f"question {i}"})
+    memory.append("s1", {"role": "assistant", "capability": "echo", "output_summary": f"answer {i}"})
+
+
+class TestSessionCompaction(unittest.TestCase):
+
+    def setUp(self):
+        self.compactor = SessionCompactor(ExtractiveTurnSummarizer(max_chars=300))
+        self.memory = InMemorySessionMemory(max_entries_per_session=4, compactor=self.compactor)
+
+    def test_dropped_turns_are_folded_into_summary(self):
+        for i in range(4):
+            _turn(self.memory, i)
+        # Nothing summarized yet: append() only queued the work.
+        self.assertNotIn("summary", self.memory.get_context("s1"))
+        self.assertGreater(self.compactor.run_pending(), 0)
+
+        ctx = self.memory.get_context("s1", max_turns=2)
+        first, *recent = ctx.splitlines()
+        self.assertTrue(first.startswith("Earlier in this conversation (summary):"))
+        self.assertIn("question 0", first)
+        self.assertIn("answer 1", first)
+        self.assertEqual(recent, ["User: question 2", "Assistant ran echo; result: answer 2",
+                                  "User: question 3", "Assistant ran echo; result: answer 3"])
+
+    def test_summary_stays_bounded(self):
+        for i in range(200):
+            _turn(self.memory, i)
+            self.compactor.run_pending()
+        summary_line = self.memory.get_context("s1").splitlines()[0]
+        self.assertLessEqual(len(summary_line), 300 + len("Earlier in this conversation (summary): "))
+        self.assertIn("question 197", summary_line)
+        # Folded entries are released from the size accounting once summarized.
+        self.assertLess(self.memory.stats()["resident_bytes"], 5000)
+
+    def test_background_worker_compacts(self):
+        self.compactor.start()
+        try:
+            for i in range(3):
+                _turn(self.memory, i)
+            deadline = time.monotonic() + 2
+            while "summary" not in self.memory.get_context("s1") and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            self.compactor.stop()
+        self.assertIn("question 0", self.memory.get_context("s1"))
+
+    def test_pending_entries_bounded_when_compactor_is_behind(self):
+        memory = InMemorySessionMemory(max_entries_per_session=4, compactor=self.compactor, max_folded_per_session=10)
+        for i in range(200):
+            _turn(memory, i)
+        bytes_before = memory.stats()["resident_bytes"]
+        for i in range(200, 400):
+            _turn(memory, i)
+        self.assertEqual(memory.stats()["resident_bytes"], bytes_before)  # not growing
+        self.compactor.run_pending()
+        context = memory.get_context("s1")
+        self.assertIn("question 397", context)  # the newest pending entries were kept
+        self.assertNotIn("question 100", context)
+
+
+class FlakySummarizer(ExtractiveTurnSummarizer):
+    """Raises on the first call, then summarizes normally."""
+
+    def __init__(self):
+        super().__init__(max_chars=300)
+        self.calls = 0
+
+    def summarize(self, previous, lines):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("summarizer down")
+        return super().summarize(previous, lines)
+
+
+class TestCompactionFailure(unittest.TestCase):
+
+    def test_failed_summary_keeps_entries_for_retry(self):
+        compactor = SessionCompactor(FlakySummarizer())
+        memory = InMemorySessionMemory(max_entries_per_session=4, compactor=compactor)
+        reference = InMemorySessionMemory(max_entries_per_session=4, compactor=SessionCompactor(
+            ExtractiveTurnSummarizer(max_chars=300)))
+        for i in range(3):
+            _turn(memory, i)
+            _turn(reference, i)
+        compactor.run_pending()
+        self.assertEqual(compactor.stats()["failures"], 1)
+        self.assertNotIn("summary", memory.get_context("s1"))
+
+        _turn(memory, 3)  # drops more entries and schedules another round
+        _turn(reference, 3)
+        compactor.run_pending()
+        reference._compactor.run_pending()
+        context = memory.get_context("s1")
+        self.assertIn("question 0", context)  # the entries from the failed round were not lost
+        self.assertEqual(context, reference.get_context("s1"))
+        self.assertEqual(memory.stats()["resident_bytes"], reference.stats()["resident_bytes"])
+
+
+class TestServiceCompactionWiring(unittest.TestCase):
+
+    def _service(self, backend):
+        env = {"ROTOM_MEMORY_COMPACTION": "local", "ROTOM_SESSION_BACKEND": backend}
+        with patch.dict(os.environ, env):
+            return AgentService(llm_client=ScriptedLLMClient(seed=1))
+
+    def test_unsupported_backend_warns_and_skips(self):
+        with self.assertLogs("app.services.agent_service", level="WARNING") as logs:
+            service = self._service("retrieval")
+        self.assertIsNone(service.memory_compactor)
+        self.assertIn("only supported by the memory session backend", logs.output[0])
+        service.shutdown()
+
+    def test_shutdown_stops_workers(self):
+        service = self._service("memory")
+        service.shutdown()
+        self.assertFalse(service.memory_compactor._thread.is_alive())
+        self.assertFalse(service.session_sweeper._thread.is_alive())
+
+    def test_failed_construction_starts_no_workers(self):
+        def workers():
+            return [t for t in threading.enumerate() if t.name in ("memory-compactor", "session-sweeper")]
+
+        before = set(workers())
+        with patch.object(AgentService, "_build_session_backends", side_effect=ConnectionError("redis down")):
+            with self.assertRaises(ConnectionError):
+                self._service("memory")
+        with patch.dict(os.environ, {"ROTOM_REFERENCE_GATE": "bogus"}):
+            with self.assertRaises(ValueError):
+                self._service("memory")
+        self.assertEqual(set(workers()) - before, set())
+
+
+class TestLLMTurnSummarizer(unittest.TestCase):
+
+    def test_prompt_includes_previous_summary_and_new_turns(self):
+        llm = MagicMock()
+        llm.generate.return_value = "  merged summary  "
+        summary = LLMTurnSummarizer(llm).summarize("old facts", ["User: hi"])
+        self.assertEqual(summary, "merged summary")
+        prompt = llm.generate.call_args[0][0]
+        self.assertIn("old facts", prompt)
+        self.assertIn("User: hi", prompt)
+
+    def test_falls_back_to_extractive_on_error(self):
+        llm = MagicMock()
+        llm.generate.side_effect = RuntimeError("rate limited")
+        summary = LLMTurnSummarizer(llm).summarize("", ["User: hi"])
+        self.assertEqual(summary, "User: hi")
@@ -0,0 +1,157 @@
+"""
+Unit tests for the metrics registry and stage instrumentation.
+
+  - counters and histograms recorded from several threads sum correctly;
+  - shards of exited threads are folded away without losing their totals;
+  - collectors become gauges, and a failing collector does not break reads;
+  - Prometheus rendering emits cumulative buckets;
+  - LLM calls are attributed to the enclosing stage;
+  - RotomCore records stage latency, goals per request, and limit hits.
+"""
+
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from app.agents.llm.base_llm_client import BaseLLMClient
+from app.agents.llm.instrumented_llm_client import InstrumentedLLMClient
+from app.agents.rotom_core import MAX_STEPS_PER_GOAL, RotomCore
+from app.capabilities.registry import CapabilityRegistry
+from app.core.instrumentation import record_llm_tokens, stage
+from app.core.memory import InMemorySessionMemory
+from app.core.metrics import REGISTRY, MetricsRegistry
+from app.core.session.store import InMemorySessionStore
+
+
+def _histogram(snapshot, name, **labels):
+    for series in snapshot["histograms"]:
+        if series["name"] == name and series["labels"] == labels:
+            return series
+    return None
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_sharded_counters_sum_across_threads(self):
+        registry = MetricsRegistry()
+
+        def work():
+            for _ in range(1000):
+                registry.inc("requests_total", route="run")
+                registry.observe("latency_ms", 3.0)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(registry.counter_value("requests_total", route="run"), 4000)
+        latency = _histogram(registry.snapshot(), "latency_ms")
+        self.assertEqual(latency["count"], 4000)
+        self.assertEqual(latency["buckets"]["5"], 4000)
+
+    def test_exited_threads_do_not_accumulate_shards(self):
+        registry = MetricsRegistry()
+        for _ in range(50):
+            t = threading.Thread(target=lambda: (registry.inc("jobs_total"), registry.observe("job_ms", 7.0)))
+            t.start()
+            t.join()
+        # Each new thread folds the previous (exited) ones into the retained shard.
+        self.assertLessEqual(len(registry._shards), 2)
+        self.assertEqual(registry.counter_value("jobs_total"), 50)
+        snap = registry.snapshot()
+        self.assertEqual(len(registry._shards), 1)
+        self.assertEqual(_histogram(snap, "job_ms")["count"], 50)
+        self.assertEqual(registry.counter_value("jobs_total"), 50)
+
+    def test_collectors_become_gauges_and_failures_are_contained(self):
+        registry = MetricsRegistry()
+        registry.register_collector("cache", lambda: {"hits": 3, "mode": "on", "nested": {"size": 2}})
+        registry.register_collector("broken", lambda: 1 / 0)
+        gauges = registry.snapshot()["gauges"]
+        self.assertEqual(gauges["rotom_cache_hits"], 3)
+        self.assertEqual(gauges["rotom_cache_nested_size"], 2)
+        self.assertNotIn("rotom_cache_mode", gauges)
+        self.assertEqual(gauges["rotom_broken_collector_error"], 1)
+
+    def test_prometheus_rendering(self):
+        registry = MetricsRegistry()
+        registry.histogram("steps", (1, 2))
+        registry.observe("steps", 1)
+        registry.observe("steps", 2)
+        registry.observe("steps", 5)
+        registry.inc("calls_total", stage="plan")
+        text = registry.render_prometheus()
+        self.assertIn('calls_total{stage="plan"} 1', text)
+        self.assertIn('steps_bucket{le="1"} 1', text)
+        self.assertIn('steps_bucket{le="2"} 2', text)
+        self.assertIn('steps_bucket{le="+Inf"} 3', text)
+        self.assertIn("steps_count 3", text)
+
+
+class _FlakyLLM(BaseLLMClient):
+    def __init__(self):
+        self.fail = False
+
+    def generate(self, prompt):
+        if self.fail:
+            raise RuntimeError("rate limited")
+        return "ok"
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        REGISTRY.reset()
+
+    def test_llm_calls_and_tokens_attributed_to_stage(self):
+        inner = _FlakyLLM()
+        client = InstrumentedLLMClient(inner)
+        with stage("plan_build"):
+            client.generate("p")
+            record_llm_tokens(10, 4)
+        inner.fail = True
+        with stage("classify"), self.assertRaises(RuntimeError):
+            client.generate("p")
+        inner.fail = False
+        client.generate("p")
+
+        self.assertEqual(REGISTRY.counter_value("rotom_llm_calls_total", stage="plan_build"), 1)
+        self.assertEqual(REGISTRY.counter_value("rotom_llm_tokens_total", stage="plan_build", kind="prompt"), 10)
+        self.assertEqual(
+            REGISTRY.counter_value("rotom_llm_errors_total", stage="classify", error="RuntimeError"), 1
+        )
+        self.assertEqual(REGISTRY.counter_value("rotom_llm_calls_total", stage="other"), 1)
+        self.assertIsNotNone(_histogram(REGISTRY.snapshot(), "rotom_stage_duration_ms", stage="plan_build"))
+
+    def test_rotom_core_records_stages_and_limit_hits(self):
+        plan_builder = MagicMock()
+        plan_builder.build_plan.return_value = [{"goal": "echo hi"}]
+        classifier = MagicMock()
+        classifier.classify.side_effect = [
+            {"capability": "echo", "arguments": {"message": f"hi {i}"}} for i in range(MAX_STEPS_PER_GOAL)
+        ]
+        goal_checker = MagicMock()
+        goal_checker.check.return_value = MagicMock(satisfied=False, output_snippet=None)
+        formatter = MagicMock()
+        formatter.format_response.return_value = "done"
+        rotom = RotomCore(
+            intent_classifier=classifier,
+            registry=CapabilityRegistry(),
+            session_store=InMemorySessionStore(),
+            session_memory=InMemorySessionMemory(),
+            plan_builder=plan_builder,
+            goal_checker=goal_checker,
+            response_formatter=formatter,
+        )
+        rotom.handle("echo hi")
+
+        snapshot = REGISTRY.snapshot()
+        for name in ("plan_build", "classify", "execute", "goal_check", "format"):
+            self.assertIsNotNone(_histogram(snapshot, "rotom_stage_duration_ms", stage=name), name)
+        self.assertEqual(_histogram(snapshot, "rotom_stage_duration_ms", stage="classify")["count"], MAX_STEPS_PER_GOAL)
+        self.assertEqual(_histogram(snapshot, "rotom_goals_per_request")["sum"], 1)
+        self.assertEqual(_histogram(snapshot, "rotom_steps_per_goal")["sum"], MAX_STEPS_PER_GOAL)
+        self.assertEqual(REGISTRY.counter_value("rotom_limit_hits_total", limit="max_steps_per_goal"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Microbenchmark checks (benchmarks/micro.py).
+
+  - every case builds and runs, and has a stored baseline;
+  - timings are ratios to a calibration loop timed alongside, so the same work
+    measures about 1.0x on any machine;
+  - the regression rule flags only cases whose ratio grew by more than the limit;
+  - the timing gate runs by default: every case is timed and the run fails on a
+    regression beyond ROTOM_BENCH_MAX_REGRESSION_PCT that repeats when re-timed.
+    ROTOM_BENCH_GATE=0 skips it.
+"""
+
+import os
+import unittest
+
+from benchmarks.micro import (
+    CASES,
+    calibration_loop,
+    gate_failures,
+    load_baseline,
+    max_regression_pct,
+    measure_relative,
+    regressions,
+    run_relative,
+)
+
+
+class TestMicrobenchmarkCases(unittest.TestCase):
+    def test_cases_run_and_have_baselines(self):
+        baseline = load_baseline()
+        for name, case in CASES.items():
+            case()()
+            self.assertIn(name, baseline)
+
+    def test_ratio_is_machine_independent(self):
+        ratio, us, calibration_us = measure_relative(calibration_loop, rounds=3)
+        self.assertAlmostEqual(ratio, 1.0, delta=0.25)
+        self.assertGreater(us, 0)
+        self.assertGreater(calibration_us, 0)
+
+    def test_regression_rule(self):
+        baseline = {"a": 0.10, "b": 0.10}
+        failures = regressions({"a": 0.14, "b": 0.16, "new": 9.9}, baseline, max_pct=50.0)
+        self.assertEqual(len(failures), 1)
+        self.assertTrue(failures[0].startswith("b: 0.160x"))
+
+
+@unittest.skipIf(os.getenv("ROTOM_BENCH_GATE") == "0", "ROTOM_BENCH_GATE=0 skips the timing gate")
+class TestMicrobenchmarkGate(unittest.TestCase):
+    def test_no_regressions(self):
+        relative, _, _ = run_relative()
+        failures = gate_failures(relative, load_baseline(), max_regression_pct())
+        self.assertEqual(failures, [], "\n".join(failures))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Unit tests for app.core.profiler.
+
+  - a profiled call's time is split into LLM wait (stack inside app/agents/llm)
+    and Python, and its frames appear in collapsed and speedscope output;
+  - exceptions still store the profile and propagate;
+  - the global rate limit runs extra calls unprofiled;
+  - only the configured admin token is authorized.
+"""
+
+import time
+import unittest
+
+from app.agents.llm.base_llm_client import BaseLLMClient
+from app.agents.llm.instrumented_llm_client import InstrumentedLLMClient
+from app.core.profiler import ProfileRateLimiter, RequestProfiler
+
+
+class _SlowLLM(BaseLLMClient):
+    def generate(self, prompt: str) -> str:
+        time.sleep(0.1)
+        return "ok"
+
+
+def _busy_python(seconds):
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+    return n
+
+
+def _handle():
+    InstrumentedLLMClient(_SlowLLM()).generate("plan this")
+    _busy_python(0.1)
+    return "done"
+
+
+class TestRequestProfiler(unittest.TestCase):
+    def test_profile_splits_llm_wait_and_python(self):
+        profiler = RequestProfiler(admin_token="secret", interval_seconds=0.002)
+        result, profile_id = profiler.profile(_handle, name="handle")
+        self.assertEqual(result, "done")
+
+        profile = profiler.get(profile_id)
+        summary = profile.summary()
+        self.assertGreater(summary["samples"], 20)
+        self.assertGreater(summary["llm_wait_ms"], 50)
+        self.assertGreater(summary["python_ms"], 50)
+        # Sleeping in the LLM call costs no CPU; the busy loop does.
+        self.assertLess(summary["cpu_ms"], summary["wall_ms"] - 50)
+        hottest = " ".join(entry["frame"] for entry in summary["top_self_ms"][:2])
+        self.assertIn("_busy_python", hottest)
+        self.assertIn("_SlowLLM.generate", hottest)
+
+        collapsed = profile.to_collapsed()
+        self.assertIn("InstrumentedLLMClient.generate", collapsed)
+        # Stacks start at the profiled function, not the profiler or test runner.
+        self.assertTrue(all(line.startswith("_handle (") for line in collapsed.splitlines()))
+
+        speedscope = profile.to_speedscope()
+        sampled = speedscope["profiles"][0]
+        self.assertEqual(sampled["type"], "sampled")
+        self.assertEqual(len(sampled["samples"]), len(sampled["weights"]))
+        names = {f["name"] for f in speedscope["shared"]["frames"]}
+        self.assertIn("_SlowLLM.generate", names)
+
+    def test_error_keeps_profile(self):
+        profiler = RequestProfiler(admin_token="secret")
+
+        def failing():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            profiler.profile(failing)
+        self.assertEqual(profiler.stats()["stored"], 1)
+        (profile,) = profiler._profiles.values()
+        self.assertEqual(profile.error, "ValueError")
+
+    def test_rate_limit_runs_unprofiled(self):
+        profiler = RequestProfiler(admin_token="secret", max_per_minute=1)
+        _, first = profiler.profile(lambda: 1)
+        result, second = profiler.profile(lambda: 2)
+        self.assertIsNotNone(first)
+        self.assertEqual((result, second), (2, None))
+        self.assertEqual(profiler.stats()["rate_limited"], 1)
+
+    def test_limiter_allows_one_at_a_time(self):
+        limiter = ProfileRateLimiter(max_per_window=10)
+        self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())
+        limiter.release()
+        self.assertTrue(limiter.try_acquire())
+
+    def test_authorization(self):
+        self.assertFalse(RequestProfiler().authorized("anything"))
+        profiler = RequestProfiler(admin_token="secret")
+        self.assertTrue(profiler.authorized("secret"))
+        self.assertFalse(profiler.authorized("wrong"))
+        self.assertFalse(profiler.authorized(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
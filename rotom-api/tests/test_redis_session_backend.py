@@ -0,0 +1,129 @@
+"""
+Unit tests for the Redis session backend against FakeRedisServer.
+
+We start the in-process fake server once per test class and check:
+  - The RESP client round-trips strings, integers, nil and arrays, and raises
+    RedisError for error replies; pipelines return one reply per command.
+  - A rejected AUTH or SELECT fails the connection instead of being ignored;
+    URL credentials are percent-decoded and rediss:// is refused.
+  - RedisSessionMemory formats context like InMemorySessionMemory, caps the
+    list with LTRIM, and sets a TTL.
+  - RedisSessionStore creates, persists, and clears sessions; a second client
+    (another "replica") sees the same data.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from app.core.memory import InMemorySessionMemory
+from app.core.memory.redis_memory import RedisSessionMemory
+from app.core.persistence import RedisClient, RedisError
+from app.core.persistence.redis_client import RedisConnection
+from app.core.session.redis_store import RedisSessionStore
+from benchmarks.fake_redis_server import FakeRedisServer
+
+
+class _FakeRedisTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeRedisServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.client = RedisClient.from_url(self.server.url)
+        self.client.execute("FLUSHALL")
+
+    def tearDown(self):
+        self.client.close()
+
+
+class TestRedisClient(_FakeRedisTestCase):
+
+    def test_reply_types_and_pipeline(self):
+        self.assertEqual(self.client.execute("PING"), "PONG")
+        self.assertIsNone(self.client.execute("GET", "missing"))
+        replies = self.client.pipeline().command("RPUSH", "l", "a", "b").command("LRANGE", "l", 0, -1).execute()
+        self.assertEqual(replies, [2, [b"a", b"b"]])
+        with self.assertRaises(RedisError):
+            self.client.execute("GET", "l")  # wrong type
+
+    def test_pool_reuses_connections(self):
+        for _ in range(5):
+            self.client.execute("PING")
+        self.assertEqual(len(self.client.pool._idle), 1)
+
+
+class TestRedisConnectionSetup(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeRedisServer(password="p@ss:word").start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def _client(self, credentials="", db=0):
+        return RedisClient.from_url(f"redis://{credentials}127.0.0.1:{self.server.port}/{db}")
+
+    def test_percent_encoded_password_authenticates(self):
+        client = self._client(":p%40ss%3Aword@", db=3)
+        try:
+            self.assertEqual(client.execute("PING"), "PONG")
+        finally:
+            client.close()
+
+    def test_rejected_auth_or_select_raises_and_closes(self):
+        closed = []
+        original_close = RedisConnection.close
+
+        def close(conn):
+            closed.append(conn)
+            original_close(conn)
+
+        with patch.object(RedisConnection, "close", close):
+            for credentials, db in ((":wrong@", 0), (":p%40ss%3Aword@", 99)):
+                client = self._client(credentials, db)
+                with self.assertRaises(RedisError):
+                    client.execute("PING")
+                self.assertEqual(len(client.pool._idle), 0)
+        self.assertEqual(len(closed), 2)
+
+    def test_unsupported_scheme_rejected(self):
+        with self.assertRaises(ValueError):
+            RedisClient.from_url(f"rediss://127.0.0.1:{self.server.port}/0")
+
+
+class TestRedisSessionMemory(_FakeRedisTestCase):
+
+    def test_context_matches_in_memory_and_is_capped(self):
+        memory = RedisSessionMemory(self.client, max_entries_per_session=4, ttl_seconds=60)
+        reference = InMemorySessionMemory(max_entries_per_session=4)
+        for target in (memory, reference):
+            for i in range(3):
+                target.append("s1", {"role": "user", "content": f"msg{i}"})
+                target.append("s1", {"role": "assistant", "capability": "echo", "output_summary": f"msg{i}"})
+        self.assertEqual(memory.get_context("s1", max_turns=5), reference.get_context("s1", max_turns=5))
+        self.assertEqual(memory.get_context("s1", max_turns=1), reference.get_context("s1", max_turns=1))
+        self.assertEqual(self.client.execute("LLEN", "rotom:memory:s1"), 4)
+        self.assertGreater(self.client.execute("TTL", "rotom:memory:s1"), 0)
+        self.assertEqual(memory.get_context("unknown"), "")
+
+
+class TestRedisSessionStore(_FakeRedisTestCase):
+
+    def test_sessions_are_shared_between_clients(self):
+        store = RedisSessionStore(self.client, ttl_seconds=60)
+        state = store.get("s1")
+        self.assertEqual(state.data, {})
+        state.data["name"] = "rotom"
+        store.save(state)
+
+        other_replica = RedisSessionStore(RedisClient.from_url(self.server.url))
+        self.assertEqual(other_replica.get("s1").data, {"name": "rotom"})
+        store.clear("s1")
+        self.assertEqual(self.client.execute("EXISTS", "rotom:session:s1"), 0)
@@ -3,18 +3,61 @@ Unit tests for Phase 6: LLMReferenceResolver.
 
 We mock BaseLLMClient.generate to return a fixed rewritten string and assert
 that resolve(user_input, context) returns it. We also assert the prompt
-passed to the LLM contains the context and user message.
+passed to the LLM contains the context and user message. GatedReferenceResolver
+tests check the anaphora gate skips the inner resolver for self-contained
+messages (including a realistic mix of requests), counts shadow-mode
+agreement, and loads replacement patterns from ROTOM_REFERENCE_GATE_PATTERNS.
 """
 
+import os
+import re
+import tempfile
 import unittest
 # MagicMock: a fake object. When our code calls llm_client.generate(some_prompt),
 # we want it to get back a string we choose—without calling the real OpenAI API.
 # We set llm_client.generate.return_value = "echo hello", and then any call to
 # .generate(...) returns "echo hello". We can also inspect .call_args to see
 # what prompt was passed in.
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
-from app.agents.reference_resolver import LLMReferenceResolver
+from app.agents.reference_resolver import AnaphoraGate, GatedReferenceResolver, LLMReferenceResolver, load_patterns
+from app.services.agent_service import AgentService
+from benchmarks.scripted_llm_client import ScriptedLLMClient
+
+# Follow-ups that only make sense with the previous turn.
+FOLLOW_UPS = (
+    "do that again",
+    "summarize it",
+    "repeat the last one",
+    "and shorter",
+    "twice",
+    "Use the result from before",
+    "now translate it to French",
+    "same thing but in uppercase",
+    "count the words in the previous answer",
+    "can you make the summary shorter?",
+    "yes",
+    "try that with the other file instead",
+)
+# Self-contained requests, several of which the old catch-all patterns fired on.
+SELF_CONTAINED = (
+    "count the words in 'hello world'",
+    "echo hello world please",
+    "summarize the quarterly report for Acme Corp",
+    "summarize this text: the meeting moved to Thursday at 3pm",
+    "count the words in the text 'one two three'",
+    "echo this is a test",
+    "tell me more about Python decorators",
+    "summarize the article about their new product launch",
+    "hello",
+    "what is the capital of France?",
+    "echo good morning",
+    "count words: she sells sea shells",
+    "summarize the following: our Q3 revenue grew 12% year over year",
+    "echo the first and second lines too",
+    "summarize what he said in the standup notes below: shipping is on track",
+    "last quarter's numbers look strong, summarize them for the board",
+)
 
 
 class TestLLMReferenceResolver(unittest.TestCase):
@@ -72,3 +115,73 @@ class TestLLMReferenceResolver(unittest.TestCase):
         self.llm_client.generate.return_value = "  echo hello  \n"
         result = self.resolver.resolve("that", "User: echo hi")
         self.assertEqual(result, "echo hello")
+
+
+class TestGatedReferenceResolver(unittest.TestCase):
+    """The anaphora gate skips the inner resolver for self-contained messages."""
+
+    def setUp(self):
+        self.inner = MagicMock()
+        self.inner.resolve.side_effect = lambda user_input, context: "echo hello"
+
+    def test_gate_fires_on_references(self):
+        gate = AnaphoraGate()
+        for message in FOLLOW_UPS:
+            self.assertTrue(gate.needs_resolution(message), message)
+        for message in SELF_CONTAINED[:-1]:
+            self.assertFalse(gate.needs_resolution(message), message)
+
+    def test_realistic_mix_has_meaningful_skip_rate(self):
+        resolver = GatedReferenceResolver(self.inner)
+        for message in FOLLOW_UPS + SELF_CONTAINED:
+            resolver.resolve(message, "User: echo hello")
+        stats = resolver.stats()
+        # Every follow-up still reaches the resolver; nearly all self-contained requests skip it.
+        self.assertEqual(stats["resolved"], len(FOLLOW_UPS) + 1)  # "...summarize them" fires (harmless)
+        self.assertGreater(stats["skip_rate"], 0.5)
+
+    def test_self_contained_message_skips_llm(self):
+        resolver = GatedReferenceResolver(self.inner)
+        self.assertEqual(resolver.resolve("echo hello world please", "User: hi"), "echo hello world please")
+        self.inner.resolve.assert_not_called()
+        self.assertEqual(resolver.resolve("do that again", "User: echo hello"), "echo hello")
+        stats = resolver.stats()
+        self.assertEqual((stats["calls"], stats["skipped"]), (2, 1))
+        self.assertEqual(stats["skip_rate"], 0.5)
+
+    def test_shadow_mode_always_calls_and_counts_agreement(self):
+        resolver = GatedReferenceResolver(self.inner, shadow=True)
+        resolver.resolve("echo hello world please", "User: hi")  # gate: skip, LLM: changed -> missed
+        resolver.resolve("do that again", "User: echo hello")  # gate: fire, LLM: changed -> agree
+        self.assertEqual(self.inner.resolve.call_count, 2)
+        stats = resolver.stats()
+        self.assertEqual((stats["shadow_missed"], stats["shadow_agree"], stats["skipped"]), (1, 1, 0))
+
+    def test_custom_patterns(self):
+        gate = AnaphoraGate(patterns=[r"\bdito\b"])
+        self.assertTrue(gate.needs_resolution("dito please"))
+        self.assertFalse(gate.needs_resolution("do that again"))
+
+    def test_patterns_from_env_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("# site-specific references\n\n\\bdito\\b\n")
+        try:
+            self.assertEqual(load_patterns(f.name), (r"\bdito\b",))
+            env = {"ROTOM_REFERENCE_GATE": "on", "ROTOM_REFERENCE_GATE_PATTERNS": f.name}
+            with patch.dict(os.environ, env):
+                service = AgentService(llm_client=ScriptedLLMClient(seed=1))
+        finally:
+            os.unlink(f.name)
+        gate = service.reference_resolver.gate
+        service.shutdown()
+        self.assertTrue(gate.needs_resolution("dito please"))
+        self.assertFalse(gate.needs_resolution("do that again"))
+
+    def test_invalid_pattern_file_rejected(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("(unclosed\n")
+        try:
+            with self.assertRaises(re.error):
+                load_patterns(f.name)
+        finally:
+            os.unlink(f.name)
@@ -0,0 +1,127 @@
+"""
+Unit tests for the per-request breakdown (app.core.instrumentation.request_breakdown).
+
+  - AgentService.run(..., breakdown=True) reports wall time, LLM calls, and
+    tokens per stage, and the stage totals add up to the request totals;
+  - a call queued by the LLM scheduler and a turn waiting on the session lock
+    show up under queued_ms;
+  - with tracing off the breakdown is skipped, not wrong;
+  - an Idempotency-Key replay gets its own breakdown (no LLM work), and the
+    stored response is not changed by what callers add to theirs.
+"""
+
+import threading
+import time
+import unittest
+
+from app.agents.llm.scheduled_llm_client import ScheduledLLMClient
+from app.core.context import request_id_ctx
+from app.core.instrumentation import record_llm_tokens, request_breakdown, stage
+from app.core.session.keyed_lock import KeyedLocks
+from app.core.tracing import TRACER
+from app.services.agent_service import AgentService
+from benchmarks.scripted_llm_client import ScriptedLLMClient
+
+
+class TokenReportingClient(ScriptedLLMClient):
+    """Scripted answers plus provider-style token usage (4 characters per token)."""
+
+    def generate(self, prompt: str) -> str:
+        answer = super().generate(prompt)
+        record_llm_tokens(len(prompt) // 4, len(answer) // 4 + 1)
+        return answer
+
+
+class SlowClient:
+    def generate(self, prompt: str) -> str:
+        time.sleep(0.05)
+        return "ok"
+
+
+def _in_request(request_id: str, fn):
+    token = request_id_ctx.set(request_id)
+    try:
+        with stage("request"):
+            return fn()
+    finally:
+        request_id_ctx.reset(token)
+
+
+class TestRequestBreakdown(unittest.TestCase):
+    def test_service_breakdown(self):
+        service = AgentService(llm_client=TokenReportingClient(seed=3))
+        token = request_id_ctx.set("req-breakdown")
+        try:
+            result = service.run("echo hello then count words in a b c", breakdown=True)
+        finally:
+            request_id_ctx.reset(token)
+
+        breakdown = result.metadata["breakdown"]
+        stages = breakdown["stages"]
+        for name in ("plan_build", "classify", "goal_check", "format"):
+            self.assertGreaterEqual(stages[name]["llm_calls"], 1)
+        self.assertEqual(stages["classify"]["count"], 2)  # once per goal
+        self.assertEqual(breakdown["llm"]["calls"], sum(s["llm_calls"] for s in stages.values()))
+        self.assertEqual(breakdown["llm"]["prompt_tokens"], sum(s["prompt_tokens"] for s in stages.values()))
+        self.assertGreater(breakdown["llm"]["completion_tokens"], 0)
+        self.assertEqual(breakdown["capabilities"]["executed"], 2)
+        self.assertGreaterEqual(breakdown["wall_ms"], stages["plan_build"]["ms"])
+        self.assertNotIn("breakdown", service.run("echo hi").metadata)
+
+    def test_queue_waits(self):
+        llm = ScheduledLLMClient(SlowClient(), max_concurrency=1)
+        locks = KeyedLocks()
+
+        def call(request_id):
+            def turn():
+                with locks.hold("same-session"):
+                    time.sleep(0.03)
+                with stage("classify"):
+                    llm.generate("x")
+
+            _in_request(request_id, turn)
+
+        threads = [threading.Thread(target=call, args=(f"req-queue-{i}",)) for i in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        breakdowns = [request_breakdown(TRACER.get_trace(f"req-queue-{i}")) for i in range(2)]
+        self.assertGreater(max(b["queued_ms"]["session_lock"] for b in breakdowns), 10)
+        waited = max(breakdowns, key=lambda b: b["queued_ms"]["llm_scheduler"])
+        self.assertGreater(waited["queued_ms"]["llm_scheduler"], 0)
+        self.assertEqual(waited["stages"]["classify"]["llm_queue_ms"], waited["queued_ms"]["llm_scheduler"])
+
+    def test_idempotent_replay_gets_its_own_breakdown(self):
+        service = AgentService(llm_client=TokenReportingClient(seed=3))
+
+        def run(request_id, breakdown):
+            token = request_id_ctx.set(request_id)
+            try:
+                return service.run("echo hello", idempotency_key="k1", breakdown=breakdown)
+            finally:
+                request_id_ctx.reset(token)
+
+        first = run("req-idem-1", breakdown=False)
+        self.assertNotIn("breakdown", first.metadata)
+        first.metadata["caller_only"] = True
+        replay = run("req-idem-2", breakdown=True)
+        self.assertEqual(replay.output, first.output)
+        self.assertNotIn("caller_only", replay.metadata)
+        self.assertEqual(replay.metadata["breakdown"]["llm"]["calls"], 0)  # replayed, not re-run
+        replay.metadata["breakdown"]["queued_ms"]["admission"] = 12.5  # as routes.run_agent does
+        self.assertNotIn("breakdown", run("req-idem-3", breakdown=False).metadata)
+
+    def test_skipped_when_tracing_disabled(self):
+        service = AgentService(llm_client=ScriptedLLMClient(seed=1))
+        TRACER.enabled = False
+        try:
+            result = service.run("echo hi", breakdown=True)
+        finally:
+            TRACER.enabled = True
+        self.assertEqual(result.metadata["breakdown_skipped"], "tracing_disabled")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Unit tests for RetrievalSessionMemory (hashed-feature embeddings + NumPy scoring).
+
+We check:
+  - Without a query, context matches InMemorySessionMemory (recency only).
+  - With a query, an older matching turn (user + assistant pair) is recalled
+    ahead of the recent turns, in chronological order; unrelated turns are not.
+  - Per-session history stays bounded.
+  - The embedding is deterministic and normalized.
+"""
+
+import unittest
+
+import numpy as np
+
+from app.core.memory import InMemorySessionMemory
+from app.core.memory.retrieval import HashedFeatureEmbedder, RetrievalSessionMemory
+
+
+def _turn(memory, user, result, session_id="s1"):
+    memory.append(session_id, {"role": "user", "content": user})
+    memory.append(session_id, {"role": "assistant", "capability": "echo", "output_summary": result})
+
+
+class TestRetrievalSessionMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.memory = RetrievalSessionMemory(max_entries_per_session=40, top_k=1)
+        _turn(self.memory, "summarize the lease contract for the warehouse", "lease runs five years")
+        for i in range(8):
+            _turn(self.memory, f"echo filler message {i}", f"filler {i}")
+
+    def test_no_query_is_recency_only(self):
+        reference = InMemorySessionMemory(max_entries_per_session=40)
+        _turn(reference, "summarize the lease contract for the warehouse", "lease runs five years")
+        for i in range(8):
+            _turn(reference, f"echo filler message {i}", f"filler {i}")
+        self.assertEqual(self.memory.get_context("s1", max_turns=2), reference.get_context("s1", max_turns=2))
+
+    def test_query_recalls_older_relevant_turn(self):
+        ctx = self.memory.get_context("s1", max_turns=2, query="what did the warehouse lease contract say?")
+        lines = ctx.splitlines()
+        self.assertEqual(lines[0], "User: summarize the lease contract for the warehouse")
+        self.assertEqual(lines[1], "Assistant ran echo; result: lease runs five years")
+        self.assertEqual(lines[2:], [
+            "User: echo filler message 6", "Assistant ran echo; result: filler 6",
+            "User: echo filler message 7", "Assistant ran echo; result: filler 7",
+        ])
+
+    def test_unrelated_query_adds_nothing(self):
+        ctx = self.memory.get_context("s1", max_turns=2, query="zebra quantum pancake")
+        self.assertEqual(len(ctx.splitlines()), 4)
+
+    def test_history_is_bounded(self):
+        memory = RetrievalSessionMemory(max_entries_per_session=8)
+        for i in range(100):
+            _turn(memory, f"message {i}", f"result {i}")
+        ctx = memory.get_context("s1", max_turns=0)
+        self.assertLessEqual(len(ctx.splitlines()), 8)
+        self.assertIn("message 99", ctx)
+        self.assertEqual(memory.get_context("unknown", query="anything"), "")
+
+
+class TestHashedFeatureEmbedder(unittest.TestCase):
+
+    def test_deterministic_and_normalized(self):
+        embedder = HashedFeatureEmbedder(dim=64)
+        a = embedder.embed("Hello world")
+        self.assertTrue(np.array_equal(a, embedder.embed("hello WORLD")))
+        self.assertAlmostEqual(float(np.linalg.norm(a)), 1.0, places=5)
+        self.assertEqual(float(np.linalg.norm(embedder.embed(""))), 0.0)
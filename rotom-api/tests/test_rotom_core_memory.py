@@ -5,7 +5,7 @@ reference resolution, and the goals path.
 We use a real CapabilityRegistry and a real capability (echo), but we mock
 the session_store, session_memory, intent_classifier, plan_builder, goal_checker,
 and response_formatter. That lets us verify:
-  1. When session_id is set, RotomCore calls get_context(session_id, max_turns=5)
+  1. When session_id is set, RotomCore calls get_context(session_id, max_turns=5, query=user_input)
      and the goals path runs (plan → classify per goal → execute → goal_checker).
   2. After handling the request, RotomCore calls append() for user entry and
      assistant entry; the user entry is always the original user_input.
@@ -78,7 +78,7 @@ class TestRotomCoreMemory(unittest.TestCase):
         """With a session_id, RotomCore gets context and the goals path runs; classifier is called with goal text and context."""
         self.session_memory.get_context.return_value = "User: previous message"
         result = self.rotom.handle("echo hello", session_id="s1")
-        self.session_memory.get_context.assert_called_once_with("s1", max_turns=5)
+        self.session_memory.get_context.assert_called_once_with("s1", max_turns=5, query="echo hello")
         # Classify is called from _handle_goals_based with (goal_text, step_context).
         self.intent_classifier.classify.assert_called()
         call_args = self.intent_classifier.classify.call_args
@@ -0,0 +1,87 @@
+"""
+Unit tests for app.core.serialization and the JSON log formatter.
+
+  - fenced / prose-wrapped LLM JSON is stripped before parsing;
+  - invalid JSON raises json.JSONDecodeError whatever the backend;
+  - dumps/dumps_bytes round-trip, pretty-print, and fall back for values
+    orjson rejects;
+  - FastJsonFormatter emits one JSON object with the extra fields.
+"""
+
+import json
+import logging
+import unittest
+
+from app.agents.goal_checker.llm_goal_checker import LLMGoalChecker
+from app.agents.plan_builder.llm_plan_builder import LLMPlanBuilder
+from app.core.logging_config import FastJsonFormatter
+from app.core.serialization import FastJSONResponse, dumps, dumps_bytes, loads, loads_llm_json, strip_code_fences
+
+
+class TestStripCodeFences(unittest.TestCase):
+    def test_plain_json_unchanged(self):
+        self.assertEqual(strip_code_fences('  {"a": 1} '), '{"a": 1}')
+
+    def test_fenced_block(self):
+        raw = '```json\n["one", "two"]\n```'
+        self.assertEqual(loads_llm_json(raw), ["one", "two"])
+
+    def test_single_line_fence(self):
+        self.assertEqual(loads_llm_json('```json {"satisfied": false}```'), {"satisfied": False})
+
+    def test_prose_around_json(self):
+        raw = 'Here is the plan:\n["count words"]\nHope that helps.'
+        self.assertEqual(loads_llm_json(raw), ["count words"])
+
+    def test_invalid_json_raises_stdlib_error(self):
+        for raw in (None, "", "not json", "```\n{broken\n```"):
+            with self.assertRaises(json.JSONDecodeError):
+                loads_llm_json(raw)
+
+
+class TestDumps(unittest.TestCase):
+    def test_round_trip_and_indent(self):
+        data = {"name": "héllo", "items": [1, 2.5, None, True]}
+        self.assertEqual(loads(dumps(data)), data)
+        self.assertEqual(loads(dumps_bytes(data)), data)
+        self.assertIn("\n  ", dumps(data, indent=True))
+        self.assertIn("héllo", dumps(data))
+
+    def test_falls_back_for_values_orjson_rejects(self):
+        self.assertEqual(loads(dumps({1: "a"})), {"1": "a"})
+        self.assertEqual(loads(dumps({"big": 2**70})), {"big": 2**70})
+
+    def test_default_hook(self):
+        self.assertEqual(loads(dumps({"s": {3}}, default=list)), {"s": [3]})
+
+    def test_response_class_renders_json(self):
+        response = FastJSONResponse({"output": "ok", "success": True})
+        self.assertEqual(loads(response.body), {"output": "ok", "success": True})
+
+
+class TestAgentParsersUseSharedStripping(unittest.TestCase):
+    def test_plan_builder_and_goal_checker_accept_fences(self):
+        plan = LLMPlanBuilder(llm_client=None)._parse_response('```json\n["a", {"goal": "b"}]\n```', "x")
+        self.assertEqual(plan, [{"goal": "a"}, {"goal": "b"}])
+        result = LLMGoalChecker(llm_client=None)._parse_response('```\n{"satisfied": false}\n```')
+        self.assertFalse(result.satisfied)
+
+
+class TestFastJsonFormatter(unittest.TestCase):
+    def test_formats_record_with_extras(self):
+        record = logging.LogRecord("rotom.test", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+        record.request_id = "r1"
+        record.layer = "api"
+        line = FastJsonFormatter().format(record)
+        data = json.loads(line)
+        self.assertEqual(data["message"], "hello world")
+        self.assertEqual(data["level"], "INFO")
+        self.assertEqual(data["name"], "rotom.test")
+        self.assertEqual(data["request_id"], "r1")
+        self.assertEqual(data["layer"], "api")
+        self.assertNotIn("args", data)
+        self.assertNotIn("\n", line)
+
+
+if __name__ == "__main__":
+    unittest.main()
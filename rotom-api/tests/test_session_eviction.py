@@ -0,0 +1,121 @@
+"""
+Unit tests for global session eviction (SessionLRU, SessionSweeper).
+
+We check:
+  - sweep() enforces the session-count cap in least-recently-used order.
+  - sweep() enforces the approximate byte cap and drops idle sessions.
+  - Reads and appends never evict; only sweep() does.
+  - Many one-shot session ids leave residency bounded after a sweep.
+  - Striped shard caps add up to the global cap, also below one per stripe.
+  - Cached context strings count toward a session's bytes, and the number of
+    cached windows per session is capped.
+"""
+
+import time
+import unittest
+
+from app.core.memory import InMemorySessionMemory
+from app.core.memory.ring_buffer import MAX_CACHED_WINDOWS
+from app.core.session.lru import SessionLRU, StripedSessionLRU
+from app.core.session.store import InMemorySessionStore
+from app.core.session.sweeper import SessionSweeper
+
+
+class TestSessionLRU(unittest.TestCase):
+
+    def test_count_cap_evicts_least_recently_used(self):
+        lru = SessionLRU(max_sessions=2, idle_ttl_seconds=None)
+        for sid in ("a", "b", "c"):
+            lru.get_or_create(sid, dict)
+        lru.get("a")  # a is now most recently used; b is oldest
+        self.assertEqual(len(lru), 3)  # no eviction until sweep
+        self.assertEqual(lru.sweep(), 1)
+        self.assertNotIn("b", lru)
+        self.assertIn("a", lru)
+        self.assertEqual(lru.stats()["evicted_lru"], 1)
+
+    def test_byte_cap_and_idle_ttl(self):
+        lru = SessionLRU(max_bytes=100, idle_ttl_seconds=60)
+        lru.get_or_create("big", dict, size=80)
+        lru.get_or_create("small", dict, size=40)
+        lru.sweep()
+        self.assertNotIn("big", lru)
+        self.assertEqual(lru.stats()["resident_bytes"], 40)
+
+        lru.sweep(now=time.monotonic() + 120)
+        stats = lru.stats()
+        self.assertEqual(stats["resident_sessions"], 0)
+        self.assertEqual(stats["evicted_idle"], 1)
+
+    def test_striped_caps_add_up_to_global_cap(self):
+        for max_sessions, stripes in ((3, 16), (100, 16), (16, 16)):
+            lru = StripedSessionLRU(max_sessions=max_sessions, stripes=stripes, idle_ttl_seconds=None)
+            self.assertEqual(sum(shard.max_sessions for shard in lru._shards), max_sessions)
+            for i in range(max_sessions * 20):
+                lru.get_or_create(f"s{i}", dict)
+            lru.sweep()
+            self.assertLessEqual(len(lru), max_sessions)
+        self.assertEqual(StripedSessionLRU(max_sessions=3, stripes=16).stats()["stripes"], 3)
+        with self.assertRaises(ValueError):
+            StripedSessionLRU(max_sessions=0)
+
+
+class TestInMemoryBackendsEviction(unittest.TestCase):
+
+    def test_one_shot_sessions_stay_bounded(self):
+        memory = InMemorySessionMemory(max_sessions=100)
+        store = InMemorySessionStore(max_sessions=100)
+        sweeper = SessionSweeper([store, memory])
+        for i in range(5000):
+            sid = f"one-shot-{i}"
+            store.get(sid)
+            memory.append(sid, {"role": "user", "content": "hello"})
+        sweeper.sweep_once()
+        # Caps are split across lock stripes, so residency ends at or just under the cap.
+        resident = memory.stats()["resident_sessions"]
+        self.assertLessEqual(resident, 100)
+        self.assertGreater(resident, 50)
+        self.assertLessEqual(store.stats()["resident_sessions"], 100)
+        self.assertEqual(memory.stats()["evicted_lru"], 5000 - resident)
+        # The most recent sessions survive with their history.
+        self.assertIn("hello", memory.get_context("one-shot-4999"))
+        self.assertEqual(memory.get_context("one-shot-0"), "")
+
+    def test_memory_bytes_track_trimmed_entries(self):
+        memory = InMemorySessionMemory(max_entries_per_session=2)
+        memory.append("s", {"role": "user", "content": "x" * 1000})
+        big = memory.stats()["resident_bytes"]
+        memory.append("s", {"role": "user", "content": "a"})
+        memory.append("s", {"role": "user", "content": "b"})  # drops the 1000-char entry
+        self.assertLess(memory.stats()["resident_bytes"], big)
+
+    def test_cached_contexts_count_toward_bytes(self):
+        memory = InMemorySessionMemory(max_entries_per_session=40)
+        for i in range(40):
+            memory.append("s", {"role": "user", "content": f"message {i} " + "x" * 100})
+        entries_only = memory.stats()["resident_bytes"]
+        context = memory.get_context("s", max_turns=20)
+        self.assertEqual(memory.stats()["resident_bytes"], entries_only + len(context))
+        memory.get_context("s", max_turns=20)  # cached: no growth
+        self.assertEqual(memory.stats()["resident_bytes"], entries_only + len(context))
+        # Appends keep the cached window (and its accounting) up to date.
+        memory.append("s", {"role": "user", "content": "new"})
+        self.assertEqual(memory._sessions.read("s", lambda ring: ring.cached_chars), len(memory.get_context("s", 20)))
+        # Distinct window sizes beyond the cap are rendered but not cached.
+        for max_turns in range(1, 20):
+            memory.get_context("s", max_turns=max_turns)
+        self.assertEqual(memory._sessions.read("s", lambda ring: len(ring._contexts)), MAX_CACHED_WINDOWS)
+
+    def test_background_sweeper_evicts(self):
+        memory = InMemorySessionMemory(max_sessions=1, stripes=1)
+        memory.append("s1", {"role": "user", "content": "a"})
+        memory.append("s2", {"role": "user", "content": "b"})
+        sweeper = SessionSweeper([memory], interval_seconds=0.01)
+        sweeper.start()
+        try:
+            deadline = time.monotonic() + 2
+            while memory.stats()["resident_sessions"] > 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            sweeper.stop()
+        self.assertEqual(memory.stats()["resident_sessions"], 1)
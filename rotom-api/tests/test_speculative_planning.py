@@ -0,0 +1,104 @@
+"""
+Unit tests for speculative planning in RotomCore.
+
+With a speculation_executor injected, build_plan(user_input) runs concurrently
+with reference resolution. We check:
+  - Resolver returns the message unchanged → the speculative plan is used and
+    build_plan runs exactly once (a hit).
+  - Resolver rewrites the message → the plan is rebuilt from the resolved text
+    (a miss).
+  - Planning and resolution really overlap in time.
+  - A gated resolver that won't rewrite the message is not speculated on, and
+    the turn is counted as "gated" rather than as a hit.
+  - Without an executor, behavior is unchanged (no speculation counted).
+"""
+
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from app.agents.reference_resolver import GatedReferenceResolver
+from app.agents.rotom_core import RotomCore
+from app.capabilities.registry import CapabilityRegistry
+from app.core.memory import InMemorySessionMemory
+from app.core.session.store import InMemorySessionStore
+
+
+class TestSpeculativePlanning(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.memory = InMemorySessionMemory()
+        self.memory.append("s1", {"role": "user", "content": "echo hello"})
+        self.plan_builder = MagicMock()
+        self.plan_builder.build_plan.side_effect = lambda text: [{"goal": f"echo: {text}"}]
+        self.resolver = MagicMock()
+        goal_checker = MagicMock()
+        goal_checker.check.return_value = MagicMock(satisfied=True, output_snippet=None)
+        formatter = MagicMock()
+        formatter.format_response.return_value = "done"
+        classifier = MagicMock()
+        self.classifier = classifier
+        classifier.classify.return_value = {"capability": "echo", "arguments": {"message": "hello"}}
+        self.rotom = RotomCore(
+            intent_classifier=classifier,
+            registry=CapabilityRegistry(),
+            session_store=InMemorySessionStore(),
+            session_memory=self.memory,
+            plan_builder=self.plan_builder,
+            goal_checker=goal_checker,
+            response_formatter=formatter,
+            reference_resolver=self.resolver,
+            speculation_executor=self.executor,
+        )
+
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+
+    def test_unchanged_message_keeps_speculative_plan(self):
+        self.resolver.resolve.side_effect = lambda user_input, context: user_input
+        self.assertTrue(self.rotom.handle("echo world", session_id="s1").success)
+        self.plan_builder.build_plan.assert_called_once_with("echo world")
+        stats = self.rotom.speculation_stats()
+        self.assertEqual((stats["attempts"], stats["hits"], stats["hit_rate"]), (1, 1, 1.0))
+
+    def test_rewritten_message_replans(self):
+        self.resolver.resolve.side_effect = lambda user_input, context: "echo hello"
+        self.rotom.handle("do that again", session_id="s1")
+        # The discarded speculative call may still finish after the replan, so check the plan that was used.
+        self.assertIn("echo hello", [c[0][0] for c in self.plan_builder.build_plan.call_args_list])
+        self.assertEqual(self.classifier.classify.call_args[0][0], "echo: echo hello")
+        self.assertEqual(self.rotom.speculation_stats()["misses"], 1)
+
+    def test_planning_overlaps_resolution(self):
+        planning_started = threading.Event()
+
+        def build_plan(text):
+            planning_started.set()
+            return [{"goal": f"echo: {text}"}]
+
+        def resolve(user_input, context):
+            # Only returns if build_plan started while we were still resolving.
+            self.assertTrue(planning_started.wait(2))
+            return user_input
+
+        self.plan_builder.build_plan.side_effect = build_plan
+        self.resolver.resolve.side_effect = resolve
+        self.assertTrue(self.rotom.handle("echo world", session_id="s1").success)
+
+    def test_gated_skip_is_not_counted_as_hit(self):
+        inner = MagicMock()
+        self.rotom.reference_resolver = GatedReferenceResolver(inner)
+        self.assertTrue(self.rotom.handle("echo world please", session_id="s1").success)  # gate: skip
+        inner.resolve.assert_not_called()
+        self.plan_builder.build_plan.assert_called_once_with("echo world please")
+        stats = self.rotom.speculation_stats()
+        self.assertEqual((stats["attempts"], stats["hits"], stats["gated"], stats["hit_rate"]), (0, 0, 1, 0.0))
+
+    def test_no_executor_means_no_speculation(self):
+        self.rotom.speculation_executor = None
+        self.resolver.resolve.side_effect = lambda user_input, context: user_input
+        self.rotom.handle("echo world", session_id="s1")
+        self.assertEqual(self.rotom.speculation_stats()["attempts"], 0)
+        self.plan_builder.build_plan.assert_called_once_with("echo world")
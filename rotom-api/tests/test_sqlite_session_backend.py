@@ -0,0 +1,100 @@
+"""
+Unit tests for the SQLite session backend (SQLiteSessionMemory, SQLiteSessionStore).
+
+Each test uses a fresh database file in a temp directory. We check:
+  - get_context() formats turns exactly like InMemorySessionMemory.
+  - Appends are written behind: after flush() a brand-new instance (a "restart"
+    or another worker) sees the same history.
+  - Entries still waiting in the write queue are not lost when the cache refreshes.
+  - The session store persists sessions and their data across instances.
+"""
+
+import os
+import tempfile
+import unittest
+
+from app.core.memory import InMemorySessionMemory, SQLiteSessionMemory
+from app.core.persistence import SQLiteWriteBehind
+from app.core.session.sqlite_store import SQLiteSessionStore
+
+
+class TestSQLiteSessionMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "sessions.db")
+        self.db = SQLiteWriteBehind(self.path)
+        self.memory = SQLiteSessionMemory(self.db, max_entries_per_session=20)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def _add_turns(self, memory, session_id, count):
+        for i in range(count):
+            memory.append(session_id, {"role": "user", "content": f"msg{i}"})
+            memory.append(session_id, {"role": "assistant", "capability": "echo", "output_summary": f"msg{i}"})
+
+    def test_wal_mode_enabled(self):
+        mode = self.db.query("PRAGMA journal_mode")[0][0]
+        self.assertEqual(mode.lower(), "wal")
+
+    def test_context_matches_in_memory_implementation(self):
+        reference = InMemorySessionMemory(max_entries_per_session=20)
+        self._add_turns(self.memory, "s1", 3)
+        self._add_turns(reference, "s1", 3)
+        self.assertEqual(self.memory.get_context("s1", max_turns=2), reference.get_context("s1", max_turns=2))
+        self.assertEqual(self.memory.get_context("unknown"), "")
+
+    def test_history_survives_restart_after_flush(self):
+        self._add_turns(self.memory, "s1", 2)
+        self.assertTrue(self.memory.flush(timeout=5))
+        restarted = SQLiteSessionMemory(SQLiteWriteBehind(self.path), max_entries_per_session=20)
+        ctx = restarted.get_context("s1", max_turns=5)
+        self.assertIn("User: msg0", ctx)
+        self.assertIn("Assistant ran echo; result: msg1", ctx)
+
+    def test_cache_refresh_keeps_unflushed_entries(self):
+        # TTL 0: every read goes back to the database and must merge pending entries.
+        memory = SQLiteSessionMemory(self.db, cache_ttl_seconds=0)
+        memory.append("s2", {"role": "user", "content": "not yet committed"})
+        self.assertIn("not yet committed", memory.get_context("s2"))
+        memory.flush(timeout=5)
+        self.assertEqual(memory.get_context("s2").count("not yet committed"), 1)
+
+    def test_old_rows_are_trimmed(self):
+        memory = SQLiteSessionMemory(self.db, max_entries_per_session=4)
+        self._add_turns(memory, "s3", 10)
+        memory.flush(timeout=5)
+        count = self.db.query("SELECT COUNT(*) FROM session_turns WHERE session_id = ?", ("s3",))[0][0]
+        self.assertLessEqual(count, 4)
+
+
+class TestSQLiteSessionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "sessions.db")
+        self.db = SQLiteWriteBehind(self.path)
+        self.store = SQLiteSessionStore(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def test_get_creates_and_persists_session(self):
+        state = self.store.get("s1")
+        self.assertEqual(state.session_id, "s1")
+        self.assertIs(self.store.get("s1"), state)
+        state.data["name"] = "rotom"
+        self.store.save(state)
+        self.store.flush(timeout=5)
+
+        other_worker = SQLiteSessionStore(SQLiteWriteBehind(self.path))
+        self.assertEqual(other_worker.get("s1").data, {"name": "rotom"})
+
+    def test_clear_removes_session(self):
+        self.store.get("s1")
+        self.store.clear("s1")
+        self.store.flush(timeout=5)
+        self.assertEqual(self.db.query("SELECT COUNT(*) FROM sessions")[0][0], 0)
@@ -0,0 +1,204 @@
+"""
+Unit tests for app.core.tracing.
+
+  - spans nest through contextvars (also across copy_context() into a thread);
+  - the root span's trace_id is the request_id;
+  - errors mark the span and still record it;
+  - spans outside any request are kept apart and never evict request traces;
+  - JSONL and OTLP/HTTP exporters receive finished spans; shutdown stops the
+    export thread;
+  - GET /debug/trace requires the admin token;
+  - a RotomCore turn produces stage spans with capability spans under execute,
+    and render_waterfall shows them.
+"""
+
+import contextvars
+import http.server
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from fastapi import HTTPException
+
+from app.agents.rotom_core import RotomCore
+from app.api import routes
+from app.capabilities.registry import CapabilityRegistry
+from app.core.context import request_id_ctx
+from app.core.instrumentation import stage
+from app.core.memory import InMemorySessionMemory
+from app.core.session.store import InMemorySessionStore
+from app.core.tracing import JsonlSpanExporter, OTLPHttpSpanExporter, Tracer, TRACER, render_waterfall
+
+
+class TestTracer(unittest.TestCase):
+    def test_nesting_and_thread_propagation(self):
+        tracer = Tracer()
+        token = request_id_ctx.set("req-1")
+        try:
+            with tracer.span("request") as root:
+                with tracer.span("plan_build"):
+                    pass
+
+                def speculative():
+                    with tracer.span("speculative"):
+                        pass
+
+                worker = threading.Thread(target=contextvars.copy_context().run, args=(speculative,))
+                worker.start()
+                worker.join()
+                with tracer.span("classify"):
+                    pass
+        finally:
+            request_id_ctx.reset(token)
+
+        spans = {s.name: s for s in tracer.get_trace("req-1")}
+        self.assertEqual(root.trace_id, "req-1")
+        self.assertIsNone(spans["request"].parent_id)
+        self.assertEqual(spans["plan_build"].parent_id, root.span_id)
+        self.assertEqual(spans["classify"].parent_id, root.span_id)
+        self.assertEqual(spans["speculative"].parent_id, root.span_id)
+        self.assertNotEqual(spans["speculative"].thread, spans["request"].thread)
+
+    def test_error_marks_span(self):
+        tracer = Tracer()
+        with self.assertRaises(ValueError):
+            with tracer.span("goal_check") as span:
+                raise ValueError("bad json")
+        recorded = tracer.get_trace(span.trace_id)[0]
+        self.assertEqual(recorded.status, "error")
+        self.assertEqual(recorded.attributes["error"], "ValueError")
+
+    def test_background_spans_do_not_evict_request_traces(self):
+        tracer = Tracer(max_traces=2, max_background_traces=3)
+        for request_id in ("req-1", "req-2"):
+            token = request_id_ctx.set(request_id)
+            try:
+                with tracer.span("request"):
+                    pass
+            finally:
+                request_id_ctx.reset(token)
+        background = []
+        for _ in range(10):
+            with tracer.span("memory.compact") as span:
+                with tracer.span("llm.call"):
+                    pass
+            background.append(span.trace_id)
+        self.assertEqual(len(tracer.get_trace("req-1")), 1)
+        self.assertEqual(len(tracer.get_trace("req-2")), 1)
+        self.assertEqual(len(tracer.get_trace(background[-1])), 2)
+        self.assertEqual(tracer.get_trace(background[0]), [])
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer(enabled=False)
+        with tracer.span("x") as span:
+            self.assertIsNone(span)
+
+    def test_jsonl_exporter(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "spans.jsonl")
+            tracer = Tracer()
+            tracer.add_exporter(JsonlSpanExporter(path))
+            with tracer.span("request"):
+                with tracer.span("format"):
+                    pass
+            export_thread = tracer._thread
+            tracer.shutdown()
+            self.assertFalse(export_thread.is_alive())
+            with open(path) as f:
+                names = [json.loads(line)["name"] for line in f]
+        self.assertEqual(sorted(names), ["format", "request"])
+
+    def test_otlp_exporter_posts_to_collector(self):
+        received = []
+
+        class Collector(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                received.append((self.path, json.loads(self.rfile.read(int(self.headers["Content-Length"])))))
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.HTTPServer(("127.0.0.1", 0), Collector)
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        thread.start()
+        try:
+            tracer = Tracer()
+            tracer.add_exporter(OTLPHttpSpanExporter(f"http://127.0.0.1:{server.server_port}/v1/traces"))
+            with tracer.span("request", capability="echo"):
+                pass
+            tracer.flush()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        path, body = received[0]
+        self.assertEqual(path, "/v1/traces")
+        span = body["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        self.assertEqual(span["name"], "request")
+        self.assertEqual(len(span["traceId"]), 32)
+        self.assertIn({"key": "capability", "value": {"stringValue": "echo"}}, span["attributes"])
+
+
+class TestRotomCoreTrace(unittest.TestCase):
+    def test_turn_produces_waterfall(self):
+        plan_builder = MagicMock()
+        plan_builder.build_plan.return_value = [{"goal": "echo hi"}]
+        classifier = MagicMock()
+        classifier.classify.return_value = {"capability": "echo", "arguments": {"message": "hi"}}
+        goal_checker = MagicMock()
+        goal_checker.check.return_value = MagicMock(satisfied=True, output_snippet=None)
+        formatter = MagicMock()
+        formatter.format_response.return_value = "done"
+        rotom = RotomCore(
+            intent_classifier=classifier,
+            registry=CapabilityRegistry(),
+            session_store=InMemorySessionStore(),
+            session_memory=InMemorySessionMemory(),
+            plan_builder=plan_builder,
+            goal_checker=goal_checker,
+            response_formatter=formatter,
+        )
+        token = request_id_ctx.set("req-trace")
+        try:
+            with stage("request"):
+                rotom.handle("echo hi")
+        finally:
+            request_id_ctx.reset(token)
+
+        spans = TRACER.get_trace("req-trace")
+        by_name = {s.name: s for s in spans}
+        for name in ("request", "plan_build", "classify", "execute", "capability.execute", "goal_check", "format"):
+            self.assertIn(name, by_name)
+        self.assertEqual(by_name["capability.execute"].parent_id, by_name["execute"].span_id)
+        self.assertEqual(by_name["capability.execute"].attributes["capability"], "echo")
+        waterfall = render_waterfall(spans)
+        self.assertIn("trace req-trace", waterfall)
+        self.assertIn("    capability.execute", waterfall)
+
+
+class TestDebugTraceRoute(unittest.TestCase):
+    def test_requires_admin_token(self):
+        provider = MagicMock()
+        provider.get.return_value.profiler.authorized.side_effect = lambda token: token == "secret"
+        token = request_id_ctx.set("req-admin")
+        try:
+            with stage("request"):
+                pass
+        finally:
+            request_id_ctx.reset(token)
+        with patch.object(routes, "service_provider", provider):
+            with self.assertRaises(HTTPException) as ctx:
+                routes.debug_trace("req-admin", admin_token=None)
+            self.assertEqual(ctx.exception.status_code, 403)
+            with self.assertRaises(HTTPException):
+                routes.debug_trace("req-admin", admin_token="wrong")
+            self.assertEqual(routes.debug_trace("req-admin", format="json", admin_token="secret")["trace_id"], "req-admin")
+
+
+if __name__ == "__main__":
+    unittest.main()